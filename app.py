@@ -1,49 +1,534 @@
+import time
+import uuid
+
+run_started = time.perf_counter()
+
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+
+from calculator import startup, telemetry
+
+with startup.importing("numpy, pandas"):
+    import numpy as np
+    import pandas as pd
+
+with startup.importing("calculator"):
+    from calculator import amortization, engine, exact, graph, listings, memory, projection, rates, sensitivity, simulation, solvers, urlstate
+    from calculator.cache import commercial_key, deal_cache, residential_key, sweep_cache
 
 st.set_page_config(
     page_title="Property Investment Calculator - Analyze Real Estate Deals",
-    page_icon="favicon.png",
+    page_icon=startup.page_icon(),
     layout="wide",
     initial_sidebar_state="expanded"
 )
 
+# Hidden diagnostics view (?diagnostics=1): section timings, sessions and memory for this server process
+def show_diagnostics():
+    st.title("Diagnostics")
+    snapshot = telemetry.snapshot()
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Memory (RSS)", f"{snapshot['rss_bytes'] / 2**20:,.0f} MB")
+    col2.metric("Sessions", len(snapshot["sessions"]), help=f"Seen in the last {telemetry.SESSION_TTL // 60} minutes")
+    col3.metric("Script Runs", f"{snapshot['runs']:,}")
+    col4.metric("Median Run", "n/a" if snapshot["run_median_s"] is None else f"{snapshot['run_median_s'] * 1000:.0f} ms",
+                help="n/a" if snapshot["run_p95_s"] is None else f"95th percentile {snapshot['run_p95_s'] * 1000:.0f} ms")
+
+    st.header("Sections")
+    sections = sorted(snapshot["sections"].items(), key=lambda item: -item[1]["total_s"])
+    st.dataframe({
+        "Section": [name for name, _ in sections],
+        "Count": [stats["count"] for _, stats in sections],
+        "Total (s)": [round(stats["total_s"], 3) for _, stats in sections],
+        "Mean (ms)": [round(stats["mean_s"] * 1000, 2) for _, stats in sections],
+        "Median (ms)": [round(stats["median_s"] * 1000, 2) for _, stats in sections],
+        "p95 (ms)": [round(stats["p95_s"] * 1000, 2) for _, stats in sections],
+    }, hide_index=True)
+
+    st.header("Memory")
+    if snapshot["rss_history"]:
+        st.line_chart({"RSS (MB)": [rss / 2**20 for _, rss in snapshot["rss_history"]]})
+
+    st.header("Sessions")
+    sessions = sorted(snapshot["sessions"].items(), key=lambda item: -item[1]["last_seen"])
+    now = time.time()
+    st.dataframe({
+        "Session": [session_id for session_id, _ in sessions],
+        "Reruns": [session["reruns"] for _, session in sessions],
+        "Last Run (ms)": [round(session["last_run_s"] * 1000, 1) for _, session in sessions],
+        "Memory (KB)": [round(session.get("bytes", 0) / 1024) for _, session in sessions],
+        "Slowest Section": [max(session["sections"], key=session["sections"].get, default="") for _, session in sessions],
+        "Idle (s)": [round(now - session["last_seen"]) for _, session in sessions],
+    }, hide_index=True)
+
+    st.header("Caches")
+    st.dataframe([{"Cache": name, **cache.stats()} for name, cache in (("deals", deal_cache), ("sweeps", sweep_cache))],
+                 hide_index=True)
+
+    metrics = telemetry.prometheus()
+    st.download_button("Download Metrics", metrics, file_name="metrics.prom", mime="text/plain")
+    with st.expander("Prometheus Metrics"):
+        st.code(metrics, language=None)
+
+if st.query_params.get("diagnostics") in ("1", "true"):
+    show_diagnostics()
+    st.stop()
+
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:8]
+telemetry.begin_run(st.session_state.session_id, started=run_started)
+
 st.title("Property Investment Calculator")
 
-# URL parser function
-def parse_property_url(url):
-    """Extract address from LoopNet or Zillow URLs"""
-    if not url:
-        return None
-    
+# Inputs live in the session under their URL parameter names; the address bar
+# gets them back as one compact blob, written once at the end of each run
+if "url_params" not in st.session_state:
     try:
-        if "loopnet.com/Listing/" in url or "zillow.com/homedetails/" in url:
-            parts = url.split("/")
-            if len(parts) > 4:
-                address_part = parts[4]
-                # Replace hyphens with spaces
-                address = address_part.replace("-", " ")
-                # Add comma before state (last 2 characters)
-                if len(address) > 2:
-                    address = address[:-2] + ", " + address[-2:]
-                return address
-    except:
-        pass
-    
-    return None
-
-# Initialize property type in query params
-if "property_type" not in st.query_params:
-    st.query_params["property_type"] = "Residential"
+        with telemetry.section("query_params"):
+            deals = urlstate.deals_from_params(st.query_params.to_dict())
+    except urlstate.StateError as e:
+        st.error(f"❌ Could not open this link: {e}")
+        deals = [{}]
+    if len(deals) > 1:
+        st.info(f"This link holds {len(deals)} deals; showing the first. Open it on the Compare Deals page to see them all.")
+    st.session_state.url_params = deals[0]
+    # Panels this viewer asked for; kept out of the deal and the links it shares
+    st.session_state.view_flags = urlstate.view_flags(st.query_params.to_dict())
+params = st.session_state.url_params
+
+# plotly is imported on the first chart a process draws, not at startup
+def plotly():
+    with startup.importing("plotly"):
+        import plotly.graph_objects as go
+    return go
+
+# Values formatted into display strings once, so reruns don't pay for a pandas Styler
+def formatted(table, formats):
+    return {column: [formats[column].format(value) for value in values] if column in formats else list(values)
+            for column, values in table.items()}
+
+# Small result tables as markdown: no DataFrame or Styler on the rerun path
+def markdown_table(table, formats=None, colored=()):
+    formats = formats or {}
+    columns = list(table)
+    lines = ["| " + " | ".join(columns) + " |",
+             "|" + "|".join("---:" if column in formats else "---" for column in columns) + "|"]
+    for row in zip(*table.values()):
+        cells = []
+        for column, value in zip(columns, row):
+            # Escaped so a pair of dollar amounts isn't read as LaTeX
+            text = (formats[column].format(value) if column in formats else str(value)).replace("$", "\\$")
+            if column in colored:
+                text = f":{'red' if value < 0 else 'green'}[{text}]"
+            cells.append(text)
+        lines.append("| " + " | ".join(cells) + " |")
+    return "\n".join(lines)
+
+# Amortization tables and chart data (shared by both property types)
+def build_amortization(loan_amount, interest_rate_value, loan_years):
+    monthly_df, annual_df = amortization.schedule_frames(loan_amount, interest_rate_value, loan_years)
+    money_format = {column: "${:,.2f}" for column in monthly_df.columns if column not in ("Payment", "Year")}
+    # Balance Over Time chart (downsampled so long schedules stay light in the browser)
+    balance = amortization.downsample(monthly_df)
+    return {
+        "annual": pd.DataFrame(formatted(annual_df, money_format)),
+        "monthly": pd.DataFrame(formatted(monthly_df, money_format)),
+        "balance": {"Payment": balance["Payment"].to_numpy(), "Balance": balance["Balance"].to_numpy()},
+    }
+
+def show_amortization(outputs):
+    st.header("Amortization Schedule")
+    annual_tab, monthly_tab = st.tabs(["Annual", "Monthly"])
+    with annual_tab:
+        st.dataframe(outputs["annual"], hide_index=True)
+    with monthly_tab:
+        st.dataframe(outputs["monthly"], hide_index=True)
+    with telemetry.section("charts"):
+        go = plotly()
+        fig = go.Figure(go.Scatter(x=outputs["balance"]["Payment"], y=outputs["balance"]["Balance"], mode="lines"))
+        fig.update_layout(title="Loan Balance Over Time", xaxis_title="Payment", yaxis_title="Balance")
+        st.plotly_chart(fig, use_container_width=True)
+
+# Exact-cents figures for lender documents; the tables above are the float screening values
+def build_lender_figures(property_type, inputs):
+    evaluate = exact.residential if property_type == "residential" else exact.commercial
+    results = evaluate(**inputs)
+    figures = pd.DataFrame({
+        "Item": [name.replace("_", " ").title() for name in results if not isinstance(results[name], bool)],
+        "Exact": [str(value) for value in results.values() if not isinstance(value, bool)],
+    })
+    monthly = exact.schedule(results["loan_amount"], inputs["interest_rate"], inputs["loan_years"])
+    return {"figures": figures, "schedule_csv": pd.DataFrame(monthly).to_csv(index=False)}
+
+def show_lender_figures(property_type, inputs):
+    with telemetry.section("lender_figures"):
+        lender = deal_cache.get_or_compute(("exact", property_type, rates.current().digest, tuple(sorted(inputs.items()))),
+                                           lambda: build_lender_figures(property_type, inputs))
+    with st.expander("🏦 Lender Figures (exact cents)"):
+        st.caption("Every line rounded to the cent (half to even) before totals, so the figures foot.")
+        st.dataframe(lender["figures"], hide_index=True)
+        st.download_button("Download Exact Schedule (CSV)", lender["schedule_csv"],
+                           file_name=f"{property_type}_amortization_exact.csv", mime="text/csv")
+
+# calculator.export (and the workbook compiler it uses) is imported on the first report, not at startup
+def exporter():
+    with startup.importing("calculator.export"):
+        from calculator import export
+    return export
+
+EXPORT_FORMATS = {".xlsx": "Excel (screening workbook layout)", ".pdf": "PDF summary", ".csv": "CSV"}
+
+# A report is written on a background thread; while it runs only this fragment reruns, polling it
+def show_export_job(key):
+    job = exporter().job(st.session_state.get(key)) if key in st.session_state else None
+    if job is None:
+        return
+    running = job.status == "running"
+
+    @st.fragment(run_every=1 if running else None)
+    def export_status():
+        if job.status == "running":
+            st.progress(min(job.rows / job.total, 1.0) if job.total else 0.0, text=f"Writing report: {job.rows:,} deals")
+        elif running:
+            st.rerun()  # finished: one full rerun shows the download and stops the polling
+        elif job.status == "failed":
+            st.error(f"❌ Could not write the report: {job.error}")
+        else:
+            with open(job.path, "rb") as f:
+                st.download_button("Download Report", f, file_name=job.file_name, mime=job.mime, key=f"{key}_download")
+
+    export_status()
+
+def show_export(property_type, inputs):
+    with st.expander("📤 Export Report"):
+        st.caption("This deal in the screening workbook's layout, as a PDF summary or as CSV, for lender packets.")
+        col1, col2 = st.columns(2)
+        kind = col1.selectbox("Format", list(EXPORT_FORMATS), format_func=EXPORT_FORMATS.get,
+                              key=f"{property_type}_export_format")
+        if col2.button("Prepare Report", key=f"{property_type}_export"):
+            deal = pd.DataFrame([{**inputs, "name": params.get("name") or f"{property_type.title()} Deal"}])
+            job = exporter().submit({property_type: [deal]}, f"{property_type}_deal{kind}", total=1)
+            st.session_state[f"{property_type}_export_job"] = job.id
+        show_export_job(f"{property_type}_export_job")
+
+def format_target(value, template):
+    return "Not reachable" if np.isnan(value) else template.format(value)
+
+# Deal targets: inputs that bring the deal to break-even (or a target return)
+def show_targets(property_type, inputs):
+    st.header("Deal Targets")
+    col1, col2, col3, col4 = st.columns(4)
+    max_rate = solvers.max_interest_rate(property_type, inputs).item()
+    if property_type == "residential":
+        args = {name: inputs[name] for name in ("interest_rate", "loan_years", "state", "zip_code")}
+        break_even_rent = solvers.residential_break_even_rent(inputs["purchase_price"], inputs["down_payment"], **args).item()
+        max_price = solvers.residential_max_price(inputs["down_payment"], monthly_rent=inputs["monthly_rent"], **args).item()
+        required_down = solvers.residential_required_down_payment(inputs["purchase_price"], monthly_rent=inputs["monthly_rent"], **args).item()
+        col1.metric("Break-even Rent (75% Occupancy)", format_target(break_even_rent, "${:,.0f}"))
+        col2.metric("Max Purchase Price", format_target(max_price, "${:,.0f}"), help="Highest price that breaks even at 75% occupancy")
+        col3.metric("Required Down Payment", format_target(required_down, "{:.1f}%"), help="Smallest down payment that breaks even at 75% occupancy")
+    else:
+        target = st.number_input("Target Cash-on-Cash Return %", min_value=0.0, max_value=50.0, value=0.0, step=0.5,
+                                 key="comm_target_coc", help="0% solves for break-even annual cash flow")
+        args = {name: inputs[name] for name in ("annual_gross_rents", "vacancy_rate", "other_expenses", "interest_rate", "loan_years", "state", "zip_code")}
+        max_price = solvers.commercial_max_price(inputs["down_payment"], target_cash_on_cash=target, **args).item()
+        required_down = solvers.commercial_required_down_payment(inputs["purchase_price"], target_cash_on_cash=target, **args).item()
+        col1.metric("Max Offer Price", format_target(max_price, "${:,.0f}"), help="Highest price that reaches the target return")
+        col2.metric("Required Down Payment", format_target(required_down, "{:.1f}%"), help="Smallest down payment that reaches the target return")
+        col3.metric("Price vs. Max Offer", format_target(inputs["purchase_price"] - max_price, "${:,.0f}"))
+    col4.metric("Break-even Interest Rate", format_target(max_rate, "{:.2f}%"),
+                help=f"Highest rate that keeps cash flow positive (searched up to {solvers.MAX_RATE:.0f}%)")
+
+# Sensitivity analysis panel (shared by both property types)
+def show_sensitivity(property_type, inputs, cache_key):
+    st.header("Sensitivity Analysis")
+    prefix = "sens_" if property_type == "residential" else "comm_sens_"
+    rent_label = "Rent" if property_type == "residential" else "Gross Rents"
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        rate_range = st.slider("Interest Rate Range %", 0.0, 20.0, (4.0, 9.0), step=0.1, key=f"{prefix}rate_range")
+    with col2:
+        price_pct = st.slider("Purchase Price ±%", 0, 50, 20, key=f"{prefix}price_pct")
+    with col3:
+        rent_pct = st.slider(f"{rent_label} ±%", 0, 50, 15, key=f"{prefix}rent_pct")
+    
+    # Full rate x price x rent grid in one broadcast evaluation, shared across sessions
+    with telemetry.section("sensitivity"):
+        grid = sweep_cache.get_or_compute(
+            ("sensitivity", cache_key, rate_range, price_pct, rent_pct),
+            lambda: sensitivity.sweep(property_type, inputs, rate_range, price_pct, rent_pct)
+        )
+    
+    metrics = sensitivity.METRICS[property_type]
+    col1, col2 = st.columns(2)
+    with col1:
+        metric = st.radio("Metric", list(metrics), format_func=metrics.get, horizontal=True, key=f"{prefix}metric")
+    with col2:
+        rent_index = st.select_slider(f"{rent_label} Change", options=list(range(len(grid["rent_pct"]))),
+                                      value=len(grid["rent_pct"]) // 2,
+                                      format_func=lambda i: f"{grid['rent_pct'][i]:+.1f}%",
+                                      key=f"{prefix}rent_index")
+    
+    with telemetry.section("charts"):
+        values = grid["metrics"][metric][:, :, rent_index].T
+        go = plotly()
+        fig = go.Figure()
+        fig.add_trace(go.Heatmap(
+            x=grid["interest_rate"], y=grid["purchase_price"], z=values,
+            colorscale="RdYlGn", zmid=0, colorbar=dict(title=metrics[metric])
+        ))
+        # Break-even contour where the metric crosses zero
+        fig.add_trace(go.Contour(
+            x=grid["interest_rate"], y=grid["purchase_price"], z=values,
+            contours=dict(start=0, end=0, size=1, coloring="lines"),
+            line=dict(color="black", width=2), showscale=False, name="Break-even"
+        ))
+        fig.update_layout(
+            title=f"{metrics[metric]} at {rent_label} {grid['rent_pct'][rent_index]:+.1f}%",
+            xaxis_title="Interest Rate %", yaxis_title="Purchase Price"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+    
+    positive_share = (grid["metrics"][metric] > 0).mean()
+    st.caption(f"{positive_share:.0%} of the {grid['metrics'][metric].size:,} scenarios in the full grid are above break-even.")
+
+# Monte Carlo risk simulation panel (shared by both property types)
+SIMULATION_DEFAULTS = {"sim_paths": "10000", "sim_years": "10", "sim_seed": "42"}
+SIMULATION_PATHS = [1000, 10000, 100000, 1000000]
+
+def update_simulation_param(name):
+    params[name] = str(st.session_state[f"{name}_input"])
+
+def show_simulation(property_type, inputs, cache_key):
+    st.header("Risk Simulation")
+    # Settings live in the URL so a shared link reproduces the same paths
+    for name, default in SIMULATION_DEFAULTS.items():
+        if name not in params:
+            params[name] = default
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        paths = st.selectbox("Simulated Paths", SIMULATION_PATHS,
+                             index=SIMULATION_PATHS.index(int(params["sim_paths"])),
+                             format_func=lambda n: f"{n:,}",
+                             key="sim_paths_input",
+                             on_change=update_simulation_param, args=("sim_paths",))
+    with col2:
+        years = st.number_input("Hold Period (Years)", value=int(params["sim_years"]),
+                                min_value=1, max_value=30, step=1,
+                                key="sim_years_input",
+                                on_change=update_simulation_param, args=("sim_years",))
+    with col3:
+        seed = st.number_input("Random Seed", value=int(params["sim_seed"]),
+                               min_value=0, step=1,
+                               key="sim_seed_input",
+                               on_change=update_simulation_param, args=("sim_seed",))
+    
+    with telemetry.section("simulation"):
+        result = sweep_cache.get_or_compute(
+            ("simulation", cache_key, paths, years, seed),
+            lambda: simulation.simulate(property_type, inputs, years=years, paths=paths, seed=seed)
+        )
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Negative Cash Flow (Year 1)", f"{result['prob_negative_year1']:.1%}")
+    col2.metric("Any Negative Year", f"{result['prob_any_negative_year']:.1%}")
+    median_irr = result["irr_percentiles"].get(50)
+    col3.metric("Median IRR", f"{median_irr:.1%}" if median_irr is not None else "n/a")
+    col4.metric("Negative IRR", f"{result['prob_negative_irr']:.1%}")
+    
+    with telemetry.section("charts"):
+        go = plotly()
+        chart_col1, chart_col2 = st.columns(2)
+        with chart_col1:
+            bands = result["cash_flow_bands"]
+            year_axis = list(range(1, years + 1))
+            fig = go.Figure()
+            fig.add_trace(go.Scatter(x=year_axis, y=bands[95], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+            fig.add_trace(go.Scatter(x=year_axis, y=bands[5], fill="tonexty", line=dict(width=0), name="5th-95th percentile"))
+            fig.add_trace(go.Scatter(x=year_axis, y=bands[75], line=dict(width=0), showlegend=False, hoverinfo="skip"))
+            fig.add_trace(go.Scatter(x=year_axis, y=bands[25], fill="tonexty", line=dict(width=0), name="25th-75th percentile"))
+            fig.add_trace(go.Scatter(x=year_axis, y=bands[50], line=dict(color="black"), name="Median"))
+            fig.update_layout(title="Annual Cash Flow Bands", xaxis_title="Year", yaxis_title="Annual Cash Flow")
+            st.plotly_chart(fig, use_container_width=True)
+        with chart_col2:
+            # Bin on the server so a million IRRs never ship to the browser
+            irrs = result["irr"][~np.isnan(result["irr"])] * 100
+            counts, edges = np.histogram(irrs, bins=60) if len(irrs) else (np.array([]), np.array([0.0]))
+            fig = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, marker_color="#1f77b4"))
+            fig.update_layout(title="IRR Distribution", xaxis_title="IRR %", yaxis_title="Paths", bargap=0)
+            st.plotly_chart(fig, use_container_width=True)
+
+# Multi-year hold projection panel (shared by both property types)
+def show_projection(property_type, inputs, cache_key):
+    st.header("Hold Projection")
+    prefix = "proj_" if property_type == "residential" else "comm_proj_"
+    cap_source = "listing NOI" if property_type == "commercial" else "NOI at purchase"
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        years = st.number_input("Hold Period (Years)", value=10, min_value=1, max_value=30, step=1, key=f"{prefix}years")
+    with col2:
+        rent_growth = st.number_input("Rent Growth %/yr", value=3.0, step=0.5, key=f"{prefix}rent_growth")
+    with col3:
+        expense_inflation = st.number_input("Expense Inflation %/yr", value=3.0, step=0.5, key=f"{prefix}expense_inflation",
+                                            help="Applied to property tax, insurance and other fixed expenses")
+    with col4:
+        discount_rate = st.number_input("Discount Rate %", value=8.0, step=0.5, key=f"{prefix}discount_rate")
+    with col5:
+        exit_cap_rate = st.number_input("Exit Cap Rate %", value=None, min_value=0.1, step=0.25, key=f"{prefix}exit_cap_rate",
+                                        placeholder=f"From {cap_source}")
+    settings = {"years": years, "rent_growth": rent_growth, "expense_inflation": expense_inflation,
+                "discount_rate": discount_rate, "exit_cap_rate": exit_cap_rate}
+    if property_type == "residential":
+        settings["occupancy"] = st.radio("Occupancy", engine.OCCUPANCY_RATES, index=1, horizontal=True,
+                                         format_func=lambda rate: f"{rate:.0%}", key=f"{prefix}occupancy")
+
+    with telemetry.section("projection"):
+        result = deal_cache.get_or_compute(
+            ("projection", cache_key) + tuple(settings.values()),
+            lambda: projection.project(property_type, inputs, **settings)
+        )
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("IRR", "n/a" if np.isnan(result["irr"]) else f"{result['irr']:.1%}")
+    col2.metric(f"NPV @ {discount_rate:g}%", f"${result['npv']:,.0f}")
+    col3.metric("Equity Multiple", "n/a" if np.isnan(result["equity_multiple"]) else f"{result['equity_multiple']:.2f}x")
+    col4.metric("Exit Value", f"${result['exit_value']:,.0f}", help=f"At a {result['exit_cap_rate']:.2f}% cap rate")
+
+    yearly = {
+        "Year": result["year"],
+        "NOI": result["noi"],
+        "Debt Service": result["debt_service"],
+        "Cash Flow": result["cash_flow"],
+        "Principal Paid": result["principal_paid"],
+        "Loan Balance": result["loan_balance"],
+        "Property Value": result["property_value"],
+        "Equity": result["equity"],
+    }
+
+    table_col, chart_col = st.columns(2)
+    with table_col:
+        with telemetry.section("tables"):
+            st.dataframe(formatted(yearly, {column: "${:,.0f}" for column in yearly if column != "Year"}), hide_index=True)
+    with chart_col, telemetry.section("charts"):
+        go = plotly()
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=yearly["Year"], y=yearly["Equity"], name="Equity"))
+        fig.add_trace(go.Bar(x=yearly["Year"], y=yearly["Loan Balance"], name="Loan Balance"))
+        fig.update_layout(title="Equity Build-up", barmode="stack", xaxis_title="Year", yaxis_title="Property Value")
+        st.plotly_chart(fig, use_container_width=True)
+
+# Amortization outputs depend only on the loan, so they're shared across sessions
+# and fetched from the cache each run rather than kept in the session's graph
+def cached_amortization(loan_amount, interest_rate, loan_years):
+    with telemetry.section("tables"):
+        return deal_cache.get_or_compute(("amortization", loan_amount, interest_rate, loan_years),
+                                         lambda: build_amortization(loan_amount, interest_rate, loan_years))
+
+def residential_tables_graph():
+    deal_graph = graph.residential_graph()
+    deal_graph.add("expenses_table", lambda expense_rows: markdown_table(expense_rows, {"Amount": "${:,.2f}"}))
+    deal_graph.add("returns_table", lambda return_rows: markdown_table(
+        return_rows,
+        {
+            "Monthly Cash Flow": "${:,.2f}", 
+            "Annual ROI": "{:.1f}%"
+        },
+        colored=("Monthly Cash Flow", "Annual ROI")))
+    return deal_graph
+
+def commercial_analysis_table(analysis_rows):
+    # Mixed units, so each row is formatted on its own
+    return markdown_table({
+        "Metric": analysis_rows["Metric"],
+        "Amount": [f"{amount:.1f}%" if metric == "Cash-on-Cash Return" else f"${amount:,.0f}"
+                   for metric, amount in zip(analysis_rows["Metric"], analysis_rows["Amount"])],
+    })
+
+def commercial_tables_graph():
+    deal_graph = graph.commercial_graph()
+    deal_graph.add("expenses_table", lambda expense_rows: markdown_table(
+        expense_rows, {"Monthly Amount": "${:,.2f}", "Annual Amount": "${:,.0f}"}))
+    deal_graph.add("analysis_table", commercial_analysis_table)
+    return deal_graph
+
+# Results and tables from this session's calculation graph; only cells
+# downstream of a changed input are recomputed. The graph counts against the
+# session's memory budget and is rebuilt if it was evicted.
+def evaluate_graph(name, factory, inputs, outputs):
+    deal_graph = memory.session_budget.use(st.session_state, name, factory)
+    with telemetry.section("calculation"):
+        graph.set_deal(deal_graph, inputs)
+        deal_graph["results"]  # every formula cell
+    # Table cells are timed apart from the formulas they read
+    with telemetry.section("tables"):
+        return deal_graph, deal_graph.get(*outputs)
+
+# Debug panel (?debug=1): which cells recomputed on this rerun and how long each took
+def show_graph_debug(deal_graph):
+    if "debug" not in st.session_state.view_flags:
+        return
+    with st.expander("🔧 Calculation Graph", expanded=True):
+        log = pd.DataFrame(deal_graph.last_run)
+        recomputed = log[log["recomputed"]]
+        st.caption(f"{len(recomputed)} of {len(log)} cells recomputed in {recomputed['seconds'].sum() * 1000:.2f} ms")
+        st.dataframe(pd.DataFrame({
+            "Cell": log["node"],
+            "Excel": log["cell"],
+            "Status": log["recomputed"].map({True: "recomputed", False: "cached"}),
+            "Time (ms)": log["seconds"] * 1000,
+        }).style.format({"Time (ms)": "{:.3f}"}), hide_index=True)
+
+# Listing import fills these sidebar widgets (URL parameter -> widget key)
+LISTING_WIDGETS = {
+    "purchase_price": "purchase_price_input",
+    "monthly_rent": "monthly_rent_input",
+    "state": "state_input",
+    "zip_code": "zip_code_input",
+    "comm_purchase_price": "comm_purchase_price_input",
+    "comm_annual_gross_rents": "comm_gross_rents_input",
+    "comm_annual_noi_listing": "comm_noi_input",
+    "comm_state": "comm_state_input",
+    "comm_zip_code": "comm_zip_code_input",
+}
+
+def import_listing(property_type, url):
+    result = listings.ingest([url])[0]
+    if result["error"]:
+        st.session_state.listing_message = ("error", f"❌ Could not import the listing: {result['error']}")
+        return
+    values = listings.to_params(result["fields"], property_type)
+    for name, value in values.items():
+        params[name] = value
+        # Dropping the widget state makes the widget start again from the new value
+        st.session_state.pop(LISTING_WIDGETS[name], None)
+    if not values:
+        st.session_state.listing_message = ("warning", "No calculator inputs found on this listing")
+        return
+    message = f"Imported {len(values)} fields from {result['site']}" + (" (cached)" if result["cached"] else "")
+    if result["fields"].get("property_type", property_type) != property_type:
+        message += f"; this listing looks {result['fields']['property_type']}"
+    st.session_state.listing_message = ("success", message)
+
+def show_listing_import(property_type, url):
+    st.button("Import from Listing", on_click=import_listing, args=(property_type, url),
+              help="Fill price, rents, state and ZIP from a LoopNet, Zillow or Crexi listing")
+    if "listing_message" in st.session_state:
+        kind, message = st.session_state.pop("listing_message")
+        getattr(st, kind)(message)
+
+# Initialize property type in the URL state
+if "property_type" not in params:
+    params["property_type"] = "Residential"
 
 # Property type selection callback
 def update_property_type():
-    st.query_params["property_type"] = st.session_state.property_type_radio
+    params["property_type"] = st.session_state.property_type_radio
 
 property_type = st.radio("Property Type", ["Residential", "Commercial"], 
                         key="property_type_radio",
-                        index=0 if st.query_params["property_type"] == "Residential" else 1,
+                        index=0 if params["property_type"] == "Residential" else 1,
                         horizontal=True,
                         on_change=update_property_type)
 
@@ -51,59 +536,55 @@ property_type = st.radio("Property Type", ["Residential", "Commercial"],
 st.write("**Residential**: 4 units or less  |  **Commercial**: 5 units or more")
 
 # Display parsed address as clickable link if available
-if property_type == "Residential" and "property_url" in st.query_params and st.query_params["property_url"]:
-    address = parse_property_url(st.query_params["property_url"])
+if property_type == "Residential" and "property_url" in params and params["property_url"]:
+    address = listings.address_from_url(params["property_url"])
     if address:
-        st.markdown(f"**Address:** <a href='{st.query_params['property_url']}' target='_blank'>{address}</a>", unsafe_allow_html=True)
-elif property_type == "Commercial" and "comm_property_url" in st.query_params and st.query_params["comm_property_url"]:
-    address = parse_property_url(st.query_params["comm_property_url"])
+        st.markdown(f"**Address:** <a href='{params['property_url']}' target='_blank'>{address}</a>", unsafe_allow_html=True)
+elif property_type == "Commercial" and "comm_property_url" in params and params["comm_property_url"]:
+    address = listings.address_from_url(params["comm_property_url"])
     if address:
-        st.markdown(f"**Address:** <a href='{st.query_params['comm_property_url']}' target='_blank'>{address}</a>", unsafe_allow_html=True)
+        st.markdown(f"**Address:** <a href='{params['comm_property_url']}' target='_blank'>{address}</a>", unsafe_allow_html=True)
 
 if property_type == "Residential":
-    # Initialize query params with defaults if not present
-    if "purchase_price" not in st.query_params:
-        st.query_params["purchase_price"] = "650000"
-    if "down_payment" not in st.query_params:
-        st.query_params["down_payment"] = "20"
-    if "interest_rate" not in st.query_params:
-        st.query_params["interest_rate"] = "6.5"
-    if "loan_years" not in st.query_params:
-        st.query_params["loan_years"] = "15"
-    if "monthly_rent" not in st.query_params:
-        st.query_params["monthly_rent"] = "5000"
-    if "state" not in st.query_params:
-        st.query_params["state"] = "CA"
-    if "property_url" not in st.query_params:
-        st.query_params["property_url"] = ""
+    # Initialize URL state with defaults if not present
+    for name, default in engine.RESIDENTIAL_DEFAULTS.items():
+        if name not in params:
+            params[name] = str(default)
+    if "property_url" not in params:
+        params["property_url"] = ""
+    if "zip_code" not in params:
+        params["zip_code"] = ""
 
     # Residential input callbacks
     def update_purchase_price():
-        st.query_params["purchase_price"] = str(st.session_state.purchase_price_input)
+        params["purchase_price"] = str(st.session_state.purchase_price_input)
     
     def update_down_payment():
-        st.query_params["down_payment"] = str(st.session_state.down_payment_input)
+        params["down_payment"] = str(st.session_state.down_payment_input)
     
     def update_interest_rate():
-        st.query_params["interest_rate"] = str(st.session_state.interest_rate_input)
+        params["interest_rate"] = str(st.session_state.interest_rate_input)
     
     def update_loan_years():
-        st.query_params["loan_years"] = str(st.session_state.loan_years_input)
+        params["loan_years"] = str(st.session_state.loan_years_input)
     
     def update_monthly_rent():
-        st.query_params["monthly_rent"] = str(st.session_state.monthly_rent_input)
+        params["monthly_rent"] = str(st.session_state.monthly_rent_input)
     
     def update_state():
-        st.query_params["state"] = st.session_state.state_input
+        params["state"] = st.session_state.state_input
+    
+    def update_zip_code():
+        params["zip_code"] = st.session_state.zip_code_input.strip()
     
     def update_property_url():
-        st.query_params["property_url"] = st.session_state.property_url_input
+        params["property_url"] = st.session_state.property_url_input
 
     # Sidebar inputs
     with st.sidebar:
         st.header("Property Details")
         purchase_price = st.number_input("Purchase Price", 
-                                       value=int(st.query_params["purchase_price"]), 
+                                       value=int(params["purchase_price"]), 
                                        step=None, format="%d",
                                        key="purchase_price_input",
                                        on_change=update_purchase_price)
@@ -112,7 +593,7 @@ if property_type == "Residential":
         st.write(f"**Purchase Price:** ${purchase_price:,.0f}")
         # Down Payment
         down_payment_value = st.number_input("Down Payment %", 
-                                           value=int(st.query_params["down_payment"]), 
+                                           value=int(params["down_payment"]), 
                                            min_value=0, max_value=100, step=1,
                                            key="down_payment_input",
                                            on_change=update_down_payment)
@@ -125,52 +606,50 @@ if property_type == "Residential":
         
         # Interest Rate
         interest_rate_value = st.number_input("Interest Rate %", 
-                                            value=float(st.query_params["interest_rate"]), 
+                                            value=float(params["interest_rate"]), 
                                             min_value=0.0, max_value=10.0, step=0.1,
                                             key="interest_rate_input",
                                             on_change=update_interest_rate)
         
         interest_rate = interest_rate_value / 100
         loan_years = st.selectbox("Loan Term (Years)", [15, 30], 
-                                index=0 if st.query_params["loan_years"] == "15" else 1,
+                                index=0 if params["loan_years"] == "15" else 1,
                                 key="loan_years_input",
                                 on_change=update_loan_years)
             
         monthly_rent = st.number_input("Expected Monthly Rent", 
-                                     value=int(st.query_params["monthly_rent"]), 
+                                     value=int(params["monthly_rent"]), 
                                      step=100,
                                      key="monthly_rent_input",
                                      on_change=update_monthly_rent)
         
         st.header("Location")
-        states = ["AZ", "CA", "IN", "NV", "TX", "MI"]
+        states = engine.states()
         state = st.selectbox("State", states, 
-                           index=states.index(st.query_params["state"]),
+                           index=states.index(params["state"]),
                            key="state_input",
                            on_change=update_state)
+        zip_code = st.text_input("ZIP Code (optional)",
+                                 value=params["zip_code"],
+                                 help="Uses ZIP-level rates when the rate table has them, otherwise the state's",
+                                 key="zip_code_input",
+                                 on_change=update_zip_code).strip() or None
         
-        TAX_RATES = {
-            "AZ": 0.0062,
-            "CA": 0.0125,
-            "IN": 0.0137,
-            "NV": 0.0065,
-            "TX": 0.0170,
-            "MI": 0.0321
-        }
-        
-        # Display the tax rate for the selected state (converted to a percentage)
-        selected_tax_rate = TAX_RATES[state]
-        st.metric("Tax Rate", f"{selected_tax_rate * 100:.2f}%")
+        # Display the tax rate for the selected location (converted to a percentage)
+        location = engine.location_rates("residential", state, zip_code=zip_code)
+        st.metric("Tax Rate", f"{location['tax_rate'] * 100:.2f}%")
+        st.caption(f"Rate table {rates.current().version}")
         
         st.header("Property URL")
         property_url = st.text_input("Property Listing URL", 
-                                   value=st.query_params["property_url"],
+                                   value=params["property_url"],
                                    placeholder="https://www.zillow.com/...",
                                    help="Link to property listing (Zillow, Realtor.com, etc.)",
                                    key="property_url_input",
                                    on_change=update_property_url)
         
         if property_url.strip():
+            show_listing_import("residential", property_url.strip())
             try:
                 st.link_button("View Property Listing", property_url)
             except AttributeError:
@@ -191,184 +670,103 @@ if property_type == "Residential":
                 ">View Property Listing</a>
                 ''', unsafe_allow_html=True)
 
-    # Calculations
-    loan_amount = purchase_price * (1 - down_payment_pct)
-    monthly_rate = interest_rate / 12
-    num_payments = loan_years * 12
-    
-    # Monthly Principal & Interest Payment
-    monthly_pi = loan_amount * (monthly_rate * (1 + monthly_rate) ** num_payments) / ((1 + monthly_rate) ** num_payments - 1)
-    
-    # Other monthly costs
-    monthly_insurance = (purchase_price * 0.01) / 12
-    monthly_tax = (purchase_price * TAX_RATES[state]) / 12
-    pm_fee = monthly_rent * 0.10
-    maintenance = 250
-    
-    total_monthly = monthly_pi + monthly_insurance + monthly_tax + pm_fee + maintenance
-    
-    # Cash flow analysis
-    occupancy_rates = [0.75, 0.90, 1.0]
-    cash_flows = []
-    annual_returns = []
-    
-    for rate in occupancy_rates:
-        monthly_income = monthly_rent * rate
-        cash_flow = monthly_income - total_monthly
-        annual_return = (cash_flow * 12) / (purchase_price * down_payment_pct) * 100
-        cash_flows.append(cash_flow)
-        annual_returns.append(annual_return)
+    # Calculations (served from the shared cache when these inputs were seen before)
+    residential_inputs = {
+        "purchase_price": purchase_price,
+        "down_payment": down_payment_value,
+        "interest_rate": interest_rate_value,
+        "loan_years": loan_years,
+        "monthly_rent": monthly_rent,
+        "state": state,
+        "zip_code": zip_code
+    }
+    residential_graph, outputs = evaluate_graph("residential_graph", residential_tables_graph, residential_inputs,
+                                                ["results", "expenses_table", "returns_table"])
+    results = outputs["results"]
 
     # Display results
     col1, col2 = st.columns(2)
     
     with col1:
         st.header("Monthly Expenses")
-        expenses_df = pd.DataFrame({
-            "Expense": ["Principal & Interest", "Insurance", "Property Tax", "Property Management", "Maintenance"],
-            "Amount": [monthly_pi, monthly_insurance, monthly_tax, pm_fee, maintenance]
-        })
-        st.dataframe(expenses_df.style.format({"Amount": "${:,.2f}"}), hide_index=True)
+        st.markdown(outputs["expenses_table"])
     
     with col2:
         st.header("Investment Returns")
-        returns_df = pd.DataFrame({
-            "Scenario": ["75% Occupancy", "90% Occupancy", "100% Occupancy"],
-            "Monthly Cash Flow": cash_flows,
-            "Annual ROI": annual_returns
-        })
-        
-        def color_negative_red(val):
-            color = 'red' if val < 0 else 'green'
-            return f'color: {color}'
-        
-        st.dataframe(
-            returns_df.style
-            .format({
-                "Monthly Cash Flow": "${:,.2f}", 
-                "Annual ROI": "{:.1f}%"
-            })
-            .map(color_negative_red, subset=["Monthly Cash Flow", "Annual ROI"]),
-            hide_index=True
-        )
+        st.markdown(outputs["returns_table"])
     
     # Investment status
     st.header("Investment Status")
-    if cash_flows[0] > 0:  # Profitable at 75% occupancy
+    if results["cash_flow_75"] > 0:  # Profitable at 75% occupancy
         st.success("✅ Good Investment: Profitable even at 75% occupancy")
     else:
         st.error("❌ High Risk: Not profitable at 75% occupancy")
     
+    # Deal Targets
+    with telemetry.section("targets"):
+        show_targets("residential", residential_inputs)
+    
+    # Sensitivity Analysis
+    show_sensitivity("residential", residential_inputs, residential_key(residential_inputs))
+    
+    # Risk Simulation
+    show_simulation("residential", residential_inputs, residential_key(residential_inputs))
+    
+    # Hold Projection
+    show_projection("residential", residential_inputs, residential_key(residential_inputs))
+    
     # Amortization Schedule
-    st.header("Amortization Schedule")
-    schedule = []
-    balance = loan_amount
+    show_amortization(cached_amortization(results["loan_amount"], interest_rate_value, loan_years))
+    show_lender_figures("residential", residential_inputs)
+    show_export("residential", residential_inputs)
     
-    for payment in range(1, 13):  # First year only
-        interest_payment = balance * monthly_rate
-        principal_payment = monthly_pi - interest_payment
-        balance = balance - principal_payment
-        
-        schedule.append({
-            "Payment": payment,
-            "Principal": principal_payment,
-            "Interest": interest_payment,
-            "Balance": balance
-        })
-    
-    schedule_df = pd.DataFrame(schedule)
-    st.dataframe(
-        schedule_df.style.format({
-            "Principal": "${:,.2f}",
-            "Interest": "${:,.2f}",
-            "Balance": "${:,.2f}"
-        }),
-        hide_index=True
-    )
-    
-    # Balance Over Time chart
-    fig = px.line(
-        schedule_df, 
-        x="Payment", 
-        y="Balance",
-        title="Loan Balance Over Time"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    show_graph_debug(residential_graph)
 
 elif property_type == "Commercial":
     # Commercial property logic
     
-    # Initialize commercial query params with Excel defaults
-    if "comm_state" not in st.query_params:
-        st.query_params["comm_state"] = "CA"
-    if "comm_purchase_price" not in st.query_params:
-        st.query_params["comm_purchase_price"] = "1970000"
-    if "comm_down_payment" not in st.query_params:
-        st.query_params["comm_down_payment"] = "30"
-    if "comm_annual_gross_rents" not in st.query_params:
-        st.query_params["comm_annual_gross_rents"] = "152195"
-    if "comm_annual_noi_listing" not in st.query_params:
-        st.query_params["comm_annual_noi_listing"] = "106548"
-    if "comm_vacancy_rate" not in st.query_params:
-        st.query_params["comm_vacancy_rate"] = "3"
-    if "comm_other_expenses" not in st.query_params:
-        st.query_params["comm_other_expenses"] = "5000"
-    if "comm_loan_years" not in st.query_params:
-        st.query_params["comm_loan_years"] = "25"
-    if "comm_interest_rate" not in st.query_params:
-        st.query_params["comm_interest_rate"] = "6.5"
-    if "comm_property_url" not in st.query_params:
-        st.query_params["comm_property_url"] = ""
-    
-    # Commercial tax and insurance rates
-    COMMERCIAL_TAX_RATES = {
-        "AZ": 0.0062,
-        "CA": 0.0125,
-        "IN": 0.0137,
-        "NV": 0.0065,
-        "TX": 0.0170,
-        "MI": 0.0321
-    }
-    
-    COMMERCIAL_INSURANCE_RATES = {
-        "AZ": 0.005,
-        "CA": 0.0125,
-        "IN": 0.005,
-        "NV": 0.005,
-        "TX": 0.005,
-        "MI": 0.005
-    }
+    # Initialize commercial URL state with Excel defaults
+    for name, default in engine.COMMERCIAL_DEFAULTS.items():
+        if f"comm_{name}" not in params:
+            params[f"comm_{name}"] = str(default)
+    if "comm_property_url" not in params:
+        params["comm_property_url"] = ""
+    if "comm_zip_code" not in params:
+        params["comm_zip_code"] = ""
     
     # Commercial input callbacks
     def update_comm_purchase_price():
-        st.query_params["comm_purchase_price"] = str(st.session_state.comm_purchase_price_input)
+        params["comm_purchase_price"] = str(st.session_state.comm_purchase_price_input)
     
     def update_comm_down_payment():
-        st.query_params["comm_down_payment"] = str(st.session_state.comm_down_payment_input)
+        params["comm_down_payment"] = str(st.session_state.comm_down_payment_input)
     
     def update_comm_gross_rents():
-        st.query_params["comm_annual_gross_rents"] = str(st.session_state.comm_gross_rents_input)
+        params["comm_annual_gross_rents"] = str(st.session_state.comm_gross_rents_input)
     
     def update_comm_noi_listing():
-        st.query_params["comm_annual_noi_listing"] = str(st.session_state.comm_noi_input)
+        params["comm_annual_noi_listing"] = str(st.session_state.comm_noi_input)
     
     def update_comm_vacancy_rate():
-        st.query_params["comm_vacancy_rate"] = str(st.session_state.comm_vacancy_input)
+        params["comm_vacancy_rate"] = str(st.session_state.comm_vacancy_input)
     
     def update_comm_other_expenses():
-        st.query_params["comm_other_expenses"] = str(st.session_state.comm_expenses_input)
+        params["comm_other_expenses"] = str(st.session_state.comm_expenses_input)
     
     def update_comm_interest_rate():
-        st.query_params["comm_interest_rate"] = str(st.session_state.comm_interest_input)
+        params["comm_interest_rate"] = str(st.session_state.comm_interest_input)
     
     def update_comm_loan_years():
-        st.query_params["comm_loan_years"] = str(st.session_state.comm_loan_years_input)
+        params["comm_loan_years"] = str(st.session_state.comm_loan_years_input)
     
     def update_comm_state():
-        st.query_params["comm_state"] = st.session_state.comm_state_input
+        params["comm_state"] = st.session_state.comm_state_input
+    
+    def update_comm_zip_code():
+        params["comm_zip_code"] = st.session_state.comm_zip_code_input.strip()
     
     def update_comm_property_url():
-        st.query_params["comm_property_url"] = st.session_state.comm_property_url_input
+        params["comm_property_url"] = st.session_state.comm_property_url_input
 
     # Commercial sidebar inputs
     with st.sidebar:
@@ -376,7 +774,7 @@ elif property_type == "Commercial":
         
         # Purchase Price
         comm_purchase_price = st.number_input("Purchase Price", 
-                                             value=int(st.query_params["comm_purchase_price"]), 
+                                             value=int(params["comm_purchase_price"]), 
                                              step=None, format="%d", 
                                              help="Purchase Price or Amount we want to offer",
                                              key="comm_purchase_price_input",
@@ -386,7 +784,7 @@ elif property_type == "Commercial":
         
         # Down Payment %
         comm_down_payment_pct = st.number_input("% Down Payment", 
-                                               value=int(st.query_params["comm_down_payment"]), 
+                                               value=int(params["comm_down_payment"]), 
                                                min_value=0, max_value=100, step=1, 
                                                help="Standard % down is 25% for Non-owner occupied Resi loans. 30%+ may be required for hard money but the interest will be much higher.\n\nFor commercial loans of 5 units or more, the minimum down should be 30% down is a more safe bet, with 65% LTV more ideal for commercial lenders.\n\nTo evaluate whether more money down makes this a good deal or not, 1st try 100%. If the cash flow is not positive with 100% down, then it does not make sense at all at this price, with this rent, or with this overhead.",
                                                key="comm_down_payment_input",
@@ -404,14 +802,17 @@ elif property_type == "Commercial":
         else:
             st.markdown(f"**Amount Down:** :red[${amount_down:,.0f}]")
         
-        # Closing Costs (calculated as 3% of purchase price, matching Excel formula J3=H3*0.03)
-        closing_costs = comm_purchase_price * 0.03
-        st.metric("Estimated Closing Costs", f"${closing_costs:,.0f}", help="Estimated closing costs @ 3% of purchase price")
+        # Closing Costs (rate-table % of purchase price, matching Excel formula J3=H3*0.03)
+        # The location inputs come further down, so their current values are read from the URL
+        closing_cost_rate = engine.location_rates("commercial", params["comm_state"],
+                                                  zip_code=params["comm_zip_code"] or None)["closing_cost_rate"]
+        closing_costs = comm_purchase_price * closing_cost_rate
+        st.metric("Estimated Closing Costs", f"${closing_costs:,.0f}", help=f"Estimated closing costs @ {closing_cost_rate * 100:g}% of purchase price")
         
         
         # Annual Gross Rents
         comm_annual_gross_rents = st.number_input("Annual Gross Rents", 
-                                                 value=int(st.query_params["comm_annual_gross_rents"]), 
+                                                 value=int(params["comm_annual_gross_rents"]), 
                                                  step=1000, 
                                                  help="Typically provided in the listing on LoopNet, etc.",
                                                  key="comm_gross_rents_input",
@@ -419,21 +820,21 @@ elif property_type == "Commercial":
         
         # Annual NOI from Listing
         comm_annual_noi_listing = st.number_input("Annual NOI from Listing", 
-                                                 value=int(st.query_params["comm_annual_noi_listing"]), 
+                                                 value=int(params["comm_annual_noi_listing"]), 
                                                  step=1000,
                                                  key="comm_noi_input",
                                                  on_change=update_comm_noi_listing)
         
         # Vacancy Rate
         comm_vacancy_rate = st.number_input("Vacancy Rate %", 
-                                           value=int(st.query_params["comm_vacancy_rate"]), 
+                                           value=int(params["comm_vacancy_rate"]), 
                                            min_value=0, max_value=50, step=1,
                                            key="comm_vacancy_input",
                                            on_change=update_comm_vacancy_rate)
         
         # All Other Operating Expenses
         comm_other_expenses = st.number_input("All Other Operating Expenses", 
-                                             value=int(st.query_params["comm_other_expenses"]), 
+                                             value=int(params["comm_other_expenses"]), 
                                              step=500,
                                              key="comm_expenses_input",
                                              on_change=update_comm_other_expenses)
@@ -441,7 +842,7 @@ elif property_type == "Commercial":
         st.header("Loan Details")
         # Interest Rate
         comm_interest_rate_value = st.number_input("Interest Rate %", 
-                                                  value=float(st.query_params["comm_interest_rate"]), 
+                                                  value=float(params["comm_interest_rate"]), 
                                                   min_value=0.0, max_value=20.0, step=0.1,
                                                   key="comm_interest_input",
                                                   on_change=update_comm_interest_rate)
@@ -449,32 +850,38 @@ elif property_type == "Commercial":
         # Loan Period
         loan_years_options = list(range(1, 31))  # 1 to 30 years
         comm_loan_years = st.selectbox("Loan Period (Years)", loan_years_options, 
-                                     index=loan_years_options.index(int(st.query_params["comm_loan_years"])),
+                                     index=loan_years_options.index(int(params["comm_loan_years"])),
                                      key="comm_loan_years_input",
                                      on_change=update_comm_loan_years)
         
         st.header("Location")
-        states = ["AZ", "CA", "IN", "NV", "TX", "MI"]
+        states = engine.states()
         comm_state = st.selectbox("State", states, 
-                                index=states.index(st.query_params["comm_state"]),
+                                index=states.index(params["comm_state"]),
                                 key="comm_state_input",
                                 on_change=update_comm_state)
+        comm_zip_code = st.text_input("ZIP Code (optional)",
+                                      value=params["comm_zip_code"],
+                                      help="Uses ZIP-level rates when the rate table has them, otherwise the state's",
+                                      key="comm_zip_code_input",
+                                      on_change=update_comm_zip_code).strip() or None
         
         st.header("Lookup Rates")
-        selected_tax_rate = COMMERCIAL_TAX_RATES[comm_state]
-        selected_insurance_rate = COMMERCIAL_INSURANCE_RATES[comm_state]
-        st.metric("Tax Rate", f"{selected_tax_rate * 100:.2f}%")
-        st.metric("Insurance Rate", f"{selected_insurance_rate * 100:.1f}%")
+        location = engine.location_rates("commercial", comm_state, zip_code=comm_zip_code)
+        st.metric("Tax Rate", f"{location['tax_rate'] * 100:.2f}%")
+        st.metric("Insurance Rate", f"{location['insurance_rate'] * 100:.1f}%")
+        st.caption(f"Rate table {rates.current().version}")
         
         st.header("Property URL")
         comm_property_url = st.text_input("Property Listing URL", 
-                                        value=st.query_params["comm_property_url"],
+                                        value=params["comm_property_url"],
                                         placeholder="https://www.loopnet.com/...",
                                         help="Link to property listing (LoopNet, Crexi, etc.)",
                                         key="comm_property_url_input",
                                         on_change=update_comm_property_url)
         
         if comm_property_url.strip():
+            show_listing_import("commercial", comm_property_url.strip())
             try:
                 st.link_button("View Property Listing", comm_property_url)
             except AttributeError:
@@ -496,80 +903,47 @@ elif property_type == "Commercial":
                 ''', unsafe_allow_html=True)
     
     # Commercial calculations based on Excel formulas
-    
-    # Annual operating expenses
-    annual_insurance = comm_purchase_price * selected_insurance_rate
-    annual_property_tax = comm_purchase_price * selected_tax_rate
-    annual_pm_fee = comm_annual_gross_rents * 0.04  # 4% of gross rents
-    
-    # NOI Estimated calculation: (K4*(1-L5))-SUM(J8:J11)
-    # Excel formula: =(K4*(1-L5))-SUM(J8:J11) where J8:J11 are ONLY operating expenses (not debt service)
-    total_operating_expenses = annual_insurance + annual_property_tax + annual_pm_fee + comm_other_expenses
-    noi_estimated = (comm_annual_gross_rents * (1 - comm_vacancy_rate/100)) - total_operating_expenses
-    
-    # Commercial loan calculations (user-defined years and rate)
-    comm_loan_amount = comm_purchase_price - amount_down
-    comm_annual_interest_rate = comm_interest_rate_value / 100
-    comm_monthly_rate = comm_annual_interest_rate / 12
-    comm_num_payments = comm_loan_years * 12
-    
-    # Annual debt service
-    monthly_payment = comm_loan_amount * (comm_monthly_rate * (1 + comm_monthly_rate) ** comm_num_payments) / ((1 + comm_monthly_rate) ** comm_num_payments - 1)
-    annual_debt_service = monthly_payment * 12
-    
-    # Cash flow calculation: NOI - Annual Debt Service
-    annual_cash_flow = noi_estimated - annual_debt_service
-    
-    # Closing costs (3% of purchase price)
-    closing_costs = comm_purchase_price * 0.03
-    
-    # Total cash down
-    total_cash_down = amount_down + closing_costs
-    
-    # Cash-on-cash return calculation
-    cash_on_cash_return = (annual_cash_flow / total_cash_down) * 100 if total_cash_down > 0 else 0
+    # NOI Estimated: =(K4*(1-L5))-SUM(J8:J11) where J8:J11 are ONLY operating expenses (not debt service)
+    commercial_inputs = {
+        "purchase_price": comm_purchase_price,
+        "down_payment": comm_down_payment_pct,
+        "annual_gross_rents": comm_annual_gross_rents,
+        "annual_noi_listing": comm_annual_noi_listing,
+        "vacancy_rate": comm_vacancy_rate,
+        "other_expenses": comm_other_expenses,
+        "interest_rate": comm_interest_rate_value,
+        "loan_years": comm_loan_years,
+        "state": comm_state,
+        "zip_code": comm_zip_code
+    }
+    commercial_graph, comm_outputs = evaluate_graph("commercial_graph", commercial_tables_graph, commercial_inputs,
+                                                    ["results", "expenses_table", "analysis_table", "closing_cost_rate"])
+    comm_results = comm_outputs["results"]
+    noi_estimated = comm_results["noi_estimated"]
+    comm_loan_amount = comm_results["loan_amount"]
+    monthly_payment = comm_results["monthly_payment"]
+    annual_debt_service = comm_results["annual_debt_service"]
+    annual_cash_flow = comm_results["annual_cash_flow"]
+    closing_costs = comm_results["closing_costs"]
+    total_cash_down = comm_results["total_cash_down"]
+    cash_on_cash_return = comm_results["cash_on_cash_return"]
     
     # Display commercial results
     col1, col2 = st.columns(2)
     
     with col1:
         st.header("Operating Expenses")
-        expenses_df = pd.DataFrame({
-            "Expense": ["Purchase Loan P&I", "Property Insurance Insurance", "Property Taxes", "PM Fee", "All Other Operating Expenses"],
-            "Monthly Amount": [monthly_payment, annual_insurance/12, annual_property_tax/12, annual_pm_fee/12, comm_other_expenses/12],
-            "Annual Amount": [annual_debt_service, annual_insurance, annual_property_tax, annual_pm_fee, comm_other_expenses]
-        })
-        st.dataframe(expenses_df.style.format({"Monthly Amount": "${:,.2f}", "Annual Amount": "${:,.0f}"}), hide_index=True)
+        st.markdown(comm_outputs["expenses_table"])
         
         with st.expander("📋 Expense Notes"):
             st.write("**Property Insurance Insurance**: Rough estimate based on industry average. Double check this value for the specific property and zip code.")
             st.write("**PM Fee**: Prop Mgmt Fees on commercial properties are generally 3-4% of gross rents received/collected, with a minimum typically established.")
         
-        st.metric("Total Annual Operating Expenses", f"${annual_insurance + annual_property_tax + annual_pm_fee + comm_other_expenses:,.0f}")
+        st.metric("Total Annual Operating Expenses", f"${comm_results['total_operating_expenses']:,.0f}")
     
     with col2:
         st.header("Investment Analysis")
-        # Create Cash Down string with color
-        if total_cash_down <= 500000:
-            cash_down_display = f"${total_cash_down:,.0f}"
-        elif total_cash_down <= 750000:
-            cash_down_display = f"${total_cash_down:,.0f}"
-        else:
-            cash_down_display = f"${total_cash_down:,.0f}"
-            
-        analysis_df = pd.DataFrame({
-            "Metric": ["Annual Gross Rents", "Adjusted Gross Income", "Annual NOI (Estimated)", "Annual Debt Service", "Annual Cash Flow", "Cash-on-Cash Return", "Cash Down"],
-            "Amount": [
-                f"${comm_annual_gross_rents:,.0f}",
-                f"${comm_annual_gross_rents * (1 - comm_vacancy_rate/100):,.0f}",
-                f"${noi_estimated:,.0f}",
-                f"${annual_debt_service:,.0f}",
-                f"${annual_cash_flow:,.0f}",
-                f"{cash_on_cash_return:.1f}%",
-                cash_down_display
-            ]
-        })
-        st.dataframe(analysis_df, hide_index=True)
+        st.markdown(comm_outputs["analysis_table"])
     
     # Deal evaluation
     st.header("Deal Evaluation")
@@ -585,7 +959,8 @@ elif property_type == "Commercial":
     with summary_col1:
         st.metric("Purchase Price", f"${comm_purchase_price:,.0f}")
         st.metric("Down Payment", f"${amount_down:,.0f} ({comm_down_payment_pct}%)")
-        st.metric("Closing Costs", f"${closing_costs:,.0f}", help="closing costs @ 3%")
+        st.metric("Closing Costs", f"${closing_costs:,.0f}",
+                  help=f"closing costs @ {comm_outputs['closing_cost_rate'] * 100:g}% of purchase price")
         st.metric("Total Cash Investment", f"${total_cash_down:,.0f}")
     
     with summary_col2:
@@ -598,3 +973,57 @@ elif property_type == "Commercial":
             st.metric("Annual Cash Flow", f"${annual_cash_flow:,.0f}", delta="Positive cash flow", delta_color="normal")
         else:
             st.metric("Annual Cash Flow", f"${annual_cash_flow:,.0f}", delta="Negative cash flow", delta_color="inverse")
+    
+    # Deal Targets
+    with telemetry.section("targets"):
+        show_targets("commercial", commercial_inputs)
+    
+    # Sensitivity Analysis
+    show_sensitivity("commercial", commercial_inputs, commercial_key(commercial_inputs, prefix=""))
+    
+    # Risk Simulation
+    show_simulation("commercial", commercial_inputs, commercial_key(commercial_inputs, prefix=""))
+    
+    # Hold Projection
+    show_projection("commercial", commercial_inputs, commercial_key(commercial_inputs, prefix=""))
+    
+    # Amortization Schedule
+    show_amortization(cached_amortization(comm_loan_amount, comm_interest_rate_value, comm_loan_years))
+    show_lender_figures("commercial", commercial_inputs)
+    show_export("commercial", commercial_inputs)
+    
+    show_graph_debug(commercial_graph)
+
+# Short link for the current deal, stored on this server
+with st.sidebar:
+    st.header("Share")
+    if st.button("Create Short Link", help="The address bar link works too; this one is shorter"):
+        link_id = urlstate.store().save(urlstate.encode([params]))
+        st.code(f"{(st.context.url or '').split('?')[0]}?{urlstate.ID_PARAM}={link_id}", language=None)
+
+# Write the URL once per run, and not at all when nothing changed
+with telemetry.section("url_write"):
+    query = {urlstate.STATE_PARAM: urlstate.encode([params])}
+    if st.query_params.to_dict() != query:
+        st.query_params.from_dict(query)
+
+# Keep this session within its memory budget, least recently used objects first
+session_bytes, _ = memory.session_budget.enforce(st.session_state)
+
+# Profile panel (?profile=1): startup imports, time to first render and rerun times for this process
+startup.record_run(telemetry.end_run(session_bytes=session_bytes))
+telemetry.export()
+if "profile" in st.session_state.view_flags:
+    profile = startup.report()
+    with st.expander("⏱️ Startup Profile", expanded=True):
+        targets = profile["targets"]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("First Render", "n/a" if profile["first_render_s"] is None else f"{profile['first_render_s']:.2f} s",
+                    help=f"Process start to the end of its first script run (target {targets['first_render_s']:g} s)")
+        col2.metric("Median Rerun", "n/a" if profile["rerun_median_s"] is None else f"{profile['rerun_median_s'] * 1000:.0f} ms",
+                    help=f"Over {profile['reruns']} reruns in this process (target {targets['rerun_median_s'] * 1000:.0f} ms)")
+        col3.metric("This Run", f"{profile['last_run_s'] * 1000:.0f} ms")
+        st.caption("Within targets" if profile["within_targets"] else "⚠️ Over target")
+        st.markdown(markdown_table({"Import": list(profile["imports"]),
+                                    "Time (ms)": [seconds * 1000 for seconds in profile["imports"].values()]},
+                                   {"Time (ms)": "{:.1f}"}))
@@ -0,0 +1,159 @@
+"""Load generator for the JSON API (calculator.api).
+
+Opens a fixed number of keep-alive connections and fires randomized deals
+at one endpoint as fast as the server answers, then prints throughput and
+latency percentiles as JSON. Uses plain asyncio streams, so it needs nothing
+beyond the standard library and numpy.
+
+Usage:
+    python benchmarks/api_load.py --spawn --endpoint commercial --concurrency 64 --requests 20000
+    python benchmarks/api_load.py --url http://127.0.0.1:8600 --endpoint batch --batch-size 1000
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.parse
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from calculator import engine  # noqa: E402
+
+
+def random_deals(property_type, count, seed=0):
+    """App-style query params jittered around the calculator defaults"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    prefix = "" if property_type == "residential" else "comm_"
+    states = rng.choice(engine.states(), count)
+    scale = rng.uniform(0.7, 1.3, (count, len(defaults)))
+    deals = []
+    for i in range(count):
+        deal = {}
+        for j, (name, default) in enumerate(defaults.items()):
+            deal[f"{prefix}{name}"] = str(states[i]) if name == "state" else round(default * scale[i, j], 2)
+        deals.append(deal)
+    return deals
+
+
+def build_requests(endpoint, deals, batch_size, tables=True):
+    """Raw HTTP/1.1 request bytes, cycled through by the workers"""
+    if endpoint == "batch":
+        property_type = "residential" if "purchase_price" in deals[0] else "commercial"
+        bodies = [json.dumps({"property_type": property_type, "deals": deals[i:i + batch_size],
+                              "tables": tables}).encode()
+                  for i in range(0, len(deals), batch_size)]
+        return [(b"POST /batch HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 b"Content-Length: %d\r\n\r\n" % len(body)) + body for body in bodies]
+    return [f"GET /{endpoint}?{urllib.parse.urlencode(deal)} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode()
+            for deal in deals]
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _worker(host, port, requests, counter, total, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            index = counter[0]
+            if index >= total:
+                break
+            counter[0] += 1
+            start = time.perf_counter()
+            writer.write(requests[index % len(requests)])
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run_load(url, endpoint, requests, total, concurrency):
+    parsed = urllib.parse.urlparse(url)
+    latencies, errors, counter = [], [], [0]
+    start = time.perf_counter()
+    await asyncio.gather(*[_worker(parsed.hostname, parsed.port or 80, requests, counter, total, latencies, errors)
+                           for _ in range(concurrency)])
+    return time.perf_counter() - start, np.array(latencies), errors
+
+
+def wait_for_server(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=1) as response:
+                return json.loads(response.read())
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"API at {url} did not come up within {timeout}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the deal calculator JSON API")
+    parser.add_argument("--url", default="http://127.0.0.1:8600")
+    parser.add_argument("--endpoint", choices=["residential", "commercial", "batch"], default="residential")
+    parser.add_argument("--batch-type", choices=["residential", "commercial"], default="commercial",
+                        help="Property type of the deals sent to /batch")
+    parser.add_argument("--requests", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=500, help="Deals per /batch request")
+    parser.add_argument("--no-tables", action="store_true", help="Ask /batch for results only")
+    parser.add_argument("--spawn", action="store_true", help="Start calculator.api on --url's port for the run")
+    parser.add_argument("--output", help="Also write the JSON summary to this file")
+    args = parser.parse_args(argv)
+
+    server = None
+    if args.spawn:
+        port = urllib.parse.urlparse(args.url).port or 8600
+        server = subprocess.Popen([sys.executable, "-m", "calculator.api", "--port", str(port)],
+                                  cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    try:
+        wait_for_server(args.url)
+        property_type = args.batch_type if args.endpoint == "batch" else args.endpoint
+        deals = random_deals(property_type, 2_000 if args.endpoint != "batch" else args.batch_size * 4)
+        requests = build_requests(args.endpoint, deals, args.batch_size, not args.no_tables)
+        seconds, latencies, errors = asyncio.run(
+            run_load(args.url, args.endpoint, requests, args.requests, args.concurrency))
+        health = wait_for_server(args.url)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    deals_per_request = args.batch_size if args.endpoint == "batch" else 1
+    summary = {
+        "endpoint": args.endpoint,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "deals_per_request": deals_per_request,
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(args.requests / seconds, 1),
+        "deals_per_second": round(args.requests * deals_per_request / seconds, 1),
+        "latency_ms": {f"p{p}": round(float(np.percentile(latencies, p)) * 1000, 3) for p in (50, 90, 99)},
+        "errors": len(errors),
+        "server_batching": health["batching"],
+    }
+    print(json.dumps(summary, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""Streaming report exports: throughput, memory and the exported figures.
+
+For each format in calculator/export.py, exports each of --rows deal counts
+(half residential, half commercial, generated a chunk at a time so the
+source itself holds nothing) and reports deals per second, file size and
+the peak memory tracemalloc sees during the export. Exports are streamed,
+so the peak shouldn't grow with the deal count: exits non-zero if the
+largest run's peak is more than --memory-growth times the smallest run's
+(so each count should be at least 2 * export.CHUNK_ROWS, a full chunk of
+each property type).
+
+Also exports one deal of each type to .xlsx, reads its workbook-layout
+sheet back and checks every output cell against calculator.engine, and
+times submit() while a large export runs in the background, which is how
+long a Streamlit rerun waits for it.
+
+Usage:
+    python benchmarks/export.py [--rows 10000 100000] [--memory-growth 1.5]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import engine, export, workbook  # noqa: E402
+
+
+def deal_chunks(property_type, rows, chunk_rows=export.CHUNK_ROWS, seed=0):
+    """Deals jittered around the app defaults, generated chunk by chunk"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    for start in range(0, rows, chunk_rows):
+        size = min(chunk_rows, rows - start)
+        chunk = {name: default * rng.uniform(0.7, 1.3, size) for name, default in defaults.items() if name != "state"}
+        chunk["loan_years"] = rng.integers(10, 31, size)
+        chunk["state"] = rng.choice(engine.states(), size)
+        yield pd.DataFrame(chunk)
+
+
+def sources(rows):
+    return {"residential": deal_chunks("residential", rows // 2),
+            "commercial": deal_chunks("commercial", rows - rows // 2, seed=1)}
+
+
+def check_layout(directory):
+    """Export the default deal of each type to .xlsx and compare its layout sheet with the engine; returns problems"""
+    problems = []
+    for property_type, defaults in (("residential", engine.RESIDENTIAL_DEFAULTS),
+                                    ("commercial", engine.COMMERCIAL_DEFAULTS)):
+        path = os.path.join(directory, f"{property_type}.xlsx")
+        export.export(path, {property_type: [pd.DataFrame([{**defaults, "name": "Check"}])]})
+        with open(path, "rb") as f:
+            _, values, _, _, _ = workbook.read_xlsx(f.read())
+        expected = engine.as_scalars((engine.residential if property_type == "residential" else engine.commercial)(**defaults))
+        layout = workbook.LAYOUTS[property_type]
+        for name, (cell, scale) in layout["outputs"].items():
+            actual = values.get(f"Check!{cell}")
+            if actual is None or not math.isclose(actual * scale, expected[name], rel_tol=workbook.RTOL, abs_tol=workbook.ATOL):
+                problems.append(f"{property_type} layout sheet {cell} ({name}): {actual!r}, app {expected[name]!r}")
+        print(f"{property_type} layout sheet: {len(layout['outputs']) - len(problems)}/{len(layout['outputs'])} "
+              "outputs match the app")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark streaming exports and check the exported figures")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000], help="Deal counts to export")
+    parser.add_argument("--memory-growth", type=float, default=1.5,
+                        help="Largest acceptable ratio of the biggest export's peak memory to the smallest's")
+    args = parser.parse_args(argv)
+
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["PROPERTY_CALC_EXPORTS"] = directory
+        problems += check_layout(directory)
+
+        for kind in export.FORMATS:
+            peaks = {}
+            for rows in sorted(args.rows):
+                path = os.path.join(directory, f"deals{kind}")
+                tracemalloc.start()
+                start = time.perf_counter()
+                export.export(path, sources(rows))
+                seconds = time.perf_counter() - start
+                peaks[rows] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                print(f"{export.FORMATS[kind]:>5} {rows:>9,} deals: {rows / seconds:10,.0f} deals/s   "
+                      f"{os.path.getsize(path) / 2**20:8.1f} MB file   peak memory {peaks[rows] / 2**20:6.1f} MB")
+            smallest, largest = peaks[min(peaks)], peaks[max(peaks)]
+            if largest > args.memory_growth * smallest:
+                problems.append(f"{export.FORMATS[kind]}: peak memory grew from {smallest / 2**20:.1f} MB to "
+                                f"{largest / 2**20:.1f} MB with the deal count")
+
+        rows = max(args.rows)
+        start = time.perf_counter()
+        job = export.submit(sources(rows), "background.xlsx", total=rows)
+        submitted = time.perf_counter() - start
+        while job.status == "running":
+            time.sleep(0.05)
+        print(f"background: submit() returned in {submitted * 1000:.1f} ms; {rows:,} deals written in "
+              f"{job.finished - job.started:.1f} s ({job.status})")
+        if job.status != "done":
+            problems.append(f"background export failed: {job.error}")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
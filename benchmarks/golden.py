@@ -0,0 +1,419 @@
+"""Golden-value regression harness.
+
+Four layers of checks, all run by default:
+
+1. Workbook checks: loads the default scenario from each bundled Excel
+   workbook (the cached values Excel last calculated), evaluates the same
+   inputs with the calculator and compares every computed cell: expenses,
+   cash flows, NOI, returns, the state rate tables and the full monthly
+   amortization schedule.
+2. Snapshot checks: evaluates a fixed set of deals (the app defaults in
+   every state plus a seeded random batch) and compares every engine output
+   and amortization total with benchmarks/golden_values.json. Run with
+   --update after an intentional change to a formula or the bundled rates.
+3. Graph checks: runs the same deals through the app's incremental
+   calculation graph (calculator/graph.py) and compares them with the
+   engine's, then edits a rate without bumping the table's version label
+   and checks the same graph and the cache keys pick the edit up.
+4. Solver checks: the highest break-even interest rate for the same deals,
+   put back into the engine, must give break-even cash flow; with no loan
+   (100% down) it is the top of the bracket when the deal breaks even and
+   unreachable (nan) when it doesn't.
+
+Exits non-zero if any value differs, so performance work can prove it
+hasn't changed a number.
+
+Usage:
+    python benchmarks/golden.py [--update] [--report report.json]
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import amortization, cache, engine, graph, rates, solvers  # noqa: E402
+
+RESIDENTIAL_WORKBOOK = os.path.join(ROOT, "Residential_Prop_Screening_Tool.xlsx")
+COMMERCIAL_WORKBOOK = os.path.join(ROOT, "Commercial_Prop_Screening_Tool.xlsx")
+SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden_values.json")
+
+# Excel keeps 15 significant digits
+WORKBOOK_RTOL = 1e-9
+WORKBOOK_ATOL = 1e-6
+# Same code, same machine: only last-bit differences from vectorization are allowed
+SNAPSHOT_RTOL = 1e-12
+SOLVER_ATOL = 0.01  # dollars of cash flow left at a solved rate (the bisection stops at 1e-9 %)
+
+
+class Checker:
+    """Collects named value comparisons"""
+
+    def __init__(self, rtol, atol=0.0):
+        self.rtol = rtol
+        self.atol = atol
+        self.results = []
+
+    def check(self, name, actual, expected):
+        actual, expected = float(actual), float(expected)
+        if math.isnan(expected):
+            ok = math.isnan(actual)
+        else:
+            ok = math.isclose(actual, expected, rel_tol=self.rtol, abs_tol=self.atol)
+        self.results.append({"name": name, "actual": actual, "expected": expected, "ok": ok})
+        return ok
+
+    def check_array(self, name, actual, expected):
+        actual, expected = np.asarray(actual, dtype=float), np.asarray(expected, dtype=float)
+        same_shape = actual.shape == expected.shape
+        ok = same_shape and bool(np.allclose(actual, expected, rtol=self.rtol, atol=self.atol, equal_nan=True))
+        worst = float(np.nanmax(np.abs(actual - expected))) if same_shape and actual.size else float("nan")
+        self.results.append({"name": name, "actual": f"{actual.size} values", "expected": f"max abs diff {worst:.3g}",
+                             "ok": ok})
+        return ok
+
+    @property
+    def failures(self):
+        return [result for result in self.results if not result["ok"]]
+
+
+def _load(path):
+    import openpyxl
+
+    with warnings.catch_warnings():
+        # The workbooks' print headers use codes openpyxl can't parse
+        warnings.simplefilter("ignore")
+        return openpyxl.load_workbook(path, data_only=True)
+
+
+def _rate_table(sheet, column):
+    """State -> rate from the lookup table in P2:Q7"""
+    return {sheet[f"P{row}"].value.upper(): sheet[f"{column}{row}"].value for row in range(2, 8)}
+
+
+def _schedule_rows(sheet, first_row, payments):
+    rows = [[sheet.cell(row, column).value for column in range(4, 9)]
+            for row in range(first_row, first_row + payments)]
+    # Beginning balance, payment, principal, interest, ending balance
+    return np.array(rows, dtype=float).T
+
+
+def check_amortization(checker, prefix, sheet, loan_amount, interest_rate, loan_years):
+    monthly = amortization.schedule(loan_amount, interest_rate, loan_years)
+    payments = int(loan_years * 12)
+    beginning, payment, principal, interest, ending = _schedule_rows(sheet, 13, payments)
+    checker.check_array(f"{prefix} amortization payment (E13:E{12 + payments})",
+                        monthly["principal"][0] + monthly["interest"][0], payment)
+    checker.check_array(f"{prefix} amortization beginning balance (D13:D{12 + payments})",
+                        monthly["balance"][0] + monthly["principal"][0], beginning)
+    checker.check_array(f"{prefix} amortization principal (F13:F{12 + payments})", monthly["principal"][0], principal)
+    checker.check_array(f"{prefix} amortization interest (G13:G{12 + payments})", monthly["interest"][0], interest)
+    checker.check_array(f"{prefix} amortization balance (H13:H{12 + payments})", monthly["balance"][0], ending)
+    checker.check(f"{prefix} total interest (E10)", monthly["cumulative_interest"][0, -1], sheet["E10"].value)
+    checker.check(f"{prefix} total cost of loan (E11)",
+                  monthly["cumulative_interest"][0, -1] + monthly["cumulative_principal"][0, -1], sheet["E11"].value)
+
+
+def check_residential_workbook(checker):
+    sheet = _load(RESIDENTIAL_WORKBOOK)["BuyRent Calculator"]
+    table = rates.current()
+    for state, rate in _rate_table(sheet, "O").items():
+        checker.check(f"residential tax rate {state}", table.lookup("residential_tax_rate", state), rate)
+
+    deal = {
+        "purchase_price": sheet["H3"].value,
+        "down_payment": sheet["H5"].value * 100,
+        "interest_rate": sheet["E4"].value * 100,
+        "loan_years": sheet["E5"].value,
+        "monthly_rent": sheet["K4"].value,
+        "state": sheet["H1"].value.upper(),
+    }
+    results = engine.as_scalars(engine.residential(**deal))
+    cells = {
+        "amount_down": "H4",
+        "loan_amount": "E3",
+        "monthly_pi": "H7",
+        "monthly_insurance": "H8",
+        "monthly_tax": "H9",
+        "pm_fee": "H10",
+        "maintenance": "H11",
+        "total_monthly": "E8",
+        "cash_flow_75": "K10",
+        "cash_flow_90": "L10",
+        "cash_flow_100": "M10",
+    }
+    for name, cell in cells.items():
+        checker.check(f"residential {name} ({cell})", results[name], sheet[cell].value)
+
+    # The workbook's ROI (K12:L12) is over cash down including 3% closing
+    # costs (J12); the app reports ROI over the down payment alone
+    cash_down = results["amount_down"] + deal["purchase_price"] * table.lookup("closing_cost_rate", deal["state"])
+    checker.check("residential cash down (J12)", cash_down, sheet["J12"].value)
+    for occupancy, cell in (("75", "K12"), ("90", "L12")):
+        workbook_roi = results[f"annual_roi_{occupancy}"] / 100 * results["amount_down"] / cash_down
+        checker.check(f"residential annual_roi_{occupancy} over cash down ({cell})", workbook_roi, sheet[cell].value)
+
+    check_amortization(checker, "residential", sheet, results["loan_amount"], deal["interest_rate"], deal["loan_years"])
+    return deal
+
+
+def check_commercial_workbook(checker):
+    sheet = _load(COMMERCIAL_WORKBOOK)["Apartment Investment"]
+    table = rates.current()
+    for state, rate in _rate_table(sheet, "O").items():
+        checker.check(f"commercial tax rate {state}", table.lookup("commercial_tax_rate", state), rate)
+    for state, rate in _rate_table(sheet, "Q").items():
+        checker.check(f"commercial insurance rate {state}", table.lookup("commercial_insurance_rate", state), rate)
+
+    deal = {
+        "purchase_price": sheet["H3"].value,
+        "down_payment": sheet["H5"].value * 100,
+        "annual_gross_rents": sheet["K4"].value,
+        "annual_noi_listing": sheet["L4"].value,
+        "vacancy_rate": sheet["L5"].value * 100,
+        "other_expenses": sheet["J11"].value,
+        "interest_rate": sheet["E4"].value * 100,
+        "loan_years": sheet["E5"].value,
+        "state": sheet["H1"].value.upper(),
+    }
+    results = engine.as_scalars(engine.commercial(**deal))
+    cells = {
+        "amount_down": "H4",
+        "loan_amount": "E3",
+        "closing_costs": "J3",
+        "monthly_payment": "H7",
+        "annual_debt_service": "J7",
+        "annual_insurance": "J8",
+        "annual_property_tax": "J9",
+        "annual_pm_fee": "J10",
+        "other_expenses": "J11",
+        "noi_estimated": "M4",
+        "annual_cash_flow": "L10",
+        "total_cash_down": "L11",
+    }
+    for name, cell in cells.items():
+        checker.check(f"commercial {name} ({cell})", results[name], sheet[cell].value)
+    checker.check("commercial cash_on_cash_return (L12)", results["cash_on_cash_return"] / 100, sheet["L12"].value)
+    checker.check("commercial total monthly (E8)",
+                  results["monthly_payment"] + results["total_operating_expenses"] / 12, sheet["E8"].value)
+
+    check_amortization(checker, "commercial", sheet, results["loan_amount"], deal["interest_rate"], deal["loan_years"])
+    return deal
+
+
+def snapshot_deals(workbook_deals):
+    """The fixed scenario set: app defaults in every state, the workbook scenarios and a seeded batch"""
+    rng = np.random.default_rng(20240301)
+    deals = {}
+    for property_type, defaults in (("residential", engine.RESIDENTIAL_DEFAULTS),
+                                    ("commercial", engine.COMMERCIAL_DEFAULTS)):
+        rows = [{**defaults, "state": state} for state in engine.states()]
+        rows.append(workbook_deals[property_type])
+        for _ in range(50):
+            row = {name: round(value * rng.uniform(0.5, 1.5), 2) for name, value in defaults.items() if name != "state"}
+            row["loan_years"] = int(rng.integers(5, 31))
+            row["state"] = str(rng.choice(engine.states()))
+            rows.append(row)
+        deals[property_type] = rows
+    return deals
+
+
+def snapshot_values(deals):
+    """Every engine output plus amortization totals for the snapshot deals"""
+    values = {}
+    for property_type, rows in deals.items():
+        evaluate = engine.residential if property_type == "residential" else engine.commercial
+        columns = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+        results = evaluate(**columns)
+        outputs = {name: np.asarray(value, dtype=float).tolist() for name, value in results.items()}
+        monthly = amortization.schedule(results["loan_amount"], columns["interest_rate"], columns["loan_years"])
+        outputs["total_interest"] = monthly["cumulative_interest"][:, -1].tolist()
+        outputs["final_balance"] = monthly["balance"][:, -1].tolist()
+        values[property_type] = {"deals": rows, "outputs": outputs}
+    return values
+
+
+def check_snapshot(checker, values, expected):
+    for property_type, snapshot in expected.items():
+        if snapshot["deals"] != values[property_type]["deals"]:
+            checker.results.append({"name": f"{property_type} snapshot deals", "actual": "changed",
+                                    "expected": "run with --update", "ok": False})
+            continue
+        for name, expected_values in snapshot["outputs"].items():
+            actual = values[property_type]["outputs"].get(name)
+            if actual is None:
+                checker.results.append({"name": f"{property_type} {name}", "actual": "missing",
+                                        "expected": f"{len(expected_values)} values", "ok": False})
+                continue
+            checker.check_array(f"{property_type} {name} ({len(expected_values)} deals)", actual, expected_values)
+
+
+def check_graph(checker, deals):
+    """The app's calculation graph against the engine, one deal after another through the same graph
+
+    Reusing one graph means most deals only recompute some cells, so this
+    also catches a stale cell that should have been invalidated.
+    """
+    for property_type, rows in deals.items():
+        evaluate = engine.residential if property_type == "residential" else engine.commercial
+        deal_graph = graph.residential_graph() if property_type == "residential" else graph.commercial_graph()
+        columns = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+        expected = evaluate(**columns)
+        actual = {name: [] for name in expected}
+        for row in rows:
+            graph.set_deal(deal_graph, row)
+            for name, value in deal_graph["results"].items():
+                actual[name].append(value)
+        for name, values in expected.items():
+            checker.check_array(f"{property_type} graph {name} ({len(rows)} deals)", actual[name], values)
+
+
+def check_rate_edit(checker, deals):
+    """An edited rate with the same version label must reach warm graphs and change cache keys"""
+    table = rates.current()
+    frame = rates.read_frame(table.source)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rates.csv")
+        frame.to_csv(path, index=False)
+        rates.use(path)
+        try:
+            graphs = {"residential": graph.residential_graph(), "commercial": graph.commercial_graph()}
+            keys = {"residential": cache.residential_key(deals["residential"][0]),
+                    "commercial": cache.commercial_key(deals["commercial"][0], prefix="")}
+            for property_type, rows in deals.items():
+                graph.set_deal(graphs[property_type], rows[0])
+                graphs[property_type]["results"]
+            frame[rates.RATE_FIELDS] = frame[rates.RATE_FIELDS] + 0.001
+            frame.to_csv(path, index=False)
+            edited = rates.reload()
+            checker.check("edited rates keep the version label", edited.version == table.version, True)
+            for property_type, rows in deals.items():
+                evaluate = engine.residential if property_type == "residential" else engine.commercial
+                graph.set_deal(graphs[property_type], rows[0])
+                for name, value in evaluate(**rows[0]).items():
+                    checker.check(f"{property_type} graph {name} after a rate edit", graphs[property_type]["results"][name],
+                                  value)
+                key = (cache.residential_key(rows[0]) if property_type == "residential"
+                       else cache.commercial_key(rows[0], prefix=""))
+                checker.check(f"{property_type} cache key changes with a rate edit", key != keys[property_type], True)
+        finally:
+            rates.use(table.source)
+
+
+def check_solvers(checker, deals):
+    """max_interest_rate against the engine, its no-loan edge cases and the required down payment"""
+    for property_type, rows in deals.items():
+        evaluate = engine.residential if property_type == "residential" else engine.commercial
+        # What max_interest_rate holds at break-even
+        metric = "cash_flow_75" if property_type == "residential" else "annual_cash_flow"
+        columns = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+        rate = solvers.max_interest_rate(property_type, columns)
+        solved = (rate > 0) & (rate < solvers.MAX_RATE)
+        if solved.any():
+            at_rate = evaluate(**{name: values[solved] for name, values in columns.items()} | {"interest_rate": rate[solved]})
+            checker.check_array(f"{property_type} break-even at the max rate ({solved.sum()} deals)",
+                                at_rate[metric], np.zeros(solved.sum()))
+
+        rent = "monthly_rent" if property_type == "residential" else "annual_gross_rents"
+        no_loan = dict(rows[0], down_payment=100.0)
+        for label, income in (("breaks even", rows[0][rent] * 10), ("loses money", 1.0)):
+            deal = dict(no_loan, **{rent: income})
+            expected = solvers.MAX_RATE if evaluate(**deal)[metric] >= 0 else math.nan
+            checker.check(f"{property_type} 100% down, {label}", solvers.max_interest_rate(property_type, deal), expected)
+
+    check_required_down(checker, deals["commercial"] + [dict(engine.COMMERCIAL_DEFAULTS),
+                                                        dict(engine.COMMERCIAL_DEFAULTS, purchase_price=1_200_000)])
+
+
+def check_required_down(checker, rows):
+    """commercial_required_down_payment against the engine, with targets on both sides of the loan constant
+
+    Cash-on-cash is monotonic in the down payment, so the engine at 0% and
+    100% down says whether the answer is 0, nan or in between; in between, the
+    engine at the solved down payment must return the target.
+    """
+    columns = {name: np.array([row[name] for row in rows]) for name in rows[0]}
+    loan_constant = 12 * solvers.payment_factor(columns["interest_rate"], columns["loan_years"]) * 100
+
+    def cash_on_cash(down):
+        return engine.commercial(**columns | {"down_payment": down})["cash_on_cash_return"]
+
+    at_zero, at_full = cash_on_cash(np.zeros(len(rows))), cash_on_cash(np.full(len(rows), 100.0))
+    for label, target in (("break-even", np.zeros(len(rows))),
+                          ("below the loan constant", loan_constant - 2),
+                          ("at the loan constant", loan_constant),
+                          ("above the loan constant", loan_constant + 2),
+                          ("20% target", np.full(len(rows), 20.0))):
+        down = solvers.commercial_required_down_payment(
+            columns["purchase_price"], columns["annual_gross_rents"], columns["vacancy_rate"],
+            columns["other_expenses"], columns["interest_rate"], columns["loan_years"], columns["state"], target)
+        expected = np.where(at_zero >= target, 0.0, np.where(at_full < target, np.nan, down))
+        checker.check_array(f"commercial required down payment, {label}", down, expected)
+        between = (down > 0) & (down <= 100)
+        if between.any():
+            checker.check_array(f"commercial cash-on-cash at the required down payment, {label} ({between.sum()} deals)",
+                                cash_on_cash(np.where(between, down, 0.0))[between], target[between])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check calculator results against the workbooks and the golden snapshot")
+    parser.add_argument("--update", action="store_true", help="Rewrite golden_values.json from the current code")
+    parser.add_argument("--report", help="Write every check to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="List passing checks too")
+    parser.add_argument("--rates", default=rates.DEFAULT_PATH,
+                        help="Rate table to check (default: the bundled one the snapshot was built from)")
+    args = parser.parse_args(argv)
+    rates.use(args.rates)
+
+    workbook = Checker(WORKBOOK_RTOL, WORKBOOK_ATOL)
+    workbook_deals = {
+        "residential": check_residential_workbook(workbook),
+        "commercial": check_commercial_workbook(workbook),
+    }
+
+    values = snapshot_values(snapshot_deals(workbook_deals))
+    snapshot = Checker(SNAPSHOT_RTOL)
+    if args.update:
+        with open(SNAPSHOT, "w") as f:
+            json.dump(values, f, indent=1)
+        print(f"Wrote {os.path.relpath(SNAPSHOT, ROOT)}")
+    elif not os.path.exists(SNAPSHOT):
+        parser.error(f"{SNAPSHOT} not found; run with --update to create it")
+    else:
+        with open(SNAPSHOT) as f:
+            check_snapshot(snapshot, values, json.load(f))
+
+    # The graph repeats the engine's operations one deal at a time, so the
+    # batch's vectorized powers can still differ in the last bit
+    deal_graph = Checker(SNAPSHOT_RTOL)
+    check_graph(deal_graph, snapshot_deals(workbook_deals))
+    check_rate_edit(deal_graph, snapshot_deals(workbook_deals))
+
+    solver = Checker(0.0, SOLVER_ATOL)
+    check_solvers(solver, snapshot_deals(workbook_deals))
+
+    failures = workbook.failures + snapshot.failures + deal_graph.failures + solver.failures
+    for label, checker in (("Workbook", workbook), ("Snapshot", snapshot), ("Graph", deal_graph), ("Solver", solver)):
+        passed = len(checker.results) - len(checker.failures)
+        print(f"{label} checks: {passed}/{len(checker.results)} passed")
+        for result in checker.results:
+            if args.verbose or not result["ok"]:
+                mark = "ok  " if result["ok"] else "FAIL"
+                print(f"  {mark} {result['name']}: {result['actual']} vs {result['expected']}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"workbook": workbook.results, "snapshot": snapshot.results, "graph": deal_graph.results,
+                       "solver": solver.results}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Offline checks for listing ingestion (calculator/listings.py).
+
+Serves the saved listing pages in benchmarks/fixtures/listings from a local
+stub server, points the fetcher at it with ``resolve`` and checks:
+
+- every parser extracts the expected sidebar fields and app parameters
+- duplicate URLs are fetched once and redirects are followed
+- no more than --connections requests are in flight at once, and requests
+  to one host start at least --interval seconds apart
+- repeating the successful lookups is served from the cache (no requests)
+- bumping PARSER_VERSION re-parses cached pages without fetching them
+- identical pages are stored once in the content-addressed cache
+- a redirect off the listing's site is refused before anything is fetched
+- oversized pages are refused while they are read (by Content-Length, by
+  counting chunks, without a length) and compressed pages can't inflate
+  past the page limit
+
+Exits non-zero if any check fails. Needs no network access.
+
+Usage:
+    python benchmarks/listings_check.py [--verbose]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import listings  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "listings")
+REDIRECT_URL = "https://www.loopnet.com/moved/31234567"
+MISSING_URL = "https://www.zillow.com/homedetails/missing/1_zpid/"
+UNSUPPORTED_URL = "https://www.example.com/listing/1"
+OFFSITE_URL = "https://www.loopnet.com/offsite/1"
+
+
+class StubServer:
+    """Serves one fixture per listing host, in a different transfer style for each"""
+
+    def __init__(self, expected):
+        self.pages = {}
+        for url, case in expected.items():
+            with open(os.path.join(FIXTURES, case["fixture"]), "rb") as f:
+                self.pages[url.split("/")[2]] = (url.split("/", 3)[3], f.read())
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1].lstrip("/")
+                host = next(line.split(":", 1)[1].strip() for line in lines if line.lower().startswith("host:"))
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+                self.requests.append((host, path, time.monotonic()))
+                await asyncio.sleep(0.01)
+                writer.write(self._response(host, path))
+                await writer.drain()
+                self.active -= 1
+        finally:
+            writer.close()
+
+    def _response(self, host, path):
+        expected_path, page = self.pages.get(host, ("", b""))
+        if f"https://{host}/{path}" == OFFSITE_URL:
+            return f"HTTP/1.1 302 Found\r\nLocation: {UNSUPPORTED_URL}\r\nContent-Length: 0\r\n\r\n".encode()
+        if f"https://{host}/{path}" == REDIRECT_URL:
+            return (f"HTTP/1.1 301 Moved Permanently\r\nLocation: /{expected_path}\r\n"
+                    f"Content-Length: 0\r\n\r\n").encode()
+        if path != expected_path:
+            return b"HTTP/1.1 404 Not Found\r\nContent-Length: 9\r\n\r\nnot found"
+        if "zillow" in host:
+            body = gzip.compress(page)
+            return (f"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: {len(body)}\r\n\r\n").encode() + body
+        if "crexi" in host:
+            chunks = [page[i:i + 500] for i in range(0, len(page), 500)]
+            return (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+                    + b"".join(b"%x\r\n%s\r\n" % (len(chunk), chunk) for chunk in chunks) + b"0\r\n\r\n")
+        return f"HTTP/1.1 200 OK\r\nContent-Length: {len(page)}\r\n\r\n".encode() + page
+
+
+class Checks:
+    def __init__(self):
+        self.results = []
+
+    def check(self, name, ok, detail=""):
+        self.results.append({"name": name, "ok": bool(ok), "detail": detail})
+
+    @property
+    def failures(self):
+        return [result for result in self.results if not result["ok"]]
+
+
+async def run(checks, expected, connections, interval):
+    stub = StubServer(expected)
+    port = await stub.start()
+    resolve = {host: ("127.0.0.1", port, False) for host in stub.pages}
+    urls = list(expected) + [REDIRECT_URL, MISSING_URL, UNSUPPORTED_URL, list(expected)[0]]
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            cache = listings.ListingCache(directory)
+
+            def fetcher():
+                return listings.Fetcher(max_connections=connections, per_host=2, min_interval=interval,
+                                        timeout=5, resolve=resolve)
+
+            results = await listings.fetch_listings(urls, listing_cache=cache, fetcher=fetcher())
+            by_url = {result["url"]: result for result in results}
+            for url, case in expected.items():
+                site = by_url[url]["site"]
+                checks.check(f"{site} fields", by_url[url]["fields"] == case["fields"], by_url[url]["fields"])
+                params = listings.to_params(by_url[url]["fields"])
+                checks.check(f"{site} params", params == case["params"], params)
+            checks.check("redirect followed", by_url[REDIRECT_URL]["fields"] == by_url[list(expected)[0]]["fields"],
+                         by_url[REDIRECT_URL])
+            checks.check("HTTP errors reported", by_url[MISSING_URL]["error"] == "HTTP 404", by_url[MISSING_URL])
+            checks.check("unsupported site reported", by_url[UNSUPPORTED_URL]["error"] is not None
+                         and not by_url[UNSUPPORTED_URL]["fields"], by_url[UNSUPPORTED_URL])
+            checks.check("results in request order", [result["url"] for result in results] == urls)
+
+            # 3 listings + redirect (2 requests) + missing page; the duplicate URL is not fetched again
+            checks.check("duplicates fetched once", len(stub.requests) == 6, len(stub.requests))
+            checks.check("connection limit", stub.max_active <= connections, stub.max_active)
+            gaps = []
+            for host in stub.pages:
+                starts = sorted(started for requested_host, _, started in stub.requests if requested_host == host)
+                gaps += [later - earlier for earlier, later in zip(starts, starts[1:])]
+            # A little slack for timer resolution
+            checks.check("per-host interval", min(gaps) >= interval * 0.9, f"shortest gap {min(gaps):.3f}s")
+
+            before = len(stub.requests)
+            offsite = await listings.fetch_listings([OFFSITE_URL], listing_cache=cache, fetcher=fetcher())
+            checks.check("redirect off the site refused", "Redirected off" in (offsite[0]["error"] or "")
+                         and len(stub.requests) == before + 1, offsite[0])
+
+            # Failed lookups are not cached, so only the successful ones are repeated
+            before = len(stub.requests)
+            again = await listings.fetch_listings(list(expected) + [REDIRECT_URL], listing_cache=cache,
+                                                  fetcher=fetcher())
+            checks.check("repeat lookups use the cache", len(stub.requests) == before
+                         and all(result["cached"] for result in again), len(stub.requests) - before)
+
+            listings.PARSER_VERSION += 1
+            try:
+                reparsed = await listings.fetch_listings(list(expected), listing_cache=cache, fetcher=fetcher())
+            finally:
+                listings.PARSER_VERSION -= 1
+            checks.check("new parser version re-parses without fetching", len(stub.requests) == before
+                         and [result["fields"] for result in reparsed] == [case["fields"] for case in expected.values()])
+
+            pages = sum(len(files) for _, _, files in os.walk(os.path.join(directory, "pages")))
+            checks.check("identical pages stored once", pages == len(expected), pages)
+    finally:
+        await stub.stop()
+
+
+async def read_limited(response, limit):
+    """listings._read_response on canned bytes with a page limit of limit; the error, or None"""
+    reader = asyncio.StreamReader()
+    reader.feed_data(response)
+    reader.feed_eof()
+    saved, listings.MAX_PAGE_BYTES = listings.MAX_PAGE_BYTES, limit
+    try:
+        await listings._read_response(reader)
+    except listings.ListingError as e:
+        return str(e)
+    finally:
+        listings.MAX_PAGE_BYTES = saved
+    return None
+
+
+async def size_limits(checks):
+    limit = 10_000
+    # No body follows: reading it would raise IncompleteReadError, so this passes only if refused up front
+    error = await read_limited(b"HTTP/1.1 200 OK\r\nContent-Length: 10000000000\r\n\r\n", limit)
+    checks.check("Content-Length over the limit refused", error == "Listing page is too large", error)
+    # Chunks past the limit, then a truncated stream: refused once the count passes the limit
+    chunked = (b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+               + b"%x\r\n%s\r\n" % (6_000, b"x" * 6_000) * 2 + b"%x\r\n" % 6_000)
+    error = await read_limited(chunked, limit)
+    checks.check("chunked body over the limit refused", error == "Listing page is too large", error)
+    error = await read_limited(b"HTTP/1.1 200 OK\r\nConnection: close\r\n\r\n" + b"x" * (limit + 1), limit)
+    checks.check("unsized body over the limit refused", error == "Listing page is too large", error)
+    bomb = gzip.compress(b"0" * 1_000_000)
+    error = await read_limited(b"HTTP/1.1 200 OK\r\nContent-Encoding: gzip\r\nContent-Length: %d\r\n\r\n%s"
+                               % (len(bomb), bomb), limit)
+    checks.check(f"{len(bomb):,}-byte gzip inflating to 1 MB refused", error == "Listing page is too large", error)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check listing ingestion offline against saved pages")
+    parser.add_argument("--connections", type=int, default=2)
+    parser.add_argument("--interval", type=float, default=0.2, help="Seconds between requests to one host")
+    parser.add_argument("--verbose", action="store_true", help="List passing checks too")
+    args = parser.parse_args(argv)
+
+    with open(os.path.join(FIXTURES, "expected.json")) as f:
+        expected = json.load(f)
+    checks = Checks()
+    asyncio.run(run(checks, expected, args.connections, args.interval))
+    asyncio.run(size_limits(checks))
+
+    print(f"Listing checks: {len(checks.results) - len(checks.failures)}/{len(checks.results)} passed")
+    for result in checks.results:
+        if args.verbose or not result["ok"]:
+            print(f"  {'ok  ' if result['ok'] else 'FAIL'} {result['name']}: {result['detail']}")
+    return 1 if checks.failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""Float screening mode vs exact-cents mode.
+
+Evaluates the same random deals (plus 0% rate, 100% down and no-down edge
+cases) with calculator.engine (float64, vectorized) and calculator.exact
+(Decimal, cents, one deal at a time), and reports:
+
+- throughput of each mode in deals per second
+- the largest difference between the modes for every output, in dollars
+  (percentage points for returns)
+
+Exits non-zero when a money output differs by more than --tolerance dollars,
+or when either mode gives a non-finite result for a deal with a down payment.
+
+Usage:
+    python benchmarks/precision.py [--rows 10000] [--tolerance 0.10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import engine, exact  # noqa: E402
+from benchmarks.run import random_frame  # noqa: E402
+
+RETURNS = {"annual_roi_75", "annual_roi_90", "annual_roi_100", "cash_on_cash_return"}
+FLAGS = {"profitable", "good_deal"}
+
+
+def deals(property_type, rows):
+    # Whole-year terms, as on real loans
+    frame = random_frame(property_type, rows).assign(loan_years=lambda df: df["loan_years"].round())
+    edges = frame.head(3).copy()
+    edges["interest_rate"] = [0.0, 6.5, 0.0]
+    edges["down_payment"] = [20.0, 100.0, 100.0]
+    return pd.concat([frame, edges], ignore_index=True)
+
+
+def timed(func, frame):
+    start = time.perf_counter()
+    result = func(frame)
+    return result, time.perf_counter() - start
+
+
+def compare(property_type, frame, tolerance):
+    fast, fast_s = timed(engine.residential_frame if property_type == "residential" else engine.commercial_frame, frame)
+    precise, exact_s = timed(exact.residential_frame if property_type == "residential" else exact.commercial_frame, frame)
+    print(f"{property_type}: {len(frame):,} deals")
+    print(f"  float  {len(frame) / fast_s:12,.0f} deals/s")
+    print(f"  exact  {len(frame) / exact_s:12,.0f} deals/s  ({exact_s / fast_s:.0f}x slower)")
+
+    problems = []
+    has_down = frame["down_payment"].to_numpy() > 0
+    for name in precise.columns.difference(frame.columns):
+        if name in FLAGS:
+            flipped = int((fast[name].to_numpy() != precise[name].to_numpy().astype(bool)).sum())
+            print(f"  {name:26s} {flipped} deal(s) classified differently")
+            continue
+        a = fast[name].to_numpy(dtype=float)
+        b = precise[name].to_numpy(dtype=float)
+        finite = np.isfinite(a) & np.isfinite(b)
+        deviation = float(np.abs(a - b)[finite].max())
+        unit = "pts" if name in RETURNS else "$"
+        print(f"  {name:26s} max deviation {deviation:.6f} {unit}")
+        if not (np.isfinite(a) & np.isfinite(b))[has_down].all():
+            problems.append(f"{property_type} {name}: non-finite value")
+        if name not in RETURNS and deviation > tolerance:
+            problems.append(f"{property_type} {name}: {deviation:.4f} > {tolerance}")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the float and exact-cents calculation modes")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Largest acceptable money deviation in dollars")
+    args = parser.parse_args(argv)
+
+    problems = []
+    for property_type in ("residential", "commercial"):
+        problems += compare(property_type, deals(property_type, args.rows), args.tolerance)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
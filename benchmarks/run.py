@@ -0,0 +1,307 @@
+"""Benchmark suite for the calculators.
+
+Times single-deal latency, full app.py script runs for both property types,
+batch throughput at 1k/100k/1M deals, amortization schedules, the exact-cents
+path next to the float one, deals evaluated through the bundled workbooks,
+Excel/PDF/CSV report exports, the deal store, the parallel scenario runner and
+the Monte Carlo simulation. Each run is saved as JSON under benchmarks/results/
+(with the git commit and environment) so runs can be compared over time:
+
+    python benchmarks/run.py                       # full suite
+    python benchmarks/run.py --quick               # skip the 1M-deal and 100k-path cases
+    python benchmarks/run.py --only batch          # cases whose name contains "batch"
+    python benchmarks/run.py --compare benchmarks/results/<earlier>.json
+
+--compare exits non-zero when a case is slower than --threshold times the
+earlier run.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import amortization, engine, exact, export, scenarios, simulation, store, workbook  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def measure(func, repeat=5, number=1):
+    """Best-of and median wall time per call over repeat rounds of number calls"""
+    func()  # warm-up (imports, caches)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter() - start) / number)
+    return {"median_s": float(np.median(times)), "min_s": float(min(times)), "repeat": repeat, "number": number}
+
+
+def random_frame(property_type, rows, seed=0):
+    """Deals jittered around the app defaults, in the batch screening column layout"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    columns = {}
+    for name, default in defaults.items():
+        if name == "state":
+            columns[name] = rng.choice(engine.states(), rows)
+        else:
+            columns[name] = default * rng.uniform(0.7, 1.3, rows)
+    return pd.DataFrame(columns)
+
+
+def single_deal_cases():
+    residential = dict(engine.RESIDENTIAL_DEFAULTS)
+    commercial = dict(engine.COMMERCIAL_DEFAULTS)
+    return {
+        "single_deal.residential": (lambda: engine.as_scalars(engine.residential(**residential)), {"number": 1000}),
+        "single_deal.commercial": (lambda: engine.as_scalars(engine.commercial(**commercial)), {"number": 1000}),
+    }
+
+
+def batch_cases(quick):
+    cases = {}
+    for rows in ([1_000, 100_000] if quick else [1_000, 100_000, 1_000_000]):
+        for property_type, evaluate in (("residential", engine.residential_frame),
+                                        ("commercial", engine.commercial_frame)):
+            frame = random_frame(property_type, rows)
+            cases[f"batch.{property_type}.{rows}"] = (
+                lambda evaluate=evaluate, frame=frame: evaluate(frame),
+                {"repeat": 3 if rows >= 1_000_000 else 5, "items": rows},
+            )
+    return cases
+
+
+def amortization_cases():
+    loans = np.random.default_rng(0).uniform(100_000, 2_000_000, 1_000)
+    return {
+        "amortization.single_30y": (lambda: amortization.schedule_frames(520_000, 6.5, 30), {"number": 20}),
+        "amortization.batch_1k_30y": (lambda: amortization.schedule(loans, 6.5, 30), {"items": 1_000}),
+    }
+
+
+def precision_cases():
+    """Float screening vs exact cents on the same 1k deals (benchmarks/precision.py reports the deviation)"""
+    cases = {}
+    for property_type, fast, exact_frame in (("residential", engine.residential_frame, exact.residential_frame),
+                                              ("commercial", engine.commercial_frame, exact.commercial_frame)):
+        frame = random_frame(property_type, 1_000).assign(loan_years=lambda df: df["loan_years"].round())
+        cases[f"precision.{property_type}.float_1k"] = (lambda fast=fast, frame=frame: fast(frame), {"items": 1_000})
+        cases[f"precision.{property_type}.exact_1k"] = (
+            lambda exact_frame=exact_frame, frame=frame: exact_frame(frame), {"repeat": 3, "items": 1_000})
+    return cases
+
+
+def workbook_cases():
+    """10k deals through each compiled screening workbook (benchmarks/workbook.py checks the results)"""
+    cases = {}
+    for property_type in workbook.LAYOUTS:
+        frame = random_frame(property_type, 10_000).assign(loan_years=lambda df: df["loan_years"].round())
+        cases[f"workbook.{property_type}_10k"] = (
+            lambda property_type=property_type, frame=frame: workbook.evaluate_deals(property_type, frame),
+            {"repeat": 3, "items": 10_000})
+    return cases
+
+
+def export_cases(directory):
+    """10k-deal reports in each format, half residential and half commercial (benchmarks/export.py checks memory)"""
+    frames = {property_type: random_frame(property_type, 5_000).assign(loan_years=lambda df: df["loan_years"].round())
+              for property_type in ("residential", "commercial")}
+    return {
+        f"export.{name.lower()}_10k": (
+            lambda kind=kind: export.export(os.path.join(directory, f"deals{kind}"),
+                                            {property_type: export.frame_chunks(frame) for property_type, frame in frames.items()}),
+            {"repeat": 3, "items": 10_000})
+        for kind, name in export.FORMATS.items()
+    }
+
+
+def store_cases(directory):
+    """Saving 10k deals to the deal store, and re-scoring them after a maintenance change (benchmarks/store.py checks)"""
+    frame = random_frame("residential", 10_000).assign(loan_years=lambda df: df["loan_years"].round())
+    saved = store.DealStore(os.path.join(directory, "saved.db"))
+    # Its own store, so the deals added above don't change how many are re-scored
+    scored = store.DealStore(os.path.join(directory, "scored.db"))
+    scored.add("residential", frame)
+
+    def rescore():
+        maintenance = engine.MAINTENANCE
+        try:
+            engine.MAINTENANCE = maintenance + 50
+            scored.refresh()
+        finally:
+            engine.MAINTENANCE = maintenance
+        scored.refresh()
+
+    return {
+        "store.add_10k": (lambda: saved.add("residential", frame), {"repeat": 3, "items": 10_000}),
+        "store.query_top_100": (lambda: scored.query(states=["CA"], limit=100), {}),
+        "store.rescore_10k": (rescore, {"repeat": 3, "items": 20_000}),
+    }
+
+
+def scenario_cases():
+    """20k commercial deals through the scenario runner on one worker and on every core (benchmarks/scenarios.py checks scaling)"""
+    frame = random_frame("commercial", 20_000).assign(loan_years=lambda df: df["loan_years"].round())
+    cores = os.cpu_count() or 1
+    return {
+        "scenarios.commercial_20k_serial": (lambda: scenarios.run("commercial", frame, workers=1),
+                                            {"repeat": 3, "items": 20_000}),
+        "scenarios.commercial_20k_parallel": (lambda: scenarios.run("commercial", frame, workers=cores),
+                                              {"repeat": 3, "items": 20_000}),
+    }
+
+
+def simulation_cases(quick):
+    residential = dict(engine.RESIDENTIAL_DEFAULTS)
+    commercial = dict(engine.COMMERCIAL_DEFAULTS)
+    cases = {
+        "simulation.residential_10k_10y": (
+            lambda: simulation.simulate("residential", residential, years=10, paths=10_000, seed=42),
+            {"items": 10_000}),
+        "simulation.commercial_10k_10y": (
+            lambda: simulation.simulate("commercial", commercial, years=10, paths=10_000, seed=42),
+            {"items": 10_000}),
+    }
+    if not quick:
+        cases["simulation.commercial_100k_30y"] = (
+            lambda: simulation.simulate("commercial", commercial, years=30, paths=100_000, seed=42),
+            {"repeat": 3, "items": 100_000})
+    return cases
+
+
+def script_run_cases():
+    """Full app.py runs through Streamlit's AppTest: a fresh session and a rerun of it"""
+    from streamlit.testing.v1 import AppTest
+
+    from calculator.cache import deal_cache, sweep_cache
+
+    cases = {}
+    for property_type in ("Residential", "Commercial"):
+        def cold(property_type=property_type):
+            deal_cache.clear()
+            sweep_cache.clear()
+            at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+            at.query_params["property_type"] = property_type
+            at.run()
+            if at.exception:
+                raise RuntimeError(f"app.py raised: {at.exception}")
+
+        session = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+        session.query_params["property_type"] = property_type
+
+        def rerun(session=session):
+            session.run()
+            if session.exception:
+                raise RuntimeError(f"app.py raised: {session.exception}")
+
+        name = property_type.lower()
+        cases[f"script.{name}.cold"] = (cold, {"repeat": 3})
+        cases[f"script.{name}.rerun"] = (rerun, {"repeat": 5})
+    return cases
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = "unknown"
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Cases slower than threshold x the baseline median"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        ratio = result["median_s"] / before["median_s"]
+        marker = "  SLOWER" if ratio > threshold else ""
+        print(f"  {name:40s} {before['median_s'] * 1000:10.3f} ms -> {result['median_s'] * 1000:10.3f} ms "
+              f"({ratio:5.2f}x){marker}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the property calculators")
+    parser.add_argument("--quick", action="store_true", help="Skip the largest batch and simulation cases")
+    parser.add_argument("--only", help="Run only cases whose name contains this text")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio that counts as a regression")
+    args = parser.parse_args(argv)
+
+    groups = [
+        single_deal_cases,
+        lambda: batch_cases(args.quick),
+        amortization_cases,
+        precision_cases,
+        workbook_cases,
+        lambda: export_cases(scratch),
+        lambda: store_cases(scratch),
+        scenario_cases,
+        lambda: simulation_cases(args.quick),
+        script_run_cases,
+    ]
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for group in groups:
+            for name, (func, options) in group().items():
+                if args.only and args.only not in name:
+                    continue
+                options = dict(options)
+                items = options.pop("items", None)
+                result = measure(func, **options)
+                if items:
+                    result["items"] = items
+                    result["items_per_second"] = items / result["median_s"]
+                results[name] = result
+                rate = f"  {result['items_per_second']:,.0f}/s" if items else ""
+                print(f"{name:40s} {result['median_s'] * 1000:10.3f} ms{rate}", flush=True)
+
+    run = {**environment(), "results": results}
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = run["timestamp"].replace(":", "").replace("-", "").split("+")[0]
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{run['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"Saved {os.path.relpath(output, ROOT)}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"Compared with {baseline.get('commit', '?')} ({baseline.get('timestamp', '?')}):")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.threshold}x: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
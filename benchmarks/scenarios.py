@@ -0,0 +1,116 @@
+"""Parallel scenario runner: scaling across cores, and identical results.
+
+Evaluates --rows random deals (half residential, half commercial) under one
+scenario (calculator/scenarios.py: engine, full-term amortization and a
+10-year projection) with each --workers count, and reports deals per second,
+the speedup over one worker and the parallel efficiency (speedup / workers).
+Times include starting the pool and copying the deals into shared memory,
+as a nightly run pays them; the time until the first chunk streams out is
+reported too.
+
+Also prints what a task costs to send: the row range the runner pickles,
+next to the pickled chunk of deals it replaces.
+
+Exits non-zero if any worker count gives results that differ from one
+worker's, or if the efficiency at the largest worker count the machine has
+cores for is below --min-efficiency. On a single-core machine only the
+results are checked.
+
+Usage:
+    python benchmarks/scenarios.py [--rows 200000] [--workers 1 2 4 8] [--min-efficiency 0.7]
+"""
+import argparse
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import engine, scenarios  # noqa: E402
+
+
+def random_deals(property_type, rows, seed=0):
+    """Deals jittered around the app defaults in every rated state, with whole-year terms"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    deals = {name: default * rng.uniform(0.7, 1.3, rows) for name, default in defaults.items() if name != "state"}
+    deals["interest_rate"] = rng.integers(30, 90, rows) / 10
+    deals["loan_years"] = rng.integers(10, 31, rows)
+    deals["state"] = rng.choice(engine.states(), rows)
+    return pd.DataFrame(deals)
+
+
+def default_workers():
+    cores = os.cpu_count() or 1
+    counts = [1]
+    while counts[-1] * 2 < cores:
+        counts.append(counts[-1] * 2)
+    return counts + [cores] if cores > 1 else counts
+
+
+def run_all(deals, workers):
+    """Results per property type, seconds in total and seconds until the first chunk"""
+    results, first = {}, None
+    start = time.perf_counter()
+    for property_type, frame in deals.items():
+        with scenarios.ScenarioRunner(property_type, frame, workers) as runner:
+            chunks = []
+            for chunk in runner.run():
+                if first is None:
+                    first = time.perf_counter() - start
+                chunks.append(chunk)
+        results[property_type] = pd.concat(chunks)
+    return results, time.perf_counter() - start, first
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure how the scenario runner scales across cores")
+    parser.add_argument("--rows", type=int, default=200_000, help="Deals to evaluate, half of each property type")
+    parser.add_argument("--workers", type=int, nargs="+", default=default_workers(), help="Worker counts to time")
+    parser.add_argument("--min-efficiency", type=float, default=0.7,
+                        help="Lowest acceptable speedup / workers at the largest worker count with a core each")
+    args = parser.parse_args(argv)
+
+    deals = {"residential": random_deals("residential", args.rows // 2),
+             "commercial": random_deals("commercial", args.rows - args.rows // 2, seed=1)}
+    chunk = deals["commercial"].iloc[:scenarios.CHUNK_ROWS]
+    cores = os.cpu_count() or 1
+    print(f"{cores} core{'s' if cores > 1 else ''}; a task sends {len(pickle.dumps((0, len(chunk), {}, {}))):,} bytes "
+          f"instead of {len(pickle.dumps(chunk)):,} for its {len(chunk):,} deals")
+
+    problems = []
+    workers = sorted(set([1] + args.workers))
+    baseline, timings = None, {}
+    for count in workers:
+        results, seconds, first = run_all(deals, count)
+        timings[count] = seconds
+        if baseline is None:
+            baseline = results
+        speedup = timings[1] / seconds
+        print(f"{count:>3} workers: {args.rows / seconds:10,.0f} deals/s   {seconds:7.2f} s   speedup {speedup:5.2f}   "
+              f"efficiency {speedup / count:5.0%}   first chunk after {first * 1000:6.0f} ms")
+        for property_type, frame in results.items():
+            if not frame.equals(baseline[property_type]):
+                problems.append(f"{count} workers: {property_type} results differ from one worker's")
+
+    scaled = [count for count in workers if 1 < count <= cores]
+    if scaled:
+        count = max(scaled)
+        efficiency = timings[1] / timings[count] / count
+        if efficiency < args.min_efficiency:
+            problems.append(f"efficiency at {count} workers is {efficiency:.0%}, below {args.min_efficiency:.0%}")
+    else:
+        print("one core: scaling not checked")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
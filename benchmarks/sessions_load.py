@@ -0,0 +1,104 @@
+"""Memory and rerun latency of app.py as concurrent sessions grow.
+
+Opens headless app sessions (Streamlit's AppTest) in this one process, the
+way browser tabs share one Streamlit server, alternating residential and
+commercial. At each step the open sessions grow to the next count in
+--sessions and every session reruns --reruns times concurrently, changing
+its purchase price each time. Sessions stay open between steps, so memory
+accumulates as it would on the server. After each step the process RSS,
+the memory the sessions hold between reruns (calculator.memory) and the
+rerun latency percentiles are printed as one JSON line.
+
+Usage:
+    python benchmarks/sessions_load.py [--sessions 1 4 16 32] [--reruns 5] [--session-mb 16]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PRICE_WIDGETS = {"Residential": "purchase_price_input", "Commercial": "comm_purchase_price_input"}
+
+
+def open_session(index):
+    from streamlit.testing.v1 import AppTest
+
+    property_type = "Residential" if index % 2 == 0 else "Commercial"
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.query_params["property_type"] = property_type
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app.py raised: {at.exception}")
+    return property_type, at, np.random.default_rng(index)
+
+
+def rerun(session, reruns):
+    """Rerun one session with a new purchase price each time; returns the rerun latencies"""
+    property_type, at, rng = session
+    widget = at.number_input(key=PRICE_WIDGETS[property_type])
+    latencies = []
+    for _ in range(reruns):
+        widget.set_value(int(widget.value * rng.uniform(0.9, 1.1)))
+        start = time.perf_counter()
+        at.run()
+        latencies.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(f"app.py raised: {at.exception}")
+        widget = at.number_input(key=PRICE_WIDGETS[property_type])
+    return latencies
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure RSS and rerun latency as app sessions grow")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 32], help="Open session counts, ascending")
+    parser.add_argument("--reruns", type=int, default=5, help="Reruns per session at each step")
+    parser.add_argument("--session-mb", type=float, help="Per-session memory budget (PROPERTY_CALC_SESSION_MB)")
+    parser.add_argument("--output", help="Also write the JSON lines to this file")
+    args = parser.parse_args(argv)
+    if args.session_mb is not None:
+        os.environ["PROPERTY_CALC_SESSION_MB"] = str(args.session_mb)
+
+    from calculator import telemetry
+    from calculator.cache import deal_cache, sweep_cache
+
+    process = psutil.Process()
+    gc.collect()
+    baseline = process.memory_info().rss
+    sessions = []
+    lines = []
+    for count in sorted(args.sessions):
+        with ThreadPoolExecutor(max_workers=count) as pool:
+            sessions.extend(pool.map(open_session, range(len(sessions), count)))
+            latencies = np.concatenate(list(pool.map(lambda session: rerun(session, args.reruns), sessions)))
+        gc.collect()
+        rss = process.memory_info().rss
+        held = [session.get("bytes", 0) for session in telemetry.snapshot()["sessions"].values()]
+        line = {
+            "sessions": count,
+            "reruns": len(latencies),
+            "rerun_ms": {f"p{p}": round(float(np.percentile(latencies, p)) * 1000, 1) for p in (50, 95, 99)},
+            "rss_mb": round(rss / 2**20, 1),
+            "rss_growth_per_session_mb": round((rss - baseline) / count / 2**20, 2),
+            "session_held_mb": {"total": round(sum(held) / 2**20, 2), "max": round(max(held, default=0) / 2**20, 3)},
+            "cache_mb": {"deals": round(deal_cache.bytes / 2**20, 1), "sweeps": round(sweep_cache.bytes / 2**20, 1)},
+        }
+        lines.append(line)
+        print(json.dumps(line), flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            f.writelines(json.dumps(line) + "\n" for line in lines)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
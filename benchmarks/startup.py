@@ -0,0 +1,72 @@
+"""Time to first render and rerun latency of app.py, each in a fresh process.
+
+For each property type a new Python process renders app.py once through
+Streamlit's AppTest and then reruns the same session, and reports
+calculator.startup's profile: time per import block (numpy/pandas, the
+calculator package, plotly on the first chart), process start to the end of
+the first run, and the rerun median and 95th percentile. The same figures
+are shown in the app with ?profile=1.
+
+Exits non-zero when the first render or the median rerun misses
+calculator.startup.TARGETS. The targets are assumed budgets for the Azure B1
+plan the app is deployed to (1 vCPU, 1.75 GB), not timings taken there; to
+approximate that plan locally, pin the run to one core:
+
+    taskset -c 0 python benchmarks/startup.py [--reruns 20] [--type commercial]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import startup  # noqa: E402
+
+
+def profile_app(property_type, reruns):
+    """Run in the child process: first render plus reruns of one session"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+    at.query_params["property_type"] = property_type
+    for _ in range(reruns + 1):
+        at.run()
+        if at.exception:
+            raise RuntimeError(f"app.py raised: {at.exception}")
+    return startup.report()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app.py startup and rerun time in fresh processes")
+    parser.add_argument("--type", choices=["residential", "commercial"], help="Only this property type")
+    parser.add_argument("--reruns", type=int, default=20, help="Reruns after the first render")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(profile_app(args.child.title(), args.reruns)))
+        return 0
+
+    failures = []
+    for property_type in [args.type] if args.type else ["residential", "commercial"]:
+        child = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", property_type,
+                                "--reruns", str(args.reruns)], cwd=ROOT, capture_output=True, text=True)
+        if child.returncode:
+            print(child.stderr, file=sys.stderr)
+            return child.returncode
+        profile = json.loads(child.stdout.strip().splitlines()[-1])
+        print(json.dumps({"property_type": property_type, **profile}, indent=2))
+        if not profile["within_targets"]:
+            failures.append(property_type)
+
+    if failures:
+        print(f"Over target ({startup.TARGETS}): {', '.join(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+"""Deal store: saving, indexed queries and incremental re-scoring.
+
+Saves --rows random deals (half residential, half commercial, across every
+state in the rate table) to a fresh store (calculator/store.py) and reports
+deals saved per second. Then:
+
+1. Times screens on state, property type, cash-on-cash and cash flow and
+   checks, with EXPLAIN QUERY PLAN, that each one searches an index instead
+   of scanning the table.
+2. Changes each global assumption in turn: one state's tax rate, the
+   closing cost rate, the commercial PM fee (in a copy of the rate file) and
+   the residential maintenance. After each, refresh() must re-score exactly
+   the deals the change affects, and the stored metrics of every deal must
+   equal a full re-score with the new assumptions.
+3. Times a refresh with nothing changed, which is what checking costs.
+
+Exits non-zero if a screen doesn't search an index, a refresh re-scores more or fewer
+deals than it should, or any stored metric differs from a full re-score.
+
+Usage:
+    python benchmarks/store.py [--rows 200000]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import comparison, engine, rates, store  # noqa: E402
+
+
+def random_deals(property_type, rows, seed=0):
+    """Deals jittered around the app defaults in every rated state"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    deals = {name: default * rng.uniform(0.7, 1.3, rows) for name, default in defaults.items() if name != "state"}
+    deals["loan_years"] = rng.integers(10, 31, rows)
+    deals["state"] = rng.choice(engine.states(), rows)
+    return pd.DataFrame(deals)
+
+
+def check_scores(deals):
+    """Stored metrics that differ from scoring every deal afresh; returns problems"""
+    stored = deals.query(order_by="id")
+    problems = []
+    for property_type in comparison.PROPERTY_TYPES:
+        rows = stored[stored["property_type"] == property_type]
+        _, fresh = store.score(property_type, rows)
+        for name in store.METRICS:
+            if name in store.TEXT_METRICS or name == "good":
+                differ = (rows[name] != fresh[name]).sum()
+            else:
+                differ = (~np.isclose(rows[name], fresh[name], rtol=1e-12, equal_nan=True)).sum()
+            if differ:
+                problems.append(f"{property_type} {name}: {differ:,} stored values differ from a full re-score")
+    return problems
+
+
+def refresh(deals, label, expected):
+    """Refresh after one change; returns problems if it re-scored anything but the expected count"""
+    start = time.perf_counter()
+    summary = deals.refresh()
+    seconds = time.perf_counter() - start
+    share = summary["rescored"] / len(deals)
+    print(f"{label}: {summary['changed_locations']} locations, {summary['rescored']:,} deals re-scored "
+          f"({share:.0%}) in {seconds:.2f} s ({summary['rescored'] / seconds if seconds else math.inf:,.0f} deals/s)")
+    if summary["rescored"] != expected:
+        return [f"{label}: re-scored {summary['rescored']:,} deals, expected {expected:,}"]
+    return []
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the deal store and check incremental re-scoring")
+    parser.add_argument("--rows", type=int, default=200_000, help="Deals to save, half of each property type")
+    args = parser.parse_args(argv)
+
+    problems = []
+    with tempfile.TemporaryDirectory() as directory:
+        deals = store.DealStore(os.path.join(directory, "deals.db"))
+        start = time.perf_counter()
+        for property_type, rows, seed in (("residential", args.rows // 2, 0), ("commercial", args.rows - args.rows // 2, 1)):
+            deals.add(property_type, random_deals(property_type, rows, seed))
+        seconds = time.perf_counter() - start
+        print(f"saved {len(deals):,} deals in {seconds:.2f} s ({len(deals) / seconds:,.0f} deals/s), "
+              f"{os.path.getsize(deals.path) / 2**20:.0f} MB")
+
+        state = engine.states()[0]
+        # Each screen sorted the way the app and CLI would show it
+        screens = {
+            f"state {state}": {"states": [state]},
+            "commercial": {"property_types": ["commercial"]},
+            "cash-on-cash >= 12%": {"min_cash_on_cash": 12},
+            "annual cash flow >= $40k": {"min_cash_flow": 40_000, "order_by": "annual_cash_flow"},
+            f"commercial in {state}, top 100": {"property_types": ["commercial"], "states": [state], "limit": 100},
+        }
+        for label, filters in screens.items():
+            filters = dict(filters)
+            options = {name: filters.pop(name) for name in ("order_by", "limit") if name in filters}
+            where, values = deals._where(**filters)
+            plan = " / ".join(row[-1] for row in deals._connection.execute(
+                f"EXPLAIN QUERY PLAN SELECT * FROM deals{where} ORDER BY {options.get('order_by', 'cash_on_cash')} DESC",
+                values))
+            start = time.perf_counter()
+            found = deals.query(**options, **filters)
+            seconds = time.perf_counter() - start
+            print(f"  {label:30s} {len(found):>8,} deals in {seconds * 1000:8.1f} ms   [{plan}]")
+            if "SEARCH deals USING" not in plan:
+                problems.append(f"screen '{label}' doesn't search an index: {plan}")
+
+        frame = rates.read_frame(rates.current().source)
+        changes = [
+            (f"{state} residential tax rate", {"residential_tax_rate": (frame["state"] == state, 0.001)},
+             lambda: deals.count(property_types=["residential"], states=[state])),
+            ("closing cost rate", {"closing_cost_rate": (slice(None), 0.005)},
+             lambda: deals.count(property_types=["commercial"])),
+            ("commercial PM fee", {"commercial_pm_fee_rate": (slice(None), 0.01)},
+             lambda: deals.count(property_types=["commercial"])),
+        ]
+        for label, edits, affected in changes:
+            for column, (rows, step) in edits.items():
+                frame.loc[rows, column] += step
+            frame["version"] = f"{frame['version'].iloc[0]}-{column}"
+            path = os.path.join(directory, f"rates-{column}.csv")
+            frame.to_csv(path, index=False)
+            rates.use(path)
+            problems += refresh(deals, label, affected())
+        maintenance = engine.MAINTENANCE
+        try:
+            engine.MAINTENANCE = maintenance + 50
+            problems += refresh(deals, "residential maintenance", deals.count(property_types=["residential"]))
+        finally:
+            engine.MAINTENANCE = maintenance
+        problems += refresh(deals, "maintenance back", deals.count(property_types=["residential"]))
+
+        start = time.perf_counter()
+        summary = deals.refresh()
+        print(f"refresh with nothing changed: {(time.perf_counter() - start) * 1000:.1f} ms")
+        if summary["rescored"]:
+            problems.append(f"refresh with nothing changed re-scored {summary['rescored']:,} deals")
+        problems += check_scores(deals)
+        deals.close()
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Bundled workbooks evaluated headlessly, and checked against the app.
+
+For each screening workbook (calculator/workbook.py):
+
+1. Times compiling it three ways: from the .xlsx, from the saved plan on
+   disk (a new process) and from memory (a rerun).
+2. Recalculates every formula on its main sheet with the workbook's own
+   inputs and compares the results with the values Excel saved, which checks
+   the compiler itself. TODAY() is pinned to the day the workbook was saved.
+3. Evaluates --rows random deals (in the states the workbook's rate table
+   lists) through the workbook and reports deals per second.
+4. Compares those deals with calculator.engine, the calculation app.py
+   shows, output by output and across the amortization schedule for the
+   first --schedule-rows deals.
+
+Exits non-zero if a formula doesn't compile, a recalculated value differs
+from Excel's or any output differs from the app's, so an edit to a
+workbook that the app doesn't follow fails CI.
+
+Usage:
+    python benchmarks/workbook.py [--rows 10000] [--schedule-rows 1000]
+"""
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from calculator import engine, workbook  # noqa: E402
+
+
+def random_deals(property_type, states, rows, seed=0):
+    """Deals jittered around the app defaults, with 0.1% rates above zero and whole-year terms"""
+    rng = np.random.default_rng(seed)
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    deals = {name: np.round(value * rng.uniform(0.5, 1.5, rows), 2)
+             for name, value in defaults.items() if name != "state"}
+    deals["interest_rate"] = rng.integers(1, 151, rows) / 10
+    deals["loan_years"] = rng.integers(5, 31, rows)
+    deals["state"] = rng.choice(states, rows)
+    return deals
+
+
+def check_saved_values(book, sheet):
+    """Recalculate every formula cell on sheet; returns (cells checked, cells that differ from Excel's saved values)"""
+    cells = [key.rsplit("!", 1)[1] for key in book.plan["formulas"] if key.startswith(f"{sheet}!")]
+    values = book.evaluate({}, cells, sheet=sheet, today=book.saved_today)
+    failures = []
+    for cell in cells:
+        saved = book.value(cell, sheet)
+        actual = values[cell][0]
+        if isinstance(saved, str):
+            # "" (a blank amortization row) is NaN once evaluated
+            ok = saved == actual or (saved == "" and isinstance(actual, float) and math.isnan(actual))
+        elif saved is None or isinstance(saved, bool):
+            continue
+        else:
+            ok = math.isclose(float(actual), saved, rel_tol=workbook.RTOL, abs_tol=workbook.ATOL)
+        if not ok:
+            failures.append(f"{sheet}!{cell}: recalculated {actual!r}, Excel saved {saved!r}")
+    return len(cells), failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate the bundled workbooks headlessly and check them against the app")
+    parser.add_argument("--rows", type=int, default=10_000, help="Random deals to evaluate per workbook")
+    parser.add_argument("--schedule-rows", type=int, default=1_000, help="Deals whose amortization schedules are compared")
+    args = parser.parse_args(argv)
+
+    problems = []
+    with tempfile.TemporaryDirectory() as plans:
+        os.environ["PROPERTY_CALC_PLANS"] = plans
+        for property_type, layout in workbook.LAYOUTS.items():
+            name = os.path.basename(layout["workbook"])
+            timings = {}
+            for label in ("xlsx", "disk", "memory"):
+                if label != "memory":
+                    workbook.clear_cache()
+                start = time.perf_counter()
+                book = workbook.load(layout["workbook"])
+                timings[label] = time.perf_counter() - start
+            print(f"{name}: {len(book.plan['formulas']):,} formulas, compiled in {timings['xlsx'] * 1000:.0f} ms, "
+                  f"plan loaded in {timings['disk'] * 1000:.1f} ms from disk, {timings['memory'] * 1000:.2f} ms from memory")
+            problems.extend(book.errors.values())
+
+            checked, failures = check_saved_values(book, layout["sheet"])
+            print(f"  recalculated {checked:,} formulas on '{layout['sheet']}': "
+                  f"{checked - len(failures):,} match the values Excel saved")
+            problems.extend(failures)
+
+            deals = random_deals(property_type, book.value(layout["states"], layout["sheet"]), args.rows)
+            start = time.perf_counter()
+            workbook.evaluate_deals(property_type, deals)
+            seconds = time.perf_counter() - start
+            print(f"  {args.rows:,} deals through the workbook in {seconds * 1000:.0f} ms "
+                  f"({args.rows / seconds:,.0f} deals/s)")
+
+            results = workbook.compare(property_type, deals, schedule=False)
+            subset = {column: values[:args.schedule_rows] for column, values in deals.items()}
+            results += [result for result in workbook.compare(property_type, subset) if result["name"].startswith("amortization")]
+            drift = [result for result in results if not result["ok"]]
+            print(f"  {len(results) - len(drift)}/{len(results)} outputs match the app")
+            for result in drift:
+                problems.append(f"{name} {result['name']}: {result['differing']:,} of {result['rows']:,} deals differ "
+                                f"from the app (first row {result['first_differing_row']}, max difference "
+                                f"{result['max_abs_diff']:.6g})")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
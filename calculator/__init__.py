@@ -0,0 +1 @@
+"""Calculation layer behind the Property Investment Calculator app."""
@@ -0,0 +1,108 @@
+"""Full-term amortization schedules computed in closed form.
+
+The balance after k payments is L * ((1+r)^N - (1+r)^k) / ((1+r)^N - 1), so a
+whole schedule (or a batch of schedules, one row per deal) is a handful of
+array operations instead of a Python loop over months.
+"""
+import numpy as np
+import pandas as pd
+
+
+def schedule(loan_amount, interest_rate, loan_years):
+    """Monthly schedules for one or more loans
+
+    interest_rate is in percent, as in the sidebar. Returns a dict of
+    (deals, months) arrays padded with zeros past each loan's term, plus
+    the 1-based payment numbers.
+    """
+    loan_amount = np.atleast_1d(np.asarray(loan_amount, dtype=float))
+    monthly_rate = np.atleast_1d(np.asarray(interest_rate, dtype=float)) / 100 / 12
+    num_payments = np.atleast_1d(np.asarray(loan_years)) * 12
+    loan_amount, monthly_rate, num_payments = np.broadcast_arrays(loan_amount, monthly_rate, num_payments)
+
+    payment_numbers = np.arange(1, int(num_payments.max()) + 1)
+    growth = (1 + monthly_rate[:, None]) ** payment_numbers
+    growth_at_term = ((1 + monthly_rate) ** num_payments)[:, None]
+    active = payment_numbers <= num_payments[:, None]
+
+    # Same expression as engine.monthly_payment; a 0% loan is repaid in equal parts
+    interest_free = (monthly_rate == 0)[:, None]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = np.where(interest_free, loan_amount[:, None] / num_payments[:, None],
+                           loan_amount[:, None] * (monthly_rate[:, None] * growth_at_term) / (growth_at_term - 1))
+        remaining = np.where(interest_free, (num_payments[:, None] - payment_numbers) / num_payments[:, None],
+                             (growth_at_term - growth) / (growth_at_term - 1))
+    balance = np.where(active, loan_amount[:, None] * remaining, 0.0)
+    beginning_balance = np.concatenate([loan_amount[:, None], balance[:, :-1]], axis=1)
+    interest = np.where(active, beginning_balance * monthly_rate[:, None], 0.0)
+    principal = np.where(active, payment - interest, 0.0)
+
+    return {
+        "payment_number": payment_numbers,
+        "principal": principal,
+        "interest": interest,
+        "balance": balance,
+        "cumulative_principal": np.cumsum(principal, axis=1),
+        "cumulative_interest": np.cumsum(interest, axis=1),
+    }
+
+
+def balance_after(loan_amount, interest_rate, loan_years, payments_made):
+    """Remaining balance after payments_made payments; all arguments broadcast"""
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    num_payments = np.asarray(loan_years) * 12
+    growth_at_term = (1 + monthly_rate) ** num_payments
+    paid = np.minimum(payments_made, num_payments)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        remaining = np.where(monthly_rate == 0, (num_payments - paid) / num_payments,
+                             (growth_at_term - (1 + monthly_rate) ** paid) / (growth_at_term - 1))
+    return np.asarray(loan_amount, dtype=float) * remaining
+
+
+def annual_summary(monthly):
+    """Roll a monthly schedule up to calendar years of the loan"""
+    deals, months = monthly["principal"].shape
+    years = months // 12
+
+    def by_year(values):
+        return values.reshape(deals, years, 12)
+
+    return {
+        "year": np.arange(1, years + 1),
+        "principal": by_year(monthly["principal"]).sum(axis=2),
+        "interest": by_year(monthly["interest"]).sum(axis=2),
+        "balance": by_year(monthly["balance"])[:, :, -1],
+        "cumulative_principal": by_year(monthly["cumulative_principal"])[:, :, -1],
+        "cumulative_interest": by_year(monthly["cumulative_interest"])[:, :, -1],
+    }
+
+
+def schedule_frames(loan_amount, interest_rate, loan_years):
+    """Monthly and annual schedule DataFrames for a single loan"""
+    monthly = schedule(loan_amount, interest_rate, loan_years)
+    annual = annual_summary(monthly)
+    monthly_df = pd.DataFrame({
+        "Payment": monthly["payment_number"],
+        "Principal": monthly["principal"][0],
+        "Interest": monthly["interest"][0],
+        "Balance": monthly["balance"][0],
+        "Cumulative Principal": monthly["cumulative_principal"][0],
+        "Cumulative Interest": monthly["cumulative_interest"][0],
+    })
+    annual_df = pd.DataFrame({
+        "Year": annual["year"],
+        "Principal": annual["principal"][0],
+        "Interest": annual["interest"][0],
+        "Balance": annual["balance"][0],
+        "Cumulative Principal": annual["cumulative_principal"][0],
+        "Cumulative Interest": annual["cumulative_interest"][0],
+    })
+    return monthly_df, annual_df
+
+
+def downsample(df, max_points=120):
+    """Thin a schedule to at most max_points rows for charting, keeping the last row"""
+    if len(df) <= max_points:
+        return df
+    positions = np.unique(np.linspace(0, len(df) - 1, max_points).round().astype(int))
+    return df.iloc[positions]
@@ -0,0 +1,232 @@
+"""Headless JSON API for deal evaluation.
+
+Endpoints take the same parameter names the Streamlit app keeps in its URL,
+so the query string of a shared calculator link works unchanged:
+
+    GET  /residential?purchase_price=650000&down_payment=20&state=CA
+    GET  /residential?purchase_price=650000&state=CA&county=Alameda&zip_code=94501
+    GET  /commercial?comm_purchase_price=1970000&comm_annual_gross_rents=152195
+    GET  /commercial?s=AQABAf5_AAAKQ29tbWVyY2lhbA...   (the app's compact link state)
+    POST /batch  {"property_type": "commercial", "deals": [{...}, ...], "tables": true}
+    GET  /metrics  (Prometheus text format, see calculator.telemetry)
+
+/residential and /commercial also accept a POSTed JSON object of the same
+parameters. A compact ``s`` state or short ``id`` is expanded first; for a
+portfolio link the first deal is used. Missing parameters fall back to the
+app defaults; anything the engine doesn't use (property_url, sim_seed, ...)
+is ignored. Concurrent single-deal requests are coalesced into one
+vectorized engine call per event loop turn.
+
+Usage:
+    python -m calculator.api --port 8600
+"""
+import argparse
+import asyncio
+import math
+
+import numpy as np
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from calculator import engine, tables, telemetry, urlstate
+
+MAX_BATCH_DEALS = 10_000
+
+PROPERTY_TYPES = {
+    "residential": (engine.RESIDENTIAL_DEFAULTS, engine.residential, ""),
+    "commercial": (engine.COMMERCIAL_DEFAULTS, engine.commercial, "comm_"),
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_deal(params, property_type):
+    """Engine inputs from app-style parameters (comm_ prefix optional for commercial)"""
+    try:
+        return engine.parse_inputs(urlstate.expand(params), property_type)
+    except ValueError as e:
+        raise BadRequest(str(e))
+
+
+def evaluate_many(property_type, deals):
+    """Evaluate a list of parsed deals in one engine call; returns one results dict per deal"""
+    _, evaluate, _ = PROPERTY_TYPES[property_type]
+    names = {name for deal in deals for name in deal}
+    columns = {name: np.array([deal.get(name, "") for deal in deals]) for name in names}
+    with telemetry.section(f"api.{property_type}"):
+        results = evaluate(**columns)
+    names = list(results)
+    values = [np.broadcast_to(results[name], (len(deals),)).tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def _finite(value):
+    # JSON has no NaN/inf
+    return value if not isinstance(value, float) or math.isfinite(value) else None
+
+
+def deal_response(property_type, deal, results, include_tables=True):
+    """JSON body for one deal: inputs, every engine output and the app's tables"""
+    results = {name: _finite(value) for name, value in results.items()}
+    if not include_tables:
+        return {"inputs": deal, "results": results}
+    if property_type == "residential":
+        deal_tables = tables.residential_tables(results)
+    else:
+        deal_tables = tables.commercial_tables(results, deal["annual_gross_rents"])
+    return {
+        "property_type": property_type,
+        "inputs": deal,
+        "results": results,
+        **{name: tables.records(table) for name, table in deal_tables.items()},
+    }
+
+
+class DealBatcher:
+    """Coalesce concurrent single-deal requests into one vectorized evaluation
+
+    Deals submitted during the same event loop turn (or within max_delay
+    seconds, if set) are evaluated together; a full batch flushes at once.
+    """
+
+    def __init__(self, property_type, max_batch=1024, max_delay=0.0):
+        self.property_type = property_type
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.deals = 0
+        self._pending = []
+        self._handle = None
+
+    def submit(self, deal):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((deal, future))
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._handle is None:
+            if self.max_delay > 0:
+                self._handle = loop.call_later(self.max_delay, self.flush)
+            else:
+                self._handle = loop.call_soon(self.flush)
+        return future
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        self.batches += 1
+        self.deals += len(pending)
+        try:
+            results = evaluate_many(self.property_type, [deal for deal, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(pending, results):
+            if not future.done():
+                future.set_result(result)
+
+
+async def _params(request):
+    if request.method == "POST":
+        try:
+            body = await request.json()
+        except ValueError:
+            raise BadRequest("Body must be JSON")
+        if not isinstance(body, dict):
+            raise BadRequest("Body must be a JSON object of deal parameters")
+        return body
+    return dict(request.query_params)
+
+
+def _error(message, status_code=400):
+    return JSONResponse({"error": message}, status_code=status_code)
+
+
+def create_app(max_batch=1024, max_delay=0.0):
+    """Starlette app with one request batcher per property type"""
+    batchers = {name: DealBatcher(name, max_batch, max_delay) for name in PROPERTY_TYPES}
+
+    def deal_endpoint(property_type):
+        async def endpoint(request):
+            try:
+                deal = parse_deal(await _params(request), property_type)
+            except BadRequest as e:
+                return _error(str(e))
+            results = await batchers[property_type].submit(deal)
+            return JSONResponse(deal_response(property_type, deal, results))
+        return endpoint
+
+    async def batch(request):
+        try:
+            body = await request.json()
+        except ValueError:
+            return _error("Body must be JSON")
+        if isinstance(body, list):
+            body = {"deals": body}
+        if not isinstance(body, dict):
+            return _error("Body must be a JSON object or a list of deals")
+        property_type = str(body.get("property_type", request.query_params.get("property_type", "residential"))).lower()
+        if property_type not in PROPERTY_TYPES:
+            return _error(f"Unknown property type: {property_type}")
+        raw_deals = body.get("deals")
+        if not isinstance(raw_deals, list) or not raw_deals:
+            return _error("deals must be a non-empty list")
+        if len(raw_deals) > MAX_BATCH_DEALS:
+            return _error(f"At most {MAX_BATCH_DEALS:,} deals per batch", status_code=413)
+        try:
+            deals = [parse_deal(params, property_type) for params in raw_deals]
+        except (BadRequest, AttributeError) as e:
+            return _error(str(e) if isinstance(e, BadRequest) else "Each deal must be a JSON object")
+        # Serializing the tables costs far more than computing them; bulk callers can skip them
+        include_tables = bool(body.get("tables", True))
+        results = evaluate_many(property_type, deals)
+        return JSONResponse({
+            "property_type": property_type,
+            "count": len(deals),
+            "deals": [deal_response(property_type, deal, result, include_tables)
+                      for deal, result in zip(deals, results)],
+        })
+
+    async def health(request):
+        return JSONResponse({
+            "status": "ok",
+            "batching": {name: {"batches": b.batches, "deals": b.deals} for name, b in batchers.items()},
+        })
+
+    async def metrics(request):
+        return PlainTextResponse(telemetry.prometheus(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[
+        Route("/residential", deal_endpoint("residential"), methods=["GET", "POST"]),
+        Route("/commercial", deal_endpoint("commercial"), methods=["GET", "POST"]),
+        Route("/batch", batch, methods=["POST"]),
+        Route("/health", health),
+        Route("/metrics", metrics),
+    ])
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the deal calculator as a JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=1024, help="Largest coalesced batch of single-deal requests")
+    parser.add_argument("--batch-delay-ms", type=float, default=0.0,
+                        help="Wait this long to collect a batch (0 = just the current event loop turn)")
+    args = parser.parse_args(argv)
+    app = create_app(args.max_batch, args.batch_delay_ms / 1000)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
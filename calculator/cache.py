@@ -0,0 +1,112 @@
+"""Process-wide memoization of deal results.
+
+Streamlit reruns app.py on every widget change and keeps one script run per
+browser session, but imported modules live for the whole process. Results
+stored here are therefore shared by every session, so a link opened by the
+whole team is computed once.
+
+Each cache is bounded by entry count and by approximate bytes
+(calculator.memory), so a few large sensitivity grids can't crowd the
+process out of a small instance.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from calculator import engine, memory, rates
+
+
+class DealCache:
+    """Thread-safe LRU cache with a time-to-live, a byte budget and hit/miss counters"""
+
+    def __init__(self, max_entries=512, ttl=3600, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        value = compute()
+        size = memory.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return value  # would evict everything else and still not fit
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._entries[key] = (now, value, size)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.bytes = 0
+
+
+def _normalize(params, defaults, prefix=""):
+    # The rate table's content digest is part of the key so a reloaded table isn't served stale
+    # results, even if the file was edited without bumping its version label
+    key = [rates.current().digest]
+    for name, default in defaults.items():
+        value = params.get(f"{prefix}{name}", default)
+        if name == "state":
+            key.append(str(value).strip().upper())
+        else:
+            key.append(float(value))
+    for name in engine.LOCATION_INPUTS:
+        key.append(str(params.get(f"{prefix}{name}") or "").strip().upper())
+    return tuple(key)
+
+
+def residential_key(params):
+    """Cache key for residential query params (or sidebar values) by input name"""
+    return ("residential",) + _normalize(params, engine.RESIDENTIAL_DEFAULTS)
+
+
+def commercial_key(params, prefix="comm_"):
+    """Cache key for commercial query params; the listing URL is deliberately excluded"""
+    return ("commercial",) + _normalize(params, engine.COMMERCIAL_DEFAULTS, prefix)
+
+
+deal_cache = DealCache(max_bytes=memory.budget_from_env("PROPERTY_CALC_CACHE_MB", 128))
+
+# Sensitivity grids are several MB each, so they get a much smaller cache
+sweep_cache = DealCache(max_entries=16, max_bytes=memory.budget_from_env("PROPERTY_CALC_SWEEP_CACHE_MB", 256))
@@ -0,0 +1,319 @@
+"""Side-by-side comparison of many residential and commercial deals.
+
+A Workspace keeps every deal's inputs in one columnar table per property
+type, with the engine outputs alongside. Adding or editing deals only marks
+those rows stale; the next view() evaluates the stale rows of each type in
+one vectorized engine call and leaves every other row alone.
+
+The combined view puts both property types on shared columns so they sort
+and filter together. Residential figures are taken at the app's verdict
+scenario (75% occupancy) and cash-on-cash is the app's annual ROI, i.e.
+over the down payment; commercial cash-on-cash is over total cash down.
+"""
+import math
+import urllib.parse
+
+import numpy as np
+import pandas as pd
+
+from calculator import engine, listings, urlstate
+
+PROPERTY_TYPES = {
+    "residential": (engine.RESIDENTIAL_INPUTS, engine.residential),
+    "commercial": (engine.COMMERCIAL_INPUTS, engine.commercial),
+}
+
+# Input table columns that hold text; only the engine inputs among the rest affect results
+TEXT_COLUMNS = ["name", "listing_url", "state"] + engine.LOCATION_INPUTS
+LABEL_COLUMNS = ["name", "listing_url"]
+
+# The app's color tiers for the amount down: green, orange, red
+AMOUNT_DOWN_TIERS = [(500_000, "≤ $500k"), (750_000, "≤ $750k"), (math.inf, "> $750k")]
+
+# Shared view columns and their labels
+VIEW_COLUMNS = {
+    "name": "Deal",
+    "property_type": "Type",
+    "state": "State",
+    "purchase_price": "Purchase Price",
+    "amount_down": "Amount Down",
+    "amount_down_tier": "Down Tier",
+    "loan_amount": "Loan Amount",
+    "monthly_payment": "Monthly P&I",
+    "monthly_cash_flow": "Monthly Cash Flow",
+    "annual_cash_flow": "Annual Cash Flow",
+    "cash_on_cash": "Cash-on-Cash %",
+    "verdict": "Verdict",
+}
+
+
+def amount_down_tier(amount_down):
+    """Tier label for each amount down"""
+    limits = [limit for limit, _ in AMOUNT_DOWN_TIERS]
+    labels = np.array([label for _, label in AMOUNT_DOWN_TIERS], dtype=object)
+    return labels[np.searchsorted(limits[:-1], np.asarray(amount_down, dtype=float), side="left")]
+
+
+def deal_from_params(params):
+    """(property_type, inputs, listing URL, name) from one deal's app parameters"""
+    property_type = params.get("property_type", "Residential").strip().lower()
+    if property_type not in PROPERTY_TYPES:
+        raise ValueError(f"Unknown property type: {property_type}")
+    listing = params.get("property_url" if property_type == "residential" else "comm_property_url", "")
+    return property_type, engine.parse_inputs(params, property_type), listing, params.get("name")
+
+
+def deals_from_url(url):
+    """Every deal in a shared calculator link; portfolio links hold many"""
+    query = {name: values[-1] for name, values in urllib.parse.parse_qs(urllib.parse.urlsplit(url.strip()).query).items()}
+    return [deal_from_params(params) for params in urlstate.deals_from_params(query)]
+
+
+def deal_from_listing(result):
+    """(property_type, inputs, listing URL, name) from one listings.fetch_listings() result"""
+    fields = result["fields"]
+    property_type = fields.get("property_type", "residential")
+    params = {"property_type": property_type, **listings.to_params(fields, property_type)}
+    property_type, inputs, _, _ = deal_from_params(params)
+    return property_type, inputs, result["url"], fields.get("address")
+
+
+def _param_string(value):
+    # Whole numbers without a trailing .0, so shared links stay short
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def shared_columns(property_type, deals, results):
+    """The shared view columns (plus "good") for deals of one type and their engine results, row for row"""
+    if property_type == "residential":
+        shared = {
+            "monthly_payment": results["monthly_pi"],
+            "monthly_cash_flow": results["cash_flow_75"],
+            "annual_cash_flow": results["cash_flow_75"] * 12,
+            "cash_on_cash": results["annual_roi_75"],
+            "verdict": results["profitable"].map({True: "Good Investment", False: "High Risk"}),
+        }
+    else:
+        shared = {
+            "monthly_payment": results["monthly_payment"],
+            "monthly_cash_flow": results["annual_cash_flow"] / 12,
+            "annual_cash_flow": results["annual_cash_flow"],
+            "cash_on_cash": results["cash_on_cash_return"],
+            "verdict": results["good_deal"].map({True: "GOOD DEAL", False: "BAD DEAL"}),
+        }
+    return pd.DataFrame({
+        "name": deals["name"],
+        "property_type": property_type,
+        "state": deals["state"],
+        "purchase_price": deals["purchase_price"],
+        "amount_down": results["amount_down"],
+        "amount_down_tier": amount_down_tier(results["amount_down"]),
+        "loan_amount": results["loan_amount"],
+        **shared,
+        "good": results["profitable"] if property_type == "residential" else results["good_deal"],
+    })
+
+
+def input_columns(property_type, deals):
+    """Validated engine input columns (plus any county/zip_code) from a DataFrame of app-style inputs
+
+    Missing inputs (columns or cells) use the app defaults and the comm_ prefix
+    is optional. Raises ValueError for an unknown state or a non-numeric value.
+    """
+    inputs, _ = PROPERTY_TYPES[property_type]
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    rows = {}
+    for name in inputs + engine.LOCATION_INPUTS:
+        column = name if name in deals.columns else f"comm_{name}"
+        if column in deals.columns:
+            values = deals[column]
+            rows[name] = (values.fillna(defaults[name]) if name in defaults else values).to_numpy()
+        elif name in defaults:
+            rows[name] = np.full(len(deals), defaults[name], dtype=object if name == "state" else float)
+    rows["state"] = pd.Series(rows["state"]).astype(str).str.strip().str.upper().to_numpy(dtype=object)
+    unknown = set(rows["state"]) - set(engine.states())
+    if unknown:
+        raise ValueError(f"Unknown state codes: {', '.join(sorted(unknown))}")
+    for name in inputs:
+        if name != "state":
+            rows[name] = pd.to_numeric(pd.Series(rows[name]), errors="raise").to_numpy(dtype=float)
+    return rows
+
+
+class Workspace:
+    """Deals under comparison, evaluated incrementally"""
+
+    def __init__(self):
+        self._inputs = {}
+        self._outputs = {}
+        self._stale = {}
+        for property_type, (inputs, _) in PROPERTY_TYPES.items():
+            self._inputs[property_type] = pd.DataFrame(
+                {name: pd.Series(dtype=object if name in TEXT_COLUMNS else float)
+                 for name in ["name", "listing_url"] + inputs + engine.LOCATION_INPUTS})
+            self._outputs[property_type] = pd.DataFrame()
+            self._stale[property_type] = set()
+        self._next_id = 1
+        self._view = None
+        self.version = 0
+        self.evaluated_rows = 0
+
+    def __len__(self):
+        return sum(len(frame) for frame in self._inputs.values())
+
+    def inputs(self, property_type):
+        """The input table of one property type, indexed by deal id"""
+        return self._inputs[property_type]
+
+    def add(self, property_type, deals, names=None, listing_urls=None):
+        """Add deals (a DataFrame or list of dicts of app-style inputs); returns their ids
+
+        Missing inputs (columns or cells) use the app defaults; the comm_ prefix is optional.
+        Deals without a name are called "<Type> <id>".
+        """
+        deals = pd.DataFrame(deals).reset_index(drop=True)
+        if deals.empty:
+            return []
+        rows = input_columns(property_type, deals)
+
+        ids = list(range(self._next_id, self._next_id + len(deals)))
+        self._next_id += len(deals)
+        names = list(names) if names is not None else [None] * len(deals)
+        rows["name"] = [name or f"{property_type.title()} {i}" for name, i in zip(names, ids)]
+        rows["listing_url"] = list(listing_urls) if listing_urls is not None else [""] * len(deals)
+        frame = self._inputs[property_type]
+        added = pd.DataFrame(rows, index=pd.Index(ids, name="id")).reindex(columns=frame.columns)
+        added = added.astype(frame.dtypes.to_dict())
+        self._inputs[property_type] = added if frame.empty else pd.concat([frame, added])
+        self._stale[property_type].update(ids)
+        self._changed()
+        return ids
+
+    def as_params(self, ids=None):
+        """App-style parameters of each deal (all, or the given ids in order), for sharing"""
+        deals = []
+        for deal_id in (sorted(set().union(*(frame.index for frame in self._inputs.values()))) if ids is None else ids):
+            property_type = next(name for name, frame in self._inputs.items() if deal_id in frame.index)
+            row = self._inputs[property_type].loc[deal_id]
+            prefix = "" if property_type == "residential" else "comm_"
+            params = {"property_type": property_type.title(), "name": row["name"]}
+            for name in PROPERTY_TYPES[property_type][0] + engine.LOCATION_INPUTS:
+                if not pd.isna(row[name]) and row[name] != "":
+                    params[f"{prefix}{name}"] = _param_string(row[name])
+            if row["listing_url"]:
+                params[f"{prefix}property_url"] = row["listing_url"]
+            deals.append(params)
+        return deals
+
+    def update(self, property_type, changes):
+        """Apply {deal id: {input: value}} edits; only rows whose values really change go stale"""
+        frame = self._inputs[property_type]
+        changed = False
+        for deal_id, values in changes.items():
+            for name, value in values.items():
+                if name not in frame.columns:
+                    raise KeyError(f"Unknown input: {name}")
+                if name == "state":
+                    value = str(value).strip().upper()
+                    if value not in engine.states():
+                        raise ValueError(f"Unknown state: {value}")
+                elif name not in TEXT_COLUMNS:
+                    value = float(value)
+                old = frame.at[deal_id, name]
+                if old == value or (pd.isna(old) and (value is None or value == "")):
+                    continue
+                frame.at[deal_id, name] = value
+                if name not in LABEL_COLUMNS:
+                    self._stale[property_type].add(deal_id)
+                changed = True
+        if changed:
+            self._changed()
+
+    def remove(self, ids):
+        ids = set(ids)
+        for property_type in PROPERTY_TYPES:
+            frame = self._inputs[property_type]
+            drop = frame.index.intersection(list(ids))
+            if len(drop):
+                self._inputs[property_type] = frame.drop(drop)
+                outputs = self._outputs[property_type]
+                self._outputs[property_type] = outputs.drop(outputs.index.intersection(drop))
+                self._stale[property_type] -= set(drop)
+        self._changed()
+
+    def clear(self):
+        version = self.version
+        self.__init__()
+        self.version = version + 1
+
+    def trim(self):
+        """Drop the evaluated outputs to save memory; they are recomputed on the next view()"""
+        for property_type, frame in self._inputs.items():
+            self._outputs[property_type] = pd.DataFrame()
+            self._stale[property_type] = set(frame.index)
+        self._view = None
+
+    def _changed(self):
+        self.version += 1
+        self._view = None
+
+    def _evaluate(self, property_type):
+        stale = sorted(self._stale[property_type])
+        if not stale:
+            return self._outputs[property_type]
+        inputs, evaluate = PROPERTY_TYPES[property_type]
+        rows = self._inputs[property_type].loc[stale]
+        columns = {name: rows[name].to_numpy() for name in inputs}
+        for name in engine.LOCATION_INPUTS:
+            if rows[name].notna().any():
+                columns[name] = rows[name].fillna("").to_numpy(dtype=object)
+        results = pd.DataFrame({name: np.asarray(value) for name, value in evaluate(**columns).items()},
+                               index=rows.index)
+        outputs = self._outputs[property_type]
+        if not outputs.empty:
+            results = pd.concat([outputs.drop(outputs.index.intersection(results.index)), results])
+        self._outputs[property_type] = results
+        self._stale[property_type] = set()
+        self.evaluated_rows += len(stale)
+        return self._outputs[property_type]
+
+    def view(self):
+        """Every deal on the shared comparison columns, evaluating stale rows first"""
+        outputs = {property_type: self._evaluate(property_type) for property_type in PROPERTY_TYPES}
+        if self._view is not None:
+            return self._view
+
+        parts = []
+        for property_type, results in outputs.items():
+            deals = self._inputs[property_type]
+            if deals.empty:
+                continue
+            parts.append(shared_columns(property_type, deals, results.loc[deals.index]))
+        self._view = (pd.concat(parts) if parts else pd.DataFrame(columns=list(VIEW_COLUMNS) + ["good"])).sort_index()
+        return self._view
+
+
+def select(view, property_types=None, tiers=None, states=None, min_cash_on_cash=None, good_only=False,
+           sort_by="cash_on_cash", ascending=False):
+    """Filter and sort a comparison view"""
+    keep = np.ones(len(view), dtype=bool)
+    if property_types:
+        keep &= view["property_type"].isin(property_types).to_numpy()
+    if tiers:
+        keep &= view["amount_down_tier"].isin(tiers).to_numpy()
+    if states:
+        keep &= view["state"].isin(states).to_numpy()
+    if min_cash_on_cash is not None:
+        keep &= (view["cash_on_cash"] >= min_cash_on_cash).to_numpy()
+    if good_only:
+        keep &= view["good"].to_numpy(dtype=bool)
+    return view[keep].sort_values(sort_by, ascending=ascending, kind="stable", na_position="last")
+
+
+def page(frame, number, size):
+    """Rows of one page (1-based) and the page count"""
+    pages = max(1, math.ceil(len(frame) / size))
+    number = min(max(1, number), pages)
+    return frame.iloc[(number - 1) * size:number * size], pages
@@ -0,0 +1,335 @@
+"""Vectorized residential and commercial deal calculations.
+
+Every formula here is the one app.py shows for a single deal (and that the
+bundled screening workbooks use), written so that each input can be a scalar,
+a NumPy array or a pandas column. Percent inputs use the same whole-number
+units as the sidebar and query params (20 means 20% down, 6.5 means 6.5%).
+"""
+import math
+
+import numpy as np
+
+from calculator import rates
+
+# Residential assumptions (tax, insurance and PM fee rates come from the rate table)
+MAINTENANCE = 250  # Flat monthly maintenance/overhead
+OCCUPANCY_RATES = [0.75, 0.90, 1.0]
+
+RESIDENTIAL_INPUTS = ["purchase_price", "down_payment", "interest_rate", "loan_years", "monthly_rent", "state"]
+COMMERCIAL_INPUTS = ["purchase_price", "down_payment", "annual_gross_rents", "annual_noi_listing",
+                     "vacancy_rate", "other_expenses", "interest_rate", "loan_years", "state"]
+# Optional finer-grained location inputs for the rate table
+LOCATION_INPUTS = ["county", "zip_code"]
+
+# Default inputs (the Excel workbook defaults the app starts from)
+RESIDENTIAL_DEFAULTS = {
+    "purchase_price": 650000,
+    "down_payment": 20,
+    "interest_rate": 6.5,
+    "loan_years": 15,
+    "monthly_rent": 5000,
+    "state": "CA",
+}
+
+COMMERCIAL_DEFAULTS = {
+    "purchase_price": 1970000,
+    "down_payment": 30,
+    "annual_gross_rents": 152195,
+    "annual_noi_listing": 106548,
+    "vacancy_rate": 3,
+    "other_expenses": 5000,
+    "interest_rate": 6.5,
+    "loan_years": 25,
+    "state": "CA",
+}
+
+
+def states():
+    """State codes with rates in the current rate table"""
+    return rates.current().states
+
+
+def location_rates(property_type, state, county=None, zip_code=None):
+    """Tax, insurance, PM fee and closing cost rates for each location"""
+    return rates.current().location_rates(property_type, state, county, zip_code)
+
+
+def monthly_payment(loan_amount, annual_rate, years):
+    """Monthly principal & interest payment for a fully amortizing loan"""
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 12
+    num_payments = np.asarray(years) * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payment = loan_amount * (monthly_rate * (1 + monthly_rate) ** num_payments) / ((1 + monthly_rate) ** num_payments - 1)
+        # At 0% the formula is 0/0; the loan is simply repaid in equal parts
+        return np.where(monthly_rate == 0, loan_amount / num_payments, payment)[()]
+
+
+# One function per workbook cell, each parameter named after the input or cell
+# it reads. residential() and commercial() call them on arrays, and
+# calculator.graph registers the same functions as its cells, so each formula
+# is written once.
+
+def amount_down(purchase_price, down_payment):
+    """Down payment in dollars (H4)"""
+    return purchase_price * (down_payment / 100)
+
+
+def loan_amount(purchase_price, down_payment):
+    """Residential loan amount (E3)"""
+    return purchase_price * (1 - down_payment / 100)
+
+
+def commercial_loan_amount(purchase_price, amount_down):
+    """Commercial loan amount (E3)"""
+    return purchase_price - amount_down
+
+
+def monthly_pi(loan_amount, interest_rate, loan_years):
+    """Monthly principal & interest (H7); interest_rate in percent"""
+    return monthly_payment(loan_amount, np.asarray(interest_rate, dtype=float) / 100, loan_years)
+
+
+def monthly_insurance(purchase_price, insurance_rate):
+    return (purchase_price * insurance_rate) / 12
+
+
+def monthly_tax(purchase_price, tax_rate):
+    return (purchase_price * tax_rate) / 12
+
+
+def pm_fee(monthly_rent, pm_fee_rate):
+    return monthly_rent * pm_fee_rate
+
+
+def maintenance():
+    return float(MAINTENANCE)
+
+
+def total_monthly(monthly_pi, monthly_insurance, monthly_tax, pm_fee, maintenance):
+    return monthly_pi + monthly_insurance + monthly_tax + pm_fee + maintenance
+
+
+def cash_flow(monthly_rent, total_monthly, rate):
+    """Monthly cash flow at an occupancy rate (K10:M10)"""
+    return monthly_rent * rate - total_monthly
+
+
+def annual_roi(cash_flow, purchase_price, down_payment):
+    """Annual return on the down payment, in percent (K12:M12)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (np.asarray(cash_flow, dtype=float) * 12) / (purchase_price * (down_payment / 100)) * 100
+
+
+def profitable(cash_flow_75):
+    """Profitable even at 75% occupancy"""
+    return cash_flow_75 > 0
+
+
+def annual_insurance(purchase_price, insurance_rate):
+    return purchase_price * insurance_rate
+
+
+def annual_property_tax(purchase_price, tax_rate):
+    return purchase_price * tax_rate
+
+
+def annual_pm_fee(annual_gross_rents, pm_fee_rate):
+    return annual_gross_rents * pm_fee_rate
+
+
+def total_operating_expenses(annual_insurance, annual_property_tax, annual_pm_fee, other_expenses):
+    """SUM(J8:J11)"""
+    return annual_insurance + annual_property_tax + annual_pm_fee + other_expenses
+
+
+def adjusted_gross_income(annual_gross_rents, vacancy_rate):
+    """K4*(1-L5)"""
+    return annual_gross_rents * (1 - vacancy_rate / 100)
+
+
+def noi_estimated(adjusted_gross_income, total_operating_expenses):
+    """NOI Estimated (L8): (K4*(1-L5))-SUM(J8:J11)"""
+    return adjusted_gross_income - total_operating_expenses
+
+
+def annual_debt_service(monthly_payment):
+    return monthly_payment * 12
+
+
+def annual_cash_flow(noi_estimated, annual_debt_service):
+    """NOI - Annual Debt Service (L10)"""
+    return noi_estimated - annual_debt_service
+
+
+def closing_costs(purchase_price, closing_cost_rate):
+    return purchase_price * closing_cost_rate
+
+
+def total_cash_down(amount_down, closing_costs):
+    """Closing Costs + Down Payment (L11): =J3+H4"""
+    return amount_down + closing_costs
+
+
+def cash_on_cash_return(annual_cash_flow, total_cash_down):
+    """=L10/L11 in percent (L12); 0 with nothing down"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total_cash_down > 0, (annual_cash_flow / total_cash_down) * 100, 0.0)[()]
+
+
+def good_deal(annual_cash_flow):
+    return annual_cash_flow > 0
+
+
+def residential(purchase_price, down_payment, interest_rate, loan_years, monthly_rent, state,
+                county=None, zip_code=None):
+    """Evaluate residential deals; returns a dict of output arrays"""
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    down_payment = np.asarray(down_payment, dtype=float)
+    monthly_rent = np.asarray(monthly_rent, dtype=float)
+    # Tax Rate Lookup: =SUMIF(P2:P7,H1,O2:O7), now from the rate table
+    location = location_rates("residential", state, county, zip_code)
+    shape = np.broadcast(purchase_price, down_payment, np.asarray(interest_rate),
+                         np.asarray(loan_years), monthly_rent, location["tax_rate"]).shape
+
+    loan = loan_amount(purchase_price, down_payment)
+    costs = {
+        "monthly_pi": monthly_pi(loan, interest_rate, loan_years),
+        "monthly_insurance": monthly_insurance(purchase_price, location["insurance_rate"]),
+        "monthly_tax": monthly_tax(purchase_price, location["tax_rate"]),
+        "pm_fee": pm_fee(monthly_rent, location["pm_fee_rate"]),
+        "maintenance": np.full(shape, maintenance()),
+    }
+    total = total_monthly(**costs)
+    result = {"amount_down": amount_down(purchase_price, down_payment), "loan_amount": loan, **costs,
+              "total_monthly": total}
+    result = {name: np.broadcast_to(value, shape) for name, value in result.items()}
+
+    # Cash flow analysis at each occupancy scenario
+    for rate in OCCUPANCY_RATES:
+        label = int(rate * 100)
+        flow = cash_flow(monthly_rent, total, rate)
+        result[f"cash_flow_{label}"] = np.broadcast_to(flow, shape)
+        result[f"annual_roi_{label}"] = np.broadcast_to(annual_roi(flow, purchase_price, down_payment), shape)
+
+    result["profitable"] = profitable(result["cash_flow_75"])
+    return result
+
+
+def commercial(purchase_price, down_payment, annual_gross_rents, annual_noi_listing,
+               vacancy_rate, other_expenses, interest_rate, loan_years, state, county=None, zip_code=None):
+    """Evaluate commercial deals; returns a dict of output arrays"""
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    down_payment = np.asarray(down_payment, dtype=float)
+    annual_gross_rents = np.asarray(annual_gross_rents, dtype=float)
+    vacancy_rate = np.asarray(vacancy_rate, dtype=float)
+    other_expenses = np.asarray(other_expenses, dtype=float)
+    # Tax/insurance lookups: =SUMIF(P2:P7,H1,O2:O7) and =SUMIF(P2:P7,H1,Q2:Q7), now from the rate table
+    location = location_rates("commercial", state, county, zip_code)
+    shape = np.broadcast(purchase_price, down_payment, annual_gross_rents,
+                         np.asarray(annual_noi_listing), vacancy_rate, other_expenses,
+                         np.asarray(interest_rate), np.asarray(loan_years), location["tax_rate"]).shape
+
+    down = amount_down(purchase_price, down_payment)
+
+    # Annual operating expenses and NOI
+    expenses = {
+        "annual_insurance": annual_insurance(purchase_price, location["insurance_rate"]),
+        "annual_property_tax": annual_property_tax(purchase_price, location["tax_rate"]),
+        "annual_pm_fee": annual_pm_fee(annual_gross_rents, location["pm_fee_rate"]),
+        "other_expenses": other_expenses,
+    }
+    operating = total_operating_expenses(**expenses)
+    income = adjusted_gross_income(annual_gross_rents, vacancy_rate)
+    noi = noi_estimated(income, operating)
+
+    # Debt service and cash flow
+    loan = commercial_loan_amount(purchase_price, down)
+    payment = monthly_pi(loan, interest_rate, loan_years)
+    debt_service = annual_debt_service(payment)
+    flow = annual_cash_flow(noi, debt_service)
+
+    closing = closing_costs(purchase_price, location["closing_cost_rate"])
+    cash_down = total_cash_down(down, closing)
+
+    outputs = {
+        "amount_down": down,
+        "loan_amount": loan,
+        "monthly_payment": payment,
+        "annual_debt_service": debt_service,
+        **expenses,
+        "total_operating_expenses": operating,
+        "adjusted_gross_income": income,
+        "noi_estimated": noi,
+        "annual_cash_flow": flow,
+        "closing_costs": closing,
+        "total_cash_down": cash_down,
+        "cash_on_cash_return": cash_on_cash_return(flow, cash_down),
+        "good_deal": good_deal(flow),
+    }
+    return {name: np.broadcast_to(value, shape) for name, value in outputs.items()}
+
+
+def _frame_inputs(deals, names):
+    """Pull engine inputs out of a DataFrame, accepting comm_-prefixed query param names
+
+    county and zip_code columns are passed through when present.
+    """
+    columns = {}
+    for name in names:
+        column = name if name in deals.columns else f"comm_{name}"
+        columns[name] = deals[column].to_numpy()
+    for name in LOCATION_INPUTS:
+        for column in (name, f"comm_{name}"):
+            if column in deals.columns:
+                columns[name] = deals[column].to_numpy()
+                break
+    return columns
+
+
+def residential_frame(deals):
+    """Evaluate a DataFrame of residential deals and append the output columns"""
+    result = residential(**_frame_inputs(deals, RESIDENTIAL_INPUTS))
+    return deals.assign(**result)
+
+
+def commercial_frame(deals):
+    """Evaluate a DataFrame of commercial deals and append the output columns"""
+    result = commercial(**_frame_inputs(deals, COMMERCIAL_INPUTS))
+    return deals.assign(**result)
+
+
+def parse_inputs(params, property_type):
+    """Engine inputs for one deal from app-style query params
+
+    Commercial params may carry the comm_ prefix; missing inputs use the app
+    defaults and county/zip_code are passed through when given. Raises
+    ValueError for an unknown state or a non-numeric value.
+    """
+    defaults, prefix = ((RESIDENTIAL_DEFAULTS, "") if property_type == "residential"
+                        else (COMMERCIAL_DEFAULTS, "comm_"))
+    deal = {}
+    for name, default in defaults.items():
+        value = params.get(f"{prefix}{name}", params.get(name, default))
+        if name == "state":
+            value = str(value).strip().upper()
+            if value not in states():
+                raise ValueError(f"Unknown state: {value}")
+        else:
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{prefix}{name} must be a number, got {value!r}")
+            if not math.isfinite(value):
+                raise ValueError(f"{prefix}{name} must be finite")
+        deal[name] = value
+    # Optional county/ZIP for finer-grained rates
+    for name in LOCATION_INPUTS:
+        value = params.get(f"{prefix}{name}", params.get(name))
+        if value not in (None, ""):
+            deal[name] = str(value).strip()
+    return deal
+
+
+def as_scalars(result):
+    """Unwrap a single-deal result into plain Python numbers"""
+    return {name: np.asarray(value).item() for name, value in result.items()}
@@ -0,0 +1,203 @@
+"""Exact-cents deal calculations for documents that go to lenders.
+
+calculator.engine is the fast path: float64 arrays, thousands of deals in one
+vectorized pass, used for screening and on screen. Its values are unrounded,
+so a summary printed from it can be a cent off its own total, and it can
+drift from the workbooks in the last cent.
+
+This module is the exact path. Inputs are read as decimals (6.5 is exactly
+6.5, not the nearest binary fraction), intermediate math runs at 40
+significant digits, and every money line is rounded to the cent with
+banker's rounding (half to even) before anything is added up. Totals are
+sums of the rounded lines, so a document built from these values always
+foots. Returns are rounded to hundredths of a percent.
+
+Outputs have the same names as the engine's, one deal at a time, as Decimal.
+Both paths treat a 0% rate as a straight-line loan (loan / payments) and a
+100% down payment as no loan.
+"""
+import decimal
+from decimal import Decimal, ROUND_HALF_EVEN
+
+import pandas as pd
+
+from calculator import engine
+
+PRECISION = 40
+CENT = Decimal("0.01")
+HUNDRED = Decimal(100)
+TWELVE = Decimal(12)
+
+
+def _context():
+    return decimal.localcontext(prec=PRECISION, rounding=ROUND_HALF_EVEN)
+
+
+def to_decimal(value):
+    """Decimal of an input as written: floats go through their shortest repr"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, int) and not isinstance(value, bool):
+        return Decimal(value)
+    return Decimal(repr(float(value)))
+
+
+def cents(value):
+    """Round to the cent, half to even"""
+    return value.quantize(CENT, rounding=ROUND_HALF_EVEN)
+
+
+def to_cents(value):
+    """Integer cents of a dollar amount"""
+    return int(cents(to_decimal(value)) * 100)
+
+
+def _ratio_pct(numerator, denominator):
+    # Percent to two places; a zero base gives an infinite (or undefined) return, as in the engine
+    if denominator == 0:
+        return Decimal("NaN") if numerator == 0 else Decimal("Infinity").copy_sign(numerator)
+    return cents(numerator / denominator * HUNDRED)
+
+
+def monthly_payment(loan_amount, interest_rate, loan_years):
+    """Unrounded monthly payment; interest_rate in percent, 0% amortizes straight-line"""
+    with _context():
+        loan_amount = to_decimal(loan_amount)
+        monthly_rate = to_decimal(interest_rate) / HUNDRED / TWELVE
+        # Not truncated to whole months, so odd terms match the engine
+        num_payments = to_decimal(loan_years) * 12
+        if loan_amount == 0:
+            return Decimal(0)
+        if monthly_rate == 0:
+            return loan_amount / num_payments
+        growth = (1 + monthly_rate) ** num_payments
+        return loan_amount * (monthly_rate * growth) / (growth - 1)
+
+
+def _rates(property_type, state, county, zip_code):
+    location = engine.location_rates(property_type, state, county, zip_code)
+    return {name: to_decimal(float(value)) for name, value in location.items()}
+
+
+def residential(purchase_price, down_payment, interest_rate, loan_years, monthly_rent, state,
+                county=None, zip_code=None):
+    """One residential deal in exact cents; same outputs as engine.residential"""
+    location = _rates("residential", state, county, zip_code)
+    with _context():
+        purchase_price = cents(to_decimal(purchase_price))
+        monthly_rent = cents(to_decimal(monthly_rent))
+        down_payment_pct = to_decimal(down_payment) / HUNDRED
+
+        amount_down = cents(purchase_price * down_payment_pct)
+        loan_amount = purchase_price - amount_down
+        monthly_pi = cents(monthly_payment(loan_amount, interest_rate, loan_years))
+        monthly_insurance = cents(purchase_price * location["insurance_rate"] / TWELVE)
+        monthly_tax = cents(purchase_price * location["tax_rate"] / TWELVE)
+        pm_fee = cents(monthly_rent * location["pm_fee_rate"])
+        maintenance = cents(Decimal(engine.MAINTENANCE))
+        total_monthly = monthly_pi + monthly_insurance + monthly_tax + pm_fee + maintenance
+
+        result = {
+            "amount_down": amount_down,
+            "loan_amount": loan_amount,
+            "monthly_pi": monthly_pi,
+            "monthly_insurance": monthly_insurance,
+            "monthly_tax": monthly_tax,
+            "pm_fee": pm_fee,
+            "maintenance": maintenance,
+            "total_monthly": total_monthly,
+        }
+        for rate in engine.OCCUPANCY_RATES:
+            label = int(rate * 100)
+            cash_flow = cents(monthly_rent * to_decimal(rate)) - total_monthly
+            result[f"cash_flow_{label}"] = cash_flow
+            result[f"annual_roi_{label}"] = _ratio_pct(cash_flow * 12, amount_down)
+        result["profitable"] = result["cash_flow_75"] > 0
+    return result
+
+
+def commercial(purchase_price, down_payment, annual_gross_rents, annual_noi_listing,
+               vacancy_rate, other_expenses, interest_rate, loan_years, state, county=None, zip_code=None):
+    """One commercial deal in exact cents; same outputs as engine.commercial"""
+    location = _rates("commercial", state, county, zip_code)
+    with _context():
+        purchase_price = cents(to_decimal(purchase_price))
+        annual_gross_rents = cents(to_decimal(annual_gross_rents))
+        other_expenses = cents(to_decimal(other_expenses))
+
+        amount_down = cents(purchase_price * to_decimal(down_payment) / HUNDRED)
+        annual_insurance = cents(purchase_price * location["insurance_rate"])
+        annual_property_tax = cents(purchase_price * location["tax_rate"])
+        annual_pm_fee = cents(annual_gross_rents * location["pm_fee_rate"])
+        total_operating_expenses = annual_insurance + annual_property_tax + annual_pm_fee + other_expenses
+        adjusted_gross_income = cents(annual_gross_rents * (1 - to_decimal(vacancy_rate) / HUNDRED))
+        noi_estimated = adjusted_gross_income - total_operating_expenses
+
+        loan_amount = purchase_price - amount_down
+        monthly_pi = cents(monthly_payment(loan_amount, interest_rate, loan_years))
+        annual_debt_service = monthly_pi * 12
+        annual_cash_flow = noi_estimated - annual_debt_service
+        closing_costs = cents(purchase_price * location["closing_cost_rate"])
+        total_cash_down = amount_down + closing_costs
+
+        return {
+            "amount_down": amount_down,
+            "loan_amount": loan_amount,
+            "monthly_payment": monthly_pi,
+            "annual_debt_service": annual_debt_service,
+            "annual_insurance": annual_insurance,
+            "annual_property_tax": annual_property_tax,
+            "annual_pm_fee": annual_pm_fee,
+            "other_expenses": other_expenses,
+            "total_operating_expenses": total_operating_expenses,
+            "adjusted_gross_income": adjusted_gross_income,
+            "noi_estimated": noi_estimated,
+            "annual_cash_flow": annual_cash_flow,
+            "closing_costs": closing_costs,
+            "total_cash_down": total_cash_down,
+            "cash_on_cash_return": _ratio_pct(annual_cash_flow, total_cash_down) if total_cash_down > 0 else Decimal("0.00"),
+            "good_deal": annual_cash_flow > 0,
+        }
+
+
+def schedule(loan_amount, interest_rate, loan_years):
+    """Lender-style monthly schedule in cents
+
+    The payment is rounded to the cent, each month's interest is rounded half
+    to even, and the last payment absorbs the leftover cents so the balance
+    ends at exactly 0.00. Returns a dict of lists like amortization.schedule.
+    """
+    with _context():
+        balance = cents(to_decimal(loan_amount))
+        monthly_rate = to_decimal(interest_rate) / HUNDRED / TWELVE
+        num_payments = int(to_decimal(loan_years) * 12)
+        payment = cents(monthly_payment(balance, interest_rate, loan_years))
+        rows = {"payment_number": [], "payment": [], "principal": [], "interest": [], "balance": []}
+        for number in range(1, num_payments + 1):
+            interest = cents(balance * monthly_rate)
+            principal = balance if number == num_payments else min(payment - interest, balance)
+            balance -= principal
+            rows["payment_number"].append(number)
+            rows["payment"].append(principal + interest)
+            rows["principal"].append(principal)
+            rows["interest"].append(interest)
+            rows["balance"].append(balance)
+    return rows
+
+
+def _evaluate_frame(deals, names, evaluate):
+    columns = engine._frame_inputs(deals, names)
+    rows = [evaluate(**dict(zip(columns, values))) for values in zip(*columns.values())]
+    outputs = {name: [row[name] for row in rows] for name in rows[0]} if rows else {}
+    return deals.assign(**{name: pd.Series(values, index=deals.index, dtype=object)
+                           for name, values in outputs.items()})
+
+
+def residential_frame(deals):
+    """Exact residential outputs for a DataFrame of deals (Decimal columns); one deal at a time"""
+    return _evaluate_frame(deals, engine.RESIDENTIAL_INPUTS, residential)
+
+
+def commercial_frame(deals):
+    """Exact commercial outputs for a DataFrame of deals (Decimal columns); one deal at a time"""
+    return _evaluate_frame(deals, engine.COMMERCIAL_INPUTS, commercial)
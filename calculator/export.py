@@ -0,0 +1,811 @@
+"""Deal reports for lender packets: Excel, CSV and PDF, for one deal or a portfolio.
+
+export() streams deals through in chunks: each chunk is evaluated with the
+batch screening code and its rows are written out before the next chunk is
+read, so memory stays flat however many deals there are. The format follows
+the output file's extension:
+
+- .xlsx: a sheet per property type with every input and output, one row per
+  deal, and a sheet for each of the first DEAL_PAGES deals laid out like the
+  bundled screening workbook (same cells, labels, number formats and
+  amortization table; see workbook.sheet_values). Each sheet is spooled to a
+  temporary file as rows arrive and the workbook is zipped up at the end, so
+  neither openpyxl nor the whole sheet in memory is needed.
+- .csv: the same rows under the batch screening column names, so an export
+  can be screened or compared again.
+- .pdf: a table of every deal on the comparison columns, then a page for
+  each of the first DEAL_PAGES deals with its inputs, the Investment Summary
+  figures and the app's expense and returns tables. Written by the small
+  text-only PDF writer below; a finished page is written out straight away.
+
+submit() runs an export on a background thread and returns a Job to poll, so
+a Streamlit rerun never waits for one. Files are written to
+PROPERTY_CALC_EXPORTS (default property-calculator-exports in the temp
+directory) and removed JOB_TTL_S after they finish.
+
+Usage:
+    python -m calculator.export deals.csv report.xlsx --type commercial
+"""
+import argparse
+import datetime
+import math
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from calculator import comparison, engine, screening, tables, workbook
+
+CHUNK_ROWS = 5_000
+DEAL_PAGES = 25  # deals that get their own workbook sheet or PDF page
+JOB_TTL_S = 3600
+MAX_SHEET_ROWS = 1_048_575  # Excel's row limit, less the header
+
+FORMATS = {".xlsx": "Excel", ".pdf": "PDF", ".csv": "CSV"}
+MIME_TYPES = {
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pdf": "application/pdf",
+    ".csv": "text/csv",
+}
+
+LABELS = {
+    "name": "Deal",
+    "property_type": "Type",
+    "state": "State",
+    "county": "County",
+    "zip_code": "ZIP Code",
+    "purchase_price": "Purchase Price",
+    "down_payment": "Down Payment %",
+    "interest_rate": "Interest Rate %",
+    "loan_years": "Loan Term (Years)",
+    "monthly_rent": "Monthly Rent",
+    "annual_gross_rents": "Annual Gross Rents",
+    "annual_noi_listing": "Annual NOI from Listing",
+    "vacancy_rate": "Vacancy Rate %",
+    "other_expenses": "Other Operating Expenses",
+    "monthly_pi": "Monthly P&I",
+    "pm_fee": "PM Fee",
+    "total_monthly": "Total Monthly Costs",
+    "noi_estimated": "Annual NOI (Estimated)",
+    "annual_pm_fee": "Annual PM Fee",
+    "total_cash_down": "Total Cash Investment",
+    "cash_on_cash_return": "Cash-on-Cash %",
+    **{f"cash_flow_{int(rate * 100)}": f"Cash Flow ({int(rate * 100)}% Occupancy)" for rate in engine.OCCUPANCY_RATES},
+    **{f"annual_roi_{int(rate * 100)}": f"Annual ROI % ({int(rate * 100)}% Occupancy)" for rate in engine.OCCUPANCY_RATES},
+}
+# Columns in percent (6.5 for 6.5%), as the app shows them
+PERCENT_COLUMNS = {"down_payment", "interest_rate", "vacancy_rate", "cash_on_cash_return",
+                   *(f"annual_roi_{int(rate * 100)}" for rate in engine.OCCUPANCY_RATES)}
+TEXT_COLUMNS = {"name", "property_type", "state", "verdict", *engine.LOCATION_INPUTS}
+
+
+def label(name):
+    return LABELS.get(name, name.replace("_", " ").title())
+
+
+@lru_cache(maxsize=None)
+def columns(property_type):
+    """Export columns of one property type: name, inputs, location, outputs and verdict"""
+    inputs, evaluate = comparison.PROPERTY_TYPES[property_type]
+    defaults = engine.RESIDENTIAL_DEFAULTS if property_type == "residential" else engine.COMMERCIAL_DEFAULTS
+    outputs = [name for name in evaluate(**defaults) if name not in inputs]
+    return ("name", *inputs, *engine.LOCATION_INPUTS, *outputs, "verdict")
+
+
+def frame_chunks(frame, chunk_rows=CHUNK_ROWS):
+    """Slices of a DataFrame of deals, chunk_rows at a time"""
+    for start in range(0, len(frame), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def evaluate_chunk(property_type, chunk, first=1):
+    """A chunk of deals (app-style inputs) with the engine outputs, on the export columns
+
+    Deals without a name are called "<Type> <n>", numbering from first.
+    """
+    chunk = chunk.rename(columns={column: column[5:] for column in chunk.columns
+                                  if column.startswith("comm_") and column[5:] not in chunk.columns})
+    for name in engine.LOCATION_INPUTS:
+        if name in chunk.columns and chunk[name].isna().all():
+            chunk = chunk.drop(columns=name)
+        elif name in chunk.columns:
+            chunk[name] = chunk[name].fillna("").astype(str)
+    results = screening.screen_chunk(chunk, property_type).reset_index(drop=True)
+    numbers = pd.Series([f"{property_type.title()} {n}" for n in range(first, first + len(results))])
+    if "name" in results:
+        named = results["name"].notna() & (results["name"].astype(str).str.strip() != "")
+        results["name"] = results["name"].astype(str).where(named, numbers)
+    else:
+        results["name"] = numbers
+    return results.reindex(columns=list(columns(property_type)))
+
+
+def _xml_text(text):
+    # Control characters aren't allowed in XML at all; quotes are escaped for attributes
+    return escape(re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f]", "", text), {'"': "&quot;"})
+
+
+# --- CSV -------------------------------------------------------------------
+
+class CsvReport:
+    """Rows under the batch screening column names, with a property_type column"""
+
+    def __init__(self, path, property_types):
+        self._columns = ["property_type"] + list(dict.fromkeys(
+            name for property_type in property_types for name in columns(property_type)))
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        pd.DataFrame(columns=self._columns).to_csv(self._file, index=False)
+
+    def write(self, property_type, results):
+        results.assign(property_type=property_type).reindex(columns=self._columns).to_csv(
+            self._file, header=False, index=False)
+
+    def close(self):
+        self._file.close()
+
+
+# --- Excel -----------------------------------------------------------------
+
+class _Styles:
+    """Cell styles used so far (number format, bold), numbered as styles.xml lists them"""
+
+    def __init__(self):
+        self._styles = {(None, False): 0}
+
+    def index(self, number_format=None, bold=False):
+        return self._styles.setdefault((number_format, bold), len(self._styles))
+
+    def xml(self):
+        codes = {code: 164 + i for i, code in enumerate(dict.fromkeys(code for code, _ in self._styles if code))}
+        number_formats = "".join(f'<numFmt numFmtId="{number}" formatCode="{_xml_text(code)}"/>'
+                                 for code, number in codes.items())
+        xfs = "".join(f'<xf numFmtId="{codes.get(code, 0)}" fontId="{int(bold)}" fillId="0" borderId="0" xfId="0"'
+                      + (' applyNumberFormat="1"' if code else "") + (' applyFont="1"' if bold else "") + "/>"
+                      for code, bold in self._styles)
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<styleSheet xmlns="{workbook.MAIN_NS}">'
+                f'<numFmts count="{len(codes)}">{number_formats}</numFmts>'
+                '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+                '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+                '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+                '<fill><patternFill patternType="gray125"/></fill></fills>'
+                '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                f'<cellXfs count="{len(self._styles)}">{xfs}</cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                '</styleSheet>')
+
+
+def _cell(reference, value, style=0):
+    """One <c> element; blank for None, NaN, infinities and empty text"""
+    style = f' s="{style}"' if style else ""
+    if isinstance(value, str):
+        return f'<c r="{reference}" t="inlineStr"{style}><is><t>{_xml_text(value)}</t></is></c>' if value else ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{reference}" t="b"{style}><v>{int(value)}</v></c>'
+    if value is None or not math.isfinite(value):
+        return ""
+    return f'<c r="{reference}"{style}><v>{value!r}</v></c>'
+
+
+class _Sheet:
+    """One worksheet, its rows spooled to a temporary file until the workbook is zipped"""
+
+    def __init__(self, name, widths=None, freeze_rows=0, grid=True):
+        self.name = name
+        self.widths = widths or {}
+        self.freeze_rows = freeze_rows
+        self.grid = grid
+        self.rows = 0
+        self._file = tempfile.TemporaryFile()
+
+    def row(self, number, cells):
+        self._file.write(f'<row r="{number}">{"".join(cells)}</row>'.encode("utf-8"))
+        self.rows = number
+
+    @property
+    def size(self):
+        return self._file.tell()
+
+    def write_to(self, out):
+        view = '<sheetView workbookViewId="0"' + ("" if self.grid else ' showGridLines="0"')
+        if self.freeze_rows:
+            view += (f'><pane ySplit="{self.freeze_rows}" topLeftCell="A{self.freeze_rows + 1}" activePane="bottomLeft" '
+                     'state="frozen"/></sheetView>')
+        else:
+            view += "/>"
+        cols = "".join(f'<col min="{workbook.column_number(letters)}" max="{workbook.column_number(letters)}" '
+                       f'width="{width:g}" customWidth="1"/>' for letters, width in self.widths.items())
+        out.write((f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                   f'<worksheet xmlns="{workbook.MAIN_NS}" xmlns:r="{workbook.REL_NS}">'
+                   f'<sheetViews>{view}</sheetViews>{f"<cols>{cols}</cols>" if cols else ""}<sheetData>').encode("utf-8"))
+        self._file.seek(0)
+        shutil.copyfileobj(self._file, out)
+        out.write(b"</sheetData></worksheet>")
+
+    def close(self):
+        self._file.close()
+
+
+class ExcelReport:
+    """A sheet of every deal per property type, plus workbook-layout sheets for the first deals"""
+
+    def __init__(self, path, property_types, deal_pages=DEAL_PAGES):
+        self.path = path
+        self.deal_pages = deal_pages
+        self._styles = _Styles()
+        self._header_style = self._styles.index(bold=True)
+        self._summaries = {}
+        self._deal_sheets = []
+        self._names = set()
+        self._deals = 0
+
+    def _sheet_name(self, name):
+        # At most 31 characters, none of []:*?/\, unique regardless of case
+        base = re.sub(r"[\[\]:*?/\\]", " ", str(name)).strip()[:31] or "Deal"
+        name, n = base, 1
+        while name.lower() in self._names:
+            n += 1
+            name = f"{base[:31 - len(str(n)) - 3]} ({n})"
+        self._names.add(name.lower())
+        return name
+
+    def _summary(self, property_type):
+        sheets = self._summaries.setdefault(property_type, [])
+        if not sheets or sheets[-1].rows > MAX_SHEET_ROWS:
+            names = list(columns(property_type))
+            letters = [workbook.column_letters(i) for i in range(1, len(names) + 1)]
+            title = f"{property_type.title()} Deals" + (f" ({len(sheets) + 1})" if sheets else "")
+            sheet = _Sheet(self._sheet_name(title), freeze_rows=1,
+                           widths={letter: max(10, len(label(name)) + 2) for letter, name in zip(letters, names)})
+            sheet.row(1, [_cell(f"{letter}1", label(name), self._header_style) for letter, name in zip(letters, names)])
+            sheets.append(sheet)
+        return sheets[-1]
+
+    def _column_style(self, name):
+        if name in TEXT_COLUMNS or name in ("profitable", "good_deal"):
+            return 0
+        if name == "loan_years":
+            return self._styles.index("0")
+        return self._styles.index("0.00" if name in PERCENT_COLUMNS else "#,##0.00")
+
+    def write(self, property_type, results):
+        names = list(columns(property_type))
+        letters = [workbook.column_letters(i) for i in range(1, len(names) + 1)]
+        styles = [self._column_style(name) for name in names]
+        values = [results[name].tolist() for name in names]
+        start = 0
+        while start < len(results):
+            sheet = self._summary(property_type)
+            stop = min(len(results), start + MAX_SHEET_ROWS + 1 - sheet.rows)
+            for number, row in enumerate(zip(*(column[start:stop] for column in values)), sheet.rows + 1):
+                sheet.row(number, [_cell(f"{letter}{number}", value, style)
+                                   for letter, value, style in zip(letters, row, styles)])
+            start = stop
+
+        laid_out = results.iloc[:max(0, self.deal_pages - self._deals)]
+        if len(laid_out):
+            self._lay_out(property_type, laid_out)
+        self._deals += len(results)
+
+    def _lay_out(self, property_type, deals):
+        layout = workbook.LAYOUTS[property_type]
+        book = workbook.load(layout["workbook"])
+        prefix = f"{layout['sheet']}!"
+        # Blank county/ZIP cells mean the state's rates, as in the app
+        values = workbook.sheet_values(property_type, deals.fillna({name: "" for name in engine.LOCATION_INPUTS}), deals)
+        styles = {cell: self._styles.index(book.plan["formats"].get(f"{prefix}{cell}")) for cell in values}
+        rows = {cell: int(re.search(r"\d+$", cell)[0]) for cell in values}
+        for i, name in enumerate(deals["name"]):
+            sheet = _Sheet(self._sheet_name(name), widths=book.plan["widths"].get(layout["sheet"]),
+                           freeze_rows=layout["schedule"]["first_row"] - 1, grid=False)
+            number, row = None, []
+            for cell, cell_values in values.items():
+                if rows[cell] != number and row:
+                    sheet.row(number, row)
+                    row = []
+                number = rows[cell]
+                value = cell_values[i]
+                row.append(_cell(cell, value.item() if isinstance(value, np.generic) else value, styles[cell]))
+            if row:
+                sheet.row(number, row)
+            self._deal_sheets.append(sheet)
+
+    def close(self):
+        summaries = [sheet for sheets in self._summaries.values() for sheet in sheets]
+        # A single deal opens on its workbook layout; a portfolio on its table
+        sheets = self._deal_sheets + summaries if self._deals == 1 else summaries + self._deal_sheets
+        with zipfile.ZipFile(self.path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for number, sheet in enumerate(sheets, 1):
+                with archive.open(f"xl/worksheets/sheet{number}.xml", "w", force_zip64=sheet.size > 2**30) as out:
+                    sheet.write_to(out)
+                sheet.close()
+            archive.writestr("[Content_Types].xml", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/styles.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                + "".join(f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+                          'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                          for number in range(1, len(sheets) + 1))
+                + "</Types>"))
+            archive.writestr("_rels/.rels", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" Target="xl/workbook.xml" Type="http://schemas.openxmlformats.org/'
+                'officeDocument/2006/relationships/officeDocument"/></Relationships>'))
+            archive.writestr("xl/workbook.xml", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<workbook xmlns="{workbook.MAIN_NS}" xmlns:r="{workbook.REL_NS}"><sheets>'
+                + "".join(f'<sheet name="{_xml_text(sheet.name)}" sheetId="{number}" r:id="rId{number}"/>'
+                          for number, sheet in enumerate(sheets, 1))
+                + "</sheets></workbook>"))
+            archive.writestr("xl/_rels/workbook.xml.rels", (
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                + "".join(f'<Relationship Id="rId{number}" Target="worksheets/sheet{number}.xml" '
+                          f'Type="{workbook.REL_NS}/worksheet"/>' for number in range(1, len(sheets) + 1))
+                + f'<Relationship Id="rId{len(sheets) + 1}" Target="styles.xml" Type="{workbook.REL_NS}/styles"/>'
+                + "</Relationships>"))
+            archive.writestr("xl/styles.xml", self._styles.xml())
+
+
+# --- PDF -------------------------------------------------------------------
+
+# Helvetica advance widths (1/1000 em) for printable ASCII, from the standard font metrics
+_HELVETICA_WIDTHS = dict(zip(
+    " !\"#$%&'()*+,-./0123456789:;<=>?@ABCDEFGHIJKLMNOPQRSTUVWXYZ[\\]^_`abcdefghijklmnopqrstuvwxyz{|}~",
+    [278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278, *[556] * 10, 278, 278,
+     584, 584, 584, 556, 1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778, 667,
+     778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556, 333, 556, 556, 500, 556, 556,
+     278, 556, 556, 222, 222, 500, 222, 833, 556, 556, 556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500,
+     334, 260, 334, 584]))
+
+
+def text_width(text, size):
+    """Width of text in Helvetica at size points (other characters count as a digit)"""
+    return sum(_HELVETICA_WIDTHS.get(char, 556) for char in text) * size / 1000
+
+
+def _fit(text, width, size):
+    """text, cut short with "..." to fit width"""
+    if text_width(text, size) <= width:
+        return text
+    while text and text_width(text + "...", size) > width:
+        text = text[:-1]
+    return text + "..."
+
+
+class Pdf:
+    """A minimal PDF writer: text and rules on Letter pages, each written out once finished
+
+    Only the file offsets of written objects are kept; the page tree and
+    cross-reference table are written by close().
+    """
+
+    WIDTH, HEIGHT = 612, 792
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._offsets = {}
+        self._next = 5  # 1 catalog, 2 page tree, 3-4 fonts
+        self._ops = []
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for number, font in ((3, "Helvetica"), (4, "Helvetica-Bold")):
+            self._object(number, f"<< /Type /Font /Subtype /Type1 /BaseFont /{font} /Encoding /WinAnsiEncoding >>".encode())
+
+    def _object(self, number, body):
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    def _allocate(self):
+        self._next += 1
+        return self._next - 1
+
+    def text(self, x, y, text, size=9, bold=False, align="left", color=None):
+        if align == "right":
+            x -= text_width(text, size)
+        text = re.sub(r"\s", " ", str(text)).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        fill = f"{color[0]:g} {color[1]:g} {color[2]:g} rg " if color else ""
+        self._ops.append(f"BT {fill}/F{2 if bold else 1} {size:g} Tf {x:.2f} {y:.2f} Td ({text}) Tj ET")
+
+    def rule(self, x1, y, x2, width=0.5):
+        self._ops.append(f"{width:g} w {x1:.2f} {y:.2f} m {x2:.2f} {y:.2f} l S")
+
+    def end_page(self):
+        """Write out the page drawn since the last one; returns its object number for the page tree"""
+        content = zlib.compress("\n".join(self._ops).encode("cp1252", errors="replace"))
+        self._ops = []
+        stream, page = self._allocate(), self._allocate()
+        self._object(stream, f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode()
+                     + content + b"\nendstream")
+        self._object(page, (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {self.WIDTH} {self.HEIGHT}] "
+                            f"/Contents {stream} 0 R /Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>").encode())
+        return page
+
+    def close(self, pages):
+        """Finish the file with pages (page object numbers) in reading order"""
+        self._object(2, f"<< /Type /Pages /Kids [{' '.join(f'{page} 0 R' for page in pages)}] /Count {len(pages)} >>".encode())
+        self._object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self._file.tell()
+        self._file.write(f"xref\n0 {self._next}\n0000000000 65535 f\r\n".encode())
+        self._file.write("".join(f"{self._offsets[number]:010d} 00000 n\r\n" for number in range(1, self._next)).encode())
+        self._file.write(f"trailer\n<< /Size {self._next} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        self._file.close()
+
+
+MARGIN = 54
+ROW_HEIGHT = 14
+GREEN, RED = (0.0, 0.5, 0.0), (0.8, 0.0, 0.0)
+
+# (column, label, format, right-aligned) of the portfolio table
+PORTFOLIO_COLUMNS = [
+    ("name", "Deal", "{}", False),
+    ("property_type", "Type", "{}", False),
+    ("state", "State", "{}", False),
+    ("purchase_price", "Purchase Price", "${:,.0f}", True),
+    ("amount_down", "Amount Down", "${:,.0f}", True),
+    ("monthly_cash_flow", "Monthly Cash Flow", "${:,.0f}", True),
+    ("cash_on_cash", "Cash-on-Cash", "{:.1f}%", True),
+    ("verdict", "Verdict", "{}", False),
+]
+PORTFOLIO_WIDTHS = [96, 54, 28, 72, 66, 66, 50, 0]  # points; the verdict takes the rest
+
+
+def _format(template, value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return "n/a"
+    return template.format(value.title() if template == "{}" and value in comparison.PROPERTY_TYPES else value)
+
+
+class PdfReport:
+    """A portfolio table of every deal, then a summary page for each of the first deals"""
+
+    def __init__(self, path, property_types, deal_pages=DEAL_PAGES):
+        self.deal_pages = deal_pages
+        self._pdf = Pdf(path)
+        self._table_pages, self._deal_pages = [], []
+        self._y = None
+        self._deals = 0
+        self._laid_out = []  # (property type, deal) of the first deal_pages deals, drawn after the table
+        self._totals = {"good": 0, "purchase_price": 0.0, "amount_down": 0.0, "annual_cash_flow": 0.0}
+
+    # Portfolio table, a row per deal
+
+    def _table_header(self):
+        pdf = self._pdf
+        top = pdf.HEIGHT - MARGIN
+        pdf.text(MARGIN, top, "Deal Portfolio" + (" (continued)" if self._table_pages else ""), size=14, bold=True)
+        pdf.text(pdf.WIDTH - MARGIN, top, f"Exported {datetime.date.today():%B %d, %Y}  |  Page {len(self._table_pages) + 1}",
+                 size=8, align="right")
+        self._y = top - 28
+        x = MARGIN
+        for (_, heading, _, right), width in zip(PORTFOLIO_COLUMNS, PORTFOLIO_WIDTHS):
+            pdf.text(x + width - 4 if right else x, self._y, heading, size=8, bold=True, align="right" if right else "left")
+            x += width
+        pdf.rule(MARGIN, self._y - 4, pdf.WIDTH - MARGIN)
+        self._y -= ROW_HEIGHT + 2
+
+    def _table_row(self, values, bold=False, color=None):
+        if self._y is None:
+            self._table_header()
+        elif self._y < MARGIN:
+            self._table_pages.append(self._pdf.end_page())
+            self._table_header()
+        x = MARGIN
+        for (name, _, template, right), width, value in zip(PORTFOLIO_COLUMNS, PORTFOLIO_WIDTHS, values):
+            width = width or self._pdf.WIDTH - MARGIN - x
+            # Figures are never cut short; a long one runs into the column to its left
+            text = value if right else _fit(value, width - 6, 8)
+            self._pdf.text(x + width - 4 if right else x, self._y, text, size=8, bold=bold,
+                           align="right" if right else "left", color=color(name) if color else None)
+            x += width
+        self._y -= ROW_HEIGHT
+
+    # A page per deal
+
+    def _section(self, title):
+        self._y -= 10
+        self._pdf.text(MARGIN, self._y, title, size=12, bold=True)
+        self._pdf.rule(MARGIN, self._y - 4, self._pdf.WIDTH - MARGIN)
+        self._y -= ROW_HEIGHT + 4
+
+    def _pairs(self, pairs):
+        """Label/value pairs in two columns"""
+        half = (self._pdf.WIDTH - 2 * MARGIN) / 2
+        for i in range(0, len(pairs), 2):
+            for column, (name, value) in enumerate(pairs[i:i + 2]):
+                x = MARGIN + column * half
+                self._pdf.text(x, self._y, name, size=9)
+                self._pdf.text(x + half - 18, self._y, value, size=9, bold=True, align="right")
+            self._y -= ROW_HEIGHT
+
+    def _table(self, rows, formats):
+        """One of the app's tables (column lists) with its number formats"""
+        names = list(rows)
+        first = 190
+        width = (self._pdf.WIDTH - 2 * MARGIN - first) / (len(names) - 1)
+        for i, name in enumerate(names):
+            x = MARGIN if i == 0 else MARGIN + first + i * width
+            self._pdf.text(x, self._y, name, size=9, bold=True, align="left" if i == 0 else "right")
+        self._y -= ROW_HEIGHT
+        for values in zip(*rows.values()):
+            for i, (name, value) in enumerate(zip(names, values)):
+                x = MARGIN if i == 0 else MARGIN + first + i * width
+                if i == 0:
+                    template = "{}"
+                else:
+                    template = formats(values[0], name) if callable(formats) else formats.get(name, "{}")
+                self._pdf.text(x, self._y, _format(template, value), size=9, align="left" if i == 0 else "right")
+            self._y -= ROW_HEIGHT
+
+    def _deal_page(self, property_type, deal):
+        pdf = self._pdf
+        self._y = pdf.HEIGHT - MARGIN
+        pdf.text(MARGIN, self._y, _fit(str(deal["name"]), pdf.WIDTH - 2 * MARGIN, 16), size=16, bold=True)
+        self._y -= 16
+        location = "  |  ".join(str(deal[name]) for name in ["state", *engine.LOCATION_INPUTS]
+                                if isinstance(deal[name], str) and deal[name])
+        pdf.text(MARGIN, self._y, f"{property_type.title()}  |  {location}  |  Exported {datetime.date.today():%B %d, %Y}",
+                 size=9)
+        self._y -= 8
+
+        inputs, _ = comparison.PROPERTY_TYPES[property_type]
+        self._section("Inputs")
+        self._pairs([(label(name).replace(" %", ""), _format("{:g}%" if name in PERCENT_COLUMNS else
+                                           "{:g}" if name == "loan_years" else "${:,.0f}", deal[name]))
+                     for name in inputs if name != "state"])
+
+        self._section("Investment Summary")
+        if property_type == "residential":
+            self._pairs([
+                ("Purchase Price", f"${deal['purchase_price']:,.0f}"),
+                ("Loan Amount", f"${deal['loan_amount']:,.0f}"),
+                ("Down Payment", f"${deal['amount_down']:,.0f} ({deal['down_payment']:g}%)"),
+                ("Monthly P&I", f"${deal['monthly_pi']:,.0f}"),
+                ("Monthly Rent", f"${deal['monthly_rent']:,.0f}"),
+                ("Total Monthly Costs", f"${deal['total_monthly']:,.0f}"),
+            ])
+            table_data = tables.residential_tables(deal)
+            sections = [("Monthly Expenses", table_data["expenses"], {"Amount": "${:,.2f}"}),
+                        ("Investment Returns", table_data["returns"],
+                         {"Monthly Cash Flow": "${:,.2f}", "Annual ROI": "{:.1f}%"})]
+            good, verdict = deal["profitable"], ("Good Investment: Profitable even at 75% occupancy" if deal["profitable"]
+                                                 else "High Risk: Not profitable at 75% occupancy")
+        else:
+            self._pairs([
+                ("Purchase Price", f"${deal['purchase_price']:,.0f}"),
+                ("Loan Amount", f"${deal['loan_amount']:,.0f}"),
+                ("Down Payment", f"${deal['amount_down']:,.0f} ({deal['down_payment']:g}%)"),
+                ("Monthly Payment", f"${deal['monthly_payment']:,.0f}"),
+                ("Closing Costs", f"${deal['closing_costs']:,.0f}"),
+                ("Annual NOI (Estimated)", f"${deal['noi_estimated']:,.0f}"),
+                ("Total Cash Investment", f"${deal['total_cash_down']:,.0f}"),
+                ("Annual Cash Flow", f"${deal['annual_cash_flow']:,.0f}"),
+            ])
+            table_data = tables.commercial_tables(deal, deal["annual_gross_rents"])
+            sections = [("Operating Expenses", table_data["expenses"],
+                         {"Monthly Amount": "${:,.2f}", "Annual Amount": "${:,.0f}"}),
+                        ("Investment Analysis", table_data["analysis"],
+                         # Mixed units, so each row is formatted on its own
+                         lambda metric, name: "{:.1f}%" if metric == "Cash-on-Cash Return" else "${:,.0f}")]
+            good, verdict = deal["good_deal"], ("GOOD DEAL: Positive annual cash flow" if deal["good_deal"]
+                                                else "BAD DEAL: Negative annual cash flow")
+        for title, rows, formats in sections:
+            self._section(title)
+            self._table(rows, formats)
+
+        self._section("Verdict")
+        pdf.text(MARGIN, self._y, verdict, size=11, bold=True, color=GREEN if good else RED)
+        self._deal_pages.append(pdf.end_page())
+
+    def write(self, property_type, results):
+        shared = comparison.shared_columns(property_type, results, results)
+        names = [name for name, *_ in PORTFOLIO_COLUMNS]
+        for values in zip(*(shared[name].tolist() for name in names)):
+            row = dict(zip(names, values))
+
+            def color(name):
+                if name in ("monthly_cash_flow", "cash_on_cash"):
+                    return GREEN if row[name] >= 0 else RED
+                return None
+
+            self._table_row([_format(template, row[name]) for name, _, template, _ in PORTFOLIO_COLUMNS], color=color)
+        self._totals["good"] += int(shared["good"].sum())
+        for name in ("purchase_price", "amount_down", "annual_cash_flow"):
+            self._totals[name] += float(shared[name].sum())
+
+        self._laid_out.extend((property_type, deal)
+                              for _, deal in results.iloc[:max(0, self.deal_pages - self._deals)].iterrows())
+        self._deals += len(results)
+
+    def close(self):
+        totals = self._totals
+        if self._y is not None:
+            self._y -= 4
+        self._table_row([f"{self._deals:,} deals", "", "", f"${totals['purchase_price']:,.0f}",
+                         f"${totals['amount_down']:,.0f}", f"${totals['annual_cash_flow'] / 12:,.0f}", "",
+                         f"{totals['good']:,} good"], bold=True)
+        self._table_pages.append(self._pdf.end_page())
+        for property_type, deal in self._laid_out:
+            self._deal_page(property_type, deal)
+        # One deal needs no portfolio table; its page is left out of the page tree
+        self._pdf.close(self._deal_pages if self._deals == 1 else self._table_pages + self._deal_pages)
+
+
+REPORTS = {".xlsx": ExcelReport, ".pdf": PdfReport, ".csv": CsvReport}
+
+
+def export(path, sources, kind=None, progress=None, deal_pages=DEAL_PAGES):
+    """Write a report of the deals in sources to path
+
+    sources maps a property type to an iterable of DataFrame chunks of
+    app-style inputs (the batch screening columns, plus an optional name).
+    kind is ".xlsx", ".pdf" or ".csv", by default path's extension. progress,
+    if given, is called with the running deal count after each chunk.
+    Returns the number of deals written.
+    """
+    kind = (kind or os.path.splitext(path)[1]).lower()
+    if kind not in REPORTS:
+        raise ValueError(f"Unknown export format: {kind}")
+    unknown = set(sources) - set(comparison.PROPERTY_TYPES)
+    if unknown:
+        raise ValueError(f"Unknown property type: {', '.join(sorted(unknown))}")
+    if kind == ".csv":
+        report = CsvReport(path, list(sources))
+    else:
+        report = REPORTS[kind](path, list(sources), deal_pages=deal_pages)
+    rows = 0
+    try:
+        for property_type, chunks in sources.items():
+            numbered = 0
+            for chunk in chunks:
+                results = evaluate_chunk(property_type, chunk, first=numbered + 1)
+                report.write(property_type, results)
+                numbered += len(results)
+                rows += len(results)
+                if progress is not None:
+                    progress(rows)
+    finally:
+        report.close()
+    return rows
+
+
+# --- Background jobs -------------------------------------------------------
+
+def exports_dir():
+    return os.environ.get("PROPERTY_CALC_EXPORTS", os.path.join(tempfile.gettempdir(), "property-calculator-exports"))
+
+
+class Job:
+    """One export on the background thread; status is "running", "done" or "failed" """
+
+    def __init__(self, file_name, total=None):
+        self.id = uuid.uuid4().hex
+        self.file_name = file_name
+        self.kind = os.path.splitext(file_name)[1].lower()
+        self.path = os.path.join(exports_dir(), f"{self.id}{self.kind}")
+        self.total = total
+        self.rows = 0
+        self.error = None
+        self.started = time.time()
+        self.finished = None
+
+    @property
+    def status(self):
+        if self.finished is None:
+            return "running"
+        return "failed" if self.error else "done"
+
+    @property
+    def mime(self):
+        return MIME_TYPES[self.kind]
+
+    def _run(self, sources, deal_pages):
+        # Written aside and renamed, so a download never serves half a file
+        temp_path = f"{self.path}.tmp"
+        try:
+            export(temp_path, sources, kind=self.kind, progress=lambda rows: setattr(self, "rows", rows),
+                   deal_pages=deal_pages)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            self.finished = time.time()
+
+
+_jobs_lock = threading.Lock()
+_jobs = {}  # job id -> Job
+_executor = None
+
+
+def submit(sources, file_name, total=None, deal_pages=DEAL_PAGES):
+    """Export sources (as for export()) to a file named file_name on the background thread; returns its Job
+
+    The chunks are read on that thread, so pass data the caller won't change
+    meanwhile. total, if known, is the deal count for progress bars.
+    """
+    global _executor
+    job = Job(file_name, total)
+    if job.kind not in REPORTS:
+        raise ValueError(f"Unknown export format: {job.kind}")
+    expire()
+    os.makedirs(exports_dir(), exist_ok=True)
+    with _jobs_lock:
+        if _executor is None:
+            workers = int(os.environ.get("PROPERTY_CALC_EXPORT_WORKERS", "1"))
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        _jobs[job.id] = job
+    _executor.submit(job._run, sources, deal_pages)
+    return job
+
+
+def job(job_id):
+    """The Job with this id, or None once it has expired"""
+    with _jobs_lock:
+        return _jobs.get(job_id)
+
+
+def expire(ttl_s=JOB_TTL_S):
+    """Forget jobs that finished over ttl_s ago and delete export files that old, from any process"""
+    cutoff = time.time() - ttl_s
+    with _jobs_lock:
+        for job_id in [job_id for job_id, job in _jobs.items() if job.finished and job.finished < cutoff]:
+            del _jobs[job_id]
+    try:
+        entries = list(os.scandir(exports_dir()))
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a CSV/Parquet file of deals as an Excel, PDF or CSV report")
+    parser.add_argument("input", help="CSV or Parquet file of deals (the batch screening columns, plus an optional name)")
+    parser.add_argument("output", help="Report file: .xlsx, .pdf or .csv")
+    parser.add_argument("--type", dest="property_type", choices=sorted(comparison.PROPERTY_TYPES), default="residential")
+    parser.add_argument("--chunksize", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--deal-pages", type=int, default=DEAL_PAGES,
+                        help="Deals that get their own workbook sheet or PDF page")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("output must be a different file than input")
+    if os.path.splitext(args.output)[1].lower() not in REPORTS:
+        parser.error("output must end in .xlsx, .pdf or .csv")
+
+    def report(rows):
+        print(f"\rExported {rows:,} deals", end="", file=sys.stderr)
+
+    start = time.perf_counter()
+    rows = export(args.output, {args.property_type: screening.read_chunks(args.input, args.chunksize)},
+                  progress=report, deal_pages=args.deal_pages)
+    print(file=sys.stderr)
+    print(f"{rows:,} deals written to {args.output} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
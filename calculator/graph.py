@@ -0,0 +1,192 @@
+"""Incremental recomputation of one deal as a graph of spreadsheet cells.
+
+Each node is one of calculator.engine's per-cell formulas, named after the
+engine output it produces and tagged with the workbook cell it mirrors (H3
+purchase price, E3 loan amount, J8:J11 operating expenses, ...). A node's
+inputs are the parameter names of its function, so the graph wires itself up
+from the engine's own formulas.
+
+Every input and node carries a version that is bumped when its value
+changes. A node recomputes only when the version of one of its inputs
+differs from the last time it ran, and a recomputed value equal to the old
+one keeps its version, so the change stops propagating there. Changing the
+other expenses (J11) therefore recomputes the operating expenses, NOI and
+cash flow, but not the loan payment.
+
+Because the graph calls the same functions the engine does, the two can't
+drift apart; the golden-value harness still checks both give identical
+results.
+"""
+import functools
+import inspect
+import time
+
+import numpy as np
+
+from calculator import engine, rates, tables
+
+
+def _same(old, new):
+    # Only cheap, unambiguous comparisons; anything else counts as changed
+    if type(old) is not type(new) or not isinstance(new, (int, float, str, bool, np.bool_, tuple, dict, type(None))):
+        return False
+    try:
+        return bool(old == new)
+    except (TypeError, ValueError):
+        return False
+
+
+class Graph:
+    """Memoized dependency graph of named cells"""
+
+    def __init__(self):
+        self.inputs = {}
+        self.nodes = {}
+        self.last_run = []
+        self._values = {}
+        self._versions = {}
+        self._seen = {}
+        self._logged = set()
+
+    def input(self, name, cell=None):
+        self.inputs[name] = cell
+
+    def add(self, name, func, cell=None, inputs=None):
+        """Add a node; func gets its inputs positionally, by default the names of its parameters without defaults"""
+        if inputs is None:
+            # Parameters with defaults are bound constants, not cells
+            inputs = [param.name for param in inspect.signature(func).parameters.values()
+                      if param.default is param.empty and param.kind is not param.VAR_POSITIONAL]
+        missing = [dep for dep in inputs if dep not in self.inputs and dep not in self.nodes]
+        if missing:
+            raise KeyError(f"{name} depends on unknown cells: {', '.join(missing)}")
+        self.nodes[name] = (func, tuple(inputs), cell)
+
+    def set_inputs(self, **values):
+        """Start a rerun with new input values; only changed inputs invalidate anything"""
+        self.last_run = []
+        self._logged = set()
+        for name, value in values.items():
+            if name not in self.inputs:
+                raise KeyError(f"Unknown input: {name}")
+            if name not in self._values or not _same(self._values[name], value):
+                self._values[name] = value
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def __getitem__(self, name):
+        return self._evaluate(name)
+
+    def get(self, *names):
+        """Several cells at once, as a dict"""
+        return {name: self._evaluate(name) for name in names}
+
+    def _evaluate(self, name):
+        if name in self.inputs:
+            if name not in self._values:
+                raise KeyError(f"Input {name} has not been set")
+            return self._values[name]
+
+        func, deps, cell = self.nodes[name]
+        args = [self._evaluate(dep) for dep in deps]
+        versions = tuple(self._versions[dep] for dep in deps)
+        if self._seen.get(name) == versions:
+            self._log(name, cell, False, 0.0)
+            return self._values[name]
+
+        start = time.perf_counter()
+        value = func(*args)
+        seconds = time.perf_counter() - start
+        if name not in self._values or not _same(self._values[name], value):
+            self._versions[name] = self._versions.get(name, 0) + 1
+        self._values[name] = value
+        self._seen[name] = versions
+        self._log(name, cell, True, seconds)
+        return value
+
+    def _log(self, name, cell, recomputed, seconds):
+        if name not in self._logged:
+            self._logged.add(name)
+            self.last_run.append({"node": name, "cell": cell or "", "recomputed": recomputed, "seconds": seconds})
+
+
+def _location(property_type, state, zip_code, county=None):
+    return {field: float(value)
+            for field, value in engine.location_rates(property_type, state, county, zip_code).items()}
+
+
+def _add_location(graph, property_type):
+    graph.input("state", "H1")
+    graph.input("zip_code")
+    graph.input("rate_table")
+    # rate_table (the table's content digest) is only a dependency, so a reload recomputes the lookups
+    graph.add("location", lambda state, zip_code, rate_table: _location(property_type, state, zip_code), "O2:Q7")
+    for field in ("tax_rate", "insurance_rate", "pm_fee_rate", "closing_cost_rate"):
+        graph.add(field, lambda location, field=field: location[field])
+
+
+def residential_graph():
+    """Cells of the residential workbook (BuyRent Calculator sheet)"""
+    graph = Graph()
+    for name, cell in (("purchase_price", "H3"), ("down_payment", "H5"), ("interest_rate", "E4"),
+                       ("loan_years", "E5"), ("monthly_rent", "K4")):
+        graph.input(name, cell)
+    _add_location(graph, "residential")
+
+    graph.add("amount_down", engine.amount_down, "H4")
+    graph.add("loan_amount", engine.loan_amount, "E3")
+    graph.add("monthly_pi", engine.monthly_pi, "H7")
+    graph.add("monthly_insurance", engine.monthly_insurance, "H8")
+    graph.add("monthly_tax", engine.monthly_tax, "H9")
+    graph.add("pm_fee", engine.pm_fee, "H10")
+    graph.add("maintenance", engine.maintenance, "H11")
+    graph.add("total_monthly", engine.total_monthly, "E8")
+    for rate, column in zip(engine.OCCUPANCY_RATES, "KLM"):
+        label = int(rate * 100)
+        graph.add(f"cash_flow_{label}", functools.partial(engine.cash_flow, rate=rate), f"{column}10")
+        graph.add(f"annual_roi_{label}", engine.annual_roi, f"{column}12",
+                  inputs=[f"cash_flow_{label}", "purchase_price", "down_payment"])
+    graph.add("profitable", engine.profitable)
+
+    graph.add("expense_rows", tables.residential_expenses)
+    graph.add("return_rows", tables.residential_returns)
+    outputs = list(engine.residential(**engine.RESIDENTIAL_DEFAULTS))
+    graph.add("results", lambda *values: dict(zip(outputs, values)), inputs=outputs)
+    return graph
+
+
+def commercial_graph():
+    """Cells of the commercial workbook (Apartment Investment sheet)"""
+    graph = Graph()
+    for name, cell in (("purchase_price", "H3"), ("down_payment", "H5"), ("annual_gross_rents", "K4"),
+                       ("annual_noi_listing", "L4"), ("vacancy_rate", "L5"), ("other_expenses", "J11"),
+                       ("interest_rate", "E4"), ("loan_years", "E5")):
+        graph.input(name, cell)
+    _add_location(graph, "commercial")
+
+    graph.add("amount_down", engine.amount_down, "H4")
+    graph.add("loan_amount", engine.commercial_loan_amount, "E3")
+    graph.add("monthly_payment", engine.monthly_pi, "H7")
+    graph.add("annual_debt_service", engine.annual_debt_service, "J7")
+    graph.add("annual_insurance", engine.annual_insurance, "J8")
+    graph.add("annual_property_tax", engine.annual_property_tax, "J9")
+    graph.add("annual_pm_fee", engine.annual_pm_fee, "J10")
+    graph.add("total_operating_expenses", engine.total_operating_expenses, "SUM(J8:J11)")
+    graph.add("adjusted_gross_income", engine.adjusted_gross_income, "K4*(1-L5)")
+    graph.add("noi_estimated", engine.noi_estimated, "L8")
+    graph.add("annual_cash_flow", engine.annual_cash_flow, "L10")
+    graph.add("closing_costs", engine.closing_costs, "J3")
+    graph.add("total_cash_down", engine.total_cash_down, "L11")
+    graph.add("cash_on_cash_return", engine.cash_on_cash_return, "L12")
+    graph.add("good_deal", engine.good_deal)
+
+    graph.add("expense_rows", tables.commercial_expenses)
+    graph.add("analysis_rows", tables.commercial_analysis)
+    outputs = list(engine.commercial(**engine.COMMERCIAL_DEFAULTS))
+    graph.add("results", lambda *values: dict(zip(outputs, values)), inputs=outputs)
+    return graph
+
+
+def set_deal(graph, deal):
+    """Feed one deal's engine inputs (plus the current rate table digest) into a graph"""
+    values = {name: deal.get(name) for name in graph.inputs if name != "rate_table"}
+    graph.set_inputs(rate_table=rates.current().digest, **values)
@@ -0,0 +1,663 @@
+"""Listing ingestion: fetch listing pages and extract the sidebar inputs.
+
+Each listing site has a parser registered for its host (LoopNet, Zillow and
+Crexi ship here; register_parser() adds more). A parser turns page HTML into
+the fields the calculator's sidebar takes: purchase price, monthly rent or
+annual gross rents and NOI, state and ZIP code, plus whether the listing is
+residential (≤4 units) or commercial.
+
+Pages are fetched concurrently on one asyncio event loop through a bounded
+keep-alive connection pool, with a minimum interval between requests to the
+same host. Every fetched page is kept in a content-addressed on-disk cache
+(identical pages are stored once) with a per-URL index of the parsed fields,
+so looking a listing up again costs a file read. Changing a parser bumps
+PARSER_VERSION, and cached pages are re-parsed without being fetched again.
+
+Fetching only uses the standard library. For offline runs, ``resolve`` maps a
+host to a local address (like curl --resolve), so a stub server can stand in
+for the real sites; benchmarks/listings_check.py does exactly that against
+the saved pages in benchmarks/fixtures/listings.
+
+Usage:
+    python -m calculator.listings https://www.loopnet.com/Listing/... [more URLs]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import ssl
+import time
+import urllib.parse
+import zlib
+from html.parser import HTMLParser
+
+from calculator import engine
+
+PARSER_VERSION = 1
+USER_AGENT = "Mozilla/5.0 (compatible; PropertyInvestmentCalculator/1.0)"
+MAX_REDIRECTS = 5
+MAX_PAGE_BYTES = 8 * 1024 * 1024
+
+# Fields a parser may return, in sidebar order
+FIELDS = ["property_type", "purchase_price", "monthly_rent", "annual_gross_rents", "annual_noi_listing",
+          "state", "zip_code", "address"]
+
+
+class ListingError(ValueError):
+    pass
+
+
+def address_from_url(url):
+    """Extract address from LoopNet or Zillow URLs"""
+    if not url:
+        return None
+
+    try:
+        if "loopnet.com/Listing/" in url or "zillow.com/homedetails/" in url:
+            parts = url.split("/")
+            if len(parts) > 4:
+                address_part = parts[4]
+                # Replace hyphens with spaces
+                address = address_part.replace("-", " ")
+                # Add comma before state (last 2 characters)
+                if len(address) > 2:
+                    address = address[:-2] + ", " + address[-2:]
+                return address
+    except:
+        pass
+
+    return None
+
+
+# --- Page scanning -----------------------------------------------------------
+
+class Page(HTMLParser):
+    """The parts of a listing page parsers look at
+
+    texts: visible text chunks in document order
+    meta: <meta> property/name -> content
+    scripts: <script id=...> -> text
+    json_ld: every JSON-LD object (top-level lists and @graph flattened)
+    """
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.texts = []
+        self.meta = {}
+        self.scripts = {}
+        self.json_ld = []
+        self._open = None
+        self._buffer = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            if key and attrs.get("content") is not None:
+                self.meta.setdefault(key.lower(), attrs["content"])
+        elif tag in ("script", "style"):
+            self._open = (tag, attrs.get("id"), (attrs.get("type") or "").lower())
+            self._buffer = []
+
+    def handle_endtag(self, tag):
+        if self._open is None or tag != self._open[0]:
+            return
+        _, element_id, kind = self._open
+        text = "".join(self._buffer)
+        self._open = None
+        if kind == "application/ld+json":
+            try:
+                self._add_json_ld(json.loads(text))
+            except ValueError:
+                pass
+        elif element_id:
+            self.scripts[element_id] = text
+
+    def handle_data(self, data):
+        if self._open is not None:
+            self._buffer.append(data)
+        elif data.strip():
+            self.texts.append(" ".join(data.split()))
+
+    def _add_json_ld(self, value):
+        if isinstance(value, list):
+            for item in value:
+                self._add_json_ld(item)
+        elif isinstance(value, dict):
+            self.json_ld.append(value)
+            for item in value.get("@graph", []):
+                self._add_json_ld(item)
+
+    def facts(self, labels):
+        """{field: value text} for label/value pairs such as <dt>Price</dt><dd>$1.2M</dd>
+
+        labels maps lower-case label text to a field; the first match wins.
+        "Label: value" in a single text chunk counts too.
+        """
+        found = {}
+        for i, text in enumerate(self.texts):
+            label, _, inline = text.partition(":")
+            field = labels.get(label.strip().lower())
+            if field is None or field in found:
+                continue
+            value = inline.strip() or (self.texts[i + 1] if i + 1 < len(self.texts) else "")
+            if value:
+                found[field] = value
+        return found
+
+
+_MONEY = re.compile(r"([0-9][0-9,]*(?:\.[0-9]+)?)\s*([KMB]\b)?", re.IGNORECASE)
+_MULTIPLIERS = {"k": 1e3, "m": 1e6, "b": 1e9}
+
+
+def parse_money(value):
+    """Dollar amount in "$1,970,000", "$1.97M" or 152195; None when there is none"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _MONEY.search(str(value or ""))
+    if not match:
+        return None
+    amount = float(match.group(1).replace(",", ""))
+    return amount * _MULTIPLIERS.get((match.group(2) or "").lower(), 1)
+
+
+def parse_percent(value):
+    match = re.search(r"([0-9]+(?:\.[0-9]+)?)\s*%", str(value or ""))
+    return float(match.group(1)) if match else None
+
+
+def _is_monthly(text):
+    return bool(re.search(r"/\s*mo|month", str(text), re.IGNORECASE))
+
+
+def _walk(value):
+    # Every dict nested in a JSON value, including JSON encoded inside strings
+    if isinstance(value, dict):
+        yield value
+        for item in value.values():
+            yield from _walk(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _walk(item)
+    elif isinstance(value, str) and value[:1] in "{[" and len(value) > 2:
+        try:
+            yield from _walk(json.loads(value))
+        except ValueError:
+            pass
+
+
+def _json_ld_fields(page):
+    """Price and address from schema.org listing data"""
+    fields = {}
+    for item in page.json_ld:
+        for node in _walk(item):
+            offers = node.get("offers")
+            if isinstance(offers, list):
+                offers = offers[0] if offers else None
+            if isinstance(offers, dict) and "purchase_price" not in fields:
+                price = parse_money(offers.get("price"))
+                if price:
+                    fields["purchase_price"] = price
+            address = node.get("address")
+            if isinstance(address, dict) and "state" not in fields:
+                fields.update(_address_fields(address.get("addressRegion"), address.get("postalCode"),
+                                              address.get("streetAddress"), address.get("addressLocality")))
+    return fields
+
+
+def _address_fields(state, zip_code, street=None, city=None):
+    fields = {}
+    if state:
+        fields["state"] = str(state).strip().upper()[:2]
+    if zip_code:
+        fields["zip_code"] = str(zip_code).strip()[:5]
+    if street:
+        fields["address"] = ", ".join(str(part).strip() for part in (street, city, state) if part)
+    return fields
+
+
+# --- Site parsers ------------------------------------------------------------
+
+PARSERS = {}
+
+
+def register_parser(host, parse):
+    """Use parse(page, url) -> fields for listings on host (and its subdomains)"""
+    PARSERS[host.lower()] = parse
+
+
+def parser_for(url):
+    """(site host, parser) for a listing URL, or (host, None) when no parser handles it"""
+    host = (urllib.parse.urlsplit(url).hostname or "").lower()
+    for site, parse in PARSERS.items():
+        if host == site or host.endswith(f".{site}"):
+            return site, parse
+    return host, None
+
+
+def _commercial_facts(page, labels):
+    facts = page.facts(labels)
+    fields = {}
+    for name in ("purchase_price", "annual_noi_listing", "annual_gross_rents"):
+        amount = parse_money(facts.get(name))
+        if amount is not None:
+            if name == "annual_gross_rents" and _is_monthly(facts[name]):
+                amount *= 12
+            fields[name] = amount
+    cap_rate = parse_percent(facts.get("cap_rate"))
+    price = fields.get("purchase_price")
+    if "annual_noi_listing" not in fields and cap_rate and price:
+        # Listings often give the cap rate instead of the NOI
+        fields["annual_noi_listing"] = round(price * cap_rate / 100)
+    units = parse_money(facts.get("units"))
+    if units is not None:
+        fields["property_type"] = "residential" if units <= 4 else "commercial"
+    return fields
+
+
+LOOPNET_LABELS = {
+    "price": "purchase_price", "asking price": "purchase_price", "sale price": "purchase_price",
+    "noi": "annual_noi_listing", "net operating income": "annual_noi_listing",
+    "gross rent": "annual_gross_rents", "gross income": "annual_gross_rents",
+    "gross scheduled income": "annual_gross_rents", "gross rents": "annual_gross_rents",
+    "cap rate": "cap_rate", "no. units": "units", "units": "units", "number of units": "units",
+}
+
+
+def parse_loopnet(page, url):
+    fields = {"property_type": "commercial", **_json_ld_fields(page)}
+    fields.update(_commercial_facts(page, LOOPNET_LABELS))
+    return fields
+
+
+CREXI_LABELS = {
+    "asking price": "purchase_price", "price": "purchase_price",
+    "noi": "annual_noi_listing", "net operating income": "annual_noi_listing",
+    "gross income": "annual_gross_rents", "gross rent": "annual_gross_rents",
+    "gross potential rent": "annual_gross_rents",
+    "cap rate": "cap_rate", "units": "units", "# of units": "units",
+}
+
+
+def parse_crexi(page, url):
+    fields = {"property_type": "commercial", **_json_ld_fields(page)}
+    fields.update(_commercial_facts(page, CREXI_LABELS))
+    return fields
+
+
+ZILLOW_LABELS = {
+    "rent zestimate": "monthly_rent", "rent zestimate®": "monthly_rent", "est. rent": "monthly_rent",
+    "price": "purchase_price",
+}
+
+
+def parse_zillow(page, url):
+    fields = {"property_type": "residential", **_json_ld_fields(page)}
+    # The page's own data (Next.js) is more complete than its markup
+    try:
+        data = json.loads(page.scripts.get("__NEXT_DATA__", "null"))
+    except ValueError:
+        data = None
+    for node in _walk(data):
+        if "zpid" not in node:
+            continue
+        if node.get("price") and "purchase_price" not in fields:
+            fields["purchase_price"] = parse_money(node["price"])
+        if node.get("rentZestimate") and "monthly_rent" not in fields:
+            fields["monthly_rent"] = parse_money(node["rentZestimate"])
+        address = node.get("address")
+        if isinstance(address, dict) and "state" not in fields:
+            fields.update(_address_fields(address.get("state"), address.get("zipcode"),
+                                          address.get("streetAddress"), address.get("city")))
+    facts = page.facts(ZILLOW_LABELS)
+    for name in ("purchase_price", "monthly_rent"):
+        if name not in fields and parse_money(facts.get(name)) is not None:
+            fields[name] = parse_money(facts[name])
+    return fields
+
+
+register_parser("loopnet.com", parse_loopnet)
+register_parser("crexi.com", parse_crexi)
+register_parser("zillow.com", parse_zillow)
+
+
+def parse_listing(url, html):
+    """Sidebar fields from one listing page; raises ListingError when no parser handles the site"""
+    site, parse = parser_for(url)
+    if parse is None:
+        raise ListingError(f"No listing parser for {site or url}")
+    fields = parse(Page(html), url)
+    fields = {name: fields[name] for name in FIELDS if fields.get(name) not in (None, "")}
+    if "address" not in fields and address_from_url(url):
+        fields["address"] = address_from_url(url)
+    return fields
+
+
+def to_params(fields, property_type=None):
+    """App URL parameters (comm_ prefixed for commercial) from parsed listing fields
+
+    Rents are converted between monthly and annual when the listing only has
+    the other one; a state outside the rate table is left out.
+    """
+    property_type = property_type or fields.get("property_type", "residential")
+    prefix = "" if property_type == "residential" else "comm_"
+    values = {name: fields[name] for name in ("purchase_price", "state", "zip_code") if name in fields}
+    if property_type == "residential":
+        names = ["monthly_rent"]
+        if "monthly_rent" not in fields and "annual_gross_rents" in fields:
+            values["monthly_rent"] = fields["annual_gross_rents"] / 12
+    else:
+        names = ["annual_gross_rents", "annual_noi_listing"]
+        if "annual_gross_rents" not in fields and "monthly_rent" in fields:
+            values["annual_gross_rents"] = fields["monthly_rent"] * 12
+    values.update({name: fields[name] for name in names if name in fields})
+    if values.get("state") not in engine.states():
+        values.pop("state", None)
+    return {f"{prefix}{name}": str(round(value)) if isinstance(value, float) else value
+            for name, value in values.items()}
+
+
+# --- On-disk cache -----------------------------------------------------------
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+class ListingCache:
+    """Fetched pages stored by content hash, with a per-URL index of parsed fields"""
+
+    def __init__(self, directory, max_age=7 * 24 * 3600):
+        self.directory = directory
+        self.max_age = max_age
+
+    def _index_path(self, url):
+        return os.path.join(self.directory, "urls", hashlib.sha256(url.encode("utf-8")).hexdigest() + ".json")
+
+    def _page_path(self, digest):
+        return os.path.join(self.directory, "pages", digest[:2], digest + ".html")
+
+    def lookup(self, url):
+        """The index entry for a URL, or None if it was never fetched or is older than max_age"""
+        try:
+            with open(self._index_path(url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self.max_age is not None and time.time() - entry["fetched"] > self.max_age:
+            return None
+        return entry
+
+    def page(self, digest):
+        with open(self._page_path(digest), "rb") as f:
+            return f.read()
+
+    def store(self, url, body, fields, fetched=None):
+        digest = hashlib.sha256(body).hexdigest()
+        if not os.path.exists(self._page_path(digest)):
+            _write_atomic(self._page_path(digest), body)
+        entry = {"url": url, "sha256": digest, "fetched": fetched or time.time(),
+                 "parser_version": PARSER_VERSION, "fields": fields}
+        _write_atomic(self._index_path(url), json.dumps(entry).encode("utf-8"))
+        return entry
+
+
+_cache = None
+
+
+def cache():
+    """The process-wide listing cache (PROPERTY_CALC_LISTINGS, default ~/.property-calculator/listings)"""
+    global _cache
+    if _cache is None:
+        _cache = ListingCache(os.environ.get("PROPERTY_CALC_LISTINGS",
+                                             os.path.join(os.path.expanduser("~"), ".property-calculator", "listings")))
+    return _cache
+
+
+# --- Fetching ----------------------------------------------------------------
+
+class Fetcher:
+    """Concurrent HTTP GETs over a bounded keep-alive pool, rate limited per host
+
+    max_connections bounds open connections overall, per_host the requests
+    in flight to one host, and min_interval spaces request starts to the same
+    host. resolve maps a host name to (address, port, tls) for offline runs.
+    """
+
+    def __init__(self, max_connections=8, per_host=2, min_interval=1.0, timeout=15.0, resolve=None):
+        self.max_connections = max_connections
+        self.per_host = per_host
+        self.min_interval = min_interval
+        self.timeout = timeout
+        self.resolve = resolve or {}
+        self.requests = 0
+        self._slots = None
+        self._hosts = {}
+        self._next_start = {}
+        self._idle = {}
+        self._ssl = None
+
+    async def __aenter__(self):
+        self._slots = asyncio.Semaphore(self.max_connections)
+        return self
+
+    async def __aexit__(self, *exc):
+        for connections in self._idle.values():
+            for _, writer in connections:
+                writer.close()
+        self._idle = {}
+
+    async def _wait_turn(self, host):
+        # One event loop, so reserving the next start time needs no lock
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        start = max(now, self._next_start.get(host, now))
+        self._next_start[host] = start + self.min_interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def _connect(self, key, host):
+        idle = self._idle.get(key, [])
+        while idle:
+            reader, writer = idle.pop()
+            if not reader.at_eof() and not writer.is_closing():
+                return reader, writer
+            writer.close()
+        address, port, tls = key
+        if tls and self._ssl is None:
+            self._ssl = ssl.create_default_context()
+        return await asyncio.open_connection(address, port, ssl=self._ssl if tls else None,
+                                             server_hostname=host if tls else None)
+
+    async def get(self, url):
+        """(status, body bytes, final URL), following redirects within the listing's site"""
+        site, _ = parser_for(url)
+        for _ in range(MAX_REDIRECTS + 1):
+            status, headers, body = await self._get_once(url)
+            if status in (301, 302, 303, 307, 308) and headers.get("location"):
+                url = urllib.parse.urljoin(url, headers["location"])
+                # A redirect may only move within the site whose parser matched (any of its subdomains)
+                if parser_for(url)[0] != site:
+                    raise ListingError(f"Redirected off {site} to {urllib.parse.urlsplit(url).hostname or url}")
+                continue
+            return status, body, url
+        raise ListingError(f"Too many redirects for {url}")
+
+    async def _get_once(self, url):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ListingError(f"Not an http(s) URL: {url}")
+        host = parts.hostname.lower()
+        tls = parts.scheme == "https"
+        key = self.resolve.get(host) or (host, parts.port or (443 if tls else 80), tls)
+        target = urllib.parse.urlunsplit(("", "", parts.path or "/", parts.query, ""))
+
+        semaphore = self._hosts.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            await self._wait_turn(host)
+            async with self._slots:
+                reader, writer = await asyncio.wait_for(self._connect(key, host), self.timeout)
+                self.requests += 1
+                writer.write((f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\nUser-Agent: {USER_AGENT}\r\n"
+                              f"Accept: text/html\r\nAccept-Encoding: gzip, deflate\r\nConnection: keep-alive\r\n\r\n")
+                             .encode("latin-1"))
+                try:
+                    status, headers, body, reusable = await asyncio.wait_for(_read_response(reader), self.timeout)
+                except BaseException:
+                    writer.close()
+                    raise
+                idle = self._idle.setdefault(key, [])
+                if reusable and len(idle) < self.per_host:
+                    idle.append((reader, writer))
+                else:
+                    writer.close()
+        return status, headers, body
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        status = int(lines[0].split(" ", 2)[1])
+    except (IndexError, ValueError):
+        raise ListingError(f"Bad HTTP status line: {lines[0]!r}")
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    # MAX_PAGE_BYTES is enforced as the body arrives, so a server can't make us buffer more
+    reusable = headers.get("connection", "").lower() != "close"
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks, received = [], 0
+        while True:
+            try:
+                size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            except ValueError:
+                raise ListingError("Bad chunk size in response")
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                break
+            received += size
+            if received > MAX_PAGE_BYTES:
+                raise ListingError("Listing page is too large")
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            raise ListingError(f"Bad Content-Length: {headers['content-length']!r}")
+        if not 0 <= length <= MAX_PAGE_BYTES:
+            raise ListingError("Listing page is too large")
+        body = await reader.readexactly(length)
+    else:
+        chunks, received = [], 0
+        while chunk := await reader.read(64 * 1024):
+            received += len(chunk)
+            if received > MAX_PAGE_BYTES:
+                raise ListingError("Listing page is too large")
+            chunks.append(chunk)
+        body = b"".join(chunks)
+        reusable = False
+
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding in ("gzip", "deflate"):
+        body = _decompress(body, zlib.MAX_WBITS | 16 if encoding == "gzip" else zlib.MAX_WBITS)
+    return status, headers, body, reusable
+
+
+def _decompress(body, wbits):
+    """Inflate a gzip or zlib body, to at most MAX_PAGE_BYTES of output"""
+    inflater = zlib.decompressobj(wbits)
+    try:
+        page = inflater.decompress(body, MAX_PAGE_BYTES)
+    except zlib.error as e:
+        raise ListingError(f"Bad compressed page: {e}")
+    if inflater.unconsumed_tail:
+        raise ListingError("Listing page is too large")
+    if not inflater.eof:
+        raise ListingError("Compressed page is truncated")
+    return page
+
+
+def _decode(body):
+    return body.decode("utf-8", errors="replace")
+
+
+async def fetch_listings(urls, listing_cache=None, fetcher=None, refresh=False):
+    """Fields for each listing URL, fetching only what the cache doesn't have
+
+    Returns one dict per URL, in order: url, site, fields, cached, error.
+    Duplicate URLs are fetched once.
+    """
+    listing_cache = listing_cache or cache()
+    fetcher = fetcher or Fetcher()
+    results = {}
+
+    async def ingest_one(url):
+        site, parse = parser_for(url)
+        result = {"url": url, "site": site, "fields": {}, "cached": False, "error": None}
+        if parse is None:
+            result["error"] = f"No listing parser for {site or url}"
+            return result
+        entry = None if refresh else listing_cache.lookup(url)
+        if entry is not None:
+            result["cached"] = True
+            if entry["parser_version"] != PARSER_VERSION:
+                # A newer parser reads the stored page again; no fetch needed
+                body = listing_cache.page(entry["sha256"])
+                entry = listing_cache.store(url, body, parse_listing(url, _decode(body)), entry["fetched"])
+            result["fields"] = entry["fields"]
+            return result
+        try:
+            status, body, _ = await fetcher.get(url)
+            if status != 200:
+                raise ListingError(f"HTTP {status}")
+            fields = parse_listing(url, _decode(body))
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                ValueError) as e:
+            result["error"] = str(e) or type(e).__name__
+            return result
+        listing_cache.store(url, body, fields)
+        result["fields"] = fields
+        return result
+
+    unique = list(dict.fromkeys(url.strip().split("#")[0] for url in urls))
+    async with fetcher:
+        for result in await asyncio.gather(*[ingest_one(url) for url in unique]):
+            results[result["url"]] = result
+    return [dict(results[url.strip().split("#")[0]]) for url in urls]
+
+
+def ingest(urls, **kwargs):
+    """Synchronous fetch_listings()"""
+    return asyncio.run(fetch_listings(urls, **kwargs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch listing pages and print the calculator inputs they give")
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--refresh", action="store_true", help="Fetch again even if the page is cached")
+    parser.add_argument("--connections", type=int, default=8, help="Open connections at most")
+    parser.add_argument("--interval", type=float, default=1.0, help="Seconds between requests to one host")
+    args = parser.parse_args(argv)
+
+    fetcher = Fetcher(max_connections=args.connections, min_interval=args.interval)
+    for result in ingest(args.urls, fetcher=fetcher, refresh=args.refresh):
+        if result["fields"]:
+            result["params"] = to_params(result["fields"])
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
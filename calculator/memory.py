@@ -0,0 +1,97 @@
+"""Memory accounting for the shared caches and each browser session.
+
+Streamlit keeps a session_state per open tab for as long as the tab lives,
+so anything a session holds on to is paid for once per user. The app keeps
+immutable results in the process-wide caches (calculator.cache, the rate
+table) and gives each session only what it needs to rerun quickly: its
+calculation graph and, on the Compare Deals page, its workspace. Those are
+registered with a SessionBudget, which evicts the least recently used of them
+when a session grows past its budget. An object with a trim() method (the
+comparison workspace) is asked to drop its rebuildable parts and is kept;
+anything else is dropped and rebuilt by its factory on next use.
+
+Budgets come from the environment, in MB:
+
+    PROPERTY_CALC_SESSION_MB      per-session budget (default 16)
+    PROPERTY_CALC_CACHE_MB        deal result cache (default 128)
+    PROPERTY_CALC_SWEEP_CACHE_MB  sensitivity and simulation cache (default 256)
+"""
+import os
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+MB = 2**20
+ORDER_KEY = "_memory_budget_order"
+
+
+def budget_from_env(name, default_mb):
+    """A byte budget from an environment variable given in MB"""
+    return int(float(os.environ.get(name, default_mb)) * MB)
+
+
+def sizeof(obj, _seen=None):
+    """Approximate bytes held by obj and everything it references, counting shared objects once"""
+    seen = set() if _seen is None else _seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes + (sum(sizeof(item, seen) for item in obj.flat) if obj.dtype == object else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sizeof(key, seen) + sizeof(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, (type, types.ModuleType)):
+        size += sizeof(vars(obj), seen)
+    return size
+
+
+class SessionBudget:
+    """Least-recently-used memory budget for the rebuildable objects in one session's state"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+
+    def use(self, state, key, factory):
+        """state[key], created by factory() if missing (or evicted), marked most recently used"""
+        if key not in state:
+            state[key] = factory()
+        if ORDER_KEY not in state:
+            state[ORDER_KEY] = {}
+        order = state[ORDER_KEY]
+        order.pop(key, None)
+        order[key] = True
+        return state[key]
+
+    def enforce(self, state):
+        """Trim or evict least recently used objects until the session fits; returns (bytes, evicted keys)"""
+        order = state[ORDER_KEY] if ORDER_KEY in state else {}
+        sizes = {key: sizeof(state[key]) for key in order if key in state}
+        total = sum(sizes.values())
+        evicted = []
+        for key in list(order):
+            if total <= self.max_bytes:
+                break
+            if key not in state:
+                del order[key]
+                continue
+            trim = getattr(state[key], "trim", None)
+            if trim is not None:
+                trim()
+                total -= sizes[key] - sizeof(state[key])
+            else:
+                del state[key]
+                del order[key]
+                total -= sizes[key]
+            evicted.append(key)
+        return total, evicted
+
+
+session_budget = SessionBudget(budget_from_env("PROPERTY_CALC_SESSION_MB", 16))
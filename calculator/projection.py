@@ -0,0 +1,132 @@
+"""Multi-year hold projections with IRR, NPV and equity build-up.
+
+Deals run along the leading axes and hold years along the last one, so a
+whole portfolio is projected with a few broadcast array operations. Year 1
+reproduces the engine's single-year snapshot; later years grow rents and
+inflate the state-based tax and insurance (plus the other fixed expenses),
+while the loan amortizes on schedule. The property is sold at the end of the
+hold at a cap rate taken from the listing NOI (commercial) or the going-in
+NOI (residential, which has no listing NOI).
+"""
+import numpy as np
+
+from calculator import amortization, engine
+from calculator.returns import irr, npv
+
+
+def _growth(rate_pct, years):
+    """Growth index per year, 1.0 in year 1; shape (..., years)"""
+    return (1 + np.asarray(rate_pct, dtype=float)[..., None] / 100) ** np.arange(years)
+
+
+def _operations(property_type, deal, base, years, rent_growth, expense_inflation, occupancy):
+    """Yearly gross income, operating expenses and NOI for years 1..years"""
+    rent_index = _growth(rent_growth, years)
+    expense_index = _growth(expense_inflation, years)
+
+    def col(value):
+        return np.asarray(value, dtype=float)[..., None]
+
+    pm_fee_rate = col(engine.location_rates(property_type, deal["state"], deal.get("county"),
+                                            deal.get("zip_code"))["pm_fee_rate"])
+    if property_type == "residential":
+        rent = col(deal["monthly_rent"]) * rent_index
+        gross_income = 12 * rent * occupancy
+        # Insurance, tax and maintenance inflate; the PM fee follows rent
+        operating = 12 * ((col(base["monthly_insurance"]) + col(base["monthly_tax"]) + col(base["maintenance"]))
+                          * expense_index + rent * pm_fee_rate)
+    else:
+        gross_rents = col(deal["annual_gross_rents"]) * rent_index
+        # Adjusted gross income: K4*(1-L5)
+        gross_income = gross_rents * (1 - col(deal["vacancy_rate"]) / 100)
+        operating = ((col(base["annual_insurance"]) + col(base["annual_property_tax"]) + col(deal["other_expenses"]))
+                     * expense_index + gross_rents * pm_fee_rate)
+    return gross_income, operating, gross_income - operating
+
+
+def project(property_type, deal, years=10, rent_growth=3.0, expense_inflation=3.0, discount_rate=8.0,
+            exit_cap_rate=None, occupancy=engine.OCCUPANCY_RATES[1]):
+    """Year-by-year projection and hold returns for one or more deals
+
+    deal holds the engine inputs (scalars or arrays that broadcast together).
+    Growth, inflation, discount and cap rates are percentages and may also be
+    arrays. Residential income assumes the given occupancy (90% by default).
+    Yearly outputs have shape (..., years); the return metrics have the deal
+    shape.
+    """
+    property_type = property_type.lower()
+    if property_type == "residential":
+        base = engine.residential(**deal)
+        initial_equity = np.asarray(base["amount_down"], dtype=float)
+        annual_debt_service = 12 * np.asarray(base["monthly_pi"], dtype=float)
+    else:
+        base = engine.commercial(**deal)
+        initial_equity = np.asarray(base["total_cash_down"], dtype=float)
+        annual_debt_service = np.asarray(base["annual_debt_service"], dtype=float)
+
+    # One extra year of operations gives the forward NOI the buyer at exit pays for
+    gross_income, operating, noi = _operations(property_type, deal, base, years + 1, rent_growth,
+                                               expense_inflation, occupancy)
+    year = np.arange(1, years + 1)
+    loan_years = np.asarray(deal["loan_years"])[..., None]
+    debt_service = np.where(year <= loan_years, annual_debt_service[..., None], 0.0)
+    cash_flow = noi[..., :years] - debt_service
+
+    balance = amortization.balance_after(np.asarray(base["loan_amount"])[..., None],
+                                         np.asarray(deal["interest_rate"])[..., None], loan_years, year * 12)
+    loan_amount = np.asarray(base["loan_amount"], dtype=float)[..., None]
+    principal_paid = -np.diff(balance, axis=-1, prepend=loan_amount)
+
+    purchase_price = np.asarray(deal["purchase_price"], dtype=float)
+    if exit_cap_rate is not None:
+        cap_rate = np.asarray(exit_cap_rate, dtype=float) / 100
+    elif property_type == "commercial":
+        cap_rate = np.asarray(deal["annual_noi_listing"], dtype=float) / purchase_price
+    else:
+        cap_rate = noi[..., 0] / purchase_price
+    # Value each year-end on the next year's NOI; hold value flat where the cap rate is unusable
+    with np.errstate(divide="ignore", invalid="ignore"):
+        property_value = np.where(cap_rate[..., None] > 0, noi[..., 1:] / cap_rate[..., None], purchase_price[..., None])
+    property_value = np.broadcast_to(property_value, cash_flow.shape)
+    equity = property_value - balance
+    exit_proceeds = equity[..., -1]
+
+    flows = np.concatenate([-np.broadcast_to(initial_equity, cash_flow.shape[:-1])[..., None], cash_flow], axis=-1)
+    flows[..., -1] += exit_proceeds
+    with np.errstate(divide="ignore", invalid="ignore"):
+        equity_multiple = np.where(initial_equity > 0, flows[..., 1:].sum(axis=-1) / initial_equity, np.nan)
+
+    return {
+        "year": year,
+        "gross_income": gross_income[..., :years],
+        "operating_expenses": operating[..., :years],
+        "noi": noi[..., :years],
+        "debt_service": debt_service,
+        "cash_flow": cash_flow,
+        "principal_paid": principal_paid,
+        "loan_balance": balance,
+        "property_value": property_value,
+        "equity": equity,
+        "initial_equity": initial_equity,
+        "exit_cap_rate": np.asarray(cap_rate) * 100,
+        "exit_value": property_value[..., -1],
+        "exit_proceeds": exit_proceeds,
+        "cash_flows": flows,
+        "irr": irr(flows),
+        "npv": npv(np.asarray(discount_rate, dtype=float) / 100, flows),
+        "equity_multiple": equity_multiple,
+    }
+
+
+def project_frame(deals, property_type, **assumptions):
+    """Project a DataFrame of deals and append the hold returns, best IRR first"""
+    inputs = engine.RESIDENTIAL_INPUTS if property_type == "residential" else engine.COMMERCIAL_INPUTS
+    result = project(property_type, engine._frame_inputs(deals, inputs), **assumptions)
+    ranked = deals.assign(
+        irr=result["irr"] * 100,
+        npv=result["npv"],
+        equity_multiple=result["equity_multiple"],
+        exit_value=result["exit_value"],
+        exit_proceeds=result["exit_proceeds"],
+    )
+    return ranked.sort_values("irr", ascending=False, na_position="last")
@@ -0,0 +1,223 @@
+"""Location-based rate tables (tax, insurance, PM fee, closing costs).
+
+Rates come from a versioned data file rather than code: CSV, Parquet or a
+SQLite database with a ``rates`` table, one row per location. A row with only
+a state is that state's default; rows that also name a county or ZIP code
+override it, and the most specific match wins (ZIP, then county, then state).
+
+The file is loaded into an immutable, indexed RateTable once per process and
+shared by every session. current() re-checks the file at most once a second
+and, when it has changed, builds a new table and swaps it in with a single
+assignment, so a lookup always sees one complete version. A file that fails
+to load (e.g. caught mid-write) leaves the previous table in place.
+
+The version column is a label for people and is shown in the app; nothing
+checks that it is bumped on every edit. Anything that must not outlive the
+rates it was computed from (cached results, graph nodes, worker processes)
+keys on RateTable.digest instead, a hash of the rows themselves.
+
+Columns: version (optional), state, county, zip_code and the RATE_FIELDS.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "rates.csv")
+CHECK_INTERVAL = 1.0  # seconds between file checks
+
+RATE_FIELDS = [
+    "residential_tax_rate",
+    "residential_insurance_rate",
+    "residential_pm_fee_rate",
+    "commercial_tax_rate",
+    "commercial_insurance_rate",
+    "commercial_pm_fee_rate",
+    "closing_cost_rate",
+]
+
+
+class RateTableError(ValueError):
+    pass
+
+
+def normalize_county(values):
+    """Upper-case county names without a trailing 'County'"""
+    names = pd.Series(values, dtype=object).fillna("").astype(str).str.strip().str.upper()
+    return names.str.replace(r"\s+COUNTY$", "", regex=True).to_numpy(dtype=object)
+
+
+def normalize_zip(values):
+    """Five-digit ZIP strings; ZIP+4 is truncated and numeric ZIPs are zero-padded"""
+    codes = pd.Series(values, dtype=object).fillna("").astype(str).str.strip()
+    codes = codes.str.replace(r"\.0$", "", regex=True).str[:5]
+    return codes.where(codes == "", codes.str.zfill(5)).to_numpy(dtype=object)
+
+
+class RateTable:
+    """An indexed, read-only rate table"""
+
+    def __init__(self, frame, version, source=None, signature=None):
+        missing = [column for column in ["state"] + RATE_FIELDS if column not in frame.columns]
+        if missing:
+            raise RateTableError(f"Rate table is missing columns: {', '.join(missing)}")
+        frame = frame.reset_index(drop=True)
+        states = frame["state"].astype(str).str.strip().str.upper().to_numpy(dtype=object)
+        counties = normalize_county(frame["county"] if "county" in frame.columns else [""] * len(frame))
+        zips = normalize_zip(frame["zip_code"] if "zip_code" in frame.columns else [""] * len(frame))
+
+        self.version = str(version)
+        self.source = source
+        self.signature = signature
+        # Changes whenever any row does, whether or not the version label was bumped
+        self.digest = hashlib.sha256(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes()).hexdigest()[:16]
+        self.columns = {}
+        for field in RATE_FIELDS:
+            values = pd.to_numeric(frame[field], errors="coerce").to_numpy(dtype=float)
+            if np.isnan(values).any() or (values < 0).any() or (values >= 1).any():
+                raise RateTableError(f"{field} must be a fraction between 0 and 1 on every row")
+            self.columns[field] = values
+
+        is_state = (counties == "") & (zips == "")
+        is_county = (counties != "") & (zips == "")
+        is_zip = zips != ""
+        county_keys = states[is_county] + "|" + counties[is_county]
+        for label, keys in (("state", states[is_state]), ("county", county_keys), ("ZIP code", zips[is_zip])):
+            duplicated = pd.Index(keys)[pd.Index(keys).duplicated()]
+            if len(duplicated):
+                raise RateTableError(f"Duplicate {label} rows: {', '.join(map(str, duplicated[:5]))}")
+        orphans = set(states[~is_state]) - set(states[is_state])
+        if orphans:
+            raise RateTableError(f"County/ZIP rows without a state row: {', '.join(sorted(orphans))}")
+
+        self.states = list(states[is_state])  # file order, as shown in the app
+        self._state_rows = dict(zip(states[is_state], np.flatnonzero(is_state)))
+        self._state_index = pd.Index(states[is_state])
+        self._state_row_array = np.flatnonzero(is_state)
+        self._county_index = pd.Index(county_keys)
+        self._county_rows = np.flatnonzero(is_county)
+        self._zip_index = pd.Index(zips[is_zip])
+        self._zip_rows = np.flatnonzero(is_zip)
+        self.rows = len(frame)
+
+    def resolve(self, state, county=None, zip_code=None):
+        """Row index of the most specific match for each location (arrays broadcast)"""
+        state = np.asarray(state)
+        if state.ndim == 0 and county is None and zip_code is None:
+            try:
+                return np.asarray(self._state_rows[state.item()])
+            except KeyError:
+                raise KeyError(f"Unknown state: {state.item()}")
+
+        parts = [state] + [np.asarray(part, dtype=object) for part in (county, zip_code) if part is not None]
+        shape = np.broadcast(*parts).shape
+        # Index the few distinct states, then expand; far cheaper than indexing every row
+        keys, inverse = np.unique(np.broadcast_to(state, shape).ravel(), return_inverse=True)
+        found = self._state_index.get_indexer(keys.astype(object))
+        if (found < 0).any():
+            unknown = sorted(keys[found < 0].tolist())
+            raise KeyError(f"Unknown state: {', '.join(map(str, unknown))}")
+        rows = self._state_row_array[found][inverse]
+
+        if county is not None and len(self._county_rows):
+            states = keys.astype(object)[inverse]
+            keys = states + "|" + normalize_county(np.broadcast_to(np.asarray(county, dtype=object), shape).ravel())
+            found = self._county_index.get_indexer(keys)
+            rows = np.where(found >= 0, self._county_rows[found], rows)
+        if zip_code is not None and len(self._zip_rows):
+            found = self._zip_index.get_indexer(normalize_zip(np.broadcast_to(np.asarray(zip_code, dtype=object), shape).ravel()))
+            rows = np.where(found >= 0, self._zip_rows[found], rows)
+        return rows.reshape(shape)
+
+    def lookup(self, field, state, county=None, zip_code=None):
+        """Rate for each location"""
+        return self.columns[field][self.resolve(state, county, zip_code)]
+
+    def location_rates(self, property_type, state, county=None, zip_code=None):
+        """The rates one property type needs: tax, insurance, PM fee and closing costs"""
+        rows = self.resolve(state, county, zip_code)
+        return {
+            "tax_rate": self.columns[f"{property_type}_tax_rate"][rows],
+            "insurance_rate": self.columns[f"{property_type}_insurance_rate"][rows],
+            "pm_fee_rate": self.columns[f"{property_type}_pm_fee_rate"][rows],
+            "closing_cost_rate": self.columns["closing_cost_rate"][rows],
+        }
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def read_frame(path):
+    """Raw rows from a CSV, Parquet or SQLite rate file"""
+    name = path.lower()
+    if name.endswith((".parquet", ".pq")):
+        return pd.read_parquet(path)
+    if name.endswith((".db", ".sqlite", ".sqlite3")):
+        with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as connection:
+            return pd.read_sql_query("SELECT * FROM rates", connection)
+    return pd.read_csv(path, dtype={"version": str, "state": str, "county": str, "zip_code": str}, keep_default_na=False)
+
+
+def load(path, signature=None):
+    """Build a RateTable from a file; the version column, or a content hash, identifies it"""
+    signature = signature or _signature(path)
+    frame = read_frame(path)
+    versions = frame["version"].astype(str).unique() if "version" in frame.columns else []
+    if len(versions) > 1:
+        raise RateTableError(f"Rate file mixes versions: {', '.join(versions)}")
+    if len(versions):
+        version = versions[0]
+    else:
+        with open(path, "rb") as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+    return RateTable(frame, version, source=path, signature=signature)
+
+
+_lock = threading.Lock()
+_path = os.environ.get("PROPERTY_CALC_RATES", DEFAULT_PATH)
+_table = None
+_last_check = 0.0
+
+
+def _refresh(force=False):
+    global _table, _last_check
+    with _lock:
+        try:
+            signature = _signature(_path)
+            if force or _table is None or signature != _table.signature:
+                _table = load(_path, signature)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            if _table is None:
+                raise
+            warnings.warn(f"Keeping rate table {_table.version}; could not load {_path}: {e}")
+        _last_check = time.monotonic()
+        return _table
+
+
+def current():
+    """The process-wide rate table, reloaded if the file changed"""
+    table = _table
+    if table is not None and time.monotonic() - _last_check < CHECK_INTERVAL:
+        return table
+    return _refresh()
+
+
+def reload():
+    """Force a reload of the current rate file"""
+    return _refresh(force=True)
+
+
+def use(path):
+    """Switch the process to a different rate file (loaded before it is swapped in)"""
+    global _path, _table, _last_check
+    table = load(path)
+    with _lock:
+        _path, _table, _last_check = path, table, time.monotonic()
+    return table
@@ -0,0 +1,83 @@
+"""Vectorized NPV and IRR over many cash-flow streams at once.
+
+Cash flows are arrays whose last axis is the period (period 0 is the
+undiscounted initial investment); every other axis is a separate deal or
+simulation path.
+"""
+import numpy as np
+
+
+def npv(rate, cash_flows):
+    """Net present value of each cash-flow stream at rate (scalar or per stream)"""
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    discount = 1 / (1 + np.asarray(rate, dtype=float))
+    value = np.zeros(cash_flows.shape[:-1])
+    # Horner's rule: sum of c_t * x^t without computing any powers
+    for t in range(cash_flows.shape[-1] - 1, -1, -1):
+        value = value * discount + cash_flows[..., t]
+    return value
+
+
+def _initial_guess(flows):
+    """Rough IRR from total inflows vs. the initial outlay over their weighted duration"""
+    periods = np.arange(flows.shape[1])
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        inflows = flows[:, 1:].sum(axis=1)
+        duration = (flows[:, 1:] * periods[1:]).sum(axis=1) / inflows
+        guess = (inflows / -flows[:, 0]) ** (1 / duration) - 1
+    return np.where(np.isfinite(guess) & (guess > -0.99) & (guess < 10), guess, 0.1)
+
+
+def irr(cash_flows, guess=None, tol=1e-10, max_iter=50):
+    """Internal rate of return of each cash-flow stream
+
+    Runs one Newton iteration over all unconverged streams at a time. Streams
+    without a sign change, or that don't converge, get nan. Without a guess,
+    each stream starts from a duration-based estimate.
+    """
+    cash_flows = np.asarray(cash_flows, dtype=float)
+    shape = cash_flows.shape[:-1]
+    flows = cash_flows.reshape(-1, cash_flows.shape[-1])
+    periods = flows.shape[1]
+
+    if guess is None:
+        rate = _initial_guess(flows)
+    else:
+        rate = np.broadcast_to(np.asarray(guess, dtype=float), shape).reshape(-1).copy()
+    has_root = (flows.min(axis=1) < 0) & (flows.max(axis=1) > 0)
+    converged = np.zeros(len(flows), dtype=bool)
+
+    # Work period-major so each Horner step reads one contiguous row; the
+    # working set is compacted as streams converge
+    index = np.flatnonzero(has_root)
+    columns = np.ascontiguousarray(flows[index].T)
+    work_rate = rate[index]
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for _ in range(max_iter):
+            if len(index) == 0:
+                break
+            x = 1 / (1 + work_rate)
+            value = np.zeros(len(index))
+            slope = np.zeros(len(index))
+            for t in range(periods - 1, -1, -1):
+                slope *= x
+                slope += value
+                value *= x
+                value += columns[t]
+            # slope is d(value)/dx; dx/drate = -x^2
+            step = value / (slope * -x * x)
+            work_rate = np.maximum(work_rate - step, -0.9999)
+
+            done = np.abs(step) <= tol
+            failed = ~np.isfinite(step)
+            rate[index] = work_rate
+            converged[index[done]] = True
+            keep = ~(done | failed)
+            # Copying the working set only pays off once a good share has finished;
+            # until then the finished streams just take another (harmless) step
+            if keep.mean() < 0.75:
+                index, columns, work_rate = index[keep], columns[:, keep], work_rate[keep]
+
+    rate[~converged | ~np.isfinite(rate)] = np.nan
+    return rate.reshape(shape)
@@ -0,0 +1,249 @@
+"""Parallel scenario runner for large deal sets.
+
+A nightly re-score evaluates every deal under a scenario: the engine's cash
+flow and cash-on-cash, the full-term amortization schedule and a multi-year
+hold projection. One process caps that at one core, so ScenarioRunner splits
+the deals into chunks of CHUNK_ROWS and maps them over a process pool.
+
+Nothing large is pickled per task. The runner copies the deal inputs into
+shared memory once (numeric inputs as one float64 block; state, county and
+ZIP as codes into short category lists sent to each worker when it starts)
+and allocates the result block there too. A task is just a row range: the
+worker reads those rows and writes their results in place. The other
+read-only inputs are also loaded once per worker rather than per task: the
+rate table from the parent's file, checked to have the same contents, and
+engine.MAINTENANCE.
+
+run() yields results chunk by chunk in deal order, each as soon as it and
+every chunk before it are done, so a writer can stream them out while the
+rest are computed. Each chunk is evaluated exactly as one process would
+evaluate it, so results don't depend on the worker count.
+
+Usage:
+    python -m calculator.scenarios deals.csv results.parquet --type commercial --workers 8 --interest-rate 6
+"""
+import argparse
+import concurrent.futures
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from calculator import amortization, comparison, engine, projection, rates, screening
+
+CHUNK_ROWS = 2_000  # a chunk's monthly schedules are ~35 MB per worker
+OUTPUTS = ["monthly_payment", "annual_cash_flow", "cash_on_cash", "good", "total_interest", "year1_interest",
+           "year1_principal", "exit_balance", "irr", "npv", "equity_multiple", "exit_value"]
+# projection.project() keyword arguments a scenario may set
+ASSUMPTIONS = ["years", "rent_growth", "expense_inflation", "discount_rate", "exit_cap_rate", "occupancy"]
+
+
+def evaluate(property_type, deal, **assumptions):
+    """Every output for a dict of engine input arrays; assumptions go to projection.project()"""
+    _, calculate = comparison.PROPERTY_TYPES[property_type]
+    results = pd.DataFrame({name: np.asarray(value) for name, value in calculate(**deal).items()})
+    shared = comparison.shared_columns(
+        property_type, pd.DataFrame({"name": "", "state": deal["state"], "purchase_price": deal["purchase_price"]}),
+        results)
+    monthly = amortization.schedule(results["loan_amount"].to_numpy(), deal["interest_rate"], deal["loan_years"])
+    projected = projection.project(property_type, deal, **assumptions)
+    return {
+        "monthly_payment": shared["monthly_payment"].to_numpy(),
+        "annual_cash_flow": shared["annual_cash_flow"].to_numpy(),
+        "cash_on_cash": shared["cash_on_cash"].to_numpy(),
+        "good": shared["good"].to_numpy(),
+        "total_interest": monthly["cumulative_interest"][:, -1],
+        "year1_interest": monthly["interest"][:, :12].sum(axis=1),
+        "year1_principal": monthly["principal"][:, :12].sum(axis=1),
+        "exit_balance": projected["loan_balance"][..., -1],
+        "irr": projected["irr"] * 100,
+        "npv": projected["npv"],
+        "equity_multiple": projected["equity_multiple"],
+        "exit_value": projected["exit_value"],
+    }
+
+
+def _evaluate_rows(state, start, stop, changes, assumptions):
+    """Evaluate rows start:stop of the (shared or local) input arrays into the output array"""
+    deal = {name: state["inputs"][i, start:stop] for i, name in enumerate(state["numeric"])}
+    for i, name in enumerate(state["text"]):
+        deal[name] = state["categories"][name][state["codes"][i, start:stop]]
+    for name, value in changes.items():
+        deal[name] = np.full(stop - start, float(value))
+    outputs = evaluate(state["property_type"], deal, **assumptions)
+    for i, name in enumerate(OUTPUTS):
+        state["outputs"][i, start:stop] = outputs[name]
+    return start, stop
+
+
+_worker = {}
+
+
+def _attach(state, layout, rate_file, rate_digest, maintenance):
+    """Pool initializer: map the shared blocks and load the other read-only inputs, once per worker"""
+    if rates.current().digest != rate_digest:
+        rates.use(rate_file)
+    if rates.current().digest != rate_digest:
+        raise RuntimeError(f"Rate table {rate_file} changed after the scenario runner started")
+    engine.MAINTENANCE = maintenance
+    blocks = []
+    for key, (name, shape, dtype) in layout.items():
+        block = shared_memory.SharedMemory(name=name)
+        blocks.append(block)
+        state[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    # The arrays are views of the mappings; keep those open for the worker's life
+    _worker.update(state, blocks=blocks)
+
+
+def _run_chunk(start, stop, changes, assumptions):
+    return _evaluate_rows(_worker, start, stop, changes, assumptions)
+
+
+class ScenarioRunner:
+    """Deals of one property type in shared memory, evaluated under scenarios by a process pool"""
+
+    def __init__(self, property_type, deals, workers=None, chunk_rows=CHUNK_ROWS):
+        deals = pd.DataFrame(deals)
+        columns = comparison.input_columns(property_type, deals.reset_index(drop=True))
+        self.property_type = property_type
+        self.index = deals.index
+        self.rows = len(deals)
+        self.chunk_rows = chunk_rows
+        self.workers = (os.cpu_count() or 1) if workers is None else max(1, workers)
+        self._blocks = []
+        self._layout = {}
+        self._running = False
+
+        numeric = [name for name in comparison.PROPERTY_TYPES[property_type][0] if name != "state"]
+        text = ["state"] + [name for name in engine.LOCATION_INPUTS
+                            if name in columns and pd.Series(columns[name]).notna().any()]
+        self._state = {"property_type": property_type, "numeric": numeric, "text": text, "categories": {}}
+        self._state["inputs"] = self._allocate("inputs", (len(numeric), self.rows), np.float64)
+        self._state["codes"] = self._allocate("codes", (len(text), self.rows), np.int32)
+        self._state["outputs"] = self._allocate("outputs", (len(OUTPUTS), self.rows), np.float64)
+        for i, name in enumerate(numeric):
+            self._state["inputs"][i] = columns[name]
+        for i, name in enumerate(text):
+            codes, categories = pd.factorize(pd.Series(columns[name], dtype=object).fillna("").astype(str).str.strip())
+            self._state["codes"][i] = codes
+            self._state["categories"][name] = np.asarray(categories, dtype=object)
+
+        self._pool = None
+        if self.workers > 1:
+            table = rates.current()
+            shared = {key: value for key, value in self._state.items() if key not in self._layout}
+            self._pool = ProcessPoolExecutor(self.workers, initializer=_attach,
+                                             initargs=(shared, self._layout, table.source, table.digest,
+                                                       engine.MAINTENANCE))
+
+    def _allocate(self, key, shape, dtype):
+        if self.workers <= 1:
+            return np.zeros(shape, dtype=dtype)
+        block = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize))
+        self._blocks.append(block)
+        self._layout[key] = (block.name, shape, dtype)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+    def run(self, changes=None, progress=None, **assumptions):
+        """Yield result DataFrames chunk by chunk, in deal order
+
+        changes maps inputs to a new value for every deal ({"interest_rate": 6});
+        assumptions go to projection.project() (years, rent_growth, ...).
+        progress, if given, is called with (deals done, total) after each chunk.
+        One run at a time: they share the result block.
+        """
+        changes = {name: float(value) for name, value in (changes or {}).items()}
+        unknown = (set(changes) - set(self._state["numeric"])) | (set(assumptions) - set(ASSUMPTIONS))
+        if unknown:
+            raise KeyError(f"Unknown input or assumption: {', '.join(sorted(unknown))}")
+        if self._running:
+            raise RuntimeError("A run is already in progress on this runner")
+        return self._results(changes, progress, assumptions)
+
+    def _results(self, changes, progress, assumptions):
+        self._running = True
+        bounds = [(start, min(start + self.chunk_rows, self.rows)) for start in range(0, self.rows, self.chunk_rows)]
+        futures = []
+        try:
+            if self._pool is None:
+                done = (_evaluate_rows(self._state, start, stop, changes, assumptions) for start, stop in bounds)
+            else:
+                futures = [self._pool.submit(_run_chunk, start, stop, changes, assumptions) for start, stop in bounds]
+                done = (future.result() for future in futures)
+            for start, stop in done:
+                yield self._frame(start, stop)
+                if progress is not None:
+                    progress(stop, self.rows)
+        finally:
+            # Abandoned part way: nothing may still be writing results when the next run starts
+            for future in futures:
+                future.cancel()
+            concurrent.futures.wait(futures)
+            self._running = False
+
+    def _frame(self, start, stop):
+        outputs = self._state["outputs"]
+        frame = pd.DataFrame({name: outputs[i, start:stop].copy() for i, name in enumerate(OUTPUTS)},
+                             index=self.index[start:stop])
+        frame["good"] = frame["good"].astype(bool)
+        return frame
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+        self._state = {}
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def run(property_type, deals, changes=None, workers=None, progress=None, **assumptions):
+    """Evaluate a DataFrame of deals under one scenario; returns the output columns, indexed like deals"""
+    with ScenarioRunner(property_type, deals, workers) as runner:
+        chunks = list(runner.run(changes, progress, **assumptions))
+    return pd.concat(chunks) if chunks else pd.DataFrame(columns=OUTPUTS, index=pd.DataFrame(deals).index)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate a CSV/Parquet file of deals under a scenario on every core")
+    parser.add_argument("input", help="CSV or Parquet file of deals (Batch Screening columns)")
+    parser.add_argument("output", help="Results file (.csv or .parquet)")
+    parser.add_argument("--type", dest="property_type", choices=sorted(comparison.PROPERTY_TYPES), default="residential")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    for name in dict.fromkeys(engine.RESIDENTIAL_INPUTS + engine.COMMERCIAL_INPUTS):
+        if name != "state":
+            parser.add_argument(f"--{name.replace('_', '-')}", type=float, help="Use this value for every deal")
+    parser.add_argument("--years", type=int, default=10, help="Hold period")
+    for name in ASSUMPTIONS[1:]:
+        parser.add_argument(f"--{name.replace('_', '-')}", type=float, help="Percent; see calculator.projection")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("output must be a different file than input")
+    inputs = [name for name in comparison.PROPERTY_TYPES[args.property_type][0] if name != "state"]
+    changes = {name: getattr(args, name) for name in inputs if getattr(args, name) is not None}
+    assumptions = {name: getattr(args, name) for name in ASSUMPTIONS if getattr(args, name) is not None}
+
+    deals = pd.concat(list(screening.read_chunks(args.input)), ignore_index=True)
+    with ScenarioRunner(args.property_type, deals, args.workers, args.chunk_rows) as runner, \
+            screening.ResultWriter(args.output) as writer:
+        for frame in runner.run(changes, lambda done, total: print(f"\rEvaluated {done:,} of {total:,} deals",
+                                                                    end="", file=sys.stderr), **assumptions):
+            writer.write(pd.concat([deals.loc[frame.index], frame], axis=1))
+    print(file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
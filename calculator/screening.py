@@ -0,0 +1,157 @@
+"""Bulk screening of candidate deals from CSV or Parquet files.
+
+Files are read and evaluated in fixed-size chunks and results are appended to
+the output as each chunk finishes, so memory stays flat no matter how many
+rows the export has. Columns use the same names as the app's query params
+(the comm_ prefix is optional); any input missing from the file falls back to
+the app's default. Optional county and zip_code columns pick up finer-grained
+rates from the rate table. With --solve, each deal also gets the inverse-solver
+columns (max purchase price, required down payment, break-even rate and,
+for residential, break-even rent).
+
+Usage:
+    python -m calculator.screening listings.csv results.parquet --type commercial --solve
+"""
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+from calculator import engine, solvers
+
+DEFAULT_CHUNKSIZE = 50_000
+
+PROPERTY_TYPES = {
+    "residential": (engine.RESIDENTIAL_DEFAULTS, engine.residential_frame),
+    "commercial": (engine.COMMERCIAL_DEFAULTS, engine.commercial_frame),
+}
+
+
+def _is_parquet(path):
+    name = path if isinstance(path, str) else getattr(path, "name", "")
+    return str(name).lower().endswith((".parquet", ".pq"))
+
+
+def read_chunks(source, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most chunksize rows from a CSV or Parquet file"""
+    if _is_parquet(source):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+def prepare_chunk(chunk, property_type):
+    """Fill missing inputs with app defaults and normalize state codes"""
+    defaults, _ = PROPERTY_TYPES[property_type]
+    for name, default in defaults.items():
+        if name not in chunk.columns and f"comm_{name}" not in chunk.columns:
+            chunk[name] = default
+
+    state_column = "state" if "state" in chunk.columns else "comm_state"
+    chunk[state_column] = chunk[state_column].astype(str).str.strip().str.upper()
+    unknown = set(chunk[state_column].unique()) - set(engine.states())
+    if unknown:
+        raise ValueError(f"Unknown state codes: {', '.join(sorted(unknown))}")
+    return chunk
+
+
+def screen_chunk(chunk, property_type, solve=False):
+    """Evaluate one chunk of deals and add the app's verdict column"""
+    _, evaluate = PROPERTY_TYPES[property_type]
+    results = evaluate(prepare_chunk(chunk, property_type))
+    if solve:
+        results = solvers.solve_frame(results, property_type)
+    if property_type == "residential":
+        results["verdict"] = results["profitable"].map({True: "Good Investment", False: "High Risk"})
+    else:
+        results["verdict"] = results["good_deal"].map({True: "GOOD DEAL", False: "BAD DEAL"})
+    return results
+
+
+class ResultWriter:
+    """Append result chunks to a CSV or Parquet file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._started = False
+
+    def write(self, chunk):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            else:
+                table = pa.Table.from_pandas(chunk, schema=self._writer.schema, preserve_index=False)
+            self._writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        self._started = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def screen_file(source, output_path, property_type, chunksize=DEFAULT_CHUNKSIZE, progress=None, solve=False):
+    """Screen every deal in source and write results to output_path
+
+    solve adds the inverse-solver columns. progress, if given, is called with the running row count after each chunk.
+    Returns a summary dict with total and good-deal counts.
+    """
+    property_type = property_type.lower()
+    if property_type not in PROPERTY_TYPES:
+        raise ValueError(f"Unknown property type: {property_type}")
+
+    verdict_column = "profitable" if property_type == "residential" else "good_deal"
+    rows = good = 0
+    with ResultWriter(output_path) as writer:
+        for chunk in read_chunks(source, chunksize):
+            results = screen_chunk(chunk, property_type, solve)
+            writer.write(results)
+            rows += len(results)
+            good += int(results[verdict_column].sum())
+            if progress is not None:
+                progress(rows)
+    return {"rows": rows, "good": good, "bad": rows - good}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Screen a CSV/Parquet file of candidate deals")
+    parser.add_argument("input", help="CSV or Parquet file of deals")
+    parser.add_argument("output", help="Results file (.csv or .parquet)")
+    parser.add_argument("--type", dest="property_type", choices=sorted(PROPERTY_TYPES), default="residential")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--solve", action="store_true", help="Add max price / required down payment / break-even columns")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("output must be a different file than input")
+
+    def report(rows):
+        print(f"\rScreened {rows:,} deals", end="", file=sys.stderr)
+
+    summary = screen_file(args.input, args.output, args.property_type, args.chunksize, progress=report,
+                          solve=args.solve)
+    print(file=sys.stderr)
+    print(f"{summary['rows']:,} deals screened: {summary['good']:,} good, {summary['bad']:,} bad")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Sensitivity sweeps over interest rate, purchase price and rent.
+
+Each swept input is reshaped onto its own axis and the engine broadcasts
+the formulas across the whole grid in one pass, so a 100 x 100 x 50 sweep
+costs about as much as screening half a million deals.
+"""
+import numpy as np
+
+from calculator import engine
+
+RATE_STEPS = 100
+PRICE_STEPS = 100
+RENT_STEPS = 50
+
+# Swept outputs per property type: (engine output, label)
+METRICS = {
+    "residential": {
+        "cash_flow_75": "Monthly Cash Flow (75% Occupancy)",
+        "annual_roi_75": "Annual ROI (75% Occupancy)",
+    },
+    "commercial": {
+        "annual_cash_flow": "Annual Cash Flow",
+        "cash_on_cash_return": "Cash-on-Cash Return",
+    },
+}
+
+RENT_INPUTS = {"residential": "monthly_rent", "commercial": "annual_gross_rents"}
+
+
+def relative_range(center, pct, steps):
+    """Values from center -pct% to +pct% in evenly spaced steps"""
+    return center * np.linspace(1 - pct / 100, 1 + pct / 100, steps)
+
+
+def grid(evaluate, base, axes):
+    """Evaluate a deal over a grid of input values in one broadcast pass
+
+    base holds the scalar inputs; axes is a list of (input name, values),
+    one per grid dimension. Returns the engine's result dict with arrays of
+    shape (len(values_1), len(values_2), ...).
+    """
+    inputs = dict(base)
+    for axis, (name, values) in enumerate(axes):
+        shape = [1] * len(axes)
+        shape[axis] = -1
+        inputs[name] = np.asarray(values, dtype=float).reshape(shape)
+    return evaluate(**inputs)
+
+
+def sweep(property_type, base, rate_range=(4.0, 9.0), price_pct=20, rent_pct=15,
+          rate_steps=RATE_STEPS, price_steps=PRICE_STEPS, rent_steps=RENT_STEPS):
+    """Interest rate x purchase price x rent sweep around a single deal
+
+    Returns the axis values and the swept metrics for the property type,
+    each shaped (rate_steps, price_steps, rent_steps).
+    """
+    evaluate = engine.residential if property_type == "residential" else engine.commercial
+    rent_input = RENT_INPUTS[property_type]
+    axes = [
+        ("interest_rate", np.linspace(rate_range[0], rate_range[1], rate_steps)),
+        ("purchase_price", relative_range(base["purchase_price"], price_pct, price_steps)),
+        (rent_input, relative_range(base[rent_input], rent_pct, rent_steps)),
+    ]
+    results = grid(evaluate, base, axes)
+    return {
+        "interest_rate": axes[0][1],
+        "purchase_price": axes[1][1],
+        "rent": axes[2][1],
+        "rent_pct": np.linspace(-rent_pct, rent_pct, rent_steps),
+        "metrics": {name: np.asarray(results[name]) for name in METRICS[property_type]},
+    }
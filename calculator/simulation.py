@@ -0,0 +1,180 @@
+"""Monte Carlo risk simulation over the hold period.
+
+Each path draws yearly vacancy, rent growth, tax/insurance inflation,
+appreciation and maintenance shocks (plus an optional interest rate reset)
+and runs them through the same residential occupancy model and commercial
+NOI formula as the engine. Paths are simulated in fixed-size chunks with one
+child seed per chunk, so results depend only on the seed and path count, not
+on how many worker processes share the work.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from calculator import amortization, engine
+from calculator.returns import irr
+
+DEFAULT_CHUNK_PATHS = 25_000
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def default_assumptions(property_type, deal):
+    """Distributions used when none are given
+
+    Each entry is (kind, a, b): ("normal", mean, sd), ("uniform", low, high),
+    ("fixed", value, None) or, for shocks, ("bernoulli", probability, cost).
+    Rates are annual fractions; the rate shock is in percentage points.
+    """
+    if property_type == "residential":
+        # The app's 75%-100% occupancy range
+        vacancy = ("uniform", 0.0, 0.25)
+        maintenance_shock = ("bernoulli", 0.10, 5_000)
+    else:
+        vacancy = ("normal", deal["vacancy_rate"] / 100, 0.02)
+        maintenance_shock = ("bernoulli", 0.10, 25_000)
+    return {
+        "vacancy": vacancy,
+        "rent_growth": ("normal", 0.03, 0.02),
+        "expense_inflation": ("normal", 0.03, 0.01),
+        "appreciation": ("normal", 0.03, 0.05),
+        "maintenance_shock": maintenance_shock,
+        "rate_reset_year": None,
+        "rate_shock": ("normal", 0.0, 1.0),
+    }
+
+
+def draw(rng, spec, size):
+    """Draw samples from a (kind, a, b) distribution spec"""
+    kind, a, b = spec
+    if kind == "normal":
+        return rng.normal(a, b, size)
+    if kind == "uniform":
+        return rng.uniform(a, b, size)
+    if kind == "fixed":
+        return np.full(size, float(a))
+    if kind == "bernoulli":
+        return np.where(rng.random(size) < a, float(b), 0.0)
+    raise ValueError(f"Unknown distribution: {kind}")
+
+
+def _growth_index(rates):
+    """Cumulative growth applied to each year; year 1 is the un-grown base"""
+    index = np.ones_like(rates)
+    np.cumprod(1 + rates[:, :-1], axis=1, out=index[:, 1:])
+    return index
+
+
+def _debt(rng, deal, assumptions, paths, years):
+    """Annual debt service per path/year and the loan balance at exit"""
+    loan_amount = deal["loan_amount"]
+    loan_years = deal["loan_years"]
+    payment = engine.monthly_payment(loan_amount, deal["interest_rate"] / 100, loan_years)
+    year = np.arange(1, years + 1)
+    debt_service = np.where(year <= loan_years, payment * 12, 0.0) * np.ones((paths, 1))
+
+    reset_year = assumptions.get("rate_reset_year")
+    if not reset_year or reset_year > min(years, loan_years):
+        return debt_service, np.full(paths, amortization.balance_after(
+            loan_amount, deal["interest_rate"], loan_years, years * 12))
+
+    # Re-amortize the remaining balance at the new rate for the rest of the term
+    made = (reset_year - 1) * 12
+    reset_balance = amortization.balance_after(loan_amount, deal["interest_rate"], loan_years, made)
+    new_rate = np.maximum(deal["interest_rate"] + draw(rng, assumptions["rate_shock"], paths), 0.01)
+    remaining_years = loan_years - (reset_year - 1)
+    new_payment = engine.monthly_payment(reset_balance, new_rate / 100, remaining_years)
+    after_reset = (year >= reset_year) & (year <= loan_years)
+    debt_service[:, after_reset] = new_payment[:, None] * 12
+    exit_balance = amortization.balance_after(reset_balance, new_rate, remaining_years, years * 12 - made)
+    return debt_service, exit_balance
+
+
+def simulate_paths(property_type, deal, assumptions, years, paths, seed):
+    """Yearly cash flows, initial equity and exit equity for a block of paths"""
+    rng = np.random.default_rng(seed)
+    size = (paths, years)
+    vacancy = np.clip(draw(rng, assumptions["vacancy"], size), 0.0, 1.0)
+    rent_index = _growth_index(draw(rng, assumptions["rent_growth"], size))
+    expense_index = _growth_index(draw(rng, assumptions["expense_inflation"], size))
+    shocks = draw(rng, assumptions["maintenance_shock"], size)
+    pm_fee_rate = float(engine.location_rates(property_type, deal["state"], deal.get("county"),
+                                              deal.get("zip_code"))["pm_fee_rate"])
+
+    if property_type == "residential":
+        base = engine.as_scalars(engine.residential(**deal))
+        rent = deal["monthly_rent"] * rent_index
+        income = 12 * rent * (1 - vacancy)
+        operating = 12 * ((base["monthly_insurance"] + base["monthly_tax"] + base["maintenance"]) * expense_index
+                          + rent * pm_fee_rate) + shocks
+        equity = base["amount_down"]
+    else:
+        base = engine.as_scalars(engine.commercial(**deal))
+        gross_rents = deal["annual_gross_rents"] * rent_index
+        income = gross_rents * (1 - vacancy)
+        # NOI Estimated: (K4*(1-L5))-SUM(J8:J11), with insurance, taxes and other expenses inflating
+        operating = ((base["annual_insurance"] + base["annual_property_tax"] + deal["other_expenses"]) * expense_index
+                     + gross_rents * pm_fee_rate) + shocks
+        equity = base["total_cash_down"]
+
+    debt_service, exit_balance = _debt(rng, {**deal, "loan_amount": base["loan_amount"]}, assumptions, paths, years)
+    cash_flows = income - operating - debt_service
+
+    value_index = np.prod(1 + draw(rng, assumptions["appreciation"], size), axis=1)
+    exit_equity = deal["purchase_price"] * value_index - exit_balance
+    return cash_flows, equity, exit_equity
+
+
+def _simulate_chunk(property_type, deal, assumptions, years, paths, seed):
+    cash_flows, equity, exit_equity = simulate_paths(property_type, deal, assumptions, years, paths, seed)
+    flows = np.empty((paths, years + 1))
+    flows[:, 0] = -equity
+    flows[:, 1:] = cash_flows
+    flows[:, -1] += exit_equity
+    return {
+        "paths": paths,
+        "negative_year1": int((cash_flows[:, 0] < 0).sum()),
+        "any_negative": int((cash_flows < 0).any(axis=1).sum()),
+        "cash_flow_sum": cash_flows.sum(axis=0),
+        "cash_flow_percentiles": np.percentile(cash_flows, PERCENTILES, axis=0),
+        "irr": irr(flows).astype(np.float32),
+    }
+
+
+def simulate(property_type, deal, assumptions=None, years=10, paths=10_000, seed=0,
+             chunk_paths=DEFAULT_CHUNK_PATHS, workers=None):
+    """Run a Monte Carlo simulation for one deal
+
+    deal holds the engine inputs for the property type. workers > 1 fans the
+    chunks out over a process pool. Yearly percentile bands are the
+    path-weighted average of each chunk's percentiles.
+    """
+    property_type = property_type.lower()
+    assumptions = {**default_assumptions(property_type, deal), **(assumptions or {})}
+    sizes = [min(chunk_paths, paths - start) for start in range(0, paths, chunk_paths)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(property_type, deal, assumptions, years, size, child) for size, child in zip(sizes, seeds)]
+
+    if workers and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = list(pool.map(_simulate_chunk, *zip(*args)))
+    else:
+        chunks = [_simulate_chunk(*chunk_args) for chunk_args in args]
+
+    weights = np.array(sizes, dtype=float) / paths
+    bands = sum(w * chunk["cash_flow_percentiles"] for w, chunk in zip(weights, chunks))
+    irrs = np.concatenate([chunk["irr"] for chunk in chunks])
+    valid_irrs = irrs[~np.isnan(irrs)]
+    return {
+        "paths": paths,
+        "years": years,
+        "seed": seed,
+        "assumptions": assumptions,
+        "prob_negative_year1": sum(chunk["negative_year1"] for chunk in chunks) / paths,
+        "prob_any_negative_year": sum(chunk["any_negative"] for chunk in chunks) / paths,
+        "mean_cash_flow": sum(chunk["cash_flow_sum"] for chunk in chunks) / paths,
+        "cash_flow_bands": dict(zip(PERCENTILES, bands)),
+        "irr": irrs,
+        "irr_percentiles": dict(zip(PERCENTILES, np.percentile(valid_irrs, PERCENTILES))) if len(valid_irrs) else {},
+        "prob_negative_irr": float((valid_irrs < 0).mean()) if len(valid_irrs) else float("nan"),
+        "irr_undefined": float(np.isnan(irrs).mean()),
+    }
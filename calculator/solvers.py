@@ -0,0 +1,204 @@
+"""Inverse solvers: the inputs that make a deal hit a target.
+
+Cash flow is linear in purchase price, rent and down payment (the loan
+payment is a fixed factor of the loan amount), so those solve in closed form.
+Interest rate enters through the annuity factor and uses a vectorized
+bisection instead. Every solver takes scalars or arrays like the engine and
+returns nan where no solution exists (e.g. not profitable even at 100% down).
+"""
+import numpy as np
+
+from calculator import engine
+
+MAX_RATE = 30.0  # Upper bracket (%) for interest rate solves
+
+
+def payment_factor(interest_rate, loan_years):
+    """Monthly payment per dollar of loan; interest_rate in percent"""
+    monthly_rate = np.asarray(interest_rate, dtype=float) / 100 / 12
+    num_payments = np.asarray(loan_years) * 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = (monthly_rate * (1 + monthly_rate) ** num_payments) / ((1 + monthly_rate) ** num_payments - 1)
+    return np.where(monthly_rate == 0, 1 / num_payments, factor)
+
+
+def _in_range(value, low, high):
+    return np.where((value >= low) & (value <= high), value, np.nan)
+
+
+def bisect(func, low, high, tol=1e-8, max_iter=200):
+    """Vectorized bisection for func(x) = 0 on [low, high]
+
+    func must accept an array of x values, one per problem. Problems whose
+    bracket has no sign change get nan.
+    """
+    low, high = np.broadcast_arrays(np.asarray(low, dtype=float), np.asarray(high, dtype=float))
+    low, high = low.copy(), high.copy()
+    f_low = func(low)
+    valid = np.sign(f_low) != np.sign(func(high))
+    for _ in range(max_iter):
+        mid = (low + high) / 2
+        f_mid = func(mid)
+        same_side = np.sign(f_mid) == np.sign(f_low)
+        low = np.where(same_side, mid, low)
+        f_low = np.where(same_side, f_mid, f_low)
+        high = np.where(same_side, high, mid)
+        if np.all((high - low)[valid] <= tol):
+            break
+    return np.where(valid, (low + high) / 2, np.nan)
+
+
+# Residential: cash flow at occupancy o is
+#   o*R - pm_fee*R - maintenance - P*(insurance + tax)/12 - factor*P*(1 - d)
+# with the rates looked up for the deal's location
+
+def _residential_fixed_costs(purchase_price, location):
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    return purchase_price * (location["insurance_rate"] + location["tax_rate"]) / 12 + engine.MAINTENANCE
+
+
+def residential_break_even_rent(purchase_price, down_payment, interest_rate, loan_years, state,
+                                occupancy=engine.OCCUPANCY_RATES[0], county=None, zip_code=None):
+    """Monthly rent at which cash flow is zero at the given occupancy (75% by default)"""
+    location = engine.location_rates("residential", state, county, zip_code)
+    loan_amount = np.asarray(purchase_price, dtype=float) * (1 - np.asarray(down_payment, dtype=float) / 100)
+    costs = _residential_fixed_costs(purchase_price, location) + payment_factor(interest_rate, loan_years) * loan_amount
+    return costs / (occupancy - location["pm_fee_rate"])
+
+
+def residential_max_price(down_payment, interest_rate, loan_years, monthly_rent, state,
+                          occupancy=engine.OCCUPANCY_RATES[0], county=None, zip_code=None):
+    """Highest purchase price that still breaks even at the given occupancy"""
+    location = engine.location_rates("residential", state, county, zip_code)
+    monthly_rent = np.asarray(monthly_rent, dtype=float)
+    net_rent = monthly_rent * (occupancy - location["pm_fee_rate"]) - engine.MAINTENANCE
+    cost_per_dollar = ((location["insurance_rate"] + location["tax_rate"]) / 12
+                       + payment_factor(interest_rate, loan_years) * (1 - np.asarray(down_payment, dtype=float) / 100))
+    return np.where(net_rent > 0, net_rent / cost_per_dollar, np.nan)
+
+
+def residential_required_down_payment(purchase_price, interest_rate, loan_years, monthly_rent, state,
+                                      occupancy=engine.OCCUPANCY_RATES[0], county=None, zip_code=None):
+    """Smallest down payment % that breaks even at the given occupancy"""
+    location = engine.location_rates("residential", state, county, zip_code)
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    net_rent = np.asarray(monthly_rent, dtype=float) * (occupancy - location["pm_fee_rate"])
+    available = net_rent - _residential_fixed_costs(purchase_price, location)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        down = (1 - available / (payment_factor(interest_rate, loan_years) * purchase_price)) * 100
+    return _in_range(np.maximum(down, 0.0), 0.0, 100.0)
+
+
+# Commercial: annual cash flow is NOI - 12*factor*P*(1 - d), where
+#   NOI = G*(1 - v) - pm_fee*G - other - P*(insurance + tax)
+# and cash-on-cash divides that by P*(d + closing_cost)
+
+def _commercial_net_rents(annual_gross_rents, vacancy_rate, other_expenses, location):
+    annual_gross_rents = np.asarray(annual_gross_rents, dtype=float)
+    return (annual_gross_rents * (1 - np.asarray(vacancy_rate, dtype=float) / 100)
+            - annual_gross_rents * location["pm_fee_rate"] - np.asarray(other_expenses, dtype=float))
+
+
+def commercial_max_price(down_payment, annual_gross_rents, vacancy_rate, other_expenses, interest_rate,
+                         loan_years, state, target_cash_on_cash=0.0, county=None, zip_code=None):
+    """Maximum offer price for a target cash-on-cash return % (0 = break-even cash flow)"""
+    location = engine.location_rates("commercial", state, county, zip_code)
+    down_pct = np.asarray(down_payment, dtype=float) / 100
+    net_rents = _commercial_net_rents(annual_gross_rents, vacancy_rate, other_expenses, location)
+    cost_per_dollar = (location["insurance_rate"] + location["tax_rate"]
+                       + 12 * payment_factor(interest_rate, loan_years) * (1 - down_pct)
+                       + np.asarray(target_cash_on_cash, dtype=float) / 100 * (down_pct + location["closing_cost_rate"]))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = net_rents / cost_per_dollar
+    return np.where((net_rents > 0) & (cost_per_dollar > 0), price, np.nan)
+
+
+def commercial_required_down_payment(purchase_price, annual_gross_rents, vacancy_rate, other_expenses,
+                                     interest_rate, loan_years, state, target_cash_on_cash=0.0,
+                                     county=None, zip_code=None):
+    """Smallest down payment % that reaches a target cash-on-cash return % (0 = break-even)
+
+    Each point of down payment saves debt_per_down of debt service but costs
+    target more in required return. When the target is at or above that loan
+    constant, more down never helps: 0% down either already meets the target
+    or nothing does (nan).
+    """
+    location = engine.location_rates("commercial", state, county, zip_code)
+    purchase_price = np.asarray(purchase_price, dtype=float)
+    noi = (_commercial_net_rents(annual_gross_rents, vacancy_rate, other_expenses, location)
+           - purchase_price * (location["insurance_rate"] + location["tax_rate"]))
+    debt_per_down = 12 * payment_factor(interest_rate, loan_years) * purchase_price
+    target = np.asarray(target_cash_on_cash, dtype=float) / 100 * purchase_price
+    # NOI - debt*(1 - d) = target*(d + closing_cost), solved for d
+    slope = debt_per_down - target
+    shortfall = target * location["closing_cost_rate"] + debt_per_down - noi
+    with np.errstate(divide="ignore", invalid="ignore"):
+        down = shortfall / slope * 100
+    down = np.where(slope > 0, down, np.where(shortfall <= 0, 0.0, np.nan))
+    return _in_range(np.maximum(down, 0.0), 0.0, 100.0)
+
+
+def rate_for_payment_factor(factor, loan_years, max_rate=MAX_RATE):
+    """Interest rate % whose monthly payment factor equals factor
+
+    Bisects on the annuity factor alone, which is monotonic in the rate.
+    Returns nan below the 0% factor and max_rate above the top of the bracket.
+    """
+    factor = np.asarray(factor, dtype=float)
+    loan_years = np.broadcast_to(np.asarray(loan_years, dtype=float), factor.shape)
+    rate = bisect(lambda r: payment_factor(r, loan_years) - factor, np.zeros(factor.shape),
+                  np.full(factor.shape, float(max_rate)), tol=1e-9)
+    rate = np.where(factor >= payment_factor(max_rate, loan_years), max_rate, rate)
+    return np.where(factor >= 1 / (loan_years * 12), rate, np.nan)
+
+
+def max_interest_rate(property_type, inputs, max_rate=MAX_RATE):
+    """Highest interest rate % that keeps the deal break-even
+
+    Residential deals break even at 75% occupancy, commercial deals on annual
+    cash flow. inputs holds the engine inputs (interest_rate is ignored).
+    Cash flow less debt service doesn't depend on the rate, so this solves for
+    the payment factor that uses it all up and converts that to a rate. With no
+    loan (100% down) the rate doesn't matter: max_rate if the deal breaks even,
+    nan if it doesn't.
+    """
+    base = engine.residential(**inputs) if property_type == "residential" else engine.commercial(**inputs)
+    loan_amount = np.asarray(base["loan_amount"], dtype=float)
+    if property_type == "residential":
+        available = base["cash_flow_75"] + base["monthly_pi"]
+    else:
+        available = (base["annual_cash_flow"] + base["annual_debt_service"]) / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        factor = np.where(loan_amount > 0, available / loan_amount, np.where(available >= 0, np.inf, np.nan))
+    return rate_for_payment_factor(factor, inputs["loan_years"], max_rate)
+
+
+def solve_frame(deals, property_type):
+    """Append the solver columns for a DataFrame of deals (engine input columns)"""
+    inputs = engine._frame_inputs(deals, engine.RESIDENTIAL_INPUTS if property_type == "residential"
+                                  else engine.COMMERCIAL_INPUTS)
+    location = {name: inputs[name] for name in engine.LOCATION_INPUTS if name in inputs}
+    if property_type == "residential":
+        solved = {
+            "break_even_rent": residential_break_even_rent(
+                inputs["purchase_price"], inputs["down_payment"], inputs["interest_rate"],
+                inputs["loan_years"], inputs["state"], **location),
+            "max_purchase_price": residential_max_price(
+                inputs["down_payment"], inputs["interest_rate"], inputs["loan_years"],
+                inputs["monthly_rent"], inputs["state"], **location),
+            "required_down_payment": residential_required_down_payment(
+                inputs["purchase_price"], inputs["interest_rate"], inputs["loan_years"],
+                inputs["monthly_rent"], inputs["state"], **location),
+        }
+    else:
+        rents = (inputs["annual_gross_rents"], inputs["vacancy_rate"], inputs["other_expenses"])
+        solved = {
+            "max_purchase_price": commercial_max_price(
+                inputs["down_payment"], *rents, inputs["interest_rate"], inputs["loan_years"], inputs["state"],
+                **location),
+            "required_down_payment": commercial_required_down_payment(
+                inputs["purchase_price"], *rents, inputs["interest_rate"], inputs["loan_years"], inputs["state"],
+                **location),
+        }
+    solved["max_interest_rate"] = max_interest_rate(property_type, inputs)
+    return deals.assign(**solved)
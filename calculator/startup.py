@@ -0,0 +1,84 @@
+"""Startup and rerun timing for the app's profile mode.
+
+Open the app with ?profile=1 to see how long this process spent importing
+the heavy modules, how long it took from process start to the end of its
+first script run and how long recent reruns took, next to TARGETS.
+``python benchmarks/startup.py`` measures the same numbers in a fresh
+process and fails when they miss the targets.
+
+Everything here is process-wide: imports and the first render happen once
+per process, reruns are pooled over every session.
+"""
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psutil
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAVICON_PATH = os.path.join(ROOT, "favicon.png")
+ICON_SIZE = 64  # browsers show the tab icon at 16-32 px
+
+# Assumed budgets, not measurements, sized for the Azure App Service B1 plan
+# the app is deployed to (1 vCPU, 1.75 GB): process start to the end of the
+# first script run, and the median rerun
+TARGETS = {"first_render_s": 4.0, "rerun_median_s": 0.3}
+
+_lock = threading.Lock()
+_imports = {}
+_runs = deque(maxlen=500)
+_first_render = None
+
+
+@contextmanager
+def importing(label):
+    """Time an import block; only its first run in this process is recorded"""
+    start = time.perf_counter()
+    yield
+    with _lock:
+        _imports.setdefault(label, time.perf_counter() - start)
+
+
+def record_run(seconds):
+    """Record one finished script run; the first one also fixes the time to first render"""
+    global _first_render
+    with _lock:
+        if _first_render is None:
+            _first_render = time.time() - psutil.Process().create_time()
+        _runs.append(seconds)
+
+
+def report():
+    """Import times, time to first render and rerun percentiles, with the targets they're held to"""
+    with _lock:
+        imports = dict(_imports)
+        runs = list(_runs)
+        first_render = _first_render
+    reruns = sorted(runs[1:])
+    summary = {
+        "imports": imports,
+        "first_render_s": first_render,
+        "first_run_s": runs[0] if runs else None,
+        "reruns": len(reruns),
+        "rerun_median_s": reruns[len(reruns) // 2] if reruns else None,
+        "rerun_p95_s": reruns[min(len(reruns) - 1, int(len(reruns) * 0.95))] if reruns else None,
+        "last_run_s": runs[-1] if runs else None,
+        "targets": dict(TARGETS),
+    }
+    summary["within_targets"] = all(summary[name] is None or summary[name] <= target
+                                    for name, target in TARGETS.items())
+    return summary
+
+
+@functools.lru_cache(maxsize=None)
+def page_icon():
+    """favicon.png shrunk to tab-icon size, once per process (the original is ~1 MB)"""
+    from PIL import Image
+
+    with Image.open(FAVICON_PATH) as image:
+        icon = image.convert("RGBA")
+    icon.thumbnail((ICON_SIZE, ICON_SIZE))
+    return icon
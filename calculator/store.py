@@ -0,0 +1,412 @@
+"""Persistent deal store: saved deals, their scores and indexed queries.
+
+Deals saved here outlive the browser session. One SQLite database
+(PROPERTY_CALC_DEALS, default ~/.property-calculator/deals.db) holds every
+deal's inputs next to the metrics the comparison view shows (amount down,
+monthly payment, cash flow, cash-on-cash, verdict), with indexes on state,
+property type, annual cash flow and cash-on-cash, so a screen like
+"commercial deals in CA over 8% cash-on-cash" doesn't read the whole table.
+
+Each deal also points at the assumptions it was scored with: a locations
+row holding its location's tax, insurance and PM fee rates plus the monthly
+maintenance (residential) or the closing cost rate (commercial). refresh() compares
+those few rows with the current rate table and engine.MAINTENANCE. Only the
+deals of locations whose assumptions changed are read back and re-scored,
+BATCH_ROWS at a time through the vectorized engine, and each batch moves to
+the locations row of the new assumptions in the transaction that saves its
+scores. An interrupted refresh therefore leaves every deal labelled with
+the assumptions it was really scored with, and the next one carries on.
+
+what_if() re-scores stored deals with some inputs changed (every rate at
+6%, say) without saving anything.
+
+Usage:
+    python -m calculator.store add deals.csv --type commercial
+    python -m calculator.store refresh
+    python -m calculator.store query --state CA --min-cash-on-cash 8
+    python -m calculator.store what-if --interest-rate 6 --max-cash-flow 0
+"""
+import argparse
+import contextlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from calculator import comparison, engine, rates, screening
+
+BATCH_ROWS = 50_000
+
+# Every engine input but state, for both property types; a deal leaves the other type's inputs NULL
+INPUTS = list(dict.fromkeys(name for inputs, _ in comparison.PROPERTY_TYPES.values() for name in inputs
+                            if name != "state"))
+TEXT_METRICS = ["amount_down_tier", "verdict"]
+METRICS = ["amount_down", "amount_down_tier", "loan_amount", "monthly_payment", "monthly_cash_flow",
+           "annual_cash_flow", "cash_on_cash", "verdict", "good"]
+ASSUMPTIONS = ["tax_rate", "insurance_rate", "pm_fee_rate", "closing_cost_rate", "maintenance"]
+# The assumptions each property type's scores depend on; the rest are recorded as 0 so changing them re-scores nothing
+USES = {
+    "residential": ["tax_rate", "insurance_rate", "pm_fee_rate", "maintenance"],
+    "commercial": ["tax_rate", "insurance_rate", "pm_fee_rate", "closing_cost_rate"],
+}
+LOCATION_KEY = ["state", "county", "zip_code"]
+ORDER_COLUMNS = ["cash_on_cash", "annual_cash_flow", "monthly_cash_flow", "amount_down", "purchase_price",
+                 "added", "id"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS locations (
+    id INTEGER PRIMARY KEY,
+    property_type TEXT NOT NULL,
+    {", ".join(f"{name} TEXT NOT NULL" for name in LOCATION_KEY)},
+    {", ".join(f"{name} REAL NOT NULL" for name in ASSUMPTIONS)},
+    UNIQUE (property_type, {", ".join(LOCATION_KEY + ASSUMPTIONS)})
+);
+CREATE TABLE IF NOT EXISTS deals (
+    id INTEGER PRIMARY KEY,
+    property_type TEXT NOT NULL,
+    name TEXT NOT NULL,
+    listing_url TEXT NOT NULL DEFAULT '',
+    state TEXT NOT NULL,
+    county TEXT NOT NULL DEFAULT '',
+    zip_code TEXT NOT NULL DEFAULT '',
+    {", ".join(f"{name} REAL" for name in INPUTS)},
+    location_id INTEGER NOT NULL REFERENCES locations (id),
+    {", ".join(f"{name} TEXT" if name in TEXT_METRICS else f"{name} REAL" for name in METRICS)},
+    added REAL NOT NULL,
+    scored REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deals_state ON deals (state);
+CREATE INDEX IF NOT EXISTS deals_property_type ON deals (property_type, good);
+CREATE INDEX IF NOT EXISTS deals_annual_cash_flow ON deals (annual_cash_flow);
+CREATE INDEX IF NOT EXISTS deals_cash_on_cash ON deals (cash_on_cash);
+CREATE INDEX IF NOT EXISTS deals_location ON deals (location_id);
+"""
+DEAL_COLUMNS = (["id", "property_type", "name", "listing_url", "state", "county", "zip_code"] + INPUTS
+                + ["location_id"] + METRICS + ["added", "scored"])
+
+
+def assumptions(property_type, state, county=None, zip_code=None):
+    """The current rates and maintenance for deals of one type at each location (arrays broadcast)"""
+    location = engine.location_rates(property_type, state, county, zip_code)
+    location["maintenance"] = float(engine.MAINTENANCE)
+    shape = np.shape(location["tax_rate"])
+    return {name: np.broadcast_to(location[name] if name in USES[property_type] else 0.0, shape)
+            for name in ASSUMPTIONS}
+
+
+def score(property_type, deals):
+    """The assumptions and metrics of a DataFrame of stored-form deals of one type, row for row
+
+    The assumptions are read before the deals are scored: if the rate table is
+    reloaded in between, deals are labelled with older rates than they used
+    and the next refresh() scores them again, never the other way round.
+    """
+    inputs, evaluate = comparison.PROPERTY_TYPES[property_type]
+    columns = {name: deals[name].to_numpy(dtype=object if name == "state" else float) for name in inputs}
+    for name in engine.LOCATION_INPUTS:
+        if (deals[name] != "").any():
+            columns[name] = deals[name].to_numpy(dtype=object)
+    current = assumptions(property_type, columns["state"], columns.get("county"), columns.get("zip_code"))
+    results = pd.DataFrame({name: np.asarray(value) for name, value in evaluate(**columns).items()}, index=deals.index)
+    return current, comparison.shared_columns(property_type, deals, results)[METRICS]
+
+
+class DealStore:
+    """Deals and their scores in one SQLite database"""
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # One connection shared by the app's script threads, used under the lock; transactions are explicit
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.RLock()
+        with self._lock:
+            # WAL lets the CLI and other processes read while the app writes
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS stale_locations (id INTEGER PRIMARY KEY)")
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM deals").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _location_ids(self, property_type, deals, current):
+        """locations row id of each deal's location and assumptions, adding rows that are new"""
+        keys = pd.DataFrame({"state": deals["state"].to_numpy(dtype=object),
+                             "county": rates.normalize_county(deals["county"]),
+                             "zip_code": rates.normalize_zip(deals["zip_code"]), **current})
+        # Groups are numbered in order of first appearance, the order drop_duplicates() keeps
+        groups = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+        columns = ["property_type"] + list(keys.columns)
+        insert = f"INSERT OR IGNORE INTO locations ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        select = f"SELECT id FROM locations WHERE {' AND '.join(f'{name} = ?' for name in columns)}"
+        ids = []
+        for values in keys.drop_duplicates().itertuples(index=False):
+            values = (property_type, *values)
+            self._connection.execute(insert, values)
+            ids.append(self._connection.execute(select, values).fetchone()[0])
+        return np.asarray(ids, dtype=np.int64)[groups]
+
+    def add(self, property_type, deals, names=None, listing_urls=None):
+        """Score and save deals (a DataFrame or list of dicts of app-style inputs); returns their ids
+
+        Missing inputs use the app defaults and the comm_ prefix is optional.
+        Names and listing URLs come from the arguments, else from name and
+        listing_url columns; deals without a name are called "<Type> <id>".
+        """
+        deals = pd.DataFrame(deals).reset_index(drop=True)
+        if names is None and "name" in deals.columns:
+            names = deals["name"]
+        if listing_urls is None and "listing_url" in deals.columns:
+            listing_urls = deals["listing_url"]
+        names = pd.Series(names if names is not None else [None] * len(deals), dtype=object)
+        listing_urls = pd.Series(listing_urls if listing_urls is not None else [""] * len(deals), dtype=object)
+
+        ids = []
+        for start in range(0, len(deals), BATCH_ROWS):
+            batch = deals.iloc[start:start + BATCH_ROWS].reset_index(drop=True)
+            rows = pd.DataFrame(comparison.input_columns(property_type, batch))
+            rows["county"] = rows["county"].fillna("").astype(str).str.strip() if "county" in rows.columns else ""
+            # Five digits, as the rate table reads them; a ZIP column parsed as numbers would otherwise keep its ".0"
+            rows["zip_code"] = rates.normalize_zip(rows["zip_code"]) if "zip_code" in rows.columns else ""
+            rows["name"] = names.iloc[start:start + BATCH_ROWS].to_numpy()
+            rows["listing_url"] = listing_urls.iloc[start:start + BATCH_ROWS].fillna("").astype(str).to_numpy()
+            assumptions, metrics = score(property_type, rows)
+            with self._transaction() as connection:
+                first = connection.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM deals").fetchone()[0]
+                rows.index = pd.RangeIndex(first, first + len(rows))
+                rows["name"] = [name if isinstance(name, str) and name else f"{property_type.title()} {i}"
+                                for name, i in zip(rows["name"], rows.index)]
+                rows["location_id"] = self._location_ids(property_type, rows, assumptions)
+                now = time.time()
+                frame = rows.assign(id=rows.index, property_type=property_type, added=now, scored=now,
+                                    **{name: metrics[name].to_numpy() for name in METRICS})
+                frame = frame.reindex(columns=DEAL_COLUMNS)
+                connection.executemany(
+                    f"INSERT INTO deals ({', '.join(DEAL_COLUMNS)}) VALUES ({', '.join('?' * len(DEAL_COLUMNS))})",
+                    zip(*(frame[name].tolist() for name in DEAL_COLUMNS)))
+            ids.extend(rows.index)
+        return ids
+
+    def remove(self, ids):
+        with self._transaction() as connection:
+            connection.executemany("DELETE FROM deals WHERE id = ?", [(int(deal_id),) for deal_id in ids])
+
+    def _where(self, property_types=None, states=None, min_cash_flow=None, max_cash_flow=None,
+               min_cash_on_cash=None, max_cash_on_cash=None, good=None, added_since=None, ids=None):
+        clauses, values = [], []
+        for column, allowed in (("property_type", property_types), ("state", states), ("id", ids)):
+            if allowed is not None:
+                allowed = [int(value) for value in allowed] if column == "id" else list(allowed)
+                clauses.append(f"{column} IN ({', '.join('?' * len(allowed))})")
+                values += allowed
+        for clause, value in (("annual_cash_flow >= ?", min_cash_flow), ("annual_cash_flow <= ?", max_cash_flow),
+                              ("cash_on_cash >= ?", min_cash_on_cash), ("cash_on_cash <= ?", max_cash_on_cash),
+                              ("good = ?", good), ("added >= ?", added_since)):
+            if value is not None:
+                clauses.append(clause)
+                values.append(int(value) if isinstance(value, bool) else float(value))
+        return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), values
+
+    def count(self, **filters):
+        """Number of stored deals matching the filters (see query())"""
+        where, values = self._where(**filters)
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM deals{where}", values).fetchone()[0]
+
+    def query(self, order_by="cash_on_cash", descending=True, limit=None, **filters):
+        """Stored deals matching every filter given, as a DataFrame indexed by id
+
+        Filters: property_types, states and ids (lists), min_/max_cash_flow
+        (annual), min_/max_cash_on_cash, good and added_since (a Unix time).
+        """
+        if order_by not in ORDER_COLUMNS:
+            raise ValueError(f"Cannot order by {order_by}")
+        where, values = self._where(**filters)
+        sql = (f"SELECT {', '.join(name for name in DEAL_COLUMNS if name != 'location_id')} FROM deals{where} "
+               f"ORDER BY {order_by} {'DESC' if descending else 'ASC'}, id")
+        if limit is not None:
+            sql += " LIMIT ?"
+            values.append(int(limit))
+        with self._lock:
+            deals = pd.read_sql_query(sql, self._connection, params=values, index_col="id")
+        deals["good"] = deals["good"].astype(bool)
+        return deals
+
+    def what_if(self, changes, **filters):
+        """Stored deals matching the filters (see query()) scored with some inputs changed, without saving
+
+        changes maps inputs to new values ({"interest_rate": 6}); an input only
+        one property type has changes only those deals. The new metrics are
+        added as what_if_ columns next to the stored ones.
+        """
+        unknown = set(changes) - set(INPUTS)
+        if unknown:
+            raise KeyError(f"Unknown input: {', '.join(sorted(unknown))}")
+        deals = self.query(**filters)
+        scenario = []
+        for property_type, (inputs, _) in comparison.PROPERTY_TYPES.items():
+            rows = deals[deals["property_type"] == property_type]
+            for start in range(0, len(rows), BATCH_ROWS):
+                batch = rows.iloc[start:start + BATCH_ROWS]
+                batch = batch.assign(**{name: float(value) for name, value in changes.items() if name in inputs})
+                scenario.append(score(property_type, batch)[1])
+        scenario = pd.concat(scenario) if scenario else pd.DataFrame(columns=METRICS)
+        return deals.join(scenario.drop(columns=["amount_down_tier"]).add_prefix("what_if_"))
+
+    def refresh(self, progress=None):
+        """Re-score the deals whose assumptions changed since they were scored
+
+        progress, if given, is called with the running count of re-scored deals
+        after each batch. Returns counts of changed locations, re-scored deals
+        and locations skipped because the rate table no longer has their state.
+        """
+        summary = {"changed_locations": 0, "rescored": 0, "skipped_locations": 0}
+        # Held throughout: the stale_locations table belongs to the shared connection
+        with self._lock:
+            locations = pd.read_sql_query("SELECT * FROM locations", self._connection, index_col="id")
+            for property_type, group in locations.groupby("property_type"):
+                known = group["state"].isin(engine.states())
+                summary["skipped_locations"] += int((~known).sum())
+                group = group[known]
+                if group.empty:
+                    continue
+                current = assumptions(property_type, *(group[name].to_numpy(dtype=object) for name in LOCATION_KEY))
+                changed = np.zeros(len(group), dtype=bool)
+                for name in ASSUMPTIONS:
+                    changed |= current[name] != group[name].to_numpy()
+                if changed.any():
+                    summary["changed_locations"] += int(changed.sum())
+                    summary["rescored"] = self._rescore(property_type, group.index[changed], summary["rescored"],
+                                                        progress)
+        return summary
+
+    def _rescore(self, property_type, location_ids, rescored, progress):
+        with self._transaction() as connection:
+            connection.execute("DELETE FROM stale_locations")
+            connection.executemany("INSERT INTO stale_locations (id) VALUES (?)", [(int(i),) for i in location_ids])
+        columns = ["id", "name", "state", "county", "zip_code"] + comparison.PROPERTY_TYPES[property_type][0]
+        columns = list(dict.fromkeys(columns))
+        updates = ["location_id"] + METRICS + ["scored"]
+        while True:
+            with self._transaction() as connection:
+                # Each batch leaves the stale locations as it is saved, so the next SELECT starts where this one ended
+                rows = pd.read_sql_query(
+                    f"SELECT {', '.join(columns)} FROM deals "
+                    "WHERE location_id IN (SELECT id FROM stale_locations) LIMIT ?",
+                    connection, params=[BATCH_ROWS], index_col="id")
+                if rows.empty:
+                    connection.execute("DELETE FROM locations WHERE id IN (SELECT id FROM stale_locations) "
+                                       "AND id NOT IN (SELECT location_id FROM deals)")
+                    break
+                assumptions, metrics = score(property_type, rows)
+                location = self._location_ids(property_type, rows, assumptions)
+                # Rates reloaded back to a stale location's since refresh() looked: those deals are current now
+                connection.executemany("DELETE FROM stale_locations WHERE id = ?",
+                                       [(int(i),) for i in np.unique(location)])
+                frame = metrics.assign(location_id=location, scored=time.time(), id=rows.index)
+                connection.executemany(
+                    f"UPDATE deals SET {', '.join(f'{name} = ?' for name in updates)} WHERE id = ?",
+                    zip(*(frame[name].tolist() for name in updates + ["id"])))
+            rescored += len(rows)
+            if progress is not None:
+                progress(rescored)
+        return rescored
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """The process-wide deal store (PROPERTY_CALC_DEALS, default ~/.property-calculator/deals.db)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DealStore(os.environ.get("PROPERTY_CALC_DEALS",
+                                              os.path.join(os.path.expanduser("~"), ".property-calculator", "deals.db")))
+        return _store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Save, re-score and query deals in the deal store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Score and save every deal in a CSV or Parquet file")
+    add.add_argument("input", help="CSV or Parquet file of deals (Batch Screening columns, plus optional name)")
+    add.add_argument("--type", dest="property_type", choices=sorted(comparison.PROPERTY_TYPES), default="residential")
+    add.add_argument("--chunksize", type=int, default=BATCH_ROWS)
+    commands.add_parser("refresh", help="Re-score deals whose rates or maintenance changed")
+    for name in ("query", "what-if"):
+        command = commands.add_parser(name, help="Write matching deals as CSV to stdout" if name == "query" else
+                                      "Score matching deals with changed inputs; CSV to stdout")
+        command.add_argument("--type", dest="property_types", action="append", choices=sorted(comparison.PROPERTY_TYPES))
+        command.add_argument("--state", dest="states", action="append")
+        command.add_argument("--min-cash-flow", type=float, help="Annual")
+        command.add_argument("--max-cash-flow", type=float, help="Annual")
+        command.add_argument("--min-cash-on-cash", type=float)
+        command.add_argument("--max-cash-on-cash", type=float)
+        command.add_argument("--good", action=argparse.BooleanOptionalAction, default=None)
+        command.add_argument("--days", type=float, help="Only deals added in the last DAYS days")
+        if name == "query":
+            command.add_argument("--order-by", choices=ORDER_COLUMNS, default="cash_on_cash")
+            command.add_argument("--limit", type=int)
+        else:
+            for input_name in INPUTS:
+                command.add_argument(f"--{input_name.replace('_', '-')}", type=float)
+    args = parser.parse_args(argv)
+
+    deals = store()
+    if args.command == "add":
+        added = 0
+        for chunk in screening.read_chunks(args.input, args.chunksize):
+            added += len(deals.add(args.property_type, chunk))
+            print(f"\rSaved {added:,} deals", end="", file=sys.stderr)
+        print(file=sys.stderr)
+        return
+    if args.command == "refresh":
+        summary = deals.refresh(progress=lambda rows: print(f"\rRe-scored {rows:,} deals", end="", file=sys.stderr))
+        print(file=sys.stderr)
+        print(f"{summary['changed_locations']:,} locations changed, {summary['rescored']:,} deals re-scored"
+              + (f", {summary['skipped_locations']:,} locations skipped (state no longer rated)"
+                 if summary["skipped_locations"] else ""))
+        return
+
+    filters = {"property_types": args.property_types, "states": [state.upper() for state in args.states or []] or None,
+               "min_cash_flow": args.min_cash_flow, "max_cash_flow": args.max_cash_flow,
+               "min_cash_on_cash": args.min_cash_on_cash, "max_cash_on_cash": args.max_cash_on_cash,
+               "good": args.good, "added_since": time.time() - args.days * 86400 if args.days else None}
+    if args.command == "query":
+        result = deals.query(order_by=args.order_by, limit=args.limit, **filters)
+    else:
+        changes = {name: getattr(args, name) for name in INPUTS if getattr(args, name) is not None}
+        if not changes:
+            parser.error("what-if needs at least one changed input, e.g. --interest-rate 6")
+        result = deals.what_if(changes, **filters)
+        turned = (result["annual_cash_flow"] <= 0) & (result["what_if_annual_cash_flow"] > 0)
+        print(f"{len(result):,} deals: {int(turned.sum()):,} turn cash-flow positive, "
+              f"{int((result['what_if_good'] & ~result['good']).sum()):,} become good deals", file=sys.stderr)
+    result.to_csv(sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Rows of the app's result tables, built from one deal's engine results.
+
+The Streamlit app formats these into DataFrames and the HTTP API returns
+them as JSON, so both show exactly the same line items. Each table's
+function takes just the outputs it shows, so the app's calculation graph
+only rebuilds a table when one of them changes.
+"""
+import inspect
+
+from calculator import engine
+
+
+def residential_expenses(monthly_pi, monthly_insurance, monthly_tax, pm_fee, maintenance):
+    """Monthly Expenses rows"""
+    return {
+        "Expense": ["Principal & Interest", "Insurance", "Property Tax", "Property Management", "Maintenance"],
+        "Amount": [monthly_pi, monthly_insurance, monthly_tax, pm_fee, maintenance],
+    }
+
+
+def residential_returns(cash_flow_75, cash_flow_90, cash_flow_100, annual_roi_75, annual_roi_90, annual_roi_100):
+    """Investment Returns rows: cash flow and ROI at each occupancy scenario"""
+    return {
+        "Scenario": [f"{int(rate * 100)}% Occupancy" for rate in engine.OCCUPANCY_RATES],
+        "Monthly Cash Flow": [cash_flow_75, cash_flow_90, cash_flow_100],
+        "Annual ROI": [annual_roi_75, annual_roi_90, annual_roi_100],
+    }
+
+
+def commercial_expenses(monthly_payment, annual_debt_service, annual_insurance, annual_property_tax, annual_pm_fee,
+                        other_expenses):
+    """Operating Expenses rows, monthly and annual"""
+    return {
+        "Expense": ["Purchase Loan P&I", "Property Insurance Insurance", "Property Taxes", "PM Fee", "All Other Operating Expenses"],
+        "Monthly Amount": [monthly_payment, annual_insurance/12, annual_property_tax/12,
+                           annual_pm_fee/12, other_expenses/12],
+        "Annual Amount": [annual_debt_service, annual_insurance, annual_property_tax,
+                          annual_pm_fee, other_expenses],
+    }
+
+
+def commercial_analysis(annual_gross_rents, adjusted_gross_income, noi_estimated, annual_debt_service,
+                        annual_cash_flow, cash_on_cash_return, total_cash_down):
+    """Investment Analysis rows"""
+    return {
+        "Metric": ["Annual Gross Rents", "Adjusted Gross Income", "Annual NOI (Estimated)", "Annual Debt Service",
+                   "Annual Cash Flow", "Cash-on-Cash Return", "Cash Down"],
+        "Amount": [annual_gross_rents, adjusted_gross_income, noi_estimated,
+                   annual_debt_service, annual_cash_flow, cash_on_cash_return,
+                   total_cash_down],
+    }
+
+
+def _call(func, values):
+    return func(*[values[name] for name in inspect.signature(func).parameters])
+
+
+def residential_tables(results):
+    """Monthly Expenses and Investment Returns rows for one residential deal"""
+    return {"expenses": _call(residential_expenses, results), "returns": _call(residential_returns, results)}
+
+
+def commercial_tables(results, annual_gross_rents):
+    """Operating Expenses and Investment Analysis rows for one commercial deal"""
+    return {
+        "expenses": _call(commercial_expenses, results),
+        "analysis": _call(commercial_analysis, {**results, "annual_gross_rents": annual_gross_rents}),
+    }
+
+
+def records(table):
+    """Column lists -> list of row dicts (the JSON shape of a table)"""
+    columns = list(table)
+    return [dict(zip(columns, row)) for row in zip(*table.values())]
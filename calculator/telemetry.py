@@ -0,0 +1,209 @@
+"""Hot-path timing, memory and per-session rerun counts.
+
+The app wraps each part of its script run in section(): reading the query
+params, the deal calculation, table formatting, plotly figure building and
+so on. Every section feeds a process-wide histogram; a section inside a
+script run (begin_run() ... end_run()) is also credited to that browser
+session, together with its rerun count. end_run() samples the process RSS
+so memory growth across long-lived sessions shows up over time.
+
+The data is exposed three ways:
+
+- snapshot(), rendered by the app's hidden diagnostics view (?diagnostics=1)
+- prometheus(), the Prometheus text format; the JSON API serves it at /metrics
+- export(), which writes that text to the file named by PROPERTY_CALC_METRICS
+  (at most every EXPORT_INTERVAL seconds) for a node_exporter textfile
+  collector or anything else that tails a file
+
+Streamlit runs each session's script in its own thread, so the current run
+is thread-local; sections outside a run (e.g. in the API) only count towards
+the process totals.
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psutil
+
+METRICS_ENV = "PROPERTY_CALC_METRICS"
+EXPORT_INTERVAL = 10.0  # seconds between metrics file writes
+RSS_INTERVAL = 5.0  # seconds between RSS samples
+SESSION_TTL = 3600  # sessions idle this long are dropped
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+RECENT = 1000  # samples kept per section for percentiles
+
+PREFIX = "property_calc"
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram plus the most recent samples"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.recent = deque(maxlen=RECENT)
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+_lock = threading.Lock()
+_local = threading.local()
+_process = psutil.Process()
+_started = time.time()
+_sections = {}
+_runs = Histogram()
+_sessions = {}
+_rss = deque(maxlen=720)  # an hour at RSS_INTERVAL
+_last_export = 0.0
+
+
+def begin_run(session_id, started=None):
+    """Start timing one script run for a browser session"""
+    _local.run = {"session": session_id, "started": time.perf_counter() if started is None else started, "sections": {}}
+
+
+@contextmanager
+def section(name):
+    """Time a block of the hot path under name"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        run = getattr(_local, "run", None)
+        if run is not None:
+            run["sections"][name] = run["sections"].get(name, 0.0) + seconds
+        with _lock:
+            _sections.setdefault(name, Histogram()).observe(seconds)
+
+
+def end_run(session_bytes=None):
+    """Finish the current run: count the rerun, sample RSS; returns the run's seconds
+
+    session_bytes is what the session holds on to between reruns (calculator.memory).
+    """
+    run = getattr(_local, "run", None)
+    if run is None:
+        return None
+    _local.run = None
+    seconds = time.perf_counter() - run["started"]
+    now = time.time()
+    with _lock:
+        _runs.observe(seconds)
+        session = _sessions.setdefault(run["session"], {"reruns": 0, "first_seen": now})
+        session["reruns"] += 1
+        session["last_seen"] = now
+        session["last_run_s"] = seconds
+        session["sections"] = run["sections"]
+        if session_bytes is not None:
+            session["bytes"] = session_bytes
+        for session_id in [sid for sid, s in _sessions.items() if now - s["last_seen"] > SESSION_TTL]:
+            del _sessions[session_id]
+        sample_rss = not _rss or now - _rss[-1][0] >= RSS_INTERVAL
+    if sample_rss:
+        rss = _process.memory_info().rss
+        with _lock:
+            _rss.append((now, rss))
+    return seconds
+
+
+def snapshot():
+    """Everything recorded so far, for the diagnostics view"""
+    rss = _process.memory_info().rss
+    with _lock:
+        return {
+            "uptime_s": time.time() - _started,
+            "rss_bytes": rss,
+            "rss_history": list(_rss),
+            "runs": _runs.count,
+            "run_median_s": _runs.percentile(0.5),
+            "run_p95_s": _runs.percentile(0.95),
+            "sections": {
+                name: {"count": h.count, "total_s": h.sum, "mean_s": h.sum / h.count,
+                       "median_s": h.percentile(0.5), "p95_s": h.percentile(0.95)}
+                for name, h in _sections.items()
+            },
+            "sessions": {session_id: dict(session) for session_id, session in _sessions.items()},
+        }
+
+
+def _histogram_lines(name, histogram, labels=""):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(BUCKETS + (float("inf"),), histogram.counts):
+        cumulative += count
+        le = "+Inf" if bound == float("inf") else f"{bound:g}"
+        lines.append(f'{name}_bucket{{{labels}{"," if labels else ""}le="{le}"}} {cumulative}')
+    suffix = f"{{{labels}}}" if labels else ""
+    lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+    lines.append(f"{name}_count{suffix} {histogram.count}")
+    return lines
+
+
+def prometheus():
+    """Prometheus text exposition of the process and section metrics"""
+    rss = _process.memory_info().rss
+    with _lock:
+        lines = [
+            f"# HELP {PREFIX}_process_resident_memory_bytes Resident set size of this process",
+            f"# TYPE {PREFIX}_process_resident_memory_bytes gauge",
+            f"{PREFIX}_process_resident_memory_bytes {rss}",
+            f"# HELP {PREFIX}_sessions Browser sessions seen in the last {SESSION_TTL} seconds",
+            f"# TYPE {PREFIX}_sessions gauge",
+            f"{PREFIX}_sessions {len(_sessions)}",
+            f"# HELP {PREFIX}_session_bytes Memory held between reruns by all of those sessions",
+            f"# TYPE {PREFIX}_session_bytes gauge",
+            f"{PREFIX}_session_bytes {sum(session.get('bytes', 0) for session in _sessions.values())}",
+            f"# HELP {PREFIX}_run_seconds Duration of full script runs",
+            f"# TYPE {PREFIX}_run_seconds histogram",
+            *_histogram_lines(f"{PREFIX}_run_seconds", _runs),
+            f"# HELP {PREFIX}_section_seconds Duration of timed sections of the hot path",
+            f"# TYPE {PREFIX}_section_seconds histogram",
+        ]
+        for name, histogram in sorted(_sections.items()):
+            lines.extend(_histogram_lines(f"{PREFIX}_section_seconds", histogram, f'section="{name}"'))
+    return "\n".join(lines) + "\n"
+
+
+def export(path=None, force=False):
+    """Write prometheus() to path (default: $PROPERTY_CALC_METRICS), rate-limited; returns the path written"""
+    global _last_export
+    path = path or os.environ.get(METRICS_ENV)
+    if not path:
+        return None
+    now = time.monotonic()
+    with _lock:
+        if not force and now - _last_export < EXPORT_INTERVAL:
+            return None
+        _last_export = now
+    # Written aside and renamed, so a scraper never reads half a file
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as f:
+        f.write(prometheus())
+    os.replace(temp_path, path)
+    return path
+
+
+def reset():
+    """Forget everything recorded (benchmarks and load tests)"""
+    global _runs, _last_export
+    with _lock:
+        _sections.clear()
+        _sessions.clear()
+        _rss.clear()
+        _runs = Histogram()
+        _last_export = 0.0
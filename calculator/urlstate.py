@@ -0,0 +1,302 @@
+"""Compact, versioned encoding of calculator URL state.
+
+The app used to keep every input in its own query parameter
+(?purchase_price=650000&down_payment=20&...). Those parameter names stay the
+app's vocabulary, but a link now carries them packed into a single
+``s`` parameter:
+
+    s = base64url(version byte, flags byte, payload)
+
+The payload is a count of deals followed by each deal: a presence bitmap over
+the FIELDS of that version, the present values, then any parameters outside
+FIELDS as (name, value) pairs. Values that are plain decimals ("650000",
+"6.875") are stored as a varint mantissa and a scale, so they decode to the
+exact same string; everything else is stored as UTF-8 text. The payload is
+zlib-compressed when that makes it shorter.
+
+One blob can hold a whole portfolio of deals. When a blob is too long for a
+comfortable URL, LinkStore saves it on disk under a short content-derived ID
+(?id=Ab3dE9xQ) instead.
+
+Old links with individual parameters keep working: expand() merges a blob,
+a stored ID and plain parameters into the one flat dict the app reads.
+
+View flags (?debug=1, ?profile=1) turn on panels for whoever set them; they
+are never packed into a blob and are dropped from the deals a link opens, so
+a shared link doesn't turn them on for the person it is sent to.
+"""
+import base64
+import hashlib
+import os
+import re
+import zlib
+
+VERSION = 1
+COMPRESSED = 1  # flags bit
+
+# Field order is part of the format; append new fields in a new VERSION
+FIELDS = {
+    1: [
+        "property_type",
+        "purchase_price", "down_payment", "interest_rate", "loan_years", "monthly_rent",
+        "state", "zip_code", "property_url",
+        "comm_purchase_price", "comm_down_payment", "comm_annual_gross_rents", "comm_annual_noi_listing",
+        "comm_vacancy_rate", "comm_other_expenses", "comm_interest_rate", "comm_loan_years",
+        "comm_state", "comm_zip_code", "comm_property_url",
+        "sim_paths", "sim_years", "sim_seed",
+        "county", "comm_county", "name",
+    ],
+}
+
+STATE_PARAM = "s"
+ID_PARAM = "id"
+VIEW_PARAMS = ("debug", "profile")
+MAX_URL_BLOB = 1800  # characters; longer portfolios get a short ID
+
+_TEXT = 0
+_DECIMAL = 1
+_DECIMAL_PATTERN = re.compile(r"-?(0|[1-9][0-9]*)(\.[0-9]+)?")
+
+
+class StateError(ValueError):
+    pass
+
+
+def _write_varint(out, value):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data, position):
+    value = shift = 0
+    while True:
+        if position >= len(data):
+            raise StateError("Truncated state")
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, position
+        shift += 7
+        if shift > 70:
+            raise StateError("Malformed number in state")
+
+
+def _write_text(out, text):
+    raw = text.encode("utf-8")
+    _write_varint(out, len(raw))
+    out.extend(raw)
+
+
+def _read_text(data, position):
+    length, position = _read_varint(data, position)
+    if position + length > len(data):
+        raise StateError("Truncated state")
+    try:
+        return data[position:position + length].decode("utf-8"), position + length
+    except UnicodeDecodeError:
+        raise StateError("State text is not UTF-8")
+
+
+def _decimal_string(mantissa, scale):
+    digits = str(abs(mantissa)).rjust(scale + 1, "0")
+    if scale:
+        digits = f"{digits[:-scale]}.{digits[-scale:]}"
+    return f"-{digits}" if mantissa < 0 else digits
+
+
+def _write_value(out, value):
+    value = str(value)
+    if _DECIMAL_PATTERN.fullmatch(value):
+        scale = len(value.partition(".")[2])
+        mantissa = int(value.replace(".", ""))
+        # "-0" and the like would not come back as written
+        if scale < 256 and _decimal_string(mantissa, scale) == value:
+            out.append(_DECIMAL)
+            _write_varint(out, -2 * mantissa - 1 if mantissa < 0 else 2 * mantissa)
+            out.append(scale)
+            return
+    out.append(_TEXT)
+    _write_text(out, value)
+
+
+def _read_value(data, position):
+    if position >= len(data):
+        raise StateError("Truncated state")
+    kind = data[position]
+    position += 1
+    if kind == _TEXT:
+        return _read_text(data, position)
+    if kind == _DECIMAL:
+        zigzag, position = _read_varint(data, position)
+        if position >= len(data):
+            raise StateError("Truncated state")
+        mantissa = -(zigzag >> 1) - 1 if zigzag & 1 else zigzag >> 1
+        return _decimal_string(mantissa, data[position]), position + 1
+    raise StateError(f"Unknown value type {kind} in state")
+
+
+def pack(deals):
+    """Binary form of a list of deals, each a dict of app parameter strings"""
+    fields = FIELDS[VERSION]
+    payload = bytearray()
+    _write_varint(payload, len(deals))
+    for deal in deals:
+        present = bytearray((len(fields) + 7) // 8)
+        values = bytearray()
+        for i, name in enumerate(fields):
+            if deal.get(name) is not None:
+                present[i // 8] |= 1 << (i % 8)
+                _write_value(values, deal[name])
+        extras = [(name, value) for name, value in deal.items()
+                  if name not in fields and name not in (STATE_PARAM, ID_PARAM, *VIEW_PARAMS) and value is not None]
+        payload += present + values
+        _write_varint(payload, len(extras))
+        for name, value in extras:
+            _write_text(payload, str(name))
+            _write_value(payload, value)
+
+    flags = 0
+    compressed = zlib.compress(bytes(payload), 9)
+    if len(compressed) < len(payload):
+        flags, payload = COMPRESSED, compressed
+    return bytes([VERSION, flags]) + bytes(payload)
+
+
+def unpack(data):
+    """The list of deals in a packed state; raises StateError if it is malformed"""
+    if len(data) < 2:
+        raise StateError("Truncated state")
+    version, flags = data[0], data[1]
+    if version not in FIELDS:
+        raise StateError(f"Unsupported state version {version}")
+    fields = FIELDS[version]
+    payload = data[2:]
+    if flags & COMPRESSED:
+        try:
+            payload = zlib.decompress(payload)
+        except zlib.error:
+            raise StateError("Corrupt state")
+
+    count, position = _read_varint(payload, 0)
+    deals = []
+    for _ in range(count):
+        width = (len(fields) + 7) // 8
+        present = payload[position:position + width]
+        if len(present) < width:
+            raise StateError("Truncated state")
+        position += width
+        deal = {}
+        for i, name in enumerate(fields):
+            if present[i // 8] & (1 << (i % 8)):
+                deal[name], position = _read_value(payload, position)
+        extras, position = _read_varint(payload, position)
+        for _ in range(extras):
+            name, position = _read_text(payload, position)
+            deal[name], position = _read_value(payload, position)
+        deals.append(deal)
+    if position != len(payload):
+        raise StateError("Trailing data in state")
+    return deals
+
+
+def encode(deals):
+    """URL-safe text form of a list of deals"""
+    return base64.urlsafe_b64encode(pack(deals)).rstrip(b"=").decode("ascii")
+
+
+def decode(text):
+    """The list of deals in an encoded state"""
+    try:
+        data = base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+    except (ValueError, TypeError):
+        raise StateError("State is not valid base64url")
+    return unpack(data)
+
+
+class LinkStore:
+    """Encoded states saved on disk under short, content-derived IDs"""
+
+    ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{8}")
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def save(self, text):
+        """Store an encoded state; the same state always gets the same ID"""
+        link_id = base64.urlsafe_b64encode(hashlib.sha256(text.encode("ascii")).digest()[:6]).decode("ascii")
+        path = os.path.join(self.directory, link_id)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            # Written under a temporary name and renamed, so a reader never sees half a file
+            temporary = f"{path}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="ascii") as f:
+                f.write(text)
+            os.replace(temporary, path)
+        return link_id
+
+    def load(self, link_id):
+        """The encoded state stored under an ID; raises StateError if there is none"""
+        if not self.ID_PATTERN.fullmatch(link_id or ""):
+            raise StateError(f"Invalid link ID: {link_id}")
+        try:
+            with open(os.path.join(self.directory, link_id), encoding="ascii") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise StateError(f"Unknown link ID: {link_id}")
+
+
+_store = None
+
+
+def store():
+    """The process-wide link store (PROPERTY_CALC_LINKS, default ~/.property-calculator/links)"""
+    global _store
+    if _store is None:
+        _store = LinkStore(os.environ.get("PROPERTY_CALC_LINKS",
+                                          os.path.join(os.path.expanduser("~"), ".property-calculator", "links")))
+    return _store
+
+
+def share(deals):
+    """Query string for a list of deals: the state itself, or a short ID when it is too long"""
+    text = encode(deals)
+    if len(text) > MAX_URL_BLOB:
+        return f"{ID_PARAM}={store().save(text)}"
+    return f"{STATE_PARAM}={text}"
+
+
+def deals_from_params(params):
+    """Every deal a set of query params describes
+
+    A stored ID or an ``s`` blob supplies the deals; plain parameters next to
+    them (e.g. ?s=...&state=TX) are added to every deal and take precedence.
+    Params without either are one deal, as in old links. VIEW_PARAMS are left
+    out, including from blobs written before they were; see view_flags().
+    """
+    params = {name: value for name, value in params.items() if name not in VIEW_PARAMS}
+    deals = [{}]
+    if params.get(ID_PARAM):
+        deals = decode(store().load(params.pop(ID_PARAM)))
+    elif params.get(STATE_PARAM):
+        deals = decode(params.pop(STATE_PARAM))
+    params.pop(ID_PARAM, None)
+    params.pop(STATE_PARAM, None)
+    deals = [{name: value for name, value in deal.items() if name not in VIEW_PARAMS} for deal in deals]
+    return [{**deal, **params} for deal in deals] or [params]
+
+
+def view_flags(params):
+    """The VIEW_PARAMS set to 1 or true in a set of query params"""
+    return {name for name in VIEW_PARAMS if params.get(name) in ("1", "true")}
+
+
+def expand(params):
+    """The flat app parameters of the first deal in a set of query params"""
+    return deals_from_params(params)[0]
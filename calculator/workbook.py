@@ -0,0 +1,1271 @@
+"""Headless evaluation of the bundled screening workbooks.
+
+The app's formulas were ported by hand from Residential_Prop_Screening_Tool.xlsx
+and Commercial_Prop_Screening_Tool.xlsx. This module runs the workbooks
+themselves, so an analyst's edit to a workbook shows up as a difference from
+the app instead of going unnoticed.
+
+A workbook is compiled once: every formula cell (and every defined name it
+uses, such as Monthly_Payment or Beginning_Balance) is parsed into a small
+expression tree, shared formulas are expanded, and the formula cells are put
+in dependency order. The plan is plain JSON, keyed on the SHA-256 of the
+.xlsx file and saved in PROPERTY_CALC_PLANS (default
+~/.property-calculator/plans), so a later run or another process loads it
+instead of parsing the XML again. Nothing here needs Excel or openpyxl; the
+.xlsx is read with zipfile and ElementTree. The plan also keeps each cell's
+number format and the column widths, so calculator.export can lay a deal
+out the way the workbook does.
+
+Evaluation is vectorized across deals: input cells take one value per deal,
+and each formula is evaluated once per chunk of deals with NumPy, in
+dependency order, touching only the cells the requested outputs depend on.
+Text and errors follow Excel where it matters for these workbooks: text
+compares case-insensitively, and an error (#DIV/0!, #NUM!, #VALUE!) is NaN,
+which IFERROR catches. A "" result is NaN too, so SUM over a range skips
+NaN the way Excel skips text.
+
+compare() evaluates deals both through a workbook and through calculator.engine
+(what app.py shows) and reports every output that differs.
+
+Usage:
+    python -m calculator.workbook deals.csv results.csv --type commercial [--check]
+"""
+import argparse
+import datetime
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import sys
+import threading
+import zipfile
+import xml.etree.ElementTree as ET
+from functools import lru_cache
+
+import numpy as np
+
+from calculator import amortization, engine
+
+PLAN_VERSION = 2
+CHUNK_ROWS = 1024  # deals per evaluation pass; bounds the intermediate arrays
+
+# Same tolerances as the golden workbook checks: Excel keeps 15 significant digits
+RTOL = 1e-9
+ATOL = 1e-6
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+EXCEL_EPOCH = np.datetime64("1899-12-30", "D")
+
+# Where each workbook keeps the app's inputs and outputs. Inputs map an engine
+# input to (cell, scale from the app's units to the cell's); outputs map an
+# engine output to (cell, scale from the cell's units to the app's). The
+# schedule is the amortization table, one row per payment.
+LAYOUTS = {
+    "residential": {
+        "workbook": os.path.join(ROOT, "Residential_Prop_Screening_Tool.xlsx"),
+        "sheet": "BuyRent Calculator",
+        "inputs": {
+            "purchase_price": ("H3", 1),
+            "down_payment": ("H5", 0.01),
+            "interest_rate": ("E4", 0.01),
+            "loan_years": ("E5", 1),
+            "monthly_rent": ("K4", 1),
+            "state": ("H1", None),
+        },
+        "outputs": {
+            "amount_down": ("H4", 1),
+            "loan_amount": ("E3", 1),
+            "monthly_pi": ("H7", 1),
+            "monthly_insurance": ("H8", 1),
+            "monthly_tax": ("H9", 1),
+            "pm_fee": ("H10", 1),
+            "maintenance": ("H11", 1),
+            "total_monthly": ("E8", 1),
+            "cash_flow_75": ("K10", 1),
+            "cash_flow_90": ("L10", 1),
+            "cash_flow_100": ("M10", 1),
+        },
+        # Rate cells the workbook looks up by state; the app's rate table can be finer (county, ZIP)
+        "rates": {"tax_rate": "H2"},
+        "states": "P2:P7",
+        "schedule": {"first_row": 13, "principal": "F", "interest": "G", "balance": "H"},
+    },
+    "commercial": {
+        "workbook": os.path.join(ROOT, "Commercial_Prop_Screening_Tool.xlsx"),
+        "sheet": "Apartment Investment",
+        "inputs": {
+            "purchase_price": ("H3", 1),
+            "down_payment": ("H5", 0.01),
+            "annual_gross_rents": ("K4", 1),
+            "annual_noi_listing": ("L4", 1),
+            "vacancy_rate": ("L5", 0.01),
+            "other_expenses": ("J11", 1),
+            "interest_rate": ("E4", 0.01),
+            "loan_years": ("E5", 1),
+            "state": ("H1", None),
+        },
+        "outputs": {
+            "amount_down": ("H4", 1),
+            "loan_amount": ("E3", 1),
+            "closing_costs": ("J3", 1),
+            "monthly_payment": ("H7", 1),
+            "annual_debt_service": ("J7", 1),
+            "annual_insurance": ("J8", 1),
+            "annual_property_tax": ("J9", 1),
+            "annual_pm_fee": ("J10", 1),
+            "other_expenses": ("J11", 1),
+            "noi_estimated": ("M4", 1),
+            "annual_cash_flow": ("L10", 1),
+            "total_cash_down": ("L11", 1),
+            "cash_on_cash_return": ("L12", 100),
+        },
+        "rates": {"tax_rate": "H2", "insurance_rate": "F2"},
+        "states": "P2:P7",
+        "schedule": {"first_row": 13, "principal": "F", "interest": "G", "balance": "H"},
+    },
+}
+
+
+class FormulaError(ValueError):
+    pass
+
+
+# --- Cell references -------------------------------------------------------
+
+def column_number(letters):
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - 64
+    return number
+
+
+def column_letters(number):
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def cell_key(sheet, row, column):
+    """Plan key of a cell, e.g. 'BuyRent Calculator!H3'"""
+    return f"{sheet}!{column_letters(column)}{row}"
+
+
+@lru_cache(maxsize=None)
+def _split_key(key):
+    """(sheet, row, column) of a plan key"""
+    sheet, ref = key.rsplit("!", 1)
+    match = re.fullmatch(r"([A-Z]+)(\d+)", ref)
+    return sheet, int(match[2]), column_number(match[1])
+
+
+@lru_cache(maxsize=None)
+def _area_keys(sheet, first_row, first_column, last_row, last_column):
+    """Plan keys of every cell in an area, row by row"""
+    return tuple(cell_key(sheet, row, column) for row in range(first_row, last_row + 1)
+                 for column in range(first_column, last_column + 1))
+
+
+_CELL = re.compile(r"(\$?)([A-Z]{1,3})(\$?)(\d+)")
+
+
+def _parse_reference(text, sheet, offset=(0, 0)):
+    """Expression node for a reference like H3, $J$8:J11, 'Sheet 1'!A1 or $12:$12
+
+    offset shifts the relative parts, for cells that share another cell's formula.
+    """
+    if "!" in text:
+        sheet, text = text.rsplit("!", 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    rows = re.fullmatch(r"(\$?)(\d+):(\$?)(\d+)", text)
+    if rows:
+        first = int(rows[2]) + (0 if rows[1] else offset[0])
+        last = int(rows[4]) + (0 if rows[3] else offset[0])
+        return ["rows", sheet, min(first, last), max(first, last)]
+    corners = []
+    for part in text.split(":"):
+        match = _CELL.fullmatch(part)
+        if match is None:
+            raise FormulaError(f"Unsupported reference: {text}")
+        column = column_number(match[2]) + (0 if match[1] else offset[1])
+        row = int(match[4]) + (0 if match[3] else offset[0])
+        if row < 1 or column < 1:
+            raise FormulaError(f"Reference {text} moves off the sheet")
+        corners.append((row, column))
+    if len(corners) == 1:
+        return ["ref", cell_key(sheet, *corners[0])]
+    (row_1, column_1), (row_2, column_2) = corners
+    return ["area", sheet, min(row_1, row_2), min(column_1, column_2), max(row_1, row_2), max(column_1, column_2)]
+
+
+# --- Formula parser --------------------------------------------------------
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[A-Za-z_][\w.]*)!)?
+            (?:\$?[A-Z]{1,3}\$?\d+(?::\$?[A-Z]{1,3}\$?\d+)?|\$?\d+:\$?\d+)(?![\w(]))
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[Ee][+-]?\d+)?)
+  | (?P<function>[A-Za-z_][\w.]*(?=\())
+  | (?P<name>[A-Za-z_\\][\w.]*)
+  | (?P<op><>|<=|>=|[-+*/^&=<>%(),])
+""", re.VERBOSE)
+
+_COMPARISONS = ("=", "<>", "<", ">", "<=", ">=")
+
+
+def _tokens(text):
+    position = 0
+    tokens = []
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise FormulaError(f"Can't parse {text[position:]!r}")
+        position = match.end()
+        if match.lastgroup != "space":
+            tokens.append((match.lastgroup, match.group()))
+    return tokens
+
+
+class _Parser:
+    """Recursive-descent parser from formula text to nested-list expression nodes
+
+    Nodes: ["n", number], ["s", text], ["b", bool], ["ref", key], ["area", sheet,
+    first_row, first_column, last_row, last_column], ["rows", sheet, first, last],
+    ["name", name], ["op", operator, left, right], ["neg", node], ["pct", node]
+    and ["fn", NAME, argument, ...].
+    """
+
+    def __init__(self, text, sheet, offset=(0, 0)):
+        self.tokens = _tokens(text[1:] if text.startswith("=") else text)
+        self.sheet = sheet
+        self.offset = offset
+        self.position = 0
+
+    def parse(self):
+        node = self.comparison()
+        if self.position != len(self.tokens):
+            raise FormulaError(f"Unexpected {self.tokens[self.position][1]!r}")
+        return node
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, *values):
+        kind, value = self.peek()
+        if kind == "op" and value in values:
+            self.position += 1
+            return value
+        return None
+
+    def expect(self, value):
+        if self.take(value) is None:
+            raise FormulaError(f"Expected {value!r}")
+
+    def binary(self, operators, operand):
+        node = operand()
+        while True:
+            operator = self.take(*operators)
+            if operator is None:
+                return node
+            node = ["op", operator, node, operand()]
+
+    def comparison(self):
+        return self.binary(_COMPARISONS, self.concatenation)
+
+    def concatenation(self):
+        return self.binary(("&",), self.additive)
+
+    def additive(self):
+        return self.binary(("+", "-"), self.term)
+
+    def term(self):
+        return self.binary(("*", "/"), self.power)
+
+    def power(self):
+        return self.binary(("^",), self.unary)
+
+    def unary(self):
+        operator = self.take("-", "+")
+        if operator == "-":
+            return ["neg", self.unary()]
+        if operator == "+":
+            return self.unary()
+        node = self.primary()
+        while self.take("%"):
+            node = ["pct", node]
+        return node
+
+    def primary(self):
+        kind, value = self.peek()
+        if kind is None:
+            raise FormulaError("Formula ends early")
+        self.position += 1
+        if kind == "number":
+            return ["n", float(value)]
+        if kind == "string":
+            return ["s", value[1:-1].replace('""', '"')]
+        if kind == "ref":
+            return _parse_reference(value, self.sheet, self.offset)
+        if kind == "function":
+            self.expect("(")
+            arguments = []
+            if not self.take(")"):
+                while True:
+                    arguments.append(self.comparison())
+                    if self.take(")"):
+                        break
+                    self.expect(",")
+            return ["fn", value.upper(), *arguments]
+        if kind == "name":
+            if value.upper() in ("TRUE", "FALSE"):
+                return ["b", value.upper() == "TRUE"]
+            return ["name", value]
+        if kind == "op" and value == "(":
+            node = self.comparison()
+            self.expect(")")
+            return node
+        raise FormulaError(f"Unexpected {value!r}")
+
+
+def parse_formula(text, sheet, offset=(0, 0)):
+    """Expression node for one formula; offset shifts relative references (shared formulas)"""
+    return _Parser(text, sheet, offset).parse()
+
+
+# --- Reading .xlsx ---------------------------------------------------------
+
+def _tag(name):
+    return f"{{{MAIN_NS}}}{name}"
+
+
+def _shared_strings(archive):
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    for item in ET.fromstring(archive.read("xl/sharedStrings.xml")).iter(_tag("si")):
+        # Plain text is <t>; rich text is runs <r><t>; phonetic hints (<rPh>) are skipped
+        parts = [item.find(_tag("t"))] + [run.find(_tag("t")) for run in item.findall(_tag("r"))]
+        strings.append("".join(part.text or "" for part in parts if part is not None))
+    return strings
+
+
+def _cell_value(cell, strings):
+    kind = cell.get("t")
+    value = cell.find(_tag("v"))
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(_tag("t")))
+    if value is None or value.text is None:
+        return None
+    if kind == "s":
+        return strings[int(value.text)]
+    if kind == "str":
+        return value.text
+    if kind == "b":
+        return value.text == "1"
+    if kind == "e":
+        return math.nan
+    return float(value.text)
+
+
+def _sheet_paths(archive, book):
+    """(sheet name, part path) of each sheet, in workbook order"""
+    relations = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    targets = {relation.get("Id"): relation.get("Target") for relation in relations}
+    for sheet in book.find(_tag("sheets")):
+        target = targets[sheet.get(f"{{{REL_NS}}}id")]
+        yield sheet.get("name"), target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+
+
+# Number formats Excel knows by id and doesn't spell out in styles.xml
+_BUILTIN_FORMATS = {1: "0", 2: "0.00", 3: "#,##0", 4: "#,##0.00", 9: "0%", 10: "0.00%", 11: "0.00E+00",
+                    14: "mm-dd-yy", 37: "#,##0 ;(#,##0)", 38: "#,##0 ;[Red](#,##0)", 39: "#,##0.00;(#,##0.00)",
+                    40: "#,##0.00;[Red](#,##0.00)", 49: "@"}
+
+
+def read_layout(data):
+    """Number formats and column widths from .xlsx bytes, so exports can look like the workbook
+
+    Returns ({key: number format code} for every cell not in General format,
+    {sheet: {column letters: width}}).
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        book = ET.fromstring(archive.read("xl/workbook.xml"))
+        codes = dict(_BUILTIN_FORMATS)
+        cell_formats = []
+        if "xl/styles.xml" in archive.namelist():
+            styles = ET.fromstring(archive.read("xl/styles.xml"))
+            for number_format in styles.iter(_tag("numFmt")):
+                codes[int(number_format.get("numFmtId"))] = number_format.get("formatCode")
+            xfs = styles.find(_tag("cellXfs"))
+            cell_formats = [codes.get(int(xf.get("numFmtId", 0))) for xf in (xfs if xfs is not None else ())]
+
+        formats, widths = {}, {}
+        for name, path in _sheet_paths(archive, book):
+            sheet = ET.fromstring(archive.read(path))
+            for cell in sheet.iter(_tag("c")):
+                style = int(cell.get("s", 0))
+                if style < len(cell_formats) and cell_formats[style]:
+                    formats[f"{name}!{cell.get('r')}"] = cell_formats[style]
+            # A trailing <col> often spans to the last column (XFD); only the first 100 matter
+            widths[name] = {column_letters(column): float(col.get("width"))
+                            for col in sheet.iter(_tag("col")) if col.get("width")
+                            for column in range(int(col.get("min")), min(int(col.get("max")), 100) + 1)}
+    return formats, widths
+
+
+def read_xlsx(data):
+    """Sheets, cell values, formula texts and defined names from .xlsx bytes
+
+    Returns (sheet names, {key: value}, {key: (formula, sheet, offset)}, {name: formula},
+    date last saved). Shared formulas are returned as their anchor cell's text plus the
+    offset to shift it by.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        book = ET.fromstring(archive.read("xl/workbook.xml"))
+        strings = _shared_strings(archive)
+
+        sheets, values, formulas = [], {}, {}
+        for name, path in _sheet_paths(archive, book):
+            sheets.append(name)
+            anchors, followers = {}, []
+            for cell in ET.fromstring(archive.read(path)).iter(_tag("c")):
+                key = f"{name}!{cell.get('r')}"
+                values[key] = _cell_value(cell, strings)
+                formula = cell.find(_tag("f"))
+                if formula is None:
+                    continue
+                if formula.get("t") == "shared":
+                    if formula.text:
+                        anchors[formula.get("si")] = (formula.text, key)
+                    else:
+                        followers.append((key, formula.get("si")))
+                        continue
+                if formula.text:
+                    formulas[key] = (formula.text, name, (0, 0))
+            for key, index in followers:
+                text, anchor = anchors[index]
+                _, row, column = _split_key(key)
+                _, anchor_row, anchor_column = _split_key(anchor)
+                formulas[key] = (text, name, (row - anchor_row, column - anchor_column))
+
+        names = {}
+        defined = book.find(_tag("definedNames"))
+        for name in defined if defined is not None else ():
+            # Sheet-scoped names and Excel's own (_xlnm.Print_Titles, ...) aren't used by formulas here
+            if name.get("localSheetId") is None and not name.get("name").startswith("_xlnm."):
+                names[name.get("name")] = name.text
+
+        saved = None
+        if "docProps/core.xml" in archive.namelist():
+            modified = ET.fromstring(archive.read("docProps/core.xml")).find("{http://purl.org/dc/terms/}modified")
+            saved = modified.text[:10] if modified is not None and modified.text else None
+    return sheets, values, formulas, names, saved
+
+
+# --- Compilation -----------------------------------------------------------
+
+def _walk(node):
+    yield node
+    if node[0] in ("op", "neg", "pct", "fn"):
+        for child in node[2:] if node[0] in ("op", "fn") else node[1:]:
+            yield from _walk(child)
+
+
+def _direct_references(node):
+    """Cell keys and names an expression refers to, and whether it calls ROW() without a reference"""
+    keys, names, uses_row = set(), set(), False
+    for child in _walk(node):
+        if child[0] == "ref":
+            keys.add(child[1])
+        elif child[0] == "area":
+            keys.update(_area_keys(*child[1:]))
+        elif child[0] == "name":
+            names.add(child[1])
+        elif child[0] == "fn":
+            if child[1] not in _FUNCTIONS:
+                raise FormulaError(f"Unsupported function {child[1]}")
+            uses_row |= child[1] == "ROW" and len(child) == 2
+    return keys, names, uses_row
+
+
+def compile_xlsx(data):
+    """Compile .xlsx bytes into an evaluation plan (a JSON-serializable dict)
+
+    A formula that can't be compiled doesn't stop the rest; it is listed under
+    "errors" and only evaluating a cell that depends on it raises.
+    """
+    sheets, values, texts, name_texts, saved = read_xlsx(data)
+    formats, widths = read_layout(data)
+    errors = {}
+
+    names, name_info = {}, {}
+
+    def name_references(name, stack=()):
+        """(cell keys, row-dependent) of a defined name, following the names it uses"""
+        if name in name_info:
+            return name_info[name]
+        if name not in name_texts:
+            raise FormulaError(f"Unknown name {name}")
+        if name in stack:
+            raise FormulaError(f"Name {name} refers to itself")
+        names[name] = parse_formula(name_texts[name], sheets[0])
+        keys, used, uses_row = _direct_references(names[name])
+        for other in used:
+            other_keys, other_row = name_references(other, stack + (name,))
+            keys |= other_keys
+            uses_row |= other_row
+        name_info[name] = (keys, uses_row)
+        return name_info[name]
+
+    formulas, depends = {}, {}
+    for key, (text, sheet, offset) in texts.items():
+        try:
+            node = parse_formula(text, sheet, offset)
+            keys, used, _ = _direct_references(node)
+            for name in used:
+                keys |= name_references(name)[0]
+        except FormulaError as error:
+            errors[key] = f"{key}: ={text}: {error}"
+            continue
+        formulas[key] = node
+        depends[key] = sorted(keys)
+
+    # Dependency order over the formula cells (depth-first, so deep chains don't recurse)
+    order, state = [], {}
+    for start in sorted(formulas):
+        if start in state:
+            continue
+        stack = [(start, iter(depends[start]))]
+        state[start] = "visiting"
+        while stack:
+            key, pending = stack[-1]
+            for dependency in pending:
+                if dependency not in formulas:
+                    continue
+                if state.get(dependency) == "visiting":
+                    raise FormulaError(f"Circular reference through {dependency}")
+                if dependency not in state:
+                    state[dependency] = "visiting"
+                    stack.append((dependency, iter(depends[dependency])))
+                    break
+            else:
+                stack.pop()
+                state[key] = "done"
+                order.append(key)
+
+    return {
+        "version": PLAN_VERSION,
+        "sheets": sheets,
+        "saved": saved,
+        # Cached results of formula cells are kept too: they are the values Excel last calculated
+        "values": {key: value for key, value in values.items() if value is not None},
+        "formulas": formulas,
+        "depends": depends,
+        "order": order,
+        "names": names,
+        "row_names": sorted(name for name, (_, uses_row) in name_info.items() if uses_row),
+        "errors": errors,
+        # Presentation only, for calculator.export
+        "formats": formats,
+        "widths": widths,
+    }
+
+
+# --- Evaluation ------------------------------------------------------------
+
+def _is_text(value):
+    return isinstance(value, str) or (isinstance(value, np.ndarray) and value.dtype == object)
+
+
+def _to_number(text):
+    try:
+        return float(text)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+def _number(value):
+    """Numeric view of a value: blanks are 0, text that isn't a number is NaN (#VALUE!)"""
+    if value is None:
+        return 0.0
+    if isinstance(value, str):
+        return _to_number(value)
+    if isinstance(value, np.ndarray) and value.dtype == object:
+        return np.array([_to_number(item) for item in value.ravel()], dtype=float).reshape(value.shape)
+    return value
+
+
+def _finite(value):
+    """Infinities (division by zero, overflow) become NaN, Excel's #DIV/0! and #NUM!"""
+    if np.ndim(value):
+        return np.where(np.isfinite(value), value, np.nan)
+    return value if np.isfinite(value) else np.nan
+
+
+def _upper(value):
+    if isinstance(value, str):
+        return value.upper()
+    if isinstance(value, np.ndarray):
+        return np.array([str(item).upper() for item in value.ravel()], dtype=object).reshape(value.shape)
+    return value
+
+
+_ARITHMETIC = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide, "^": np.power}
+_COMPARE = {"=": np.equal, "<>": np.not_equal, "<": np.less, ">": np.greater, "<=": np.less_equal,
+            ">=": np.greater_equal}
+
+
+def _operate(operator, left, right):
+    if operator in _ARITHMETIC:
+        with np.errstate(all="ignore"):
+            return _finite(_ARITHMETIC[operator](_number(left), _number(right)))
+    if operator == "&":
+        join = np.frompyfunc(lambda a, b: f"{a}{b}", 2, 1)
+        result = join(_display(left), _display(right))
+        return result if isinstance(result, np.ndarray) else str(result)
+    if _is_text(left) or _is_text(right):
+        # Excel compares text case-insensitively
+        left = _upper(left) if _is_text(left) else _display(left)
+        right = _upper(right) if _is_text(right) else _display(right)
+        return _COMPARE[operator](np.asarray(left, dtype=object), np.asarray(right, dtype=object))[()]
+    with np.errstate(invalid="ignore"):
+        return _COMPARE[operator](_number(left), _number(right))
+
+
+def _display(value):
+    """Text form of a value for & and mixed comparisons"""
+    if _is_text(value):
+        return value
+    if np.ndim(value):
+        return np.array([_display(item) for item in np.ravel(value)], dtype=object).reshape(np.shape(value))
+    if value is None:
+        return ""
+    number = float(value)
+    return str(int(number)) if number.is_integer() else repr(number)
+
+
+def _choose(condition, if_true, if_false):
+    """np.where for Excel values: text branches stay text, otherwise numbers with "" as NaN"""
+    if _is_text(if_true) and _is_text(if_false):
+        return np.where(condition, np.asarray(if_true, dtype=object), np.asarray(if_false, dtype=object))
+    return np.where(condition, _number(if_true), _number(if_false))
+
+
+_FUNCTIONS = {}
+
+
+def _function(name, lazy=False):
+    """Register an Excel function; lazy ones get unevaluated argument nodes"""
+    def register(func):
+        _FUNCTIONS[name] = (func, lazy)
+        return func
+    return register
+
+
+class _Evaluation:
+    """One pass over a chunk of deals"""
+
+    def __init__(self, plan, values, today):
+        self.plan = plan
+        self.values = values
+        self.today = today
+        self.names = {}
+        self.row_names = set(plan["row_names"])
+
+    def cell(self, key):
+        if key in self.values:
+            return self.values[key]
+        return self.plan["values"].get(key)
+
+    def area(self, node):
+        if node[0] == "area":
+            return [self.cell(key) for key in _area_keys(*node[1:])]
+        if node[0] == "ref":
+            return [self.cell(node[1])]
+        raise FormulaError("Expected a range")
+
+    def name(self, name, key):
+        """A defined name's value, computed once per chunk (once per row for names that use ROW())"""
+        memo = (name, _split_key(key)[1]) if name in self.row_names else name
+        if memo not in self.names:
+            self.names[memo] = self.eval(self.plan["names"][name], key)
+        return self.names[memo]
+
+    def eval(self, node, key):
+        """Value of an expression node in cell key (key is what ROW() refers to)"""
+        kind = node[0]
+        if kind in ("n", "s", "b"):
+            return node[1]
+        if kind == "ref":
+            return self.cell(node[1])
+        if kind == "name":
+            return self.name(node[1], key)
+        if kind == "op":
+            return _operate(node[1], self.eval(node[2], key), self.eval(node[3], key))
+        if kind == "neg":
+            return np.negative(_number(self.eval(node[1], key)))
+        if kind == "pct":
+            return np.divide(_number(self.eval(node[1], key)), 100)
+        if kind == "fn":
+            func, lazy = _FUNCTIONS[node[1]]
+            arguments = node[2:] if lazy else [self.eval(argument, key) if argument[0] not in ("area", "rows")
+                                                 else argument for argument in node[2:]]
+            return func(self, key, *arguments)
+        raise FormulaError(f"A range ({kind}) can only be used as a function argument")
+
+    def numbers(self, arguments):
+        """Numeric values of function arguments, expanding ranges and skipping text and blanks in them"""
+        for argument in arguments:
+            if isinstance(argument, list):
+                for value in self.area(argument):
+                    if value is not None and not _is_text(value) and not isinstance(value, bool):
+                        yield value
+            else:
+                yield _number(argument)
+
+
+@_function("IF", lazy=True)
+def _if(evaluation, key, condition, if_true, if_false=("b", False)):
+    condition = _number(evaluation.eval(condition, key))
+    if np.ndim(condition) == 0:
+        # Only the branch taken is evaluated, as in Excel
+        if math.isnan(condition):
+            return math.nan
+        return evaluation.eval(if_true if condition else if_false, key)
+    result = _choose(condition != 0, evaluation.eval(if_true, key), evaluation.eval(if_false, key))
+    return np.where(np.isnan(condition), np.nan, result) if result.dtype != object else result
+
+
+@_function("IFERROR", lazy=True)
+def _iferror(evaluation, key, value, fallback):
+    value = evaluation.eval(value, key)
+    if value is None:
+        return 0.0
+    if _is_text(value) or isinstance(value, bool):
+        return value
+    failed = np.isnan(value)
+    if not np.any(failed):
+        return value
+    if np.ndim(value) == 0:
+        return evaluation.eval(fallback, key)
+    return _choose(failed, evaluation.eval(fallback, key), value)
+
+
+@_function("ROW", lazy=True)
+def _row(evaluation, key, reference=None):
+    if reference is None:
+        return float(_split_key(key)[1])
+    if reference[0] in ("area", "rows"):
+        return float(reference[2])
+    if reference[0] == "ref":
+        return float(_split_key(reference[1])[1])
+    raise FormulaError("ROW needs a reference")
+
+
+@_function("SUM")
+def _sum(evaluation, key, *arguments):
+    total = 0.0
+    for value in evaluation.numbers(arguments):
+        # "" results (NaN here) are text to Excel, which SUM skips
+        total = total + np.where(np.isnan(value), 0.0, value)
+    return total[()] if isinstance(total, np.ndarray) else total
+
+
+@_function("SUMIF")
+def _sumif(evaluation, key, cells, criteria, sum_cells=None):
+    if not isinstance(cells, list):
+        raise FormulaError("SUMIF needs a range to test")
+    if isinstance(criteria, str) and criteria[:1] in ("<", ">"):
+        raise FormulaError("SUMIF criteria with comparison operators aren't supported")
+    if isinstance(criteria, str) and criteria.startswith("="):
+        criteria = criteria[1:]
+    sums = evaluation.area(sum_cells if sum_cells is not None else cells)
+    total = 0.0
+    for value, amount in zip(evaluation.area(cells), sums):
+        if value is None or amount is None or _is_text(amount):
+            continue
+        if _is_text(value) != _is_text(criteria):
+            continue  # text never matches a number
+        if _is_text(value):
+            match = np.equal(np.asarray(_upper(value), dtype=object), np.asarray(_upper(criteria), dtype=object))
+        else:
+            match = np.equal(_number(value), _number(criteria))
+        total = total + np.where(match, amount, 0.0)
+    return total[()] if isinstance(total, np.ndarray) else total
+
+
+@_function("MIN")
+def _min(evaluation, key, *arguments):
+    values = list(evaluation.numbers(arguments))
+    return np.minimum.reduce(np.broadcast_arrays(*values))[()] if values else 0.0
+
+
+@_function("MAX")
+def _max(evaluation, key, *arguments):
+    values = list(evaluation.numbers(arguments))
+    return np.maximum.reduce(np.broadcast_arrays(*values))[()] if values else 0.0
+
+
+@_function("ABS")
+def _abs(evaluation, key, value):
+    return np.abs(_number(value))
+
+
+@_function("ROUND")
+def _round(evaluation, key, value, digits=0.0):
+    # Excel rounds halves away from zero
+    scale = np.power(10.0, _number(digits))
+    value = _number(value)
+    return np.sign(value) * np.floor(np.abs(value) * scale + 0.5) / scale
+
+
+@_function("AND")
+def _and(evaluation, key, *arguments):
+    return np.logical_and.reduce(np.broadcast_arrays(*(np.asarray(value) != 0
+                                                       for value in evaluation.numbers(arguments))))[()]
+
+
+@_function("OR")
+def _or(evaluation, key, *arguments):
+    return np.logical_or.reduce(np.broadcast_arrays(*(np.asarray(value) != 0
+                                                      for value in evaluation.numbers(arguments))))[()]
+
+
+@_function("NOT")
+def _not(evaluation, key, value):
+    return np.equal(_number(value), 0)
+
+
+def _growth(rate, periods):
+    with np.errstate(all="ignore"):
+        return np.power(1 + rate, periods)
+
+
+def _pmt(rate, periods, present, future=0.0, due=0.0):
+    growth = _growth(rate, periods)
+    with np.errstate(all="ignore"):
+        payment = -(rate * (future + present * growth)) / ((1 + rate * due) * (growth - 1))
+        return _finite(np.where(rate == 0, -(present + future) / periods, payment)[()])
+
+
+def _fv(rate, periods, payment, present=0.0, due=0.0):
+    growth = _growth(rate, periods)
+    with np.errstate(all="ignore"):
+        future = -(present * growth + payment * (1 + rate * due) * (growth - 1) / rate)
+        return _finite(np.where(rate == 0, -(present + payment * periods), future)[()])
+
+
+def _ipmt(rate, period, periods, present, future=0.0):
+    payment = _pmt(rate, periods, present, future)
+    interest = _fv(rate, period - 1, payment, present) * rate
+    # #NUM! outside the loan's term
+    return np.where((period < 1) | (period > periods), np.nan, interest)[()]
+
+
+@_function("PMT")
+def _excel_pmt(evaluation, key, rate, periods, present, future=0.0, due=0.0):
+    return _pmt(*map(_number, (rate, periods, present, future, due)))
+
+
+@_function("FV")
+def _excel_fv(evaluation, key, rate, periods, payment, present=0.0, due=0.0):
+    return _fv(*map(_number, (rate, periods, payment, present, due)))
+
+
+@_function("IPMT")
+def _excel_ipmt(evaluation, key, rate, period, periods, present, future=0.0):
+    return _ipmt(*map(_number, (rate, period, periods, present, future)))
+
+
+@_function("PPMT")
+def _excel_ppmt(evaluation, key, rate, period, periods, present, future=0.0):
+    rate, period, periods, present, future = map(_number, (rate, period, periods, present, future))
+    return _pmt(rate, periods, present, future) - _ipmt(rate, period, periods, present, future)
+
+
+# Dates are Excel serial numbers (days since 1899-12-30)
+
+def _dates(serial):
+    days = np.nan_to_num(np.floor(_number(serial))).astype(np.int64)
+    return EXCEL_EPOCH + days.astype("timedelta64[D]")
+
+
+def _serial(dates):
+    return (dates - EXCEL_EPOCH).astype(float)
+
+
+def _month_start(year, month):
+    """First day of year/month, with months past 12 (or below 1) rolling into other years"""
+    months = (np.asarray(year, dtype=np.int64) - 1970) * 12 + np.asarray(month, dtype=np.int64) - 1
+    return months.astype("datetime64[M]").astype("datetime64[D]")
+
+
+@_function("TODAY")
+def _today(evaluation, key):
+    return evaluation.today
+
+
+@_function("DATE")
+def _date(evaluation, key, year, month, day):
+    start = _month_start(_number(year), _number(month))
+    return _serial(start + (np.asarray(_number(day), dtype=np.int64) - 1).astype("timedelta64[D]"))[()]
+
+
+@_function("YEAR")
+def _year(evaluation, key, serial):
+    return (_dates(serial).astype("datetime64[Y]").astype(np.int64) + 1970).astype(float)[()]
+
+
+@_function("MONTH")
+def _month(evaluation, key, serial):
+    return (_dates(serial).astype("datetime64[M]").astype(np.int64) % 12 + 1).astype(float)[()]
+
+
+@_function("DAY")
+def _day(evaluation, key, serial):
+    dates = _dates(serial)
+    return ((dates - dates.astype("datetime64[M]")).astype(np.int64) + 1).astype(float)[()]
+
+
+@_function("EOMONTH")
+def _eomonth(evaluation, key, serial, months):
+    start = _dates(serial).astype("datetime64[M]") + np.asarray(_number(months), dtype=np.int64) + 1
+    return _serial(start.astype("datetime64[D]") - np.timedelta64(1, "D"))[()]
+
+
+class Workbook:
+    """A compiled workbook; evaluate() runs any of its cells for many sets of inputs"""
+
+    def __init__(self, plan, sha256=None):
+        self.plan = plan
+        self.sha256 = sha256
+        self._schedules = {}
+        self._lock = threading.Lock()
+
+    @property
+    def errors(self):
+        """Formulas that didn't compile, by cell"""
+        return self.plan["errors"]
+
+    @property
+    def saved_today(self):
+        """TODAY() as of the day the workbook was last saved, to reproduce its saved values"""
+        if not self.plan["saved"]:
+            return None
+        return float((np.datetime64(self.plan["saved"], "D") - EXCEL_EPOCH).astype(int))
+
+    def keys(self, reference, sheet=None):
+        """Plan keys for a cell or range given as 'H3', 'F13:F372' or 'Sheet!H3'"""
+        node = _parse_reference(reference, sheet or self.plan["sheets"][0])
+        if node[0] == "ref":
+            return [node[1]]
+        if node[0] == "area":
+            return list(_area_keys(*node[1:]))
+        raise FormulaError(f"Expected a cell or range, got {reference}")
+
+    def value(self, reference, sheet=None):
+        """The value saved in the workbook for a cell (for a formula, what Excel last calculated)"""
+        values = [self.plan["values"].get(key) for key in self.keys(reference, sheet)]
+        return values[0] if ":" not in reference else values
+
+    def _schedule(self, targets, inputs):
+        """Formula cells to evaluate, in order, for targets given these input cells"""
+        memo = (targets, inputs)
+        with self._lock:
+            if memo in self._schedules:
+                return self._schedules[memo]
+        needed, pending = set(), [key for key in targets if key not in inputs]
+        while pending:
+            key = pending.pop()
+            if key in needed or key in inputs:
+                continue
+            if key in self.plan["errors"]:
+                raise FormulaError(self.plan["errors"][key])
+            if key not in self.plan["formulas"]:
+                continue
+            needed.add(key)
+            pending.extend(self.plan["depends"][key])
+        schedule = [key for key in self.plan["order"] if key in needed]
+        with self._lock:
+            self._schedules[memo] = schedule
+        return schedule
+
+    def evaluate(self, inputs, outputs, sheet=None, chunk_rows=CHUNK_ROWS, today=None):
+        """Evaluate output cells for every row of the input cells
+
+        inputs maps a cell ('H3') to a scalar or one value per row; cells not
+        given keep the workbook's own value or formula. outputs is a list of
+        cells and ranges. Returns {output: array}, one value per row for a
+        cell and a (rows, cells) array for a range.
+        """
+        sheet = sheet or self.plan["sheets"][0]
+        columns = {}
+        for reference, value in inputs.items():
+            (key,) = self.keys(reference, sheet)
+            value = np.asarray(value)
+            columns[key] = value.astype(object) if value.dtype.kind in "USO" else value.astype(float)
+        shape = np.broadcast_shapes(*(value.shape for value in columns.values()))
+        rows = shape[0] if shape else 1
+        targets = {reference: self.keys(reference, sheet) for reference in outputs}
+        schedule = self._schedule(frozenset(key for keys in targets.values() for key in keys), frozenset(columns))
+        if today is None:
+            today = float((np.datetime64(datetime.date.today(), "D") - EXCEL_EPOCH).astype(int))
+
+        parts = {reference: [] for reference in outputs}
+        for start in range(0, rows, chunk_rows):
+            stop = min(rows, start + chunk_rows)
+            values = {key: value[start:stop] if value.ndim else value[()] for key, value in columns.items()}
+            evaluation = _Evaluation(self.plan, values, today)
+            for key in schedule:
+                values[key] = evaluation.eval(self.plan["formulas"][key], key)
+            for reference, keys in targets.items():
+                cells = [evaluation.cell(key) for key in keys]
+                if len(keys) == 1 and ":" not in reference:
+                    value = cells[0]
+                    dtype = object if _is_text(value) else float
+                    parts[reference].append(np.broadcast_to(np.asarray(_number(value) if dtype is float else value,
+                                                                       dtype=dtype), (stop - start,)))
+                else:
+                    parts[reference].append(np.stack([np.broadcast_to(np.asarray(_number(cell), dtype=float),
+                                                                      (stop - start,)) for cell in cells], axis=1))
+        return {reference: np.concatenate(chunks) if chunks else np.empty(0) for reference, chunks in parts.items()}
+
+
+# --- Plan cache ------------------------------------------------------------
+
+_cache_lock = threading.Lock()
+_workbooks = {}  # sha256 -> Workbook
+
+
+def plans_dir():
+    return os.environ.get("PROPERTY_CALC_PLANS", os.path.join(os.path.expanduser("~"), ".property-calculator", "plans"))
+
+
+def _plan_path(sha256):
+    return os.path.join(plans_dir(), f"{sha256}-v{PLAN_VERSION}.json")
+
+
+def load(path):
+    """The compiled Workbook for an .xlsx file
+
+    Compiled at most once per version of the file: plans are kept in memory
+    and on disk under the SHA-256 of the file's bytes.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    sha256 = hashlib.sha256(data).hexdigest()
+    with _cache_lock:
+        if sha256 in _workbooks:
+            return _workbooks[sha256]
+    plan = None
+    try:
+        with open(_plan_path(sha256)) as f:
+            plan = json.load(f)
+        if plan.get("version") != PLAN_VERSION:
+            plan = None
+    except (OSError, ValueError):
+        pass
+    if plan is None:
+        plan = compile_xlsx(data)
+        try:
+            os.makedirs(plans_dir(), exist_ok=True)
+            # Written aside and renamed, so another process never reads half a plan
+            temp_path = f"{_plan_path(sha256)}.{os.getpid()}.tmp"
+            with open(temp_path, "w") as f:
+                json.dump(plan, f)
+            os.replace(temp_path, _plan_path(sha256))
+        except OSError:
+            pass  # still usable from memory
+    with _cache_lock:
+        return _workbooks.setdefault(sha256, Workbook(plan, sha256))
+
+
+def clear_cache():
+    """Forget compiled workbooks in this process (the plans on disk are kept)"""
+    with _cache_lock:
+        _workbooks.clear()
+
+
+# --- Workbook vs app -------------------------------------------------------
+
+def _columns(deals, names):
+    """Engine inputs from a DataFrame or dict of columns, accepting comm_-prefixed names"""
+    columns = {}
+    for name in names:
+        column = name if name in deals else f"comm_{name}"
+        columns[name] = np.asarray(deals[column])
+    return columns
+
+
+def _inputs(layout, columns):
+    """Input cells of a layout from engine inputs in the app's units"""
+    inputs = {}
+    for name, (cell, scale) in layout["inputs"].items():
+        value = columns[name]
+        inputs[cell] = value.astype(str) if scale is None else value.astype(float) * scale
+    return inputs
+
+
+def evaluate_deals(property_type, deals, outputs=None):
+    """Deals (engine inputs, app units) through the bundled workbook; returns {output name: array}
+
+    outputs defaults to every output in the workbook's layout.
+    """
+    layout = LAYOUTS[property_type]
+    names = list(outputs or layout["outputs"])
+    cells = {name: layout["outputs"][name][0] for name in names}
+    values = load(layout["workbook"]).evaluate(_inputs(layout, _columns(deals, layout["inputs"])),
+                                                list(cells.values()), sheet=layout["sheet"])
+    return {name: values[cells[name]] * layout["outputs"][name][1] for name in names}
+
+
+def sheet_values(property_type, deals, results):
+    """Every cell of the layout's sheet for each deal, showing the app's figures
+
+    deals are engine inputs (app units, with county and zip_code if given)
+    and results the engine outputs for them. The app's inputs, location rates
+    and outputs are pinned in their cells and the workbook's other formulas
+    evaluated around them, so totals and the amortization table agree with
+    the app even where its rate table is finer than the workbook's. Returns
+    {cell: one value per deal} for labels, constants and formulas alike,
+    in row order.
+    """
+    layout = LAYOUTS[property_type]
+    book = load(layout["workbook"])
+    sheet = layout["sheet"]
+    columns = _columns(deals, layout["inputs"])
+    inputs = _inputs(layout, columns)
+    location = engine.location_rates(property_type, columns["state"],
+                                     *(np.asarray(deals[name]) if name in deals else None for name in engine.LOCATION_INPUTS))
+    inputs.update({cell: location[name] for name, cell in layout["rates"].items()})
+    inputs.update({cell: np.asarray(results[name], dtype=float) / scale
+                   for name, (cell, scale) in layout["outputs"].items()})
+
+    prefix = f"{sheet}!"
+    keys = sorted({key for key in (*book.plan["values"], *book.plan["formulas"]) if key.startswith(prefix)},
+                  key=lambda key: _split_key(key)[1:])
+    rows = len(columns["state"])
+    values = book.evaluate(inputs, [key[len(prefix):] for key in keys if key in book.plan["formulas"]], sheet=sheet)
+    sheet_cells = {}
+    for key in keys:
+        cell = key[len(prefix):]
+        if cell in values:
+            sheet_cells[cell] = values[cell]
+        elif cell in inputs:
+            sheet_cells[cell] = np.broadcast_to(np.asarray(inputs[cell], dtype=object), (rows,))
+        else:
+            # A formula that didn't compile is left blank rather than showing Excel's saved value
+            value = None if key in book.errors else book.plan["values"][key]
+            sheet_cells[cell] = np.full(rows, value, dtype=object)
+    return sheet_cells
+
+
+def _difference(name, actual, expected, rtol, atol, mask=None):
+    actual = np.asarray(actual, dtype=float)
+    expected = np.asarray(expected, dtype=float)
+    close = np.isclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True)
+    if mask is not None:
+        close |= ~mask
+    differing = ~close.reshape(len(close), -1).all(axis=1)
+    with np.errstate(invalid="ignore"):
+        gap = np.where(close, 0.0, np.nan_to_num(np.abs(actual - expected), nan=np.inf))
+    return {
+        "name": name,
+        "rows": len(differing),
+        "differing": int(differing.sum()),
+        "first_differing_row": int(np.argmax(differing)) if differing.any() else None,
+        "max_abs_diff": float(gap.max()) if gap.size else 0.0,
+        "ok": not differing.any(),
+    }
+
+
+def compare(property_type, deals, rtol=RTOL, atol=ATOL, schedule=True):
+    """Evaluate deals through the workbook and through calculator.engine and diff every output
+
+    Returns one result per output (and per amortization column when schedule
+    is set) with the number of differing rows, the first of them and the
+    largest absolute difference. Deals must be in states the workbook's own
+    rate table lists.
+    """
+    layout = LAYOUTS[property_type]
+    columns = _columns(deals, layout["inputs"])
+    evaluate = engine.residential if property_type == "residential" else engine.commercial
+    expected = evaluate(**columns)
+
+    cells = {name: cell for name, (cell, _) in layout["outputs"].items()}
+    months = int(np.max(columns["loan_years"])) * 12 if schedule else 0
+    first, last = layout["schedule"]["first_row"], layout["schedule"]["first_row"] + months - 1
+    ranges = {name: f"{layout['schedule'][name]}{first}:{layout['schedule'][name]}{last}"
+              for name in ("principal", "interest", "balance")} if schedule else {}
+    values = load(layout["workbook"]).evaluate(_inputs(layout, columns), [*cells.values(), *ranges.values()],
+                                               sheet=layout["sheet"])
+
+    results = [_difference(f"{name} ({cell})", values[cell] * layout["outputs"][name][1], expected[name], rtol, atol)
+               for name, cell in cells.items()]
+    if schedule:
+        monthly = amortization.schedule(expected["loan_amount"], columns["interest_rate"], columns["loan_years"])
+        # The workbook leaves months past each loan's term blank; the app pads them with zeros
+        active = np.arange(1, months + 1) <= np.asarray(columns["loan_years"], dtype=float)[:, None] * 12
+        for name, reference in ranges.items():
+            results.append(_difference(f"amortization {name} ({reference})", values[reference],
+                                       monthly[name][:, :months], rtol, atol, mask=active))
+    return results
+
+
+def main(argv=None):
+    from calculator import screening
+
+    parser = argparse.ArgumentParser(description="Evaluate a CSV/Parquet file of deals through a screening workbook")
+    parser.add_argument("input", help="CSV or Parquet file of deals (the batch screening columns)")
+    parser.add_argument("output", help="Results file (.csv or .parquet) with a workbook_ column per output cell")
+    parser.add_argument("--type", dest="property_type", choices=sorted(LAYOUTS), default="residential")
+    parser.add_argument("--chunksize", type=int, default=screening.DEFAULT_CHUNKSIZE)
+    parser.add_argument("--check", action="store_true",
+                        help="Also compare every output with the app's calculation; exit 1 on any difference")
+    args = parser.parse_args(argv)
+
+    if os.path.abspath(args.input) == os.path.abspath(args.output):
+        parser.error("output must be a different file than input")
+
+    layout = LAYOUTS[args.property_type]
+    book = load(layout["workbook"])
+    for error in book.errors.values():
+        print(f"warning: {error}", file=sys.stderr)
+
+    rows = 0
+    drift = {}
+    with screening.ResultWriter(args.output) as writer:
+        for chunk in screening.read_chunks(args.input, args.chunksize):
+            chunk = screening.prepare_chunk(chunk, args.property_type)
+            results = evaluate_deals(args.property_type, chunk)
+            writer.write(chunk.assign(**{f"workbook_{name}": value for name, value in results.items()}))
+            if args.check:
+                for result in compare(args.property_type, chunk):
+                    if result["ok"]:
+                        continue
+                    total = drift.setdefault(result["name"], {"differing": 0, "first_differing_row": None,
+                                                              "max_abs_diff": 0.0})
+                    total["differing"] += result["differing"]
+                    if total["first_differing_row"] is None:
+                        total["first_differing_row"] = rows + result["first_differing_row"]
+                    total["max_abs_diff"] = max(total["max_abs_diff"], result["max_abs_diff"])
+            rows += len(chunk)
+            print(f"\rEvaluated {rows:,} deals", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    print(f"{rows:,} deals evaluated through {os.path.basename(layout['workbook'])}")
+    for name, result in drift.items():
+        print(f"DRIFT {name}: {result['differing']:,} deals differ from the app, first at row "
+              f"{result['first_differing_row']}, max difference {result['max_abs_diff']:.6g}")
+    return 1 if drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
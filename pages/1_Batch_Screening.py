@@ -0,0 +1,64 @@
+import os
+import tempfile
+
+import pandas as pd
+import streamlit as st
+
+from calculator import engine, screening, startup
+
+st.set_page_config(
+    page_title="Batch Screening - Property Investment Calculator",
+    page_icon=startup.page_icon(),
+    layout="wide"
+)
+
+st.title("Batch Screening")
+st.write("Upload a CSV or Parquet file of candidate deals to screen them all with the calculator's formulas.")
+
+property_type = st.radio("Property Type", ["Residential", "Commercial"], horizontal=True)
+
+if property_type == "Residential":
+    inputs, defaults = engine.RESIDENTIAL_INPUTS, engine.RESIDENTIAL_DEFAULTS
+else:
+    inputs, defaults = engine.COMMERCIAL_INPUTS, engine.COMMERCIAL_DEFAULTS
+
+with st.expander("📋 Expected Columns"):
+    st.write("Column names match the calculator's URL parameters (the `comm_` prefix is optional). "
+             "Missing columns use the calculator defaults.")
+    st.dataframe(pd.DataFrame({"Column": inputs, "Default": [str(defaults[name]) for name in inputs]}),
+                 hide_index=True)
+
+uploaded = st.file_uploader("Deals File", type=["csv", "parquet"])
+col1, col2 = st.columns(2)
+with col1:
+    chunksize = st.number_input("Rows per Chunk", value=screening.DEFAULT_CHUNKSIZE, min_value=1000, step=10000)
+with col2:
+    output_format = st.selectbox("Output Format", ["CSV", "Parquet"])
+solve = st.checkbox("Add deal targets", help="Max purchase price, required down payment and break-even interest rate for every deal")
+
+if uploaded is not None and st.button("Screen Deals", type="primary"):
+    suffix = ".csv" if output_format == "CSV" else ".parquet"
+    output_path = os.path.join(tempfile.mkdtemp(), f"screening_results{suffix}")
+    status = st.empty()
+
+    def report(rows):
+        status.write(f"Screened {rows:,} deals...")
+
+    try:
+        summary = screening.screen_file(uploaded, output_path, property_type, int(chunksize), progress=report,
+                                         solve=solve)
+    except (KeyError, ValueError) as e:
+        st.error(f"❌ Could not screen file: {e}")
+    else:
+        status.empty()
+        summary_col1, summary_col2, summary_col3 = st.columns(3)
+        summary_col1.metric("Deals Screened", f"{summary['rows']:,}")
+        summary_col2.metric("Good", f"{summary['good']:,}")
+        summary_col3.metric("Bad", f"{summary['bad']:,}")
+
+        # Preview only the first chunk so large result files are never loaded whole
+        preview = next(screening.read_chunks(output_path, 100), pd.DataFrame())
+        st.dataframe(preview, hide_index=True)
+
+        with open(output_path, "rb") as f:
+            st.download_button("Download Results", f, file_name=os.path.basename(output_path))
@@ -0,0 +1,253 @@
+import pandas as pd
+import streamlit as st
+
+from calculator import comparison, engine, export, listings, memory, startup, store, urlstate
+
+st.set_page_config(
+    page_title="Compare Deals - Property Investment Calculator",
+    page_icon=startup.page_icon(),
+    layout="wide"
+)
+
+st.title("Compare Deals")
+st.write("Collect residential and commercial deals in one workspace and rank them side by side. "
+         "Only deals you add or edit are recalculated.")
+
+# One workspace per browser session; over the session's memory budget its results are dropped and recomputed
+workspace = memory.session_budget.use(st.session_state, "workspace", comparison.Workspace)
+
+TIER_COLORS = dict(zip([label for _, label in comparison.AMOUNT_DOWN_TIERS], ["green", "orange", "red"]))
+MONEY_COLUMNS = ["purchase_price", "amount_down", "loan_amount", "monthly_payment", "monthly_cash_flow", "annual_cash_flow"]
+SORT_COLUMNS = ["cash_on_cash", "monthly_cash_flow", "annual_cash_flow", "amount_down", "purchase_price",
+                "loan_amount", "monthly_payment", "name"]
+
+def color_negative_red(val):
+    color = 'red' if val < 0 else 'green'
+    return f'color: {color}'
+
+def add_parsed(parsed):
+    # One add per property type, so each type is evaluated in a single pass
+    deals = {property_type: ([], [], []) for property_type in comparison.PROPERTY_TYPES}
+    for property_type, deal, listing, name in parsed:
+        rows, names, listings = deals[property_type]
+        rows.append(deal)
+        names.append(name)
+        listings.append(listing)
+    added = 0
+    for property_type, (rows, names, listings) in deals.items():
+        added += len(workspace.add(property_type, rows, names=names, listing_urls=listings))
+    return added
+
+def add_links(text):
+    parsed = []
+    errors = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            parsed.extend(comparison.deals_from_url(line))
+        except ValueError as e:
+            errors.append(f"{line.strip()}: {e}")
+    return add_parsed(parsed), errors
+
+# A shared portfolio link adds its deals once per session
+shared = st.query_params.get(urlstate.ID_PARAM) or st.query_params.get(urlstate.STATE_PARAM)
+if shared and st.session_state.get("compare_shared") != shared:
+    st.session_state.compare_shared = shared
+    try:
+        added = add_parsed([comparison.deal_from_params(params)
+                            for params in urlstate.deals_from_params(st.query_params.to_dict())])
+    except ValueError as e:
+        st.error(f"❌ Could not open this link: {e}")
+    else:
+        st.success(f"Added {added:,} deals from the shared link")
+
+with st.expander("➕ Add Deals", expanded=not len(workspace)):
+    links_tab, listings_tab, file_tab = st.tabs(["Calculator Links", "Listings", "Upload File"])
+    with links_tab:
+        links = st.text_area("Shared Calculator Links", placeholder="One link per line, copied from the calculator's address bar",
+                             key="compare_links")
+        if st.button("Add Links", disabled=not links.strip()):
+            added, errors = add_links(links)
+            st.success(f"Added {added:,} deals")
+            for error in errors:
+                st.error(f"❌ Could not add {error}")
+    with listings_tab:
+        listing_urls = st.text_area("Listing URLs", placeholder="One LoopNet, Zillow or Crexi listing per line",
+                                    key="compare_listing_urls")
+        if st.button("Import Listings", disabled=not listing_urls.strip()):
+            urls = [line.strip() for line in listing_urls.splitlines() if line.strip()]
+            # Fetched concurrently; listings seen before come from the cache
+            with st.spinner(f"Fetching {len(urls):,} listings..."):
+                results = listings.ingest(urls)
+            parsed = [comparison.deal_from_listing(result) for result in results if not result["error"]]
+            st.success(f"Added {add_parsed(parsed):,} deals "
+                        f"({sum(result['cached'] for result in results):,} from the cache)")
+            for result in results:
+                if result["error"]:
+                    st.error(f"❌ Could not import {result['url']}: {result['error']}")
+    with file_tab:
+        file_type = st.radio("Property Type", ["Residential", "Commercial"], horizontal=True, key="compare_file_type")
+        uploaded = st.file_uploader("Deals File", type=["csv", "parquet"],
+                                    help="Same columns as Batch Screening, plus an optional name column")
+        if uploaded is not None and st.button("Add File"):
+            frame = pd.read_parquet(uploaded) if uploaded.name.lower().endswith(".parquet") else pd.read_csv(uploaded)
+            try:
+                ids = workspace.add(file_type.lower(), frame,
+                                    names=frame["name"].astype(str) if "name" in frame.columns else None)
+            except (KeyError, ValueError) as e:
+                st.error(f"❌ Could not add file: {e}")
+            else:
+                st.success(f"Added {len(ids):,} deals")
+
+if not len(workspace):
+    st.info("Add deals above to start comparing.")
+    st.stop()
+
+view = workspace.view()
+
+# Filters
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    property_types = st.multiselect("Property Type", list(comparison.PROPERTY_TYPES), format_func=str.title,
+                                    key="compare_types")
+with col2:
+    tiers = st.multiselect("Amount Down", list(TIER_COLORS), key="compare_tiers")
+with col3:
+    states = st.multiselect("State", engine.states(), key="compare_states")
+with col4:
+    min_cash_on_cash = st.number_input("Min Cash-on-Cash %", value=None, step=1.0, key="compare_min_coc")
+with col5:
+    good_only = st.checkbox("Good deals only", key="compare_good_only")
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    sort_by = st.selectbox("Sort By", SORT_COLUMNS, format_func=comparison.VIEW_COLUMNS.get, key="compare_sort")
+with col2:
+    descending = st.toggle("Descending", value=True, key="compare_descending")
+with col3:
+    page_size = st.selectbox("Deals per Page", [25, 50, 100], key="compare_page_size")
+
+selected = comparison.select(view, property_types, tiers, states, min_cash_on_cash, good_only,
+                             sort_by=sort_by, ascending=not descending)
+pages = max(1, -(-len(selected) // page_size))
+if st.session_state.get("compare_page", 1) > pages:
+    # Filters shrank the selection below the current page
+    st.session_state.compare_page = pages
+with col4:
+    page_number = st.number_input(f"Page (of {pages:,})", min_value=1, max_value=pages, value=1, key="compare_page")
+rows, _ = comparison.page(selected, page_number, page_size)
+
+summary_col1, summary_col2, summary_col3 = st.columns(3)
+summary_col1.metric("Deals Shown", f"{len(selected):,} of {len(view):,}")
+summary_col2.metric("Good Deals", f"{int(selected['good'].sum()):,}")
+best = selected["cash_on_cash"].max() if len(selected) else float("nan")
+summary_col3.metric("Best Cash-on-Cash", "n/a" if pd.isna(best) else f"{best:.1f}%")
+
+# Only the visible page is styled and sent to the browser
+table = rows.drop(columns="good").rename(columns=comparison.VIEW_COLUMNS)
+table["Type"] = table["Type"].str.title()
+st.dataframe(
+    table.style
+        .format({comparison.VIEW_COLUMNS[column]: "${:,.0f}" for column in MONEY_COLUMNS} | {"Cash-on-Cash %": "{:.1f}%"})
+        .map(color_negative_red, subset=["Monthly Cash Flow", "Annual Cash Flow", "Cash-on-Cash %"])
+        .map(lambda tier: f"color: {TIER_COLORS[tier]}", subset=["Down Tier"]),
+    column_config={"id": st.column_config.NumberColumn("ID")}
+)
+st.caption("Residential cash flow is at 75% occupancy and its cash-on-cash is the annual ROI on the down payment; "
+           "commercial cash-on-cash is on total cash down including closing costs.")
+
+# Editing the visible deals; each change recalculates just that deal
+def apply_edits(property_type, ids, key):
+    edits = st.session_state[key]["edited_rows"]
+    removed = [ids[row] for row, values in edits.items() if values.pop("remove", False)]
+    changes = {ids[row]: values for row, values in edits.items() if values}
+    try:
+        workspace.update(property_type, changes)
+    except (KeyError, ValueError) as e:
+        st.session_state.compare_edit_error = str(e)
+    workspace.remove(removed)
+
+with st.expander("✏️ Edit Deals on This Page"):
+    if "compare_edit_error" in st.session_state:
+        st.error(f"❌ {st.session_state.pop('compare_edit_error')}")
+    for property_type, (inputs, _) in comparison.PROPERTY_TYPES.items():
+        ids = [deal_id for deal_id in rows.index if deal_id in workspace.inputs(property_type).index]
+        if not ids:
+            continue
+        st.subheader(property_type.title())
+        editable = workspace.inputs(property_type).loc[ids, ["name"] + inputs + ["zip_code"]].assign(remove=False)
+        key = f"compare_edit_{property_type}_{workspace.version}"
+        st.data_editor(editable, key=key, on_change=apply_edits, args=(property_type, ids, key),
+                       column_config={
+                           "state": st.column_config.SelectboxColumn("state", options=engine.states(), required=True),
+                           "zip_code": st.column_config.TextColumn("zip_code"),
+                           "remove": st.column_config.CheckboxColumn("Remove"),
+                       })
+
+col1, col2, col3, col4 = st.columns(4)
+with col1:
+    st.download_button("Download Selection", selected.rename(columns=comparison.VIEW_COLUMNS).to_csv(),
+                       file_name="deal_comparison.csv")
+with col2:
+    share = st.button("Share Selection", disabled=selected.empty,
+                      help="One link for every deal shown; large selections get a short link stored on this server")
+with col3:
+    save = st.button("Save to Deal Store", disabled=selected.empty,
+                     help="Keep every deal shown on this server, to query and re-score on the Deal Store page")
+with col4:
+    if st.button("Clear Workspace"):
+        workspace.clear()
+        st.rerun()
+if save:
+    saved = 0
+    for property_type in comparison.PROPERTY_TYPES:
+        ids = selected.index[selected["property_type"] == property_type]
+        if len(ids):
+            saved += len(store.store().add(property_type, workspace.inputs(property_type).loc[ids]))
+    st.success(f"Saved {saved:,} deals to the deal store")
+if share:
+    query = urlstate.share(workspace.as_params(selected.index))
+    st.code(f"{(st.context.url or '').split('?')[0]}?{query}", language=None)
+
+# Reports are written on a background thread; while one runs only its status fragment reruns, polling it
+def show_export_job():
+    job = export.job(st.session_state.get("compare_export_job"))
+    if job is None:
+        return
+    running = job.status == "running"
+
+    @st.fragment(run_every=1 if running else None)
+    def export_status():
+        if job.status == "running":
+            st.progress(min(job.rows / job.total, 1.0) if job.total else 0.0,
+                        text=f"Writing report: {job.rows:,} of {job.total:,} deals")
+        elif running:
+            st.rerun()  # finished: one full rerun shows the download and stops the polling
+        elif job.status == "failed":
+            st.error(f"❌ Could not write the report: {job.error}")
+        else:
+            with open(job.path, "rb") as f:
+                st.download_button("Download Report", f, file_name=job.file_name, mime=job.mime)
+
+    export_status()
+
+with st.expander("📤 Export Report"):
+    st.caption(f"Every deal shown, plus a workbook sheet or PDF page for each of the first {export.DEAL_PAGES}. "
+               "Large selections are written in the background; keep working meanwhile.")
+    col1, col2 = st.columns(2)
+    kind = col1.selectbox("Format", list(export.FORMATS), format_func=export.FORMATS.get, key="compare_export_format")
+    if col2.button("Export Selection", disabled=selected.empty):
+        # A copy of the selected inputs, so edits made while the report is written don't reach it
+        sources = {}
+        for property_type in comparison.PROPERTY_TYPES:
+            ids = selected.index[selected["property_type"] == property_type]
+            if len(ids):
+                sources[property_type] = export.frame_chunks(workspace.inputs(property_type).loc[ids].copy())
+        job = export.submit(sources, f"deal_comparison{kind}", total=len(selected))
+        st.session_state.compare_export_job = job.id
+    show_export_job()
+st.caption(f"{workspace.evaluated_rows:,} deal evaluations this session; unchanged deals are only recalculated "
+           "when the session is over its memory budget.")
+
+memory.session_budget.enforce(st.session_state)
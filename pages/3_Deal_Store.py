@@ -0,0 +1,124 @@
+import pandas as pd
+import streamlit as st
+
+from calculator import comparison, engine, rates, screening, startup, store
+
+st.set_page_config(
+    page_title="Deal Store - Property Investment Calculator",
+    page_icon=startup.page_icon(),
+    layout="wide"
+)
+
+st.title("Deal Store")
+st.write("Deals saved here stay on this server with their scores. Query them, re-score them when rates or "
+         "assumptions change, and see which would flip under different terms.")
+
+deals = store.store()
+MONEY_COLUMNS = ["purchase_price", "amount_down", "monthly_payment", "monthly_cash_flow", "annual_cash_flow"]
+SHOWN_COLUMNS = ["name", "property_type", "state"] + MONEY_COLUMNS + ["cash_on_cash", "verdict"]
+
+def color_negative_red(val):
+    color = 'red' if val < 0 else 'green'
+    return f'color: {color}'
+
+def styled(frame, extra_money=()):
+    table = frame.rename(columns=comparison.VIEW_COLUMNS)
+    table["Type"] = table["Type"].str.title()
+    money = [comparison.VIEW_COLUMNS.get(column, column) for column in MONEY_COLUMNS + list(extra_money)]
+    percent = [column for column in table.columns if "Cash-on-Cash" in column]
+    return (table.style
+            .format({column: "${:,.0f}" for column in money} | {column: "{:.1f}%" for column in percent})
+            .map(color_negative_red, subset=[column for column in table.columns if "Cash Flow" in column] + percent))
+
+with st.expander("➕ Save Deals", expanded=not len(deals)):
+    file_type = st.radio("Property Type", ["Residential", "Commercial"], horizontal=True, key="store_file_type")
+    uploaded = st.file_uploader("Deals File", type=["csv", "parquet"],
+                                help="Same columns as Batch Screening, plus optional name and listing_url columns")
+    if uploaded is not None and st.button("Save File"):
+        status = st.empty()
+        added = 0
+        try:
+            for chunk in screening.read_chunks(uploaded):
+                added += len(deals.add(file_type.lower(), chunk))
+                status.write(f"Saved {added:,} deals...")
+        except (KeyError, ValueError) as e:
+            st.error(f"❌ Could not save file after {added:,} deals: {e}")
+        else:
+            status.success(f"Saved {added:,} deals")
+    st.caption("Deals can also be saved from Compare Deals, or with `python -m calculator.store add deals.csv`.")
+
+if not len(deals):
+    st.info("Save deals above to start querying them.")
+    st.stop()
+
+col1, col2, col3 = st.columns([1, 1, 2])
+col1.metric("Deals Stored", f"{len(deals):,}")
+col2.metric("Good Deals", f"{deals.count(good=True):,}")
+with col3:
+    st.write(f"Rate table {rates.current().version}, maintenance ${engine.MAINTENANCE:,}/month")
+    if st.button("Re-score Changed Deals", help="Only deals whose location rates or maintenance changed are recalculated"):
+        progress = st.empty()
+        summary = deals.refresh(progress=lambda rows: progress.write(f"Re-scored {rows:,} deals..."))
+        progress.success(f"{summary['changed_locations']:,} locations changed, {summary['rescored']:,} deals re-scored")
+        if summary["skipped_locations"]:
+            st.warning(f"{summary['skipped_locations']:,} locations are in states the rate table no longer has; "
+                       "their deals keep their old scores")
+
+# Filters, applied in the database
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    property_types = st.multiselect("Property Type", list(comparison.PROPERTY_TYPES), format_func=str.title,
+                                    key="store_types")
+with col2:
+    states = st.multiselect("State", engine.states(), key="store_states")
+with col3:
+    min_cash_flow = st.number_input("Min Annual Cash Flow", value=None, step=1000.0, key="store_min_cash_flow")
+with col4:
+    min_cash_on_cash = st.number_input("Min Cash-on-Cash %", value=None, step=1.0, key="store_min_coc")
+with col5:
+    days = st.number_input("Added in Last Days", value=None, min_value=1, step=1, key="store_days")
+filters = {"property_types": property_types or None, "states": states or None, "min_cash_flow": min_cash_flow,
+           "min_cash_on_cash": min_cash_on_cash,
+           "added_since": pd.Timestamp.now().timestamp() - days * 86400 if days else None}
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    order_by = st.selectbox("Sort By", store.ORDER_COLUMNS[:-2], format_func=comparison.VIEW_COLUMNS.get,
+                            key="store_sort")
+with col2:
+    descending = st.toggle("Descending", value=True, key="store_descending")
+with col3:
+    limit = st.selectbox("Deals Shown", [100, 500, 1000], key="store_limit")
+
+matching = deals.count(**filters)
+st.metric("Matching Deals", f"{matching:,}")
+shown = deals.query(order_by=order_by, descending=descending, limit=limit, **filters)
+st.dataframe(styled(shown[SHOWN_COLUMNS]), column_config={"id": st.column_config.NumberColumn("ID")})
+
+with st.expander("🔮 What If", expanded=False):
+    st.write("Score the matching deals with different terms, without changing what is stored.")
+    col1, col2, col3 = st.columns(3)
+    interest_rate = col1.number_input("Interest Rate %", value=None, step=0.125, key="store_what_if_rate")
+    down_payment = col2.number_input("Down Payment %", value=None, step=5.0, key="store_what_if_down")
+    loan_years = col3.number_input("Loan Term (Years)", value=None, min_value=1, step=5, key="store_what_if_years")
+    changes = {name: value for name, value in (("interest_rate", interest_rate), ("down_payment", down_payment),
+                                               ("loan_years", loan_years)) if value is not None}
+    if st.button("Run What-If", disabled=not changes or not matching):
+        with st.spinner(f"Scoring {matching:,} deals..."):
+            scenario = deals.what_if(changes, **filters)
+        turned = scenario[(scenario["annual_cash_flow"] <= 0) & (scenario["what_if_annual_cash_flow"] > 0)]
+        lost = scenario[(scenario["annual_cash_flow"] > 0) & (scenario["what_if_annual_cash_flow"] <= 0)]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Turn Cash-Flow Positive", f"{len(turned):,}")
+        col2.metric("Turn Negative", f"{len(lost):,}")
+        col3.metric("Good Deals", f"{int(scenario['what_if_good'].sum()):,}",
+                    delta=int(scenario["what_if_good"].sum() - scenario["good"].sum()))
+        if len(turned):
+            st.subheader("Deals That Turn Cash-Flow Positive")
+            columns = ["name", "property_type", "state", "purchase_price", "annual_cash_flow",
+                       "what_if_annual_cash_flow", "cash_on_cash", "what_if_cash_on_cash"]
+            table = turned[columns].sort_values("what_if_cash_on_cash", ascending=False).head(1000)
+            st.dataframe(styled(table.rename(columns={"what_if_annual_cash_flow": "What-If Annual Cash Flow",
+                                                      "what_if_cash_on_cash": "What-If Cash-on-Cash %"}),
+                                extra_money=["What-If Annual Cash Flow"]),
+                         column_config={"id": st.column_config.NumberColumn("ID")})